@@ -0,0 +1,258 @@
+"""In-memory batch evaluation API with columnar, streamed results.
+
+``evaluator.run`` reads predictions from disk and writes reports. Pipelines
+that already hold Markdown in memory can call :func:`evaluate_many` (or the
+streaming :func:`iter_evaluate_many`) instead::
+
+    batch = evaluate_many(gt_map, pred_map, metrics=["nid", "teds"], workers=4)
+    batch.scores["nid"]          # float64 array, NaN where undefined
+    batch.masks["teds"]          # True where the metric applies
+    batch.timings["teds"]        # seconds spent per document
+
+Predictions may be a mapping or any iterable of ``(doc_id, markdown)`` pairs,
+including a generator; ``None`` marks a missing prediction and is scored like
+an absent file in ``evaluator.py``. Other predictions pass through the same
+preflight stage as files read by ``evaluator.py`` (``preflight=None`` skips
+it), and ``batch.preflight`` holds each document's statistics. Documents are
+scored in chunks by a pool of worker processes that each hold the ground
+truth, and at most a few chunks per worker are in flight, so memory stays
+bounded however long the input is. Results are yielded in input order.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from markdown_document import MarkdownDocument
+from metric_registry import compute_scores, required_metrics, resolve_metrics
+from prediction_preflight import DEFAULT_PREFLIGHT_LIMITS, PreflightLimits, preflight_text
+
+DEFAULT_BATCH_SIZE = 256
+# Chunks queued per worker before the producer waits for results.
+_IN_FLIGHT_PER_WORKER = 2
+
+Predictions = Union[Mapping[str, Optional[str]], Iterable[Tuple[str, Optional[str]]]]
+
+
+@dataclass
+class ScoreBatch:
+    """Columnar scores for a run of documents.
+
+    ``scores`` holds one float64 array per metric with NaN where the metric is
+    undefined (``None`` in ``evaluation.json``); ``masks`` marks the defined
+    entries. ``timings`` holds seconds per document for each scorer, and
+    ``preflight`` the preflight statistics of each prediction (``None`` for
+    missing predictions or when preflight is off).
+    """
+
+    document_ids: List[str]
+    scores: Dict[str, np.ndarray]
+    masks: Dict[str, np.ndarray]
+    prediction_available: np.ndarray
+    timings: Dict[str, np.ndarray]
+    preflight: List[Optional[Dict[str, Any]]]
+
+    def __len__(self) -> int:
+        return len(self.document_ids)
+
+    @classmethod
+    def concat(cls, batches: Sequence["ScoreBatch"], metrics: Sequence[str]) -> "ScoreBatch":
+        """Concatenate ``batches`` into one, preserving order."""
+
+        timing_names = _timing_names(metrics)
+
+        def join(arrays: List[np.ndarray], dtype) -> np.ndarray:
+            return np.concatenate(arrays) if arrays else np.empty(0, dtype=dtype)
+
+        return cls(
+            document_ids=[doc_id for batch in batches for doc_id in batch.document_ids],
+            scores={
+                name: join([batch.scores[name] for batch in batches], np.float64)
+                for name in metrics
+            },
+            masks={
+                name: join([batch.masks[name] for batch in batches], bool)
+                for name in metrics
+            },
+            prediction_available=join(
+                [batch.prediction_available for batch in batches], bool
+            ),
+            timings={
+                name: join([batch.timings[name] for batch in batches], np.float64)
+                for name in timing_names
+            },
+            preflight=[stats for batch in batches for stats in batch.preflight],
+        )
+
+
+def _timing_names(metrics: Sequence[str]) -> List[str]:
+    """Return the scorers needed to produce ``metrics``."""
+
+    return list(required_metrics(metrics))
+
+
+def _score_chunk(
+    items: List[Tuple[str, str, Optional[str]]],
+    metrics: Sequence[str],
+    preflight: Optional[PreflightLimits],
+) -> ScoreBatch:
+    """Score ``(doc_id, gt_markdown, pred_markdown)`` items into a batch."""
+
+    scorers = _timing_names(metrics)
+    size = len(items)
+    values = {name: np.full(size, np.nan) for name in metrics}
+    timings = {name: np.zeros(size) for name in scorers}
+    available = np.zeros(size, dtype=bool)
+    preflight_stats: List[Optional[Dict[str, Any]]] = [None] * size
+
+    for row, (_, gt_markdown, pred_markdown) in enumerate(items):
+        available[row] = pred_markdown is not None
+        if pred_markdown is not None and preflight is not None:
+            pred_markdown, stats = preflight_text(pred_markdown, preflight)
+            preflight_stats[row] = stats.to_json()
+        document_timings: Dict[str, float] = {}
+        scores = compute_scores(
+            MarkdownDocument(gt_markdown),
+            MarkdownDocument(pred_markdown or ""),
+            metrics,
+            document_timings,
+        )
+        for name, value in scores.items():
+            if value is not None:
+                values[name][row] = value
+        for name, elapsed in document_timings.items():
+            timings[name][row] = elapsed
+
+    return ScoreBatch(
+        document_ids=[doc_id for doc_id, _, _ in items],
+        scores={name: values[name] for name in metrics},
+        masks={name: ~np.isnan(values[name]) for name in metrics},
+        prediction_available=available,
+        timings=timings,
+        preflight=preflight_stats,
+    )
+
+
+# Ground truth shipped once to each worker process by ``_init_worker``.
+_WORKER_GT: Mapping[str, str] = {}
+
+
+def _init_worker(gt_map: Mapping[str, str]) -> None:
+    global _WORKER_GT
+    _WORKER_GT = gt_map
+
+
+def _score_worker_chunk(
+    items: List[Tuple[str, Optional[str]]],
+    metrics: Sequence[str],
+    preflight: Optional[PreflightLimits],
+) -> ScoreBatch:
+    return _score_chunk(
+        [(doc_id, _WORKER_GT[doc_id], pred) for doc_id, pred in items],
+        metrics,
+        preflight,
+    )
+
+
+def _chunks(
+    gt_map: Mapping[str, str], predictions: Predictions, batch_size: int
+) -> Iterator[List[Tuple[str, Optional[str]]]]:
+    pairs = predictions.items() if isinstance(predictions, Mapping) else predictions
+    iterator = iter(pairs)
+    while True:
+        chunk = list(itertools.islice(iterator, batch_size))
+        if not chunk:
+            return
+        for doc_id, pred in chunk:
+            if doc_id not in gt_map:
+                raise KeyError(f"No ground truth for document {doc_id!r}")
+            if pred is not None and not isinstance(pred, str):
+                raise TypeError(
+                    f"Prediction for document {doc_id!r} must be a string or None, "
+                    f"not {type(pred).__name__}"
+                )
+        yield chunk
+
+
+def iter_evaluate_many(
+    gt_map: Mapping[str, str],
+    predictions: Predictions,
+    metrics: Optional[Iterable[str]] = None,
+    workers: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    preflight: Optional[PreflightLimits] = DEFAULT_PREFLIGHT_LIMITS,
+) -> Iterator[ScoreBatch]:
+    """Score predictions against ``gt_map`` and yield one batch per chunk.
+
+    ``workers`` defaults to the CPU count; ``0`` or ``1`` scores in the
+    calling process. Predictions are cleaned with the ``preflight`` limits
+    unless they are ``None``.
+    """
+
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    selected = resolve_metrics(metrics)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    chunks = _chunks(gt_map, predictions, batch_size)
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield _score_chunk(
+                [(doc_id, gt_map[doc_id], pred) for doc_id, pred in chunk],
+                selected,
+                preflight,
+            )
+        return
+
+    max_in_flight = workers * _IN_FLIGHT_PER_WORKER
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(dict(gt_map),)
+    ) as executor:
+        pending: Deque[Future] = deque()
+        for chunk in chunks:
+            pending.append(
+                executor.submit(_score_worker_chunk, chunk, selected, preflight)
+            )
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def evaluate_many(
+    gt_map: Mapping[str, str],
+    predictions: Predictions,
+    metrics: Optional[Iterable[str]] = None,
+    workers: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    preflight: Optional[PreflightLimits] = DEFAULT_PREFLIGHT_LIMITS,
+) -> ScoreBatch:
+    """Score all predictions and return a single :class:`ScoreBatch`."""
+
+    selected = resolve_metrics(metrics)
+    batches = list(
+        iter_evaluate_many(
+            gt_map, predictions, selected, workers, batch_size, preflight
+        )
+    )
+    return ScoreBatch.concat(batches, selected)
@@ -0,0 +1,191 @@
+"""Resource-constrained benchmark profiles.
+
+A profile such as ``2c-4g`` describes a small container: the engine process
+is pinned to two CPUs, limited to 4 GB of address space via ``setrlimit`` and
+runs with a matching thread budget. Profiled runs execute in a fresh child
+process so the limits never leak into the caller, and their outputs live
+under ``<root>/profiles/<profile>/`` so each profile keeps its own
+prediction, history and chart layout.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+from engine_runtime import EngineRunConfig, engine_run_context
+from sampling import Sample
+from sharding import Shard
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+PROFILES_DIRNAME = "profiles"
+PROFILE_PATTERN = re.compile(r"^(\d+)c-(\d+(?:\.\d+)?)g$")
+
+
+@dataclass(frozen=True)
+class BenchmarkProfile:
+    """CPU and memory budget for a constrained engine run."""
+
+    name: str
+    cpu_count: int
+    memory_gb: float
+
+    @property
+    def memory_bytes(self) -> int:
+        return int(self.memory_gb * 1024**3)
+
+    def run_config(self) -> EngineRunConfig:
+        """Return the thread budget and CPU set matching this profile."""
+
+        if not hasattr(os, "sched_getaffinity"):
+            return EngineRunConfig(threads=self.cpu_count)
+        available = sorted(os.sched_getaffinity(0))
+        if len(available) < self.cpu_count:
+            logging.warning(
+                "Profile %s requests %d CPUs but only %d are available",
+                self.name,
+                self.cpu_count,
+                len(available),
+            )
+        return EngineRunConfig(
+            threads=self.cpu_count, cpus=tuple(available[: self.cpu_count])
+        )
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "cpu_count": self.cpu_count,
+            "memory_gb": self.memory_gb,
+        }
+
+
+PROFILES: Dict[str, BenchmarkProfile] = {
+    "2c-4g": BenchmarkProfile("2c-4g", cpu_count=2, memory_gb=4),
+    "4c-8g": BenchmarkProfile("4c-8g", cpu_count=4, memory_gb=8),
+    "8c-16g": BenchmarkProfile("8c-16g", cpu_count=8, memory_gb=16),
+}
+
+
+def resolve_profile(name: str) -> BenchmarkProfile:
+    """Look up ``name`` in :data:`PROFILES` or parse an ad-hoc ``<N>c-<M>g`` name."""
+
+    if name in PROFILES:
+        return PROFILES[name]
+    match = PROFILE_PATTERN.match(name)
+    if not match:
+        raise ValueError(
+            f"Unknown profile '{name}'. Use one of {', '.join(PROFILES)} or <N>c-<M>g."
+        )
+    cpu_count = int(match.group(1))
+    if cpu_count < 1:
+        raise ValueError(f"Profile '{name}' must allow at least one CPU")
+    return BenchmarkProfile(name, cpu_count=cpu_count, memory_gb=float(match.group(2)))
+
+
+def profile_root(root: Path, profile_name: str) -> Path:
+    """Return the per-profile counterpart of a prediction or history root."""
+
+    return root / PROFILES_DIRNAME / profile_name
+
+
+def _apply_memory_limit(limit_bytes: int) -> None:
+    if resource is None:
+        logging.warning("Memory limits are not supported on this platform")
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit_bytes = min(limit_bytes, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit_bytes, hard))
+
+
+def reject_unprofiled_options(options: Mapping[str, Any]) -> None:
+    """Raise ``ValueError`` naming the options that a profiled run would ignore.
+
+    ``options`` maps flag names to their values; unset flags are ``None``.
+    The profile sets the thread budget and CPU set itself, and tracing or
+    profiling in the caller cannot see the child process.
+    """
+
+    given = [name for name, value in options.items() if value is not None]
+    if given:
+        raise ValueError(f"{', '.join(given)} cannot be combined with --profile.")
+
+
+def _profiled_parse_worker(
+    profile: BenchmarkProfile,
+    engine_name: str,
+    input_dir_name: str,
+    doc_id: Optional[str],
+    prediction_root: Path,
+    shard: Optional[Shard],
+    sample: Optional[Sample],
+    metrics_textfile: Optional[Path],
+) -> None:
+    _apply_memory_limit(profile.memory_bytes)
+    run_config = profile.run_config()
+    with engine_run_context(run_config):
+        # Import lazily so the engine libraries initialise under the limits.
+        from pdf_parser import process_markdown
+
+        process_markdown(
+            engine_name,
+            input_dir_name,
+            doc_id=doc_id,
+            run_config=run_config,
+            prediction_root=prediction_root,
+            profile=profile,
+            shard=shard,
+            # A shared warm server would run outside this profile's limits.
+            use_engine_server=False,
+            sample=sample,
+            metrics_textfile=metrics_textfile,
+        )
+
+
+def run_profiled_parse(
+    profile: BenchmarkProfile,
+    engine_name: str,
+    input_dir_name: str,
+    prediction_root: Path,
+    doc_id: Optional[str] = None,
+    shard: Optional[Shard] = None,
+    sample: Optional[Sample] = None,
+    metrics_textfile: Optional[Path] = None,
+) -> None:
+    """Convert PDFs with ``engine_name`` in a child process constrained by ``profile``.
+
+    ``shard``, ``sample`` and ``metrics_textfile`` are passed on to
+    ``pdf_parser.process_markdown`` in the child.
+    """
+
+    context = multiprocessing.get_context("spawn")
+    process = context.Process(
+        target=_profiled_parse_worker,
+        args=(
+            profile,
+            engine_name,
+            input_dir_name,
+            doc_id,
+            prediction_root,
+            shard,
+            sample,
+            metrics_textfile,
+        ),
+        name=f"{engine_name}@{profile.name}",
+    )
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(
+            f"{engine_name} failed under profile {profile.name} "
+            f"(exit code {process.exitcode})"
+        )
@@ -0,0 +1,397 @@
+"""Corpus manifest: one row of metadata per benchmark document.
+
+``ground-truth/manifest.json`` records, for every document id:
+
+* the PDF's size, SHA-256, page count and first-page size, and
+* the ground truth's SHA-256, text length, whether it has tables and headings
+  (exactly the documents TEDS and MHS are computed on) and its table cells.
+
+Page counts come from poppler's ``pdfinfo`` (through ``pdf2image``) and fall
+back to ``reference.json``; ``pages_source`` says which was used.
+
+When the manifest is present and up to date, ``pdf_parser``, the evaluator,
+``generate_pdfs_thumbnail`` and ``sampling`` take their document lists, page
+counts and strata from it instead of globbing the corpus and parsing
+``reference.json``. A directory whose modification time no longer matches the
+manifest (a file was added or removed) is globbed as before. Refreshing is
+incremental: only files whose size or modification time changed are hashed
+and analysed again::
+
+    uv run src/corpus_manifest.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from evaluator_heading_level import heading_structure
+from evaluator_table import extract_tables, table_html
+from markdown_document import MarkdownDocument
+from sampling import REFERENCE_FILENAME, load_page_counts, stratum_key
+
+try:
+    from pdf2image import pdfinfo_from_path
+except ImportError:  # pragma: no cover - optional at manifest build time
+    pdfinfo_from_path = None
+
+MANIFEST_FILENAME = "manifest.json"
+DEFAULT_MANIFEST_PATH = "ground-truth/manifest.json"
+DEFAULT_PDF_DIR = "pdfs"
+DEFAULT_GT_DIR = "ground-truth/markdown"
+MANIFEST_VERSION = 1
+_HASH_CHUNK = 1024 * 1024
+_PAGE_SIZE_PATTERN = re.compile(r"([\d.]+) x ([\d.]+) pts")
+
+
+@dataclass
+class ManifestEntry:
+    """Metadata of one document; fields are ``None`` when its file is missing."""
+
+    pdf_size: Optional[int] = None
+    pdf_mtime_ns: Optional[int] = None
+    pdf_sha256: Optional[str] = None
+    pages: Optional[int] = None
+    pages_source: Optional[str] = None
+    # ``[width, height]`` of the first page in points, from ``pdfinfo``.
+    page_size: Optional[List[float]] = None
+    gt_size: Optional[int] = None
+    gt_mtime_ns: Optional[int] = None
+    gt_sha256: Optional[str] = None
+    gt_chars: Optional[int] = None
+    has_table: Optional[bool] = None
+    has_heading: Optional[bool] = None
+    table_cells: Optional[int] = None
+
+    @property
+    def stratum(self) -> Optional[str]:
+        """The ``sampling`` stratum, when the ground truth and page count are known."""
+
+        if self.has_table is None or self.has_heading is None:
+            return None
+        return stratum_key(self.has_table, self.has_heading, self.pages or 1)
+
+
+@dataclass
+class CorpusManifest:
+    """Every document's :class:`ManifestEntry` plus the directories they came from.
+
+    ``pdf_dir`` and ``ground_truth_dir`` are relative to the manifest file;
+    the ``*_mtime_ns`` fields are the directories' modification times when
+    the manifest was built.
+    """
+
+    pdf_dir: str
+    ground_truth_dir: str
+    pdf_dir_mtime_ns: Optional[int] = None
+    ground_truth_dir_mtime_ns: Optional[int] = None
+    documents: Dict[str, ManifestEntry] = field(default_factory=dict)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "version": MANIFEST_VERSION,
+            "pdf_dir": self.pdf_dir,
+            "ground_truth_dir": self.ground_truth_dir,
+            "pdf_dir_mtime_ns": self.pdf_dir_mtime_ns,
+            "ground_truth_dir_mtime_ns": self.ground_truth_dir_mtime_ns,
+            "documents": {
+                doc_id: asdict(entry) for doc_id, entry in sorted(self.documents.items())
+            },
+        }
+
+    @classmethod
+    def from_json(cls, payload: Dict[str, Any]) -> "CorpusManifest":
+        if payload.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported manifest version {payload.get('version')!r}")
+        return cls(
+            pdf_dir=payload["pdf_dir"],
+            ground_truth_dir=payload["ground_truth_dir"],
+            pdf_dir_mtime_ns=payload.get("pdf_dir_mtime_ns"),
+            ground_truth_dir_mtime_ns=payload.get("ground_truth_dir_mtime_ns"),
+            documents={
+                doc_id: ManifestEntry(**entry)
+                for doc_id, entry in payload.get("documents", {}).items()
+            },
+        )
+
+    def page_counts(self) -> Dict[str, int]:
+        return {
+            doc_id: entry.pages
+            for doc_id, entry in self.documents.items()
+            if entry.pages is not None
+        }
+
+    def strata(self) -> Dict[str, str]:
+        return {
+            doc_id: entry.stratum
+            for doc_id, entry in self.documents.items()
+            if entry.stratum is not None
+        }
+
+
+def load_manifest(path: Path) -> Optional[CorpusManifest]:
+    """Read the manifest at ``path``; ``None`` when it is missing or unreadable."""
+
+    if not path.is_file():
+        return None
+    try:
+        return CorpusManifest.from_json(json.loads(path.read_text(encoding="utf-8")))
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError) as exc:
+        logging.warning("Ignoring corpus manifest %s: %s", path, exc)
+        return None
+
+
+def write_manifest(manifest: CorpusManifest, path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temporary.write_text(json.dumps(manifest.to_json(), indent=2), encoding="utf-8")
+    os.replace(temporary, path)
+    return path
+
+
+def sha256_file(path: Path) -> str:
+    """Return the hex SHA-256 of the file at ``path``, read in chunks."""
+
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(_HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def pdf_page_info(path: Path) -> Tuple[Optional[int], Optional[List[float]]]:
+    """Return the page count and first-page ``[width, height]`` in points.
+
+    Either is ``None`` when ``pdfinfo`` is unavailable or cannot report it.
+    """
+
+    if pdfinfo_from_path is None:
+        return None, None
+    try:
+        info = pdfinfo_from_path(str(path))
+    except Exception as exc:  # noqa: BLE001 - poppler missing or unreadable PDF
+        logging.debug("pdfinfo failed for %s: %s", path, exc)
+        return None, None
+    try:
+        pages: Optional[int] = int(info["Pages"])
+    except (KeyError, ValueError):
+        pages = None
+    match = _PAGE_SIZE_PATTERN.search(info.get("Page size", ""))
+    page_size = [float(match.group(1)), float(match.group(2))] if match else None
+    return pages, page_size
+
+
+def _ground_truth_features(path: Path) -> Dict[str, Any]:
+    document = MarkdownDocument(path.read_text(encoding="utf-8"))
+    tables = extract_tables(document.with_html) if table_html(document) else []
+    cells = sum(
+        len(BeautifulSoup(table, "html.parser").find_all(["td", "th"]))
+        for table in tables
+    )
+    return {
+        "gt_chars": len(document.text),
+        "has_table": bool(tables),
+        "has_heading": heading_structure(document)[1],
+        "table_cells": cells,
+    }
+
+
+def _relative(path: Path, start: Path) -> str:
+    return Path(os.path.relpath(path.resolve(), start.resolve())).as_posix()
+
+
+def build_manifest(
+    pdf_dir: Path,
+    gt_dir: Path,
+    manifest_path: Path,
+    previous: Optional[CorpusManifest] = None,
+    reference_path: Optional[Path] = None,
+) -> Tuple[CorpusManifest, int]:
+    """Scan ``pdf_dir`` and ``gt_dir`` into a manifest stored at ``manifest_path``.
+
+    Entries of ``previous`` are reused for files whose size and modification
+    time are unchanged. Returns the manifest and the number of files
+    (re)analysed.
+    """
+
+    if reference_path is None:
+        reference_path = gt_dir.parent / REFERENCE_FILENAME
+    reference_pages = (
+        load_page_counts(reference_path, use_manifest=False)
+        if reference_path.is_file()
+        else {}
+    )
+    old = previous.documents if previous is not None else {}
+    pdfs = {path.stem: path for path in pdf_dir.glob("*.pdf")} if pdf_dir.is_dir() else {}
+    gts = {path.stem: path for path in gt_dir.glob("*.md")} if gt_dir.is_dir() else {}
+
+    analysed = 0
+    documents: Dict[str, ManifestEntry] = {}
+    for doc_id in sorted(set(pdfs) | set(gts)):
+        entry = ManifestEntry()
+        cached = old.get(doc_id, ManifestEntry())
+        pdf_path = pdfs.get(doc_id)
+        if pdf_path is not None:
+            stat = pdf_path.stat()
+            if (cached.pdf_size, cached.pdf_mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                entry.pdf_sha256 = cached.pdf_sha256
+                entry.page_size = cached.page_size
+                if cached.pages_source == "pdfinfo":
+                    entry.pages, entry.pages_source = cached.pages, cached.pages_source
+            else:
+                analysed += 1
+                entry.pdf_sha256 = sha256_file(pdf_path)
+                entry.pages, entry.page_size = pdf_page_info(pdf_path)
+                entry.pages_source = "pdfinfo" if entry.pages is not None else None
+            entry.pdf_size, entry.pdf_mtime_ns = stat.st_size, stat.st_mtime_ns
+        if entry.pages is None and doc_id in reference_pages:
+            entry.pages, entry.pages_source = reference_pages[doc_id], "reference"
+
+        gt_path = gts.get(doc_id)
+        if gt_path is not None:
+            stat = gt_path.stat()
+            if (cached.gt_size, cached.gt_mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                entry.gt_sha256 = cached.gt_sha256
+                entry.gt_chars = cached.gt_chars
+                entry.has_table = cached.has_table
+                entry.has_heading = cached.has_heading
+                entry.table_cells = cached.table_cells
+            else:
+                analysed += 1
+                entry.gt_sha256 = sha256_file(gt_path)
+                for name, value in _ground_truth_features(gt_path).items():
+                    setattr(entry, name, value)
+            entry.gt_size, entry.gt_mtime_ns = stat.st_size, stat.st_mtime_ns
+        documents[doc_id] = entry
+
+    manifest = CorpusManifest(
+        pdf_dir=_relative(pdf_dir, manifest_path.parent),
+        ground_truth_dir=_relative(gt_dir, manifest_path.parent),
+        pdf_dir_mtime_ns=pdf_dir.stat().st_mtime_ns if pdf_dir.is_dir() else None,
+        ground_truth_dir_mtime_ns=gt_dir.stat().st_mtime_ns if gt_dir.is_dir() else None,
+        documents=documents,
+    )
+    return manifest, analysed
+
+
+def _listed_paths(
+    directory: Path, manifest_path: Path, kind: str
+) -> Optional[List[Path]]:
+    manifest = load_manifest(manifest_path)
+    if manifest is None or not directory.is_dir():
+        return None
+    listed = manifest.pdf_dir if kind == "pdf" else manifest.ground_truth_dir
+    recorded = (
+        manifest.pdf_dir_mtime_ns if kind == "pdf" else manifest.ground_truth_dir_mtime_ns
+    )
+    if (manifest_path.parent / listed).resolve() != directory.resolve():
+        return None
+    if recorded != directory.stat().st_mtime_ns:
+        logging.debug("Corpus manifest %s is stale for %s", manifest_path, directory)
+        return None
+    if kind == "pdf":
+        return [
+            directory / f"{doc_id}.pdf"
+            for doc_id, entry in sorted(manifest.documents.items())
+            if entry.pdf_sha256 is not None
+        ]
+    return [
+        directory / f"{doc_id}.md"
+        for doc_id, entry in sorted(manifest.documents.items())
+        if entry.gt_sha256 is not None
+    ]
+
+
+def pdf_paths(pdf_dir: Path, manifest_path: Optional[Path] = None) -> List[Path]:
+    """Return the PDFs in ``pdf_dir`` in document-id order.
+
+    The list comes from the manifest when it describes ``pdf_dir`` and is up
+    to date, and from globbing the directory otherwise.
+    """
+
+    if manifest_path is not None:
+        listed = _listed_paths(pdf_dir, manifest_path, "pdf")
+        if listed is not None:
+            return listed
+    return sorted(pdf_dir.glob("*.pdf"))
+
+
+def ground_truth_paths(gt_dir: Path) -> List[Path]:
+    """Return the ground-truth Markdown files in ``gt_dir`` in document-id order.
+
+    Uses the manifest next to the ground-truth directory like :func:`pdf_paths`.
+    """
+
+    listed = _listed_paths(gt_dir, gt_dir.parent / MANIFEST_FILENAME, "ground_truth")
+    return listed if listed is not None else sorted(gt_dir.glob("*.md"))
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Build or refresh the corpus manifest (ground-truth/manifest.json)"
+    )
+    parser.add_argument(
+        "--pdf-dir", default=DEFAULT_PDF_DIR, help="Directory containing the PDFs"
+    )
+    parser.add_argument(
+        "--ground-truth-dir",
+        default=DEFAULT_GT_DIR,
+        help="Directory containing ground-truth markdown files",
+    )
+    parser.add_argument(
+        "--output",
+        default=DEFAULT_MANIFEST_PATH,
+        help="Manifest file to write (refreshed incrementally if it exists)",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Re-analyse every file instead of refreshing incrementally",
+    )
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=list(logging.getLevelNamesMapping().keys()),
+        default="INFO",
+        help="Python logging level (e.g. INFO, DEBUG)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
+    project_root = Path(__file__).parent.parent.resolve()
+    manifest_path = project_root / args.output
+    previous = None if args.full else load_manifest(manifest_path)
+    manifest, analysed = build_manifest(
+        project_root / args.pdf_dir,
+        project_root / args.ground_truth_dir,
+        manifest_path,
+        previous,
+    )
+    write_manifest(manifest, manifest_path)
+    sources: Dict[str, int] = {}
+    for entry in manifest.documents.values():
+        sources[entry.pages_source or "unknown"] = (
+            sources.get(entry.pages_source or "unknown", 0) + 1
+        )
+    print(
+        f"Wrote {manifest_path} with {len(manifest.documents)} documents "
+        f"({analysed} files analysed; page counts from "
+        + ", ".join(f"{name}: {count}" for name, count in sorted(sources.items()))
+        + ")"
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry point
+    main()
@@ -0,0 +1,546 @@
+"""Markdown corpora packed into a single archive.
+
+A production corpus means hundreds of thousands of small ``.md`` files,
+which are slow to copy, sync and glob. Wherever the evaluator reads a
+directory of Markdown files (``--ground-truth-dir`` and
+``prediction/<engine>/markdown``) it also accepts a pack:
+
+* ``.zip``,
+* ``.tar``, ``.tar.gz`` or ``.tar.zst`` (zstd needs Python 3.14 or the
+  ``zstandard`` package), or
+* ``.sqlite``, a ``documents (name TEXT PRIMARY KEY, content BLOB)`` table.
+
+A prediction pack takes the directory's place: ``prediction/docling/
+markdown.zip`` instead of ``prediction/docling/markdown/``. Members are read
+in place without extracting anything. Zip, plain tar and SQLite members are
+read on demand. Compressed tar streams have no index, so the first process
+to open one decompresses it, in one sequential pass, into a plain tar in the
+system temporary directory; every process then reads members from that copy
+on demand, so memory does not grow with the corpus. The process that wrote
+the copy deletes it in :func:`close_packs`, which also runs at exit.
+
+Packs are written with ``--pack FORMAT`` on ``pdf_parser.py`` and
+``run.py``, or from an existing directory::
+
+    uv run src/document_pack.py ground-truth/markdown ground-truth/markdown.zip
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import fnmatch
+import gzip
+import hashlib
+import io
+import logging
+import os
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+import threading
+import zipfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import IO, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+PACK_FORMATS = {
+    "zip": ".zip",
+    "tar": ".tar",
+    "tar.gz": ".tar.gz",
+    "tar.zst": ".tar.zst",
+    "sqlite": ".sqlite",
+}
+# Checked in order, so ``.tar.gz`` wins over a bare ``.gz`` lookalike.
+PACK_SUFFIXES = (".zip", ".tar.gz", ".tgz", ".tar.zst", ".tar", ".sqlite")
+MARKDOWN_DIRNAME = "markdown"
+
+_SQLITE_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS documents (name TEXT PRIMARY KEY, content BLOB NOT NULL)"
+)
+
+
+def pack_suffix(path: Path) -> Optional[str]:
+    """Return the pack suffix of ``path`` (``.tar.zst``, ``.zip``, ...), if any."""
+
+    name = path.name.lower()
+    for suffix in PACK_SUFFIXES:
+        if name.endswith(suffix):
+            return suffix
+    return None
+
+
+def _native_zstd() -> bool:
+    return "zst" in tarfile.TarFile.OPEN_METH
+
+
+def _zstd_missing() -> ValueError:
+    return ValueError(".tar.zst packs need Python 3.14 or the zstandard package")
+
+
+class _MemberStat(NamedTuple):
+    st_size: int
+
+
+class _Reader(ABC):
+    """Read access to the members of one pack, keyed by member name."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.sizes: Dict[str, int] = {}
+        self._by_name: Optional[Dict[str, str]] = None
+
+    def by_name(self) -> Dict[str, str]:
+        """Map file names to member names (members may sit in subdirectories)."""
+
+        if self._by_name is None:
+            self._by_name = {
+                PurePosixPath(member).name: member for member in sorted(self.sizes)
+            }
+        return self._by_name
+
+    @abstractmethod
+    def open(self, member: str) -> IO[bytes]:
+        """Return a binary handle on ``member``."""
+
+    def close(self) -> None:
+        pass
+
+
+class _ZipReader(_Reader):
+    def __init__(self, path: Path) -> None:
+        super().__init__(path)
+        self.archive = zipfile.ZipFile(path)
+        self.sizes = {
+            info.filename: info.file_size
+            for info in self.archive.infolist()
+            if not info.is_dir()
+        }
+
+    def open(self, member: str) -> IO[bytes]:
+        # ZipFile serialises access to the shared file itself.
+        return self.archive.open(member)
+
+    def close(self) -> None:
+        self.archive.close()
+
+
+class _TarReader(_Reader):
+    def __init__(self, path: Path) -> None:
+        super().__init__(path)
+        # The decompressed copy, when this process wrote it and must remove it.
+        self.spooled: Optional[Path] = None
+        tar_path = path if pack_suffix(path) == ".tar" else self._spool()
+        self.archive = tarfile.open(tar_path, "r:")
+        self.members: Dict[str, tarfile.TarInfo] = {}
+        for info in self.archive:
+            if info.isfile():
+                self.members[info.name] = info
+                self.sizes[info.name] = info.size
+
+    def _spool(self) -> Path:
+        """Return a plain-tar copy of the compressed pack, decompressing it once.
+
+        The copy is keyed by the pack's path, size and modification time, so
+        worker processes share it and a rewritten pack gets a fresh one. Open
+        readers keep their copy readable after the writer removes it.
+        """
+
+        stat = self.path.stat()
+        prefix = "odl-bench-" + hashlib.sha256(
+            str(self.path.resolve()).encode("utf-8")
+        ).hexdigest()[:16]
+        spooled = Path(tempfile.gettempdir()) / (
+            f"{prefix}-{stat.st_size}-{stat.st_mtime_ns}.tar"
+        )
+        if spooled.is_file():
+            return spooled
+        for stale in spooled.parent.glob(f"{prefix}-*.tar"):
+            stale.unlink(missing_ok=True)
+        temporary = spooled.with_name(f".{spooled.name}.{os.getpid()}.tmp")
+        logging.info("Decompressing %s to %s", self.path, spooled)
+        with self.path.open("rb") as raw, temporary.open("wb") as output:
+            shutil.copyfileobj(self._decompressed(raw), output, 1024 * 1024)
+        os.replace(temporary, spooled)
+        self.spooled = spooled
+        return spooled
+
+    def _decompressed(self, raw: IO[bytes]) -> IO[bytes]:
+        if pack_suffix(self.path) != ".tar.zst":
+            return gzip.GzipFile(fileobj=raw)
+        if _native_zstd():
+            from compression import zstd
+
+            return zstd.ZstdFile(raw)
+        if zstandard is None:
+            raise _zstd_missing()
+        return zstandard.ZstdDecompressor().stream_reader(raw)
+
+    def open(self, member: str) -> IO[bytes]:
+        with self.lock:
+            return io.BytesIO(self.archive.extractfile(self.members[member]).read())
+
+    def close(self) -> None:
+        self.archive.close()
+        if self.spooled is not None:
+            self.spooled.unlink(missing_ok=True)
+
+
+class _SQLiteReader(_Reader):
+    def __init__(self, path: Path) -> None:
+        super().__init__(path)
+        self.connection = sqlite3.connect(
+            f"{path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False
+        )
+        self.sizes = dict(
+            self.connection.execute("SELECT name, length(content) FROM documents")
+        )
+
+    def open(self, member: str) -> IO[bytes]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT content FROM documents WHERE name = ?", (member,)
+            ).fetchone()
+        return io.BytesIO(row[0])
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+# Readers are per process (streaming evaluation workers open their own) and
+# are reopened when the pack file is rewritten.
+_READERS: Dict[Tuple[int, Path], Tuple[int, _Reader]] = {}
+_READERS_LOCK = threading.Lock()
+
+
+def _reader(path: Path) -> _Reader:
+    key = (os.getpid(), path)
+    modified = path.stat().st_mtime_ns
+    with _READERS_LOCK:
+        cached = _READERS.get(key)
+        if cached is not None and cached[0] == modified:
+            return cached[1]
+        if cached is not None:
+            cached[1].close()
+        suffix = pack_suffix(path)
+        if suffix == ".zip":
+            reader: _Reader = _ZipReader(path)
+        elif suffix == ".sqlite":
+            reader = _SQLiteReader(path)
+        else:
+            reader = _TarReader(path)
+        _READERS[key] = (modified, reader)
+        return reader
+
+
+def close_packs() -> None:
+    """Close every pack opened by this process and remove the copies it spooled."""
+
+    with _READERS_LOCK:
+        for (pid, _), (_, reader) in list(_READERS.items()):
+            if pid == os.getpid():
+                reader.close()
+        _READERS.clear()
+
+
+atexit.register(close_packs)
+
+
+@dataclass(frozen=True, order=True)
+class PackMember:
+    """One file inside a pack, with the read-only ``pathlib.Path`` calls the
+    evaluator makes (``stem``, ``is_file``, ``stat``, ``open``, ``read_text``).
+    """
+
+    pack: Path
+    member: str
+
+    @property
+    def name(self) -> str:
+        return PurePosixPath(self.member).name
+
+    @property
+    def stem(self) -> str:
+        return PurePosixPath(self.member).stem
+
+    @property
+    def suffix(self) -> str:
+        return PurePosixPath(self.member).suffix
+
+    @property
+    def parent(self) -> Path:
+        """The directory the pack stands in for, e.g. ``prediction/docling/markdown``."""
+
+        return self.pack.with_name(self.pack.name[: -len(pack_suffix(self.pack))])
+
+    def is_file(self) -> bool:
+        return self.member in _reader(self.pack).sizes
+
+    exists = is_file
+
+    def stat(self) -> _MemberStat:
+        try:
+            return _MemberStat(_reader(self.pack).sizes[self.member])
+        except KeyError:
+            raise FileNotFoundError(str(self)) from None
+
+    def open(
+        self, mode: str = "r", encoding: Optional[str] = None
+    ) -> Union[IO[str], IO[bytes]]:
+        if mode not in ("r", "rb"):
+            raise ValueError(f"Pack members are read-only, got mode {mode!r}")
+        if not self.is_file():
+            raise FileNotFoundError(str(self))
+        handle = _reader(self.pack).open(self.member)
+        if mode == "rb":
+            return handle
+        return io.TextIOWrapper(handle, encoding=encoding)
+
+    def read_bytes(self) -> bytes:
+        with self.open("rb") as handle:
+            return handle.read()
+
+    def read_text(self, encoding: Optional[str] = None) -> str:
+        with self.open(encoding=encoding) as handle:
+            return handle.read()
+
+    def __str__(self) -> str:
+        return f"{self.pack}:{self.member}"
+
+
+@dataclass(frozen=True)
+class MarkdownPack:
+    """A pack used in place of a Markdown directory.
+
+    ``pack / "doc.md"`` and ``pack.glob("*.md")`` behave like their ``Path``
+    counterparts. Members may sit in a subdirectory of the archive; they are
+    looked up by file name.
+    """
+
+    path: Path
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    @property
+    def parent(self) -> Path:
+        return self.path.parent
+
+    def glob(self, pattern: str) -> Iterator[PackMember]:
+        for name, member in _reader(self.path).by_name().items():
+            if fnmatch.fnmatch(name, pattern):
+                yield PackMember(self.path, member)
+
+    def __truediv__(self, name: str) -> PackMember:
+        return PackMember(self.path, _reader(self.path).by_name().get(name, name))
+
+    def __str__(self) -> str:
+        return str(self.path)
+
+
+MarkdownSource = Union[Path, MarkdownPack]
+
+
+def open_markdown(path: Union[Path, MarkdownPack]) -> MarkdownSource:
+    """Return ``path`` as a Markdown source: a directory or a :class:`MarkdownPack`."""
+
+    if isinstance(path, MarkdownPack) or path.is_dir():
+        return path
+    if path.is_file() and pack_suffix(path) is not None:
+        return MarkdownPack(path)
+    raise FileNotFoundError(f"Markdown directory or pack not found: {path}")
+
+
+def find_markdown(
+    engine_dir: Path, name: str = MARKDOWN_DIRNAME
+) -> Optional[MarkdownSource]:
+    """Return ``engine_dir/markdown`` or, failing that, a ``markdown.<pack>`` file."""
+
+    directory = engine_dir / name
+    if directory.is_dir():
+        return directory
+    for suffix in PACK_SUFFIXES:
+        candidate = engine_dir / f"{name}{suffix}"
+        if candidate.is_file():
+            return MarkdownPack(candidate)
+    return None
+
+
+class PackWriter:
+    """Writes members into a new pack, replacing ``path`` atomically on close."""
+
+    def __init__(self, path: Path) -> None:
+        suffix = pack_suffix(path)
+        if suffix is None:
+            raise ValueError(
+                f"Unknown pack format for {path}; use one of {', '.join(PACK_SUFFIXES)}"
+            )
+        self.path = path
+        self.count = 0
+        self._temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        self._temporary.parent.mkdir(parents=True, exist_ok=True)
+        self._raw: Optional[IO[bytes]] = None
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._tar: Optional[tarfile.TarFile] = None
+        self._sqlite: Optional[sqlite3.Connection] = None
+        if suffix == ".zip":
+            self._zip = zipfile.ZipFile(self._temporary, "w", zipfile.ZIP_DEFLATED)
+        elif suffix == ".sqlite":
+            self._temporary.unlink(missing_ok=True)
+            self._sqlite = sqlite3.connect(self._temporary)
+            self._sqlite.execute(_SQLITE_SCHEMA)
+        elif suffix == ".tar.zst" and not _native_zstd():
+            if zstandard is None:
+                raise _zstd_missing()
+            self._raw = zstandard.ZstdCompressor().stream_writer(
+                self._temporary.open("wb")
+            )
+            self._tar = tarfile.open(fileobj=self._raw, mode="w|")
+        else:
+            mode = {".tar": "w", ".tar.gz": "w:gz", ".tgz": "w:gz", ".tar.zst": "w:zst"}
+            self._tar = tarfile.open(self._temporary, mode[suffix])
+
+    def add(self, member: str, content: bytes) -> None:
+        if self._zip is not None:
+            self._zip.writestr(member, content)
+        elif self._sqlite is not None:
+            self._sqlite.execute(
+                "INSERT OR REPLACE INTO documents (name, content) VALUES (?, ?)",
+                (member, content),
+            )
+        else:
+            info = tarfile.TarInfo(member)
+            info.size = len(content)
+            self._tar.addfile(info, io.BytesIO(content))
+        self.count += 1
+
+    def close(self) -> Path:
+        if self._zip is not None:
+            self._zip.close()
+        elif self._sqlite is not None:
+            self._sqlite.commit()
+            self._sqlite.close()
+        else:
+            self._tar.close()
+            if self._raw is not None:
+                self._raw.close()
+        os.replace(self._temporary, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        for handle in (self._zip, self._tar, self._raw, self._sqlite):
+            if handle is not None:
+                handle.close()
+        self._temporary.unlink(missing_ok=True)
+
+    def __enter__(self) -> "PackWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def pack_directory(
+    directory: Path,
+    path: Path,
+    pattern: str = "*.md",
+    remove: bool = False,
+    keep: Optional[MarkdownPack] = None,
+) -> int:
+    """Write the files in ``directory`` matching ``pattern`` into the pack ``path``.
+
+    Members of ``keep`` (usually the pack being replaced) that have no file
+    in ``directory`` are carried over. Members are added in file-name order,
+    which is the order the evaluator reads them in. With ``remove`` the packed
+    files are deleted afterwards, and the directory too once it is empty.
+    Returns the number of members written.
+    """
+
+    entries: Dict[str, Union[Path, PackMember]] = {}
+    if keep is not None:
+        entries.update((member.name, member) for member in keep.glob(pattern))
+    files = sorted(entry for entry in directory.glob(pattern) if entry.is_file())
+    entries.update((file.name, file) for file in files)
+    with PackWriter(path) as writer:
+        for name in sorted(entries):
+            writer.add(name, entries[name].read_bytes())
+    if remove:
+        for file in files:
+            file.unlink()
+        if not any(directory.iterdir()):
+            directory.rmdir()
+    return len(entries)
+
+
+def pack_predictions(engine_dir: Path, pack_format: str) -> Path:
+    """Move ``engine_dir/markdown/*.md`` into ``engine_dir/markdown.<format>``.
+
+    Documents already packed by an earlier run (in any format) are kept unless
+    they were converted again, so ``--doc-id`` runs update a pack in place.
+    The earlier pack is removed when its format differs.
+    """
+
+    path = engine_dir / f"{MARKDOWN_DIRNAME}{PACK_FORMATS[pack_format]}"
+    previous = None
+    for suffix in PACK_SUFFIXES:
+        candidate = engine_dir / f"{MARKDOWN_DIRNAME}{suffix}"
+        if candidate.is_file():
+            previous = MarkdownPack(candidate)
+            break
+    directory = engine_dir / MARKDOWN_DIRNAME
+    directory.mkdir(parents=True, exist_ok=True)
+    count = pack_directory(directory, path, remove=True, keep=previous)
+    if previous is not None and previous.path != path:
+        previous.path.unlink()
+    logging.info("Packed %d Markdown files into %s", count, path)
+    return path
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Pack a directory of Markdown files into a zip, tar or SQLite file"
+    )
+    parser.add_argument("directory", type=Path, help="Directory of .md files")
+    parser.add_argument(
+        "output",
+        type=Path,
+        help=f"Pack to write; the format follows its suffix ({', '.join(PACK_SUFFIXES)})",
+    )
+    parser.add_argument(
+        "--remove",
+        action="store_true",
+        help="Delete the packed files (and the directory, once empty)",
+    )
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=list(logging.getLevelNamesMapping().keys()),
+        default="INFO",
+        help="Python logging level (e.g. INFO, DEBUG)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
+    if not args.directory.is_dir():
+        raise FileNotFoundError(f"Directory not found: {args.directory}")
+    count = pack_directory(args.directory, args.output, remove=args.remove)
+    print(f"Packed {count} files into {args.output}")
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry point
+    main()
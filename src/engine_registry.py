@@ -2,17 +2,47 @@
 
 from __future__ import annotations
 
+import importlib
+from types import ModuleType
 from typing import Callable, Dict
 
-import pdf_parser_docling as docling
-import pdf_parser_marker as marker
-import pdf_parser_markitdown as markitdown
-import pdf_parser_opendataloader as opendataloader
-import pdf_parser_opendataloader_hybrid as opendataloader_hybrid
+from engine_runtime import EngineRunConfig
 
 EngineHandler = Callable[..., None]
 
 
+ENGINE_MODULES: Dict[str, str] = {
+    "opendataloader": "pdf_parser_opendataloader",
+    "opendataloader-hybrid": "pdf_parser_opendataloader_hybrid",
+    "docling": "pdf_parser_docling",
+    "markitdown": "pdf_parser_markitdown",
+    "marker": "pdf_parser_marker",
+}
+
+
+def load_engine(engine_name: str) -> ModuleType:
+    """Import and return the adapter module for ``engine_name``."""
+
+    return importlib.import_module(ENGINE_MODULES[engine_name])
+
+
+def _lazy_handler(module_name: str) -> EngineHandler:
+    """Return a ``to_markdown`` handler that imports its adapter on first use.
+
+    Engine libraries load torch and model code at import time, so importing
+    every adapter up front would make evaluation workers and other tooling that
+    only needs the registry metadata pay for all of them. ``pdf_parser`` calls
+    :func:`load_engine` (and the adapter's ``warm_up``) before it starts timing.
+    """
+
+    def handler(*args, **kwargs):
+        module = importlib.import_module(module_name)
+        return module.to_markdown(*args, **kwargs)
+
+    handler.__name__ = f"{module_name}.to_markdown"
+    return handler
+
+
 ENGINES: Dict[str, str] = {
     "opendataloader": "1.6.2",
     "opendataloader-hybrid": "1.6.2",
@@ -23,9 +53,18 @@ ENGINES: Dict[str, str] = {
 
 
 ENGINE_DISPATCH: Dict[str, EngineHandler] = {
-    "opendataloader": opendataloader.to_markdown,
-    "opendataloader-hybrid": opendataloader_hybrid.to_markdown,
-    "docling": docling.to_markdown,
-    "markitdown": markitdown.to_markdown,
-    "marker": marker.to_markdown,
+    engine_name: _lazy_handler(module_name)
+    for engine_name, module_name in ENGINE_MODULES.items()
+}
+
+
+# Per-engine thread budget and CPU set applied by ``pdf_parser.process_markdown``.
+# ``None`` fields keep the library defaults; the CLI ``--threads``/``--cpus``
+# options override these values for a single run.
+ENGINE_RUN_CONFIGS: Dict[str, EngineRunConfig] = {
+    "opendataloader": EngineRunConfig(),
+    "opendataloader-hybrid": EngineRunConfig(),
+    "docling": EngineRunConfig(),
+    "markitdown": EngineRunConfig(),
+    "marker": EngineRunConfig(),
 }
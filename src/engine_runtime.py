@@ -0,0 +1,174 @@
+"""Thread-budget and CPU-affinity control for engine runs.
+
+Docling, marker, EasyOCR and torch each size their own thread pools from the
+machine's core count. When several engines share a box the pools
+oversubscribe the cores and the recorded timings measure contention rather
+than the engines. :class:`EngineRunConfig` pins those knobs down and
+:func:`engine_run_context` applies them around a conversion run, restoring the
+previous process state afterwards.
+
+Thread-count environment variables are only read when a runtime loads, so
+they cannot resize the BLAS or OpenMP pools of libraries the process has
+already imported (numpy, typically). The context records which thread
+controls actually took effect rather than assuming the whole budget applied.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import logging
+import os
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+)
+
+# Modules whose native runtimes read each variable once, when they load.
+THREAD_ENV_READERS: Dict[str, Tuple[str, ...]] = {
+    "OMP_NUM_THREADS": ("numpy", "torch"),
+    "MKL_NUM_THREADS": ("numpy", "torch"),
+    "OPENBLAS_NUM_THREADS": ("numpy",),
+    "NUMEXPR_NUM_THREADS": ("numexpr",),
+    "VECLIB_MAXIMUM_THREADS": ("numpy",),
+}
+
+
+@dataclass(frozen=True)
+class EngineRunConfig:
+    """Intra-op thread count and CPU set used while an engine converts PDFs.
+
+    ``None`` leaves the corresponding library or OS default untouched.
+    """
+
+    threads: Optional[int] = None
+    cpus: Optional[Tuple[int, ...]] = None
+
+    def override(
+        self,
+        threads: Optional[int] = None,
+        cpus: Optional[Tuple[int, ...]] = None,
+    ) -> "EngineRunConfig":
+        """Return a copy with the non-``None`` arguments taking precedence."""
+
+        return dataclasses.replace(
+            self,
+            threads=self.threads if threads is None else threads,
+            cpus=self.cpus if cpus is None else cpus,
+        )
+
+
+def parse_cpu_list(value: str) -> Tuple[int, ...]:
+    """Parse a CPU list such as ``"0-3,6"`` into a sorted tuple of CPU ids."""
+
+    cpus = set()
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = (int(bound) for bound in part.split("-", 1))
+            if start > end:
+                raise ValueError(f"Invalid CPU range: {part}")
+            cpus.update(range(start, end + 1))
+        else:
+            cpus.add(int(part))
+    if not cpus:
+        raise ValueError(f"Empty CPU list: {value!r}")
+    return tuple(sorted(cpus))
+
+
+def _get_affinity() -> Optional[Tuple[int, ...]]:
+    if not hasattr(os, "sched_getaffinity"):
+        return None
+    return tuple(sorted(os.sched_getaffinity(0)))
+
+
+def _effective_env_vars() -> List[str]:
+    """Return the thread variables that no already-loaded runtime has read."""
+
+    return [
+        name
+        for name in THREAD_ENV_VARS
+        if not any(module in sys.modules for module in THREAD_ENV_READERS[name])
+    ]
+
+
+def _set_torch_threads(threads: int) -> Optional[int]:
+    """Resize torch's intra-op pool if torch is already loaded.
+
+    When torch has not been imported yet the ``OMP_NUM_THREADS`` variable set
+    by :func:`engine_run_context` is picked up on first import instead.
+    """
+
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return None
+    previous = torch.get_num_threads()
+    torch.set_num_threads(threads)
+    return previous
+
+
+@contextmanager
+def engine_run_context(config: EngineRunConfig) -> Iterator[Dict[str, Any]]:
+    """Apply ``config`` to the current process for the duration of the block.
+
+    Yields the effective settings so callers can record them alongside the
+    timing results. ``thread_controls`` lists the controls that took effect in
+    this process: ``torch`` when its pool was resized, and the environment
+    variables that no already-loaded runtime has read. ``threads`` is the
+    budget when at least one control took effect and ``None`` otherwise. The
+    variables are exported either way so child processes inherit them.
+    """
+
+    saved_env = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+    saved_affinity = _get_affinity()
+    saved_torch_threads: Optional[int] = None
+    thread_controls: List[str] = []
+
+    try:
+        if config.threads is not None:
+            thread_controls = _effective_env_vars()
+            for name in THREAD_ENV_VARS:
+                os.environ[name] = str(config.threads)
+            saved_torch_threads = _set_torch_threads(config.threads)
+            if saved_torch_threads is not None:
+                thread_controls.insert(0, "torch")
+            if not thread_controls:
+                logging.warning(
+                    "threads=%d has no effect: the thread runtimes are already loaded",
+                    config.threads,
+                )
+
+        if config.cpus is not None:
+            if saved_affinity is None:
+                logging.warning(
+                    "CPU affinity is not supported on this platform; ignoring cpus=%s",
+                    list(config.cpus),
+                )
+            else:
+                os.sched_setaffinity(0, config.cpus)
+
+        affinity = _get_affinity()
+        yield {
+            "threads": config.threads if thread_controls else None,
+            "thread_controls": thread_controls,
+            "cpus": list(affinity) if affinity is not None else None,
+        }
+    finally:
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        if saved_torch_threads is not None:
+            _set_torch_threads(saved_torch_threads)
+        if config.cpus is not None and saved_affinity is not None:
+            os.sched_setaffinity(0, saved_affinity)
@@ -0,0 +1,410 @@
+"""Long-running local server that keeps engine models loaded between runs.
+
+Debugging a single document with ``run.py --engine marker --doc-id X``
+reloads marker's models (or docling's pipeline) on every invocation, which
+dwarfs the conversion itself. This server imports the selected engine
+adapters once, warms them up and then accepts conversion jobs over a Unix
+socket. ``pdf_parser.process_markdown`` (and therefore ``run.py``) sends its
+job here automatically whenever the server is running and has the engine
+loaded, and falls back to in-process conversion otherwise.
+
+The protocol is newline-delimited JSON. A client sends one request per
+connection:
+
+* ``{"op": "status"}`` returns loaded engines, queue depth and job counts.
+* ``{"op": "convert", "engine": ..., "doc_paths": [...], "input_path": ...,
+  "output_dir": ..., "run_config": {...}}`` streams a ``queued`` event with
+  the queue depth, one ``document`` event per written Markdown file and a
+  final ``done`` event with the conversion time and queue wait.
+* ``{"op": "shutdown"}`` stops the server.
+
+Jobs run one at a time on a single worker thread so timings are not skewed by
+concurrent conversions. The server exits after ``--idle-timeout`` seconds
+without requests.
+
+    uv run src/engine_server.py --engine marker --engine docling
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from engine_registry import ENGINE_DISPATCH, ENGINES, EngineHandler, load_engine
+from engine_runtime import EngineRunConfig, engine_run_context
+
+SOCKET_ENV_VAR = "OPENDATALOADER_BENCH_ENGINE_SOCKET"
+DEFAULT_IDLE_TIMEOUT = 1800.0
+STATUS_TIMEOUT = 2.0
+
+
+def default_socket_path() -> Path:
+    """Return the socket path shared by the server and its clients."""
+
+    override = os.environ.get(SOCKET_ENV_VAR)
+    if override:
+        return Path(override)
+    user = os.getuid() if hasattr(os, "getuid") else "user"
+    return Path(tempfile.gettempdir()) / f"opendataloader-bench-engines-{user}.sock"
+
+
+@dataclass
+class _Job:
+    request: Dict[str, Any]
+    submitted: float
+    events: "queue.Queue[Dict[str, Any]]" = field(default_factory=queue.Queue)
+
+
+class EngineServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serve conversion jobs for a fixed set of pre-loaded engines."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: Path,
+        engines: Sequence[str],
+        idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT,
+        handlers: Optional[Dict[str, EngineHandler]] = None,
+    ) -> None:
+        self.socket_path = Path(socket_path)
+        _remove_stale_socket(self.socket_path)
+        super().__init__(str(self.socket_path), _RequestHandler)
+        self.engines = list(engines)
+        self.handlers = handlers if handlers is not None else ENGINE_DISPATCH
+        self.idle_timeout = idle_timeout
+        self.jobs: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self.started = time.time()
+        self.jobs_completed = 0
+        self.busy = False
+        self._last_activity = time.monotonic()
+        threading.Thread(target=self._worker, name="engine-worker", daemon=True).start()
+        if idle_timeout:
+            threading.Thread(
+                target=self._idle_watchdog, name="engine-idle", daemon=True
+            ).start()
+
+    def touch(self) -> None:
+        self._last_activity = time.monotonic()
+
+    def warm_up(self) -> None:
+        """Import every served engine and let it load its models."""
+
+        for engine_name in self.engines:
+            start = time.perf_counter()
+            module = load_engine(engine_name)
+            warm_up = getattr(module, "warm_up", None)
+            if warm_up:
+                warm_up()
+            logging.info(
+                "Loaded %s in %.2f seconds", engine_name, time.perf_counter() - start
+            )
+        self.touch()
+
+    def queue_depth(self) -> int:
+        return self.jobs.qsize() + (1 if self.busy else 0)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "engines": self.engines,
+            "queue_depth": self.queue_depth(),
+            "jobs_completed": self.jobs_completed,
+            "uptime": time.time() - self.started,
+            "idle_timeout": self.idle_timeout,
+            "pid": os.getpid(),
+        }
+
+    def submit(self, job: _Job) -> int:
+        depth = self.queue_depth()
+        self.jobs.put(job)
+        return depth
+
+    def _worker(self) -> None:
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            self.busy = True
+            try:
+                job.events.put(self._run_job(job))
+            finally:
+                self.busy = False
+                self.jobs_completed += 1
+                self.touch()
+
+    def _run_job(self, job: _Job) -> Dict[str, Any]:
+        request = job.request
+        queue_wait = time.monotonic() - job.submitted
+        run_config = request.get("run_config") or {}
+        cpus = run_config.get("cpus")
+        config = EngineRunConfig(
+            threads=run_config.get("threads"),
+            cpus=tuple(cpus) if cpus is not None else None,
+        )
+
+        def on_document(path: str) -> None:
+            job.events.put({"event": "document", "path": str(path)})
+
+        try:
+            with engine_run_context(config) as settings:
+                start = time.perf_counter()
+                self.handlers[request["engine"]](
+                    [Path(path) for path in request["doc_paths"]],
+                    Path(request["input_path"]) if request.get("input_path") else None,
+                    Path(request["output_dir"]),
+                    on_document=on_document,
+                )
+                elapsed = time.perf_counter() - start
+        except Exception as exc:  # noqa: BLE001 - reported to the client
+            logging.exception("Job for %s failed", request.get("engine"))
+            return {"event": "done", "ok": False, "error": f"{type(exc).__name__}: {exc}"}
+
+        logging.info(
+            "engine=%s documents=%d elapsed=%.2fs queue_wait=%.2fs",
+            request["engine"],
+            len(request["doc_paths"]),
+            elapsed,
+            queue_wait,
+        )
+        return {
+            "event": "done",
+            "ok": True,
+            "elapsed": elapsed,
+            "queue_wait": queue_wait,
+            "run_config": settings,
+        }
+
+    def _idle_watchdog(self) -> None:
+        interval = min(self.idle_timeout, 5.0)
+        while True:
+            time.sleep(interval)
+            idle = time.monotonic() - self._last_activity
+            if self.queue_depth() == 0 and idle >= self.idle_timeout:
+                logging.info("Idle for %.0f seconds; shutting down", idle)
+                self.shutdown()
+                return
+
+    def server_close(self) -> None:
+        self.jobs.put(None)
+        super().server_close()
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: EngineServer
+
+    def _send(self, payload: Dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(payload).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+        except ValueError:
+            self._send({"event": "done", "ok": False, "error": "invalid JSON request"})
+            return
+
+        self.server.touch()
+        op = request.get("op")
+        if op == "status":
+            self._send({"event": "done", "ok": True, **self.server.status()})
+        elif op == "shutdown":
+            self._send({"event": "done", "ok": True})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        elif op == "convert":
+            self._handle_convert(request)
+        else:
+            self._send({"event": "done", "ok": False, "error": f"unknown op {op!r}"})
+
+    def _handle_convert(self, request: Dict[str, Any]) -> None:
+        engine_name = request.get("engine")
+        if engine_name not in self.server.engines:
+            self._send(
+                {"event": "done", "ok": False, "error": f"engine {engine_name!r} not loaded"}
+            )
+            return
+        job = _Job(request, time.monotonic())
+        depth = self.server.submit(job)
+        self._send({"event": "queued", "queue_depth": depth})
+        while True:
+            event = job.events.get()
+            self._send(event)
+            if event["event"] == "done":
+                return
+
+
+def _remove_stale_socket(socket_path: Path) -> None:
+    if not socket_path.exists():
+        return
+    if server_status(socket_path) is not None:
+        raise RuntimeError(f"An engine server is already listening on {socket_path}")
+    socket_path.unlink()
+
+
+def _request(
+    socket_path: Path, payload: Dict[str, Any], timeout: Optional[float]
+) -> Iterator[Dict[str, Any]]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+        sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+        with sock.makefile("r", encoding="utf-8") as stream:
+            for line in stream:
+                yield json.loads(line)
+
+
+def server_status(socket_path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """Return the running server's status, or ``None`` if none is reachable."""
+
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    socket_path = socket_path or default_socket_path()
+    if not socket_path.exists():
+        return None
+    try:
+        events = list(_request(socket_path, {"op": "status"}, STATUS_TIMEOUT))
+    except (OSError, ValueError):
+        return None
+    return events[-1] if events else None
+
+
+def convert_with_server(
+    engine_name: str,
+    doc_paths: Sequence[Path],
+    input_path: Optional[Path],
+    output_dir: Path,
+    run_config: EngineRunConfig,
+    on_document: Optional[Callable[[str], None]] = None,
+    socket_path: Optional[Path] = None,
+) -> Optional[Dict[str, Any]]:
+    """Run a conversion job on the engine server.
+
+    Returns the final ``done`` event, or ``None`` when no server is running or
+    it does not serve ``engine_name`` so the caller can convert in-process.
+    """
+
+    socket_path = socket_path or default_socket_path()
+    status = server_status(socket_path)
+    if status is None or engine_name not in status.get("engines", []):
+        return None
+
+    payload = {
+        "op": "convert",
+        "engine": engine_name,
+        "doc_paths": [str(Path(path).resolve()) for path in doc_paths],
+        "input_path": str(Path(input_path).resolve()) if input_path else None,
+        "output_dir": str(Path(output_dir).resolve()),
+        "run_config": {
+            "threads": run_config.threads,
+            "cpus": list(run_config.cpus) if run_config.cpus is not None else None,
+        },
+    }
+    result: Optional[Dict[str, Any]] = None
+    for event in _request(socket_path, payload, timeout=None):
+        if event["event"] == "queued":
+            logging.info(
+                "Engine server accepted %s job (queue depth %d)",
+                engine_name,
+                event["queue_depth"],
+            )
+            result = {"queue_depth": event["queue_depth"]}
+        elif event["event"] == "document":
+            if on_document:
+                on_document(event["path"])
+        elif event["event"] == "done":
+            if not event.get("ok"):
+                raise RuntimeError(f"Engine server job failed: {event.get('error')}")
+            result = {**(result or {}), **event}
+    if result is None or "elapsed" not in result:
+        raise RuntimeError("Engine server closed the connection before finishing")
+    return result
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Keep PDF parsing engines loaded and serve conversion jobs."
+    )
+    parser.add_argument(
+        "--engine",
+        action="append",
+        choices=list(ENGINES.keys()),
+        help="Engine to load (repeatable). Defaults to every engine.",
+    )
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        default=None,
+        help=f"Unix socket path (defaults to ${SOCKET_ENV_VAR} or a per-user temp path)",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=DEFAULT_IDLE_TIMEOUT,
+        help="Shut down after this many idle seconds (0 disables)",
+    )
+    parser.add_argument(
+        "--status",
+        action="store_true",
+        help="Print the running server's status and exit",
+    )
+    parser.add_argument(
+        "--stop",
+        action="store_true",
+        help="Ask the running server to shut down and exit",
+    )
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=list(logging.getLevelNamesMapping().keys()),
+        default="INFO",
+        help="Python logging level (e.g. INFO, DEBUG)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
+    socket_path = args.socket or default_socket_path()
+
+    if args.status or args.stop:
+        status = server_status(socket_path)
+        if status is None:
+            raise SystemExit(f"No engine server is running on {socket_path}")
+        if args.stop:
+            list(_request(socket_path, {"op": "shutdown"}, STATUS_TIMEOUT))
+        print(json.dumps(status, indent=2))
+        return
+
+    server = EngineServer(
+        socket_path, args.engine or list(ENGINES.keys()), args.idle_timeout or None
+    )
+    try:
+        server.warm_up()
+        logging.info("Engine server listening on %s", socket_path)
+        server.serve_forever()
+    except KeyboardInterrupt:  # pragma: no cover - CLI entry point
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry point
+    main()
@@ -0,0 +1,122 @@
+"""Append-only JSON-lines journal of per-document evaluation results.
+
+``evaluator`` appends each document's scores to
+``<output>.journal.jsonl`` (for example ``evaluation.journal.jsonl``) as soon
+as they are computed, and assembles ``evaluation.json`` and ``.csv`` from the
+journal at the end, so finished documents are neither held in memory nor
+lost when a run dies part-way. ``--resume`` keeps an existing journal and
+skips the documents it already holds; without it the journal is started
+afresh. The first line records the scoring settings, and a journal written
+with other settings is discarded rather than resumed. The journal is deleted
+once the reports are written.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional
+
+JOURNAL_SUFFIX = ".journal.jsonl"
+_SETTINGS_KEY = "settings"
+
+
+def journal_filename(output_filename: str) -> str:
+    """Return the journal name for a report, e.g. ``evaluation.journal.jsonl``."""
+
+    return f"{Path(output_filename).stem}{JOURNAL_SUFFIX}"
+
+
+class EvaluationJournal:
+    """One report's journal, opened for appending.
+
+    ``completed`` maps the document ids already in the journal to the byte
+    offset of their latest entry.
+    """
+
+    def __init__(
+        self, path: Path, settings: Mapping[str, Any], resume: bool = False
+    ) -> None:
+        self.path = path
+        # Normalised through JSON so it compares equal to a journal's header.
+        self.settings = json.loads(json.dumps(settings))
+        self.completed: Dict[str, int] = {}
+        end = self._load() if resume else None
+        if end is None:
+            self.completed = {}
+            self._handle = path.open("wb")
+            self._write({_SETTINGS_KEY: self.settings})
+        else:
+            self._handle = path.open("r+b")
+            # Drop a partial line left by a crash mid-write.
+            self._handle.truncate(end)
+            self._handle.seek(end)
+            logging.info(
+                "Resuming from %s with %d documents", path, len(self.completed)
+            )
+
+    def _load(self) -> Optional[int]:
+        """Index an existing journal; return the end of its last complete line."""
+
+        if not self.path.is_file():
+            return None
+        end = 0
+        with self.path.open("rb") as handle:
+            header = handle.readline()
+            try:
+                settings = json.loads(header).get(_SETTINGS_KEY)
+            except (ValueError, AttributeError):
+                settings = None
+            if settings != self.settings or not header.endswith(b"\n"):
+                logging.warning(
+                    "Not resuming %s: it was written with other settings", self.path
+                )
+                return None
+            end = handle.tell()
+            for line in iter(handle.readline, b""):
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    document_id = json.loads(line)["document_id"]
+                except (ValueError, KeyError, TypeError):
+                    break
+                self.completed[document_id] = end
+                end = handle.tell()
+        return end
+
+    def _write(self, payload: Mapping[str, Any]) -> None:
+        line = json.dumps(payload, ensure_ascii=False) + "\n"
+        self._handle.write(line.encode("utf-8"))
+        self._handle.flush()
+
+    def __contains__(self, document_id: str) -> bool:
+        return document_id in self.completed
+
+    def append(self, payload: Mapping[str, Any]) -> None:
+        """Record one document's ``DocumentScores.to_json()`` payload."""
+
+        offset = self._handle.tell()
+        self._write(payload)
+        self.completed[payload["document_id"]] = offset
+
+    def entries(self, document_ids: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """Yield the journaled payloads of ``document_ids``, in that order.
+
+        Documents that are not in the journal are skipped.
+        """
+
+        self._handle.flush()
+        with self.path.open("rb") as handle:
+            for document_id in document_ids:
+                offset = self.completed.get(document_id)
+                if offset is None:
+                    continue
+                handle.seek(offset)
+                yield json.loads(handle.readline())
+
+    def close(self, remove: bool = False) -> None:
+        self._handle.close()
+        if remove:
+            os.remove(self.path)
@@ -0,0 +1,354 @@
+"""Long-lived HTTP service that scores predictions against in-memory ground truth.
+
+``evaluator.py`` starts a process, scans the prediction directories and
+re-parses every ground-truth file for each run. This server loads the
+ground-truth corpus once into a pool of worker processes, prepares the
+artefacts every metric needs (normalised text, TEDS table trees, heading
+trees) and then scores individual predictions on request, so a typical
+document costs milliseconds instead of a process start and a directory scan.
+
+Endpoints (JSON bodies)::
+
+    GET  /health      -> {"documents": 200, "workers": 4, ...}
+    POST /evaluate    {"doc_id": "...", "markdown": "..."}
+    POST /evaluate    {"requests": [{"doc_id": ..., "markdown": ...}, ...]}
+
+Each result has the same ``document_id``/``scores``/``prediction_available``
+fields as ``evaluation.json`` plus ``timings`` with the seconds spent on each
+metric. Predictions go through the same preflight stage as files read by
+``evaluator.py`` (``--preflight``), and each result carries its ``preflight``
+statistics. ``--metrics`` limits scoring and ground-truth preparation to a subset.
+A ``markdown`` value that is neither a string nor null is answered with 400.
+Batches are split into chunks of ``--batch-size`` documents per worker task;
+requests beyond ``--max-pending`` in flight are answered with 503.
+
+    uv run src/evaluation_server.py --port 8766 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from document_pack import open_markdown
+from evaluator import DEFAULT_GT_DIR, _read_text, _score_markdown_documents
+from markdown_document import MarkdownDocument
+from metric_registry import parse_metrics, prepare_ground_truth, resolve_metrics
+from prediction_preflight import (
+    DEFAULT_PREFLIGHT_LIMITS,
+    PreflightLimits,
+    parse_preflight_limits,
+    preflight_text,
+)
+
+DEFAULT_PORT = 8766
+DEFAULT_BATCH_SIZE = 8
+DEFAULT_MAX_PENDING = 64
+
+# Ground truth, metrics and preflight limits loaded by ``_load_ground_truth``
+# in each worker.
+_GROUND_TRUTH: Dict[str, MarkdownDocument] = {}
+_METRICS: Tuple[str, ...] = ()
+_PREFLIGHT: Optional[PreflightLimits] = DEFAULT_PREFLIGHT_LIMITS
+
+
+def _load_ground_truth(
+    gt_dir: str, metrics: Tuple[str, ...], preflight: Optional[PreflightLimits]
+) -> None:
+    """Worker initializer: read and prepare every ground-truth document."""
+
+    global _METRICS, _PREFLIGHT
+    _METRICS = metrics
+    _PREFLIGHT = preflight
+    for gt_path in sorted(open_markdown(Path(gt_dir)).glob("*.md")):
+        document = MarkdownDocument(_read_text(gt_path))
+        prepare_ground_truth(document, metrics)
+        _GROUND_TRUTH[gt_path.stem] = document
+
+
+def _score_batch(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Score ``{"doc_id", "markdown"}`` items against the loaded ground truth."""
+
+    results = []
+    for item in items:
+        doc_id = str(item.get("doc_id", ""))
+        gt_document = _GROUND_TRUTH.get(doc_id)
+        if gt_document is None:
+            results.append({"document_id": doc_id, "error": "unknown document"})
+            continue
+        markdown = item.get("markdown")
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+        preflight_stats = None
+        if markdown is not None and _PREFLIGHT is not None:
+            markdown, preflight_stats = preflight_text(markdown, _PREFLIGHT)
+        try:
+            scores = _score_markdown_documents(
+                doc_id,
+                gt_document,
+                MarkdownDocument(markdown or ""),
+                markdown is not None,
+                timings,
+                _METRICS,
+            )
+        except Exception as exc:  # noqa: BLE001 - reported per document
+            logging.exception("Failed to evaluate %s", doc_id)
+            results.append({"document_id": doc_id, "error": f"{type(exc).__name__}: {exc}"})
+            continue
+        timings["total"] = time.perf_counter() - start
+        if preflight_stats is not None:
+            scores.preflight = preflight_stats.to_json()
+        results.append({**scores.to_json(), "timings": timings})
+    return results
+
+
+def _document_count() -> int:
+    return len(_GROUND_TRUTH)
+
+
+class EvaluationServer(ThreadingHTTPServer):
+    """HTTP front end dispatching scoring batches to a worker pool."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        gt_dir: Path,
+        workers: int = 1,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        metrics: Optional[Sequence[str]] = None,
+        preflight: Optional[PreflightLimits] = DEFAULT_PREFLIGHT_LIMITS,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        open_markdown(gt_dir)
+        self.gt_dir = gt_dir
+        self.workers = workers
+        self.batch_size = batch_size
+        self.metrics = resolve_metrics(metrics)
+        self.preflight = preflight
+        self.pending = threading.BoundedSemaphore(max_pending)
+        self.started = time.time()
+        self.executor: Executor
+        if workers > 0:
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_load_ground_truth,
+                initargs=(str(gt_dir), self.metrics, preflight),
+            )
+        else:
+            # Score in-process on one thread (debugging, tests).
+            self.executor = ThreadPoolExecutor(
+                max_workers=1,
+                initializer=_load_ground_truth,
+                initargs=(str(gt_dir), self.metrics, preflight),
+            )
+        # Block until the corpus is loaded so the first request is fast.
+        self.document_count = self.executor.submit(_document_count).result()
+        super().__init__(address, _EvaluationHandler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def evaluate(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        chunks = [
+            items[index : index + self.batch_size]
+            for index in range(0, len(items), self.batch_size)
+        ]
+        futures = [self.executor.submit(_score_batch, chunk) for chunk in chunks]
+        return [result for future in futures for result in future.result()]
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.executor.shutdown(cancel_futures=True)
+
+
+class _EvaluationHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: EvaluationServer
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002
+        logging.debug("evaluation server: " + format, *args)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        if self.path != "/health":
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+            return
+        self._send_json(
+            200,
+            {
+                "documents": self.server.document_count,
+                "workers": self.server.workers,
+                "batch_size": self.server.batch_size,
+                "metrics": list(self.server.metrics),
+                "uptime": time.time() - self.server.started,
+            },
+        )
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming
+        if self.path != "/evaluate":
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "invalid JSON body"})
+            return
+
+        batched = "requests" in request
+        items = request["requests"] if batched else [request]
+        if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+            self._send_json(400, {"error": "requests must be a list of objects"})
+            return
+        for item in items:
+            markdown = item.get("markdown")
+            if markdown is not None and not isinstance(markdown, str):
+                error = f"markdown for {item.get('doc_id')!r} must be a string or null"
+                self._send_json(400, {"error": error})
+                return
+
+        if not self.server.pending.acquire(blocking=False):
+            self._send_json(503, {"error": "too many pending requests"})
+            return
+        start = time.perf_counter()
+        try:
+            results = self.server.evaluate(items)
+        finally:
+            self.server.pending.release()
+        elapsed = time.perf_counter() - start
+
+        if batched:
+            self._send_json(200, {"results": results, "elapsed": elapsed})
+        elif "error" in results[0]:
+            self._send_json(404, results[0])
+        else:
+            self._send_json(200, results[0])
+
+
+def start_evaluation_server(
+    gt_dir: Path,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    workers: int = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_pending: int = DEFAULT_MAX_PENDING,
+    metrics: Optional[Sequence[str]] = None,
+    preflight: Optional[PreflightLimits] = DEFAULT_PREFLIGHT_LIMITS,
+) -> EvaluationServer:
+    """Start the server in a background thread; call ``shutdown()`` to stop it."""
+
+    server = EvaluationServer(
+        (host, port), gt_dir, workers, batch_size, max_pending, metrics, preflight
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Score predictions against in-memory ground truth over HTTP"
+    )
+    parser.add_argument(
+        "--ground-truth-dir",
+        type=str,
+        default=DEFAULT_GT_DIR,
+        help="Directory (or zip/tar/SQLite pack) containing ground-truth markdown files",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Scoring worker processes (0 scores in the server process)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Documents per worker task when splitting batch requests",
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=DEFAULT_MAX_PENDING,
+        help="Requests allowed in flight before answering 503",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=parse_metrics,
+        default=None,
+        help="Comma-separated metrics to compute (e.g. nid,teds_s). Defaults to all.",
+    )
+    parser.add_argument(
+        "--preflight",
+        type=parse_preflight_limits,
+        default=DEFAULT_PREFLIGHT_LIMITS,
+        help=(
+            "Prediction size limits, e.g. chars=2000000,lines=20000,cells=10000 "
+            "(unspecified limits keep these defaults), or 'off'"
+        ),
+    )
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=list(logging.getLevelNamesMapping().keys()),
+        default="INFO",
+        help="Python logging level (e.g. INFO, DEBUG)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
+    project_root = Path(__file__).parent.parent.resolve()
+
+    start = time.perf_counter()
+    server = EvaluationServer(
+        (args.host, args.port),
+        project_root / args.ground_truth_dir,
+        args.workers,
+        args.batch_size,
+        args.max_pending,
+        args.metrics,
+        args.preflight,
+    )
+    logging.info(
+        "Loaded %d ground-truth documents in %.2f seconds; listening on %s",
+        server.document_count,
+        time.perf_counter() - start,
+        server.url,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:  # pragma: no cover - CLI entry point
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry point
+    main()
@@ -16,50 +16,112 @@ import argparse
 import csv
 import json
 import logging
+import math
+import textwrap
 import time
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from statistics import fmean
-from typing import Any, Dict, Iterable, List, Optional, Set
-
-from evaluator_heading_level import evaluate_heading_level
-from evaluator_reading_order import evaluate_reading_order
-from evaluator_table import evaluate_table
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from corpus_manifest import ground_truth_paths
+from document_pack import MarkdownSource, find_markdown, open_markdown
+from evaluation_journal import EvaluationJournal, journal_filename
+from markdown_document import MarkdownDocument
+from metric_registry import (
+    OVERALL,
+    SCORERS,
+    compute_scores,
+    parse_metrics,
+    resolve_metrics,
+)
+from metric_timeout import (
+    TIMEOUT_FALLBACKS,
+    parse_metric_timeouts,
+    validate_metric_timeouts,
+)
+from prediction_preflight import (
+    DEFAULT_PREFLIGHT_LIMITS,
+    PreflightLimits,
+    parse_preflight_limits,
+    read_prediction,
+)
+from sampling import (
+    REFERENCE_FILENAME,
+    DocumentSample,
+    Sample,
+    draw_sample,
+    load_strata,
+    parse_sample_size,
+    sample_filename,
+)
+from score_statistics import score_intervals, stratified_mean
+from sharding import Shard, parse_shard, select_shard, shard_filename
+from stage_profiler import (
+    DEFAULT_TOP_FUNCTIONS,
+    parse_top_count,
+    profile_document,
+    profile_stage,
+    profiling,
+)
+from telemetry import (
+    EvaluationRecorder,
+    TelemetryFile,
+    engine_labels,
+    telemetry_file,
+)
+from tracing import span, tracing
 
 
 DEFAULT_GT_DIR = "ground-truth/markdown"
 DEFAULT_PREDICTION_ROOT = "prediction"
 DEFAULT_OUTPUT_FILENAME = "evaluation.json"
+APPROX_OUTPUT_FILENAME = "evaluation_approx.json"
+SUMMARY_FILENAME = "summary.json"
 
 
 @dataclass
 class DocumentScores:
-    """Container for per-document evaluation results."""
+    """Container for per-document evaluation results.
+
+    ``scores`` maps each computed metric (see ``metric_registry``) to its
+    value, in report order. Approximate runs also fill ``bounds`` with the
+    ``[lower, upper]`` range of every approximated metric. Runs with a
+    metric time budget list the metrics that ran out of time in
+    ``timed_out``, and ``preflight`` holds the prediction's preflight
+    statistics (see ``prediction_preflight``).
+    """
 
     document_id: str
-    overall: Optional[float]
-    nid: Optional[float]
-    nid_s: Optional[float]
-    teds: Optional[float]
-    teds_s: Optional[float]
-    mhs: Optional[float]
-    mhs_s: Optional[float]
+    scores: Dict[str, Optional[float]]
     prediction_available: bool
+    bounds: Optional[Dict[str, List[float]]] = None
+    timed_out: Optional[List[str]] = None
+    preflight: Optional[Dict[str, Any]] = None
 
     def to_json(self) -> Dict[str, Any]:
-        return {
+        payload = {
             "document_id": self.document_id,
-            "scores": {
-                "overall": self.overall,
-                "nid": self.nid,
-                "nid_s": self.nid_s,
-                "teds": self.teds,
-                "teds_s": self.teds_s,
-                "mhs": self.mhs,
-                "mhs_s": self.mhs_s,
-            },
+            "scores": dict(self.scores),
             "prediction_available": self.prediction_available,
         }
+        if self.bounds is not None:
+            payload["bounds"] = dict(self.bounds)
+        if self.timed_out is not None:
+            payload["timed_out"] = list(self.timed_out)
+        if self.preflight is not None:
+            payload["preflight"] = dict(self.preflight)
+        return payload
+
+    @classmethod
+    def from_json(cls, payload: Dict[str, Any]) -> "DocumentScores":
+        return cls(
+            document_id=payload["document_id"],
+            scores=dict(payload["scores"]),
+            prediction_available=payload["prediction_available"],
+            bounds=payload.get("bounds"),
+            timed_out=payload.get("timed_out"),
+            preflight=payload.get("preflight"),
+        )
 
 
 def _read_text(path: Path) -> str:
@@ -75,15 +137,36 @@ def _read_text(path: Path) -> str:
         return ""
 
 
-def _safe_mean(values: Iterable[float]) -> Optional[float]:
-    values = list(values)
-    return fmean(values) if values else None
+def _add_exact(partials: List[float], value: float) -> None:
+    """Add ``value`` to Shewchuk ``partials`` without rounding error.
+
+    ``math.fsum(partials)`` is then the correctly rounded total, so running
+    means equal ``statistics.fmean`` over all the values.
+    """
 
+    kept = 0
+    for partial in partials:
+        if abs(value) < abs(partial):
+            value, partial = partial, value
+        high = value + partial
+        low = partial - (high - value)
+        if low:
+            partials[kept] = low
+            kept += 1
+        value = high
+    partials[kept:] = [value]
 
-def _load_summary_metadata(summary_dir: Path) -> Dict[str, Any]:
+
+def _exact_mean(partials: List[float], count: int) -> Optional[float]:
+    return math.fsum(partials) / count if count else None
+
+
+def _load_summary_metadata(
+    summary_dir: Path, summary_filename: str = SUMMARY_FILENAME
+) -> Dict[str, Any]:
     """Read the first ``summary.json`` file in ``summary_dir`` if it exists."""
 
-    for summary_path in sorted(summary_dir.glob("summary.json")):
+    for summary_path in sorted(summary_dir.glob(summary_filename)):
         try:
             with summary_path.open(encoding="utf-8") as f:
                 return json.load(f)
@@ -91,76 +174,251 @@ def _load_summary_metadata(summary_dir: Path) -> Dict[str, Any]:
             logging.warning("Failed to read summary file %s: %s", summary_path, exc)
 
 
-def _evaluate_single_document(
+def _score_markdown_documents(
     doc_id: str,
-    gt_path: Path,
-    pred_path: Path,
+    gt_document: MarkdownDocument,
+    pred_document: MarkdownDocument,
+    prediction_available: bool,
+    timings: Optional[Dict[str, float]] = None,
+    metrics: Optional[Sequence[str]] = None,
+    approximate: bool = False,
+    timeouts: Optional[Dict[str, float]] = None,
+    timeout_fallback: str = "zero",
 ) -> DocumentScores:
-    gt_markdown = _read_text(gt_path)
-    pred_markdown = _read_text(pred_path)
-    prediction_available = pred_path.is_file()
-
-    nid, nid_s = evaluate_reading_order(gt_markdown, pred_markdown)
-    teds, teds_s = evaluate_table(gt_markdown, pred_markdown)
-    mhs, mhs_s = evaluate_heading_level(gt_markdown, pred_markdown)
-
-    overall_components = [
-        nid,
-        teds,
-        mhs,
-    ]
-    overall_values = [value for value in overall_components if value is not None]
-    overall_average = _safe_mean(overall_values)
-
+    """Score a prediction against its ground truth.
+
+    Artefacts cached on ``gt_document`` are reused, so callers that keep the
+    ground truth in memory only pay for the prediction side. ``metrics``
+    defaults to every registered metric. When ``timings`` is given, the
+    seconds spent in each scorer are stored under its name. ``approximate``
+    swaps tree-edit-distance metrics for bounded estimates. ``timeouts`` and
+    ``timeout_fallback`` bound each scorer's run time (see
+    ``metric_registry.compute_scores``).
+    """
+
+    bounds: Dict[str, Tuple[float, float]] = {}
+    timed_out: List[str] = []
+    scores = compute_scores(
+        gt_document,
+        pred_document,
+        resolve_metrics(metrics),
+        timings,
+        approximate=approximate,
+        bounds=bounds,
+        timeouts=timeouts,
+        timeout_fallback=timeout_fallback,
+        timed_out=timed_out,
+    )
     return DocumentScores(
-        overall=overall_average,
         document_id=doc_id,
-        nid=nid,
-        nid_s=nid_s,
-        teds=teds,
-        teds_s=teds_s,
-        mhs=mhs,
-        mhs_s=mhs_s,
+        scores=scores,
         prediction_available=prediction_available,
+        bounds=(
+            {name: list(bound) for name, bound in bounds.items()}
+            if approximate
+            else None
+        ),
+        timed_out=timed_out if timeouts else None,
     )
 
 
-def _aggregate_document_scores(documents: List[DocumentScores]) -> Dict[str, Any]:
-    """Compute mean scores across documents and return a serialisable payload."""
-
-    overall_values = [doc.overall for doc in documents if doc.overall is not None]
-    nid_values = [doc.nid for doc in documents if doc.nid is not None]
-    nid_s_values = [doc.nid_s for doc in documents if doc.nid_s is not None]
-    teds_values = [doc.teds for doc in documents if doc.teds is not None]
-    teds_s_values = [doc.teds_s for doc in documents if doc.teds_s is not None]
-    mhs_values = [doc.mhs for doc in documents if doc.mhs is not None]
-    mhs_s_values = [doc.mhs_s for doc in documents if doc.mhs_s is not None]
-
-    overall_mean = _safe_mean(overall_values)
-    nid_mean = _safe_mean(nid_values)
-    nid_s_mean = _safe_mean(nid_s_values)
-    teds_mean = _safe_mean(teds_values)
-    teds_s_mean = _safe_mean(teds_s_values)
-    mhs_mean = _safe_mean(mhs_values)
-    mhs_s_mean = _safe_mean(mhs_s_values)
-
-    missing_predictions = sum(1 for doc in documents if not doc.prediction_available)
-
-    return {
-        "score": {
-            "overall_mean": overall_mean,
-            "nid_mean": nid_mean,
-            "nid_s_mean": nid_s_mean,
-            "teds_mean": teds_mean,
-            "teds_s_mean": teds_s_mean,
-            "mhs_mean": mhs_mean,
-            "mhs_s_mean": mhs_s_mean,
-        },
-        "nid_count": len(nid_values),
-        "teds_count": len(teds_values),
-        "mhs_count": len(mhs_values),
-        "missing_predictions": missing_predictions,
-    }
+def _evaluate_single_document(
+    doc_id: str,
+    gt_path: Path,
+    pred_path: Path,
+    metrics: Optional[Sequence[str]] = None,
+    approximate: bool = False,
+    timeouts: Optional[Dict[str, float]] = None,
+    timeout_fallback: str = "zero",
+    preflight: Optional[PreflightLimits] = DEFAULT_PREFLIGHT_LIMITS,
+    timings: Optional[Dict[str, float]] = None,
+) -> DocumentScores:
+    """Score the prediction file at ``pred_path``.
+
+    The prediction is read through the ``preflight`` limits unless they are
+    ``None``. When ``timings`` is given, the seconds spent in each scorer are
+    stored under its name.
+    """
+
+    with span(doc_id, "evaluate", engine=pred_path.parent.parent.name):
+        gt_markdown = _read_text(gt_path)
+        preflight_stats = None
+        if preflight is None:
+            pred_markdown = _read_text(pred_path)
+        else:
+            pred_markdown, preflight_stats = read_prediction(pred_path, preflight)
+        prediction_available = pred_path.is_file()
+
+        scores = _score_markdown_documents(
+            doc_id,
+            MarkdownDocument(gt_markdown),
+            MarkdownDocument(pred_markdown),
+            prediction_available,
+            timings=timings,
+            metrics=metrics,
+            approximate=approximate,
+            timeouts=timeouts,
+            timeout_fallback=timeout_fallback,
+        )
+    if preflight_stats is not None:
+        scores.preflight = preflight_stats.to_json()
+    return scores
+
+
+def _computed_metrics(documents: List[DocumentScores]) -> List[str]:
+    """Return the metrics present in ``documents`` in report order."""
+
+    return list(documents[0].scores) if documents else []
+
+
+class _ScoreAggregate:
+    """Running aggregate of per-document scores, fed one document at a time.
+
+    ``to_json`` returns the ``metrics`` section of the report. Means are
+    exact, so they do not depend on how documents were batched. Sampled runs
+    keep each document's scores and weight every stratum's mean by its share
+    of the corpus, for the means and their bootstrap intervals alike.
+    """
+
+    def __init__(self, sample: Optional[DocumentSample] = None) -> None:
+        self.sample = sample
+        self.metrics: List[str] = []
+        self.documents = 0
+        self.missing_predictions = 0
+        self._sums: Dict[str, List[float]] = {}
+        self._counts: Dict[str, int] = {}
+        self._bound_sums: Dict[str, Tuple[List[float], List[float]]] = {}
+        self._has_bounds = False
+        self._timed_out_documents: Optional[int] = None
+        self._timed_out_counts: Dict[str, int] = {}
+        self._preflight: Optional[Dict[str, int]] = None
+        self._scores: List[Dict[str, Optional[float]]] = []
+        self._bounds: List[Optional[Dict[str, List[float]]]] = []
+        self._strata: List[str] = []
+
+    def add(self, doc: DocumentScores) -> None:
+        if not self.documents:
+            self.metrics = _computed_metrics([doc])
+            for name in self.metrics:
+                self._sums[name] = []
+                self._counts[name] = 0
+                self._bound_sums[name] = ([], [])
+        self.documents += 1
+        if not doc.prediction_available:
+            self.missing_predictions += 1
+        for name in self.metrics:
+            value = doc.scores.get(name)
+            if value is None:
+                continue
+            _add_exact(self._sums[name], value)
+            self._counts[name] += 1
+            # Exact scores count as their own bounds.
+            lower, upper = (doc.bounds or {}).get(name, [value, value])
+            _add_exact(self._bound_sums[name][0], lower)
+            _add_exact(self._bound_sums[name][1], upper)
+        if doc.bounds is not None:
+            self._has_bounds = True
+        if doc.timed_out is not None:
+            self._timed_out_documents = (self._timed_out_documents or 0) + bool(
+                doc.timed_out
+            )
+        for name in set(doc.timed_out or []):
+            self._timed_out_counts[name] = self._timed_out_counts.get(name, 0) + 1
+        if doc.preflight is not None:
+            stats = doc.preflight
+            if self._preflight is None:
+                self._preflight = {
+                    "truncated_documents": 0,
+                    "stripped_documents": 0,
+                    "max_source_size": stats["source_size"],
+                }
+            self._preflight["truncated_documents"] += bool(stats["truncated"])
+            self._preflight["stripped_documents"] += bool(stats["stripped_chars"])
+            self._preflight["max_source_size"] = max(
+                self._preflight["max_source_size"], stats["source_size"]
+            )
+        if self.sample is not None:
+            self._scores.append(doc.scores)
+            self._bounds.append(doc.bounds)
+            self._strata.append(self.sample.strata.get(doc.document_id, ""))
+
+    def _mean(self, name: str, bound: Optional[int] = None) -> Optional[float]:
+        """Return the mean of ``name``, or of its lower (0) or upper (1) bound."""
+
+        if self.sample is None:
+            partials = self._sums[name] if bound is None else self._bound_sums[name][bound]
+            return _exact_mean(partials, self._counts[name])
+        values: List[float] = []
+        strata: List[str] = []
+        for scores, bounds, stratum in zip(self._scores, self._bounds, self._strata):
+            value = scores.get(name)
+            if value is None:
+                continue
+            if bound is not None:
+                value = (bounds or {}).get(name, [value, value])[bound]
+            values.append(value)
+            strata.append(stratum)
+        return stratified_mean(values, strata, self.sample.populations)
+
+    def to_json(self) -> Dict[str, Any]:
+        metrics = self.metrics
+        payload: Dict[str, Any] = {
+            "score": {f"{name}_mean": self._mean(name) for name in metrics}
+        }
+        if self._has_bounds:
+            payload["score_bounds"] = {
+                f"{name}_mean": (
+                    [self._mean(name, 0), self._mean(name, 1)]
+                    if self._counts[name]
+                    else None
+                )
+                for name in metrics
+            }
+        if self.sample is not None:
+            payload["score_intervals"] = score_intervals(
+                self._scores,
+                metrics,
+                strata=self._strata,
+                seed=self.sample.sample.seed,
+                populations=self.sample.populations,
+            )
+        aggregated = {
+            **payload,
+            **{
+                f"{name}_count": self._counts[name]
+                for name in metrics
+                if name in SCORERS
+            },
+            "missing_predictions": self.missing_predictions,
+            "computed_metrics": metrics,
+        }
+        if self._timed_out_documents is not None:
+            aggregated["timed_out_documents"] = self._timed_out_documents
+            aggregated["timed_out_counts"] = {
+                name: self._timed_out_counts.get(name, 0)
+                for name in metrics
+                if name != OVERALL
+            }
+        if self._preflight is not None:
+            aggregated["preflight"] = dict(self._preflight)
+        if self.sample is not None:
+            aggregated["sample"] = self.sample.to_json()
+        return aggregated
+
+
+def _aggregate_document_scores(
+    documents: Iterable[DocumentScores], sample: Optional[DocumentSample] = None
+) -> Dict[str, Any]:
+    """Compute mean scores across documents and return a serialisable payload.
+
+    Sampled runs add stratified bootstrap confidence intervals for each mean
+    and the composition of the sample.
+    """
+
+    aggregate = _ScoreAggregate(sample)
+    for doc in documents:
+        aggregate.add(doc)
+    return aggregate.to_json()
 
 
 def _logging_scores(
@@ -168,55 +426,181 @@ def _logging_scores(
     engine_name: str,
     doc_id: str,
 ) -> None:
-    overall = scores.overall
-    nid = scores.nid
-    nid_s = scores.nid_s
-    teds = scores.teds
-    teds_s = scores.teds_s
-    mhs = scores.mhs
-    mhs_s = scores.mhs_s
-
-    overall = f"{overall:.3f}" if overall is not None else "none "
-    nid = f"{nid:.3f}" if nid is not None else "none "
-    nid_s = f"{nid_s:.3f}" if nid_s is not None else "none "
-    teds = f"{teds:.3f}" if teds is not None else "none "
-    teds_s = f"{teds_s:.3f}" if teds_s is not None else "none "
-    mhs = f"{mhs:.3f}" if mhs is not None else "none "
-    mhs_s = f"{mhs_s:.3f}" if mhs_s is not None else "none "
+    formatted = " ".join(
+        f"{name}={value:.3f}" if value is not None else f"{name}=none "
+        for name, value in scores.scores.items()
+    )
+    logging.info("engine=%s document=%s %s", engine_name, doc_id, formatted)
 
-    logging.info(
-        "engine=%s document=%s overall=%s nid=%s nid_s=%s teds=%s teds_s=%s mhs=%s mhs_s=%s",
-        engine_name,
-        doc_id,
-        overall,
-        nid,
-        nid_s,
-        teds,
-        teds_s,
-        mhs,
-        mhs_s,
+
+def _draw_sample(
+    gt_dir: MarkdownSource, sample: Optional[Sample]
+) -> Optional[DocumentSample]:
+    """Draw ``sample`` from the ground truth, stratified by ``reference.json``.
+
+    The reference file is looked up next to the ground-truth directory or pack.
+    """
+
+    if sample is None:
+        return None
+    return draw_sample(
+        (path.stem for path in _ground_truth_files(gt_dir)),
+        sample,
+        load_strata(open_markdown(gt_dir).parent / REFERENCE_FILENAME),
     )
 
 
+def _ground_truth_files(gt_dir: MarkdownSource) -> List[Any]:
+    """List a ground-truth directory (through the corpus manifest) or pack."""
+
+    source = open_markdown(gt_dir)
+    if isinstance(source, Path):
+        return ground_truth_paths(source)
+    return sorted(source.glob("*.md"))
+
+
+def _ground_truth_paths(
+    gt_dir: MarkdownSource,
+    target_doc_id: Optional[str] = None,
+    shard: Optional[Shard] = None,
+    sample: Optional[DocumentSample] = None,
+) -> List[Path]:
+    """Return the ground-truth markdown files to evaluate, in report order.
+
+    ``gt_dir`` may be a directory or a pack (see ``document_pack``).
+    """
+
+    gt_paths = select_shard(_ground_truth_files(gt_dir), shard)
+    if sample is not None:
+        gt_paths = [path for path in gt_paths if sample.contains(path.stem)]
+    if target_doc_id:
+        gt_paths = [path for path in gt_paths if path.stem == target_doc_id]
+    return gt_paths
+
+
+def _write_evaluation(
+    prediction_dir: Path,
+    output_filename: str,
+    documents: Iterable[DocumentScores],
+    shard: Optional[Shard] = None,
+    sample: Optional[DocumentSample] = None,
+    aggregate: Optional[_ScoreAggregate] = None,
+) -> Path:
+    """Write the JSON and CSV evaluation reports for ``documents``.
+
+    Shard runs read ``summary.shard-i-of-N.json`` and write
+    ``<output>.shard-i-of-N.{json,csv}`` so partial results never overwrite
+    the merged report; sampled runs use ``sample-N-seed-S`` the same way.
+
+    Both reports are written in one pass over ``documents``, so it may be a
+    generator when ``aggregate`` already holds the same documents' totals.
+    """
+
+    requested_sample = sample.sample if sample is not None else None
+    summary_metadata = _load_summary_metadata(
+        prediction_dir,
+        sample_filename(shard_filename(SUMMARY_FILENAME, shard), requested_sample),
+    )
+    output_filename = sample_filename(
+        shard_filename(output_filename, shard), requested_sample
+    )
+
+    if aggregate is None:
+        documents = list(documents)
+        aggregate = _ScoreAggregate(sample)
+        for doc in documents:
+            aggregate.add(doc)
+    # Same text as json.dumps of the whole report, one document at a time.
+    header = json.dumps(
+        {"summary": summary_metadata, "metrics": aggregate.to_json()},
+        indent=2,
+        ensure_ascii=False,
+    )
+
+    output_path = prediction_dir / output_filename
+    csv_filename = Path(output_filename).with_suffix(".csv").name
+    csv_path = prediction_dir / csv_filename
+    metrics = aggregate.metrics
+    csv_fieldnames = ["index", "document_id", *metrics]
+    with output_path.open("w") as json_file, csv_path.open(
+        "w", encoding="utf-8", newline=""
+    ) as csv_file:
+        json_file.write(header[: -len("\n}")] + ',\n  "documents": [')
+        writer = csv.DictWriter(csv_file, fieldnames=csv_fieldnames)
+        writer.writeheader()
+        index = 0
+        for index, doc in enumerate(documents, start=1):
+            document = json.dumps(doc.to_json(), indent=2, ensure_ascii=False)
+            json_file.write("\n" if index == 1 else ",\n")
+            json_file.write(textwrap.indent(document, "    "))
+            row = {
+                "index": index,
+                "document_id": f"'{doc.document_id}",
+            }
+            for name in metrics:
+                value = doc.scores.get(name)
+                row[name] = "" if value is None else value
+            writer.writerow(row)
+        json_file.write("\n  ]\n}" if index else "]\n}")
+    logging.info("Wrote evaluation to %s", output_path)
+    logging.info("Wrote evaluation CSV to %s", csv_path)
+    return output_path
+
+
 def _evaluate_engine_version(
-    gt_dir: Path,
+    gt_dir: MarkdownSource,
     prediction_dir: Path,
     output_filename: str,
     target_doc_id: Optional[str] = None,
+    shard: Optional[Shard] = None,
+    metrics: Optional[Sequence[str]] = None,
+    approximate: bool = False,
+    sample: Optional[DocumentSample] = None,
+    timeouts: Optional[Dict[str, float]] = None,
+    timeout_fallback: str = "zero",
+    preflight: Optional[PreflightLimits] = DEFAULT_PREFLIGHT_LIMITS,
+    telemetry: Optional[TelemetryFile] = None,
+    resume: bool = False,
 ) -> Optional[Path]:
-    """Run evaluation for a single ``engine/version`` directory."""
-
-    markdown_dir = prediction_dir / "markdown"
-    if not markdown_dir.is_dir():
-        logging.info("Skipping %s (no markdown directory)", prediction_dir)
+    """Run evaluation for a single ``engine/version`` directory.
+
+    Predictions are read from ``markdown/`` or, without it, from a
+    ``markdown.<pack>`` file (see ``document_pack``). Per-document timings,
+    timeouts and cache use are recorded in ``telemetry`` when it is given.
+    Scores are journaled as they are computed (see ``evaluation_journal``);
+    ``resume`` skips the documents an interrupted run already journaled.
+    """
+
+    markdown_dir = find_markdown(prediction_dir)
+    if markdown_dir is None:
+        logging.info("Skipping %s (no markdown directory or pack)", prediction_dir)
         return None
 
-    gt_paths = sorted(gt_dir.glob("*.md"))
+    gt_paths = _ground_truth_paths(gt_dir, shard=shard, sample=sample)
     if not gt_paths:
         logging.error("No ground truth markdown files found in %s", gt_dir)
         return None
 
-    documents: List[DocumentScores] = []
+    doc_ids = [
+        path.stem
+        for path in gt_paths
+        if not target_doc_id or path.stem == target_doc_id
+    ]
+    requested_sample = sample.sample if sample is not None else None
+    journal = EvaluationJournal(
+        prediction_dir
+        / journal_filename(
+            sample_filename(shard_filename(output_filename, shard), requested_sample)
+        ),
+        {
+            "metrics": resolve_metrics(metrics),
+            "approximate": approximate,
+            "timeouts": timeouts,
+            "timeout_fallback": timeout_fallback,
+            "preflight": asdict(preflight) if preflight is not None else None,
+        },
+        resume=resume,
+    )
 
     engine_name = prediction_dir.name
     logging.info(
@@ -224,68 +608,66 @@ def _evaluate_engine_version(
         engine_name,
         len(gt_paths),
     )
+    recorder = None
+    if telemetry is not None:
+        summary = _load_summary_metadata(prediction_dir) or {}
+        version = summary.get("engine_version")
+        recorder = EvaluationRecorder(telemetry, engine_labels(engine_name, version))
 
-    for gt_path in gt_paths:
-        doc_id = gt_path.stem
-        if target_doc_id and doc_id != target_doc_id:
-            continue
-
-        pred_path = markdown_dir / f"{doc_id}.md"
-        try:
-            scores = _evaluate_single_document(doc_id, gt_path, pred_path)
-            _logging_scores(scores, engine_name, doc_id)
-        except Exception as exc:  # pragma: no cover - defensive guard
-            logging.exception("Failed to evaluate %s: %s", doc_id, exc)
-            continue
-        documents.append(scores)
-
-    if not documents:
+    try:
+        for gt_path in gt_paths:
+            doc_id = gt_path.stem
+            if target_doc_id and doc_id != target_doc_id:
+                continue
+            if doc_id in journal:
+                continue
+
+            pred_path = markdown_dir / f"{doc_id}.md"
+            timings: Optional[Dict[str, float]] = {} if recorder is not None else None
+            try:
+                with profile_document(f"{engine_name}/{doc_id}"):
+                    scores = _evaluate_single_document(
+                        doc_id,
+                        gt_path,
+                        pred_path,
+                        metrics,
+                        approximate,
+                        timeouts,
+                        timeout_fallback,
+                        preflight,
+                        timings,
+                    )
+                _logging_scores(scores, engine_name, doc_id)
+                if recorder is not None:
+                    recorder.document(timings, scores.timed_out)
+            except Exception as exc:  # pragma: no cover - defensive guard
+                logging.exception("Failed to evaluate %s: %s", doc_id, exc)
+                continue
+            journal.append(scores.to_json())
+    except BaseException:
+        # Keep what was journaled so an interrupted run can be resumed.
+        journal.close()
+        raise
+
+    if not journal.completed:
+        journal.close(remove=True)
         logging.warning("No documents evaluated for %s", prediction_dir)
         return None
 
-    summary_metadata = _load_summary_metadata(prediction_dir)
-
-    aggregated = _aggregate_document_scores(documents)
-    payload = {
-        "summary": summary_metadata,
-        "metrics": aggregated,
-        "documents": [doc.to_json() for doc in documents],
-    }
-
-    output_path = prediction_dir / output_filename
-    output_path.write_text(json.dumps(payload, indent=2, ensure_ascii=False))
-    logging.info("Wrote evaluation to %s", output_path)
-
-    csv_filename = Path(output_filename).with_suffix(".csv").name
-    csv_path = prediction_dir / csv_filename
-    csv_fieldnames = [
-        "index",
-        "document_id",
-        "overall",
-        "nid",
-        "nid_s",
-        "teds",
-        "teds_s",
-        "mhs",
-        "mhs_s",
-    ]
-    with csv_path.open("w", encoding="utf-8", newline="") as csv_file:
-        writer = csv.DictWriter(csv_file, fieldnames=csv_fieldnames)
-        writer.writeheader()
-        for index, doc in enumerate(documents):
-            row = {
-                "index": index + 1,
-                "document_id": f"'{doc.document_id}",
-                "overall": "" if doc.overall is None else doc.overall,
-                "nid": "" if doc.nid is None else doc.nid,
-                "nid_s": "" if doc.nid_s is None else doc.nid_s,
-                "teds": "" if doc.teds is None else doc.teds,
-                "teds_s": "" if doc.teds_s is None else doc.teds_s,
-                "mhs": "" if doc.mhs is None else doc.mhs,
-                "mhs_s": "" if doc.mhs_s is None else doc.mhs_s,
-            }
-            writer.writerow(row)
-    logging.info("Wrote evaluation CSV to %s", csv_path)
+    with profile_stage("evaluate.write"), span(output_filename, "write"):
+        # Totals first, so both reports stream from the journal in one pass.
+        aggregate = _ScoreAggregate(sample)
+        for payload in journal.entries(doc_ids):
+            aggregate.add(DocumentScores.from_json(payload))
+        output_path = _write_evaluation(
+            prediction_dir,
+            output_filename,
+            map(DocumentScores.from_json, journal.entries(doc_ids)),
+            shard,
+            sample,
+            aggregate,
+        )
+    journal.close(remove=True)
     return output_path
 
 
@@ -295,19 +677,51 @@ def run(
     output_filename: str,
     target_engine: Optional[str] = None,
     target_doc_id: Optional[str] = None,
+    shard: Optional[Shard] = None,
+    metrics: Optional[Sequence[str]] = None,
+    approximate: bool = False,
+    sample: Optional[Sample] = None,
+    timeouts: Optional[Dict[str, float]] = None,
+    timeout_fallback: str = "zero",
+    preflight: Optional[PreflightLimits] = DEFAULT_PREFLIGHT_LIMITS,
+    metrics_textfile: Optional[Path] = None,
+    resume: bool = False,
 ) -> List[Path]:
-    """Evaluate engine/version pairs under ``prediction_root`` optionally filtered to a single document."""
+    """Evaluate engine/version pairs under ``prediction_root`` optionally filtered to a single document.
+
+    ``metrics`` limits scoring to the named metrics (all by default).
+    ``approximate`` replaces TEDS and MHS with bounded estimates; such reports
+    should be written to ``APPROX_OUTPUT_FILENAME`` rather than the published
+    ``evaluation.json``. ``sample`` evaluates a stratified subset and adds
+    confidence intervals to the report. ``timeouts`` gives scorers a time
+    budget in seconds (see ``metric_timeout``). Predictions are read through
+    the ``preflight`` limits; ``None`` reads them unchanged. With
+    ``metrics_textfile``, evaluation telemetry is exported there (see
+    ``telemetry``). ``resume`` continues interrupted runs from their
+    journals (see ``evaluation_journal``).
+    """
+    if shard is not None and sample is not None:
+        raise ValueError("--sample cannot be combined with --shard.")
+    if timeouts:
+        validate_metric_timeouts(timeouts, SCORERS)
     project_root = Path(__file__).parent.parent.resolve()
 
-    ground_truth_dir = project_root / ground_truth_dir_name
+    ground_truth_path = project_root / ground_truth_dir_name
     prediction_root = project_root / prediction_root_name
 
-    if not ground_truth_dir.is_dir():
-        raise FileNotFoundError(f"Ground truth directory not found: {ground_truth_dir}")
+    try:
+        ground_truth_dir = open_markdown(ground_truth_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(
+            f"Ground truth directory not found: {ground_truth_path}"
+        ) from None
 
     if not prediction_root.is_dir():
         raise FileNotFoundError(f"Prediction directory not found: {prediction_root}")
 
+    document_sample = _draw_sample(ground_truth_dir, sample)
+    telemetry = telemetry_file(metrics_textfile)
+
     start_time = time.time()
 
     generated_files: List[Path] = []
@@ -322,11 +736,25 @@ def run(
 
     for engine_dir in engine_dirs:
         result_path = _evaluate_engine_version(
-            ground_truth_dir, engine_dir, output_filename, target_doc_id
+            ground_truth_dir,
+            engine_dir,
+            output_filename,
+            target_doc_id,
+            shard,
+            metrics,
+            approximate,
+            document_sample,
+            timeouts,
+            timeout_fallback,
+            preflight,
+            telemetry,
+            resume,
         )
         if result_path:
             generated_files.append(result_path)
 
+    if telemetry is not None:
+        telemetry.flush(force=True)
     end_time = time.time()
     total_elapsed = end_time - start_time
     logging.info(
@@ -344,7 +772,7 @@ def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
         "--ground-truth-dir",
         type=str,
         default=DEFAULT_GT_DIR,
-        help="Directory containing ground-truth markdown files",
+        help="Directory (or zip/tar/SQLite pack) containing ground-truth markdown files",
     )
     parser.add_argument(
         "--prediction-root",
@@ -367,8 +795,99 @@ def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser.add_argument(
         "--output-filename",
         type=str,
-        default=DEFAULT_OUTPUT_FILENAME,
-        help="Filename for generated evaluation JSON (placed in each version dir)",
+        default=None,
+        help=(
+            "Filename for generated evaluation JSON (placed in each version dir). "
+            f"Defaults to {DEFAULT_OUTPUT_FILENAME}, or {APPROX_OUTPUT_FILENAME} with --approx."
+        ),
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        help="Evaluate only shard i of N (e.g. 1/4); merge with merge_shards.py",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=parse_metrics,
+        default=None,
+        help="Comma-separated metrics to compute (e.g. nid,teds_s). Defaults to all.",
+    )
+    parser.add_argument(
+        "--sample",
+        type=parse_sample_size,
+        default=None,
+        help="Evaluate a stratified sample of N documents (see --seed)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Random seed for --sample",
+    )
+    parser.add_argument(
+        "--metric-timeout",
+        type=parse_metric_timeouts,
+        default=None,
+        help=(
+            "Time budget in seconds per scorer, for all (30), per scorer "
+            "(teds=30,mhs=10) or both (10,teds=60)"
+        ),
+    )
+    parser.add_argument(
+        "--timeout-fallback",
+        choices=TIMEOUT_FALLBACKS,
+        default="zero",
+        help="Score recorded when a scorer runs out of time: 0 or its approximate lower bound",
+    )
+    parser.add_argument(
+        "--preflight",
+        type=parse_preflight_limits,
+        default=DEFAULT_PREFLIGHT_LIMITS,
+        help=(
+            "Prediction size limits, e.g. chars=2000000,lines=20000,cells=10000 "
+            "(unspecified limits keep these defaults), or 'off'"
+        ),
+    )
+    parser.add_argument(
+        "--approx",
+        action="store_true",
+        help="Replace TEDS/MHS tree edit distance with fast estimates and bounds",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip documents already journaled by an interrupted run with the same settings",
+    )
+    parser.add_argument(
+        "--cprofile",
+        type=Path,
+        default=None,
+        help="Write per-stage cProfile .pstats files and a report.txt to this directory",
+    )
+    parser.add_argument(
+        "--cprofile-top",
+        type=parse_top_count,
+        default=DEFAULT_TOP_FUNCTIONS,
+        help="Number of hottest functions listed per stage in the profile report",
+    )
+    parser.add_argument(
+        "--cprofile-slowest",
+        type=parse_top_count,
+        default=None,
+        help="Also keep a profile of each of the K slowest evaluated documents",
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        type=Path,
+        default=None,
+        help="Export evaluation telemetry to this Prometheus text file (.prom)",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        default=None,
+        help="Write a Chrome trace-event timeline of the run to this JSON file",
     )
     parser.add_argument(
         "--log-level",
@@ -383,13 +902,28 @@ def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
 def main(argv: Optional[List[str]] = None) -> None:
     args = _parse_args(argv)
     logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
-    generated = run(
-        args.ground_truth_dir,
-        args.prediction_root,
-        args.output_filename,
-        target_engine=args.engine,
-        target_doc_id=args.doc_id,
+    output_filename = args.output_filename or (
+        APPROX_OUTPUT_FILENAME if args.approx else DEFAULT_OUTPUT_FILENAME
     )
+    with tracing(args.trace), profiling(
+        args.cprofile, args.cprofile_top, args.cprofile_slowest
+    ):
+        generated = run(
+            args.ground_truth_dir,
+            args.prediction_root,
+            output_filename,
+            target_engine=args.engine,
+            target_doc_id=args.doc_id,
+            shard=args.shard,
+            metrics=args.metrics,
+            approximate=args.approx,
+            sample=Sample(args.sample, args.seed) if args.sample is not None else None,
+            timeouts=args.metric_timeout,
+            timeout_fallback=args.timeout_fallback,
+            preflight=args.preflight,
+            metrics_textfile=args.metrics_textfile,
+            resume=args.resume,
+        )
     for path in generated:
         print(path)
 
@@ -0,0 +1,258 @@
+"""Approximate TEDS and MHS scores with guaranteed bounds.
+
+TEDS and MHS run APTED tree edit distance, which dominates evaluation time on
+table-heavy or long documents. This module estimates both from the same
+prepared trees in linear or near-linear time and brackets the exact value:
+
+* **Lower bound on the distance.** The string edit distance between the
+  pre-order label sequences (tag, plus ``colspan``/``rowspan`` for table
+  cells) never exceeds the tree edit distance under unit costs. Content-aware
+  renames cost at least as much as structural ones, so the same value bounds
+  TEDS and MHS from above.
+* **Upper bound on the distance.** Aligning the children of matched nodes by
+  position is a valid edit mapping, so its cost (with the exact rename costs)
+  bounds the distance from above and the score from below. It is exact when
+  both trees have the same shape.
+* **Estimate.** The structural estimate is the lower bound itself, a
+  row/column/span signature comparison. The content estimate adds the rename
+  cost of a cheap node pairing: either bag-of-cells (cells or heading/content
+  nodes with identical text pair up for free, the rest in order) or the
+  pre-order label alignment, whichever is lower. It is clamped to the bounds.
+
+Scores are returned as :class:`Estimate` values; ``metric_registry`` uses them
+when ``evaluator.py --approx`` is given.
+"""
+
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from rapidfuzz.distance import Levenshtein
+
+from evaluator_heading_level import HeadingConfig, heading_structure
+from evaluator_table import CustomConfig, table_html, table_tree
+from evaluator_table import _normalize as _normalize_cell
+from markdown_document import MarkdownDocument
+
+
+@dataclass(frozen=True)
+class Estimate:
+    """An approximate score and bounds that contain the exact score."""
+
+    value: float
+    lower: float
+    upper: float
+
+    @classmethod
+    def exact(cls, value: float) -> "Estimate":
+        return cls(value, value, value)
+
+
+Rename = Callable[[object, object], float]
+
+
+def _preorder(node) -> List:
+    nodes = [node]
+    for child in node.children:
+        nodes.extend(_preorder(child))
+    return nodes
+
+
+def _size(node) -> int:
+    return 1 + sum(_size(child) for child in node.children)
+
+
+def _aligned_distance(node_a, node_b, rename: Rename) -> float:
+    """Cost of mapping children by position; an upper bound on the distance."""
+
+    cost = rename(node_a, node_b)
+    for child_a, child_b in zip(node_a.children, node_b.children):
+        cost += _aligned_distance(child_a, child_b, rename)
+    for extra in node_a.children[len(node_b.children) :]:
+        cost += _size(extra)
+    for extra in node_b.children[len(node_a.children) :]:
+        cost += _size(extra)
+    return cost
+
+
+def _bag_content_cost(
+    nodes_a: List,
+    nodes_b: List,
+    label: Callable[[object], Hashable],
+    content_key: Callable[[object], Hashable],
+    rename: Rename,
+) -> float:
+    """Rename cost of nodes whose content has no identical counterpart.
+
+    Nodes are grouped by structural label; identical contents pair up for
+    free and the leftovers are paired in document order.
+    """
+
+    groups_a: Dict[Hashable, List] = defaultdict(list)
+    groups_b: Dict[Hashable, List] = defaultdict(list)
+    for node in nodes_a:
+        groups_a[label(node)].append(node)
+    for node in nodes_b:
+        groups_b[label(node)].append(node)
+
+    cost = 0.0
+    for node_label, group_a in groups_a.items():
+        group_b = groups_b.get(node_label, [])
+        keys_b = Counter(content_key(node) for node in group_b)
+        keys_a = Counter(content_key(node) for node in group_a)
+        unmatched_a = []
+        for node in group_a:
+            key = content_key(node)
+            if keys_b[key]:
+                keys_b[key] -= 1
+            else:
+                unmatched_a.append(node)
+        unmatched_b = []
+        for node in group_b:
+            key = content_key(node)
+            if keys_a[key]:
+                keys_a[key] -= 1
+            else:
+                unmatched_b.append(node)
+        cost += sum(rename(a, b) for a, b in zip(unmatched_a, unmatched_b))
+    return cost
+
+
+def _aligned_content_cost(
+    nodes_a: List,
+    nodes_b: List,
+    labels_a: List[Hashable],
+    labels_b: List[Hashable],
+    rename: Rename,
+) -> float:
+    """Rename cost of nodes paired by the pre-order label alignment."""
+
+    cost = 0.0
+    for opcode in Levenshtein.opcodes(labels_a, labels_b):
+        if opcode.tag != "equal":
+            continue
+        for offset in range(opcode.src_end - opcode.src_start):
+            cost += rename(
+                nodes_a[opcode.src_start + offset], nodes_b[opcode.dest_start + offset]
+            )
+    return cost
+
+
+def _distance_bounds(
+    tree_a,
+    tree_b,
+    label: Callable[[object], Hashable],
+    rename: Rename,
+    content_key: Optional[Callable[[object], Hashable]] = None,
+) -> Tuple[float, float, float]:
+    """Return ``(estimate, lower, upper)`` for the tree edit distance.
+
+    ``content_key`` enables the content-aware estimate, the cheaper of the
+    bag-of-contents and label-alignment pairings; without it the estimate is
+    the structural lower bound.
+    """
+
+    nodes_a = _preorder(tree_a)
+    nodes_b = _preorder(tree_b)
+    labels_a = [label(node) for node in nodes_a]
+    labels_b = [label(node) for node in nodes_b]
+    lower = float(Levenshtein.distance(labels_a, labels_b))
+    upper = _aligned_distance(tree_a, tree_b, rename)
+
+    estimate = lower
+    if content_key is not None:
+        estimate += min(
+            _bag_content_cost(nodes_a, nodes_b, label, content_key, rename),
+            _aligned_content_cost(nodes_a, nodes_b, labels_a, labels_b, rename),
+        )
+    estimate = min(max(estimate, lower), upper)
+    return estimate, lower, upper
+
+
+def _table_label(node) -> Hashable:
+    return (node.tag, node.colspan, node.rowspan)
+
+
+def _cell_content(node) -> Hashable:
+    return _normalize_cell("".join(node.content or []))
+
+
+def approximate_table(
+    gt: MarkdownDocument,
+    pred: MarkdownDocument,
+    content: bool = True,
+    structure: bool = True,
+) -> Tuple[Optional[Estimate], Optional[Estimate]]:
+    """Approximate ``(TEDS, TEDS-S)`` like ``evaluate_table_documents``."""
+
+    if table_html(gt) is None:
+        return None, None
+    if table_html(pred) is None:
+        zero = Estimate.exact(0.0)
+        return (zero if content else None), (zero if structure else None)
+
+    def estimate(structure_only: bool) -> Estimate:
+        pred_prepared = table_tree(pred, structure_only)
+        gt_prepared = table_tree(gt, structure_only)
+        if pred_prepared is None or gt_prepared is None:
+            return Estimate.exact(0.0)
+        (tree_pred, n_nodes_pred), (tree_gt, n_nodes_gt) = pred_prepared, gt_prepared
+        n_nodes = max(n_nodes_pred, n_nodes_gt)
+        distance, lower, upper = _distance_bounds(
+            tree_pred,
+            tree_gt,
+            _table_label,
+            CustomConfig().rename,
+            content_key=None if structure_only else _cell_content,
+        )
+        return Estimate(
+            1.0 - distance / n_nodes, 1.0 - upper / n_nodes, 1.0 - lower / n_nodes
+        )
+
+    teds_s = estimate(True) if structure else None
+    teds = estimate(False) if content else None
+    return teds, teds_s
+
+
+def _clamp(value: float) -> float:
+    return max(0.0, min(1.0, value))
+
+
+def approximate_heading_level(
+    gt: MarkdownDocument,
+    pred: MarkdownDocument,
+    text: bool = True,
+    structure: bool = True,
+) -> Tuple[Optional[Estimate], Optional[Estimate]]:
+    """Approximate ``(MHS, MHS-S)`` like ``evaluate_heading_level_documents``."""
+
+    gt_tree, gt_has_headings, gt_nodes = heading_structure(gt)
+    if not gt_has_headings:
+        return None, None
+
+    pred_tree, pred_has_headings, pred_nodes = heading_structure(pred)
+    if not pred_has_headings:
+        zero = Estimate.exact(0.0)
+        return (zero if text else None), (zero if structure else None)
+
+    max_nodes = max(gt_nodes, pred_nodes, 1)
+
+    def estimate(include_text: bool) -> Estimate:
+        distance, lower, upper = _distance_bounds(
+            gt_tree,
+            pred_tree,
+            lambda node: node.tag,
+            HeadingConfig(include_text=include_text).rename,
+            content_key=(lambda node: node.text) if include_text else None,
+        )
+        return Estimate(
+            _clamp(1.0 - distance / max_nodes),
+            _clamp(1.0 - upper / max_nodes),
+            _clamp(1.0 - lower / max_nodes),
+        )
+
+    mhs = estimate(True) if text else None
+    mhs_s = estimate(False) if structure else None
+    return mhs, mhs_s
@@ -0,0 +1,208 @@
+"""Compare approximate scores against exact ones and report the error.
+
+Run this after a change to ``evaluator_approx`` (or on a new engine) to check
+that ``evaluator.py --approx`` is still close enough to publish-quality
+numbers::
+
+    uv run src/evaluator_approx_report.py --engine docling --output approx_error.json
+
+Exact scores are read from each engine's ``evaluation.json`` when it covers
+every document and metric, and computed otherwise. For each approximated
+metric the report gives the mean and maximum absolute error, the bias of the
+mean score, how often the bounds contained the exact score (always, unless
+something is broken) and the mean bound width.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+from statistics import fmean
+from typing import Any, Dict, List, Optional
+
+from document_pack import find_markdown, open_markdown
+from evaluator import (
+    DEFAULT_GT_DIR,
+    DEFAULT_OUTPUT_FILENAME,
+    DEFAULT_PREDICTION_ROOT,
+    DocumentScores,
+    _evaluate_single_document,
+    _ground_truth_paths,
+)
+from metric_registry import SCORERS
+
+# Tolerance for floating point noise when checking bound coverage.
+_COVERAGE_EPSILON = 1e-9
+
+
+def _approximated_metrics() -> List[str]:
+    return [
+        metric
+        for scorer in SCORERS.values()
+        if scorer.approximate is not None
+        for metric in scorer.metrics
+    ]
+
+
+def _load_exact_scores(
+    prediction_dir: Path, doc_ids: List[str], metrics: List[str]
+) -> Optional[Dict[str, DocumentScores]]:
+    """Return exact scores from ``evaluation.json`` if it covers ``doc_ids``."""
+
+    path = prediction_dir / DEFAULT_OUTPUT_FILENAME
+    if not path.is_file():
+        return None
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    documents = {
+        entry["document_id"]: DocumentScores.from_json(entry)
+        for entry in payload.get("documents", [])
+    }
+    for doc_id in doc_ids:
+        document = documents.get(doc_id)
+        if document is None or not set(metrics).issubset(document.scores):
+            return None
+    return documents
+
+
+def _metric_report(
+    exact: List[DocumentScores], approx: List[DocumentScores], metric: str
+) -> Optional[Dict[str, Any]]:
+    errors: List[float] = []
+    widths: List[float] = []
+    covered = 0
+    exact_values: List[float] = []
+    approx_values: List[float] = []
+    for exact_doc, approx_doc in zip(exact, approx):
+        exact_value = exact_doc.scores.get(metric)
+        approx_value = approx_doc.scores.get(metric)
+        if exact_value is None or approx_value is None:
+            continue
+        lower, upper = (approx_doc.bounds or {}).get(metric, (approx_value, approx_value))
+        exact_values.append(exact_value)
+        approx_values.append(approx_value)
+        errors.append(abs(approx_value - exact_value))
+        widths.append(upper - lower)
+        if lower - _COVERAGE_EPSILON <= exact_value <= upper + _COVERAGE_EPSILON:
+            covered += 1
+    if not errors:
+        return None
+    return {
+        "documents": len(errors),
+        "exact_mean": fmean(exact_values),
+        "approx_mean": fmean(approx_values),
+        "bias": fmean(approx_values) - fmean(exact_values),
+        "mean_abs_error": fmean(errors),
+        "max_abs_error": max(errors),
+        "bound_coverage": covered / len(errors),
+        "mean_bound_width": fmean(widths),
+    }
+
+
+def compare_engine(gt_dir: Path, prediction_dir: Path) -> Optional[Dict[str, Any]]:
+    """Return the approximation error report for one engine directory."""
+
+    markdown_dir = find_markdown(prediction_dir)
+    if markdown_dir is None:
+        logging.info("Skipping %s (no markdown directory or pack)", prediction_dir)
+        return None
+    gt_paths = _ground_truth_paths(gt_dir)
+    doc_ids = [path.stem for path in gt_paths]
+    metrics = _approximated_metrics()
+
+    start = time.perf_counter()
+    approx = [
+        _evaluate_single_document(
+            path.stem, path, markdown_dir / path.name, metrics, approximate=True
+        )
+        for path in gt_paths
+    ]
+    approx_elapsed = time.perf_counter() - start
+
+    exact_elapsed: Optional[float] = None
+    loaded = _load_exact_scores(prediction_dir, doc_ids, metrics)
+    if loaded is None:
+        start = time.perf_counter()
+        exact = [
+            _evaluate_single_document(path.stem, path, markdown_dir / path.name, metrics)
+            for path in gt_paths
+        ]
+        exact_elapsed = time.perf_counter() - start
+    else:
+        exact = [loaded[doc_id] for doc_id in doc_ids]
+
+    return {
+        "documents": len(doc_ids),
+        "approx_elapsed": approx_elapsed,
+        "exact_elapsed": exact_elapsed,
+        "metrics": {
+            metric: _metric_report(exact, approx, metric) for metric in metrics
+        },
+    }
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Report the error of approximate TEDS/MHS against exact scores"
+    )
+    parser.add_argument(
+        "--ground-truth-dir",
+        type=str,
+        default=DEFAULT_GT_DIR,
+        help="Directory containing ground-truth markdown files",
+    )
+    parser.add_argument(
+        "--prediction-root",
+        type=str,
+        default=DEFAULT_PREDICTION_ROOT,
+        help="Root directory containing engine predictions",
+    )
+    parser.add_argument("--engine", type=str, help="Only report this engine")
+    parser.add_argument("--output", type=str, help="Write the report as JSON to this path")
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=list(logging.getLevelNamesMapping().keys()),
+        default="INFO",
+        help="Python logging level (e.g. INFO, DEBUG)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
+    project_root = Path(__file__).parent.parent.resolve()
+    gt_dir = open_markdown(project_root / args.ground_truth_dir)
+    prediction_root = project_root / args.prediction_root
+    if not prediction_root.is_dir():
+        raise FileNotFoundError(f"Prediction root not found: {prediction_root}")
+
+    engine_dirs = sorted(path for path in prediction_root.iterdir() if path.is_dir())
+    if args.engine:
+        engine_dirs = [path for path in engine_dirs if path.name == args.engine]
+
+    report: Dict[str, Any] = {}
+    for engine_dir in engine_dirs:
+        result = compare_engine(gt_dir, engine_dir)
+        if result is None:
+            continue
+        report[engine_dir.name] = result
+        for metric, stats in result["metrics"].items():
+            if stats is None:
+                continue
+            print(
+                f"{engine_dir.name:<16} {metric:<7} "
+                f"mae={stats['mean_abs_error']:.4f} max={stats['max_abs_error']:.4f} "
+                f"bias={stats['bias']:+.4f} coverage={stats['bound_coverage']:.2%} "
+                f"width={stats['mean_bound_width']:.4f}"
+            )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry point
+    main()
@@ -21,7 +21,7 @@ from rapidfuzz.distance import Levenshtein
 from apted import APTED, Config
 from apted.helpers import Tree
 
-from converter_markdown_table import convert_to_markdown_with_html_tables
+from markdown_document import MarkdownDocument
 
 _HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*)$")
 
@@ -122,34 +122,58 @@ def _compute_edit_distance(
     return float(APTED(tree_a, tree_b, config).compute_edit_distance())
 
 
-def evaluate_heading_level(
-    gt: Optional[str], pred: Optional[str]
+def heading_structure(document: MarkdownDocument) -> Tuple[HeadingTree, bool, int]:
+    """Return the heading tree of ``document``, whether it has headings, and its size."""
+
+    def build(doc: MarkdownDocument) -> Tuple[HeadingTree, bool, int]:
+        tree = _parse_markdown_structure(doc.with_html)
+        has_headings = any(child.tag == "heading" for child in tree.children)
+        return tree, has_headings, _count_nodes(tree)
+
+    return document.artifact("heading_structure", build)
+
+
+def evaluate_heading_level_documents(
+    gt: MarkdownDocument,
+    pred: MarkdownDocument,
+    text: bool = True,
+    structure: bool = True,
 ) -> Tuple[Optional[float], Optional[float]]:
-    """Return ``(MHS, MHS-S)`` similarity scores in ``[0.0, 1.0]``.
+    """Document-level variant of :func:`evaluate_heading_level`.
 
-    Returns ``(None, None)`` when the ground truth lacks any heading nodes.
-    Returns ``(0.0, 0.0)`` when headings exist in the ground truth but not in
-    the prediction.
+    ``text``/``structure`` select MHS and MHS-S; a skipped score is returned
+    as ``None`` without running its tree edit distance.
     """
-    gt_with_html = convert_to_markdown_with_html_tables(gt)
-    pred_with_html = convert_to_markdown_with_html_tables(pred)
 
-    gt_tree = _parse_markdown_structure(gt_with_html)
-    if not any(child.tag == "heading" for child in gt_tree.children):
+    gt_tree, gt_has_headings, gt_nodes = heading_structure(gt)
+    if not gt_has_headings:
         return None, None
 
-    pred_tree = _parse_markdown_structure(pred_with_html)
-    if not any(child.tag == "heading" for child in pred_tree.children):
-        return 0.0, 0.0
-
-    max_nodes = max(_count_nodes(gt_tree), _count_nodes(pred_tree), 1)
+    pred_tree, pred_has_headings, pred_nodes = heading_structure(pred)
+    if not pred_has_headings:
+        return (0.0 if text else None), (0.0 if structure else None)
+
+    max_nodes = max(gt_nodes, pred_nodes, 1)
+
+    mhs = mhs_s = None
+    if text:
+        edit_with_text = _compute_edit_distance(gt_tree, pred_tree, include_text=True)
+        mhs = max(0.0, min(1.0, 1.0 - (edit_with_text / max_nodes)))
+    if structure:
+        edit_structure_only = _compute_edit_distance(
+            gt_tree, pred_tree, include_text=False
+        )
+        mhs_s = max(0.0, min(1.0, 1.0 - (edit_structure_only / max_nodes)))
+    return mhs, mhs_s
 
-    edit_with_text = _compute_edit_distance(gt_tree, pred_tree, include_text=True)
-    edit_structure_only = _compute_edit_distance(gt_tree, pred_tree, include_text=False)
 
-    mhs = 1.0 - (edit_with_text / max_nodes)
-    mhs_s = 1.0 - (edit_structure_only / max_nodes)
+def evaluate_heading_level(
+    gt: Optional[str], pred: Optional[str]
+) -> Tuple[Optional[float], Optional[float]]:
+    """Return ``(MHS, MHS-S)`` similarity scores in ``[0.0, 1.0]``.
 
-    mhs = max(0.0, min(1.0, mhs))
-    mhs_s = max(0.0, min(1.0, mhs_s))
-    return mhs, mhs_s
+    Returns ``(None, None)`` when the ground truth lacks any heading nodes.
+    Returns ``(0.0, 0.0)`` when headings exist in the ground truth but not in
+    the prediction.
+    """
+    return evaluate_heading_level_documents(MarkdownDocument(gt), MarkdownDocument(pred))
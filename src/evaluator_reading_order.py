@@ -5,7 +5,7 @@ from typing import Tuple, Optional
 
 from rapidfuzz import fuzz
 
-from converter_markdown_table import convert_to_markdown_with_html_tables
+from markdown_document import MarkdownDocument
 
 _HTML_TABLE_PATTERN = re.compile(r"<table[^>]*?>.*?</table>", re.IGNORECASE | re.DOTALL)
 
@@ -19,22 +19,32 @@ def _strip_tables(text: str) -> str:
     return without_html
 
 
-def evaluate_reading_order(
-    gt: str, pred: str
+def reading_order_texts(document: MarkdownDocument) -> Tuple[str, str]:
+    """Return the normalised text of ``document`` with and without tables."""
+
+    def build(doc: MarkdownDocument) -> Tuple[str, str]:
+        with_html = doc.with_html
+        return _normalize(with_html), _normalize(_strip_tables(with_html or ""))
+
+    return document.artifact("reading_order", build)
+
+
+def evaluate_reading_order_documents(
+    gt: MarkdownDocument, pred: MarkdownDocument
 ) -> Tuple[Optional[float], Optional[float]]:
-    gt_with_html = convert_to_markdown_with_html_tables(gt)
-    gt_normalized = _normalize(gt_with_html)
-    gt_stripped = _strip_tables(gt_with_html or "")
-    gt_stripped_normalized = _normalize(gt_stripped)
+    gt_normalized, gt_stripped_normalized = reading_order_texts(gt)
     if not gt_normalized:
         return None, None
 
-    pred_with_html = convert_to_markdown_with_html_tables(pred)
-    pred_normalized = _normalize(pred_with_html)
-    pred_stripped = _strip_tables(pred_with_html or "")
-    pred_stripped_normalized = _normalize(pred_stripped)
+    pred_normalized, pred_stripped_normalized = reading_order_texts(pred)
 
     nid_score = fuzz.ratio(gt_normalized, pred_normalized) / 100.0
     nid_s_score = fuzz.ratio(gt_stripped_normalized, pred_stripped_normalized) / 100.0
 
     return nid_score, nid_s_score
+
+
+def evaluate_reading_order(
+    gt: str, pred: str
+) -> Tuple[Optional[float], Optional[float]]:
+    return evaluate_reading_order_documents(MarkdownDocument(gt), MarkdownDocument(pred))
@@ -16,7 +16,7 @@ from apted.helpers import Tree
 from apted import APTED, Config
 from bs4 import BeautifulSoup
 
-from converter_markdown_table import convert_to_markdown_with_html_tables
+from markdown_document import MarkdownDocument
 
 
 class TableTree(Tree):
@@ -135,33 +135,38 @@ class TEDSEvaluator(object):
         if parent is None:
             return new_node
 
+    def prepare(self, document):
+        """Parse an HTML document into an APTED tree and its node count.
+
+        Returns ``None`` when ``document`` is empty or has no ``body/table``.
+        """
+        if not document:
+            return None
+        parser = html.HTMLParser(remove_comments=True, encoding="utf-8")
+        root = html.fromstring(document, parser=parser)
+        if not root.xpath("body/table"):
+            return None
+        table = root.xpath("body/table")[0]
+        _convert_headers_to_cells(table)
+        if self.ignore_nodes:
+            etree.strip_tags(table, *self.ignore_nodes)
+        return self.load_html_tree(table), len(table.xpath(".//*"))
+
+    def evaluate_prepared(self, pred, true):
+        """Computes TEDS score between two trees returned by :meth:`prepare`"""
+        if pred is None or true is None:
+            return 0.0
+        tree_pred, n_nodes_pred = pred
+        tree_true, n_nodes_true = true
+        n_nodes = max(n_nodes_pred, n_nodes_true)
+        distance = APTED(tree_pred, tree_true, CustomConfig()).compute_edit_distance()
+        return 1.0 - (float(distance) / n_nodes)
+
     def evaluate(self, pred, true):
         """Computes TEDS score between the prediction and the ground truth of a given sample"""
         if (not pred) or (not true):
             return 0.0
-        parser = html.HTMLParser(remove_comments=True, encoding="utf-8")
-        pred = html.fromstring(pred, parser=parser)
-        true = html.fromstring(true, parser=parser)
-
-        if pred.xpath("body/table") and true.xpath("body/table"):
-            pred = pred.xpath("body/table")[0]
-            true = true.xpath("body/table")[0]
-            _convert_headers_to_cells(pred)
-            _convert_headers_to_cells(true)
-            if self.ignore_nodes:
-                etree.strip_tags(pred, *self.ignore_nodes)
-                etree.strip_tags(true, *self.ignore_nodes)
-            n_nodes_pred = len(pred.xpath(".//*"))
-            n_nodes_true = len(true.xpath(".//*"))
-            n_nodes = max(n_nodes_pred, n_nodes_true)
-            tree_pred = self.load_html_tree(pred)
-            tree_true = self.load_html_tree(true)
-            distance = APTED(
-                tree_pred, tree_true, CustomConfig()
-            ).compute_edit_distance()
-            return 1.0 - (float(distance) / n_nodes)
-        else:
-            return 0.0
+        return self.evaluate_prepared(self.prepare(pred), self.prepare(true))
 
 
 def _normalize(text: str) -> str:
@@ -176,32 +181,30 @@ def _convert_headers_to_cells(node: etree.Element) -> None:
         header.tag = "td"
 
 
-def calc_table_score(
-    gt_string: str, pred_string: str, evaluator: TEDSEvaluator
-) -> float:
-    """Convert edit distance into a similarity score in ``[0.0, 1.0]``."""
+def _refine_table_html(table_string: str) -> str:
+    """Wrap ``table_string`` in ``<html><body>`` and drop ``thead``/``tbody``."""
 
-    refined_pred = pred_string
-    refined_gold = gt_string
-    if pred_string.startswith("<table>") and pred_string.endswith("</table>"):
-        refined_pred = "<html><body>" + pred_string + "</body></html>"
-    elif not pred_string.startswith("<html><body><table>") and not pred_string.endswith(
+    refined = table_string
+    if table_string.startswith("<table>") and table_string.endswith("</table>"):
+        refined = "<html><body>" + table_string + "</body></html>"
+    elif not table_string.startswith("<html><body><table>") and not table_string.endswith(
         "</table></body></html>"
     ):
-        refined_pred = "<html><body><table>" + refined_pred + "</table></body></html>"
-
-    if gt_string.startswith("<table>") and gt_string.endswith("</table>"):
-        refined_gold = "<html><body>" + gt_string + "</body></html>"
-    elif not gt_string.startswith("<html><body><table>") and not gt_string.endswith(
-        "</table></body></html>"
-    ):
-        refined_gold = "<html><body><table>" + refined_gold + "</table></body></html>"
+        refined = "<html><body><table>" + refined + "</table></body></html>"
 
     # remove thead and tbody
     for tok in ["<thead>", "</thead>", "<tbody>", "</tbody>"]:
-        refined_pred = refined_pred.replace(tok, "")
-        refined_gold = refined_gold.replace(tok, "")
+        refined = refined.replace(tok, "")
+    return refined
+
+
+def calc_table_score(
+    gt_string: str, pred_string: str, evaluator: TEDSEvaluator
+) -> float:
+    """Convert edit distance into a similarity score in ``[0.0, 1.0]``."""
 
+    refined_pred = _refine_table_html(pred_string)
+    refined_gold = _refine_table_html(gt_string)
     score = evaluator.evaluate(refined_pred, refined_gold)
     return score
 
@@ -219,30 +222,73 @@ def wrap_tables_in_html(tables: list[str]) -> str:
     return f"<html><body>\n{body_content}\n</body></html>"
 
 
-def evaluate_table(gt: str, pred: str) -> Tuple[Optional[float], Optional[float]]:
-    """Evaluate predicted table markup against ground truth using TEDS metrics.
+def table_html(document: MarkdownDocument) -> Optional[str]:
+    """Return the document's tables wrapped for TEDS, or ``None`` without tables."""
 
-    Returns ``(None, None)`` when the ground truth does not contain a table.
+    def build(doc: MarkdownDocument) -> Optional[str]:
+        tables = extract_tables(doc.with_html)
+        if not tables:
+            return None
+        return _refine_table_html(wrap_tables_in_html(tables))
+
+    return document.artifact("table_html", build)
+
+
+def table_tree(document: MarkdownDocument, structure_only: bool):
+    """Return the TEDS tree and node count of the document's tables.
+
+    ``None`` when the document has no table or the markup has no parsable
+    ``body/table``.
     """
 
-    gt_with_html = convert_to_markdown_with_html_tables(gt)
-    pred_with_html = convert_to_markdown_with_html_tables(pred)
+    def build(doc: MarkdownDocument):
+        refined = table_html(doc)
+        if refined is None:
+            return None
+        return TEDSEvaluator(structure_only=structure_only).prepare(refined)
 
-    gt_tables = extract_tables(gt_with_html)
-    pred_tables = extract_tables(pred_with_html)
+    key = "table_tree_structure" if structure_only else "table_tree_content"
+    return document.artifact(key, build)
 
-    if not gt_tables:
-        return None, None
-    if not pred_tables:
-        return 0.0, 0.0
 
-    gt_data = wrap_tables_in_html(gt_tables)
-    pred_data = wrap_tables_in_html(pred_tables)
+def evaluate_table_documents(
+    gt: MarkdownDocument,
+    pred: MarkdownDocument,
+    content: bool = True,
+    structure: bool = True,
+) -> Tuple[Optional[float], Optional[float]]:
+    """Document-level variant of :func:`evaluate_table`.
 
-    structure_evaluator = TEDSEvaluator(structure_only=True)
-    teds_s_score = calc_table_score(gt_data, pred_data, structure_evaluator)
+    ``content``/``structure`` select TEDS and TEDS-S; a skipped score is
+    returned as ``None`` and its tree is never built.
+    """
 
-    content_evaluator = TEDSEvaluator(structure_only=False)
-    teds_score = calc_table_score(gt_data, pred_data, content_evaluator)
+    if table_html(gt) is None:
+        return None, None
+    if table_html(pred) is None:
+        return (0.0 if content else None), (0.0 if structure else None)
+
+    teds_s_score = None
+    if structure:
+        structure_evaluator = TEDSEvaluator(structure_only=True)
+        teds_s_score = structure_evaluator.evaluate_prepared(
+            table_tree(pred, True), table_tree(gt, True)
+        )
+
+    teds_score = None
+    if content:
+        content_evaluator = TEDSEvaluator(structure_only=False)
+        teds_score = content_evaluator.evaluate_prepared(
+            table_tree(pred, False), table_tree(gt, False)
+        )
 
     return teds_score, teds_s_score
+
+
+def evaluate_table(gt: str, pred: str) -> Tuple[Optional[float], Optional[float]]:
+    """Evaluate predicted table markup against ground truth using TEDS metrics.
+
+    Returns ``(None, None)`` when the ground truth does not contain a table.
+    """
+
+    return evaluate_table_documents(MarkdownDocument(gt), MarkdownDocument(pred))
@@ -1,13 +1,23 @@
-"""Generate benchmark bar charts from evaluation.json files."""
+"""Generate benchmark bar charts from evaluation.json files.
+
+Accuracy charts run the paired significance tests from ``score_statistics``
+on the per-document scores: engines that are not significantly different
+from the leader share its colour with a hatch, and the pairwise matrices are
+written next to the chart as ``<chart>_comparison.json``.
+
+``--trends`` plots every engine's seconds per page and accuracy across the
+runs recorded in the ``history_store`` SQLite store instead.
+"""
 
 from __future__ import annotations
 
 import argparse
 import json
 import logging
+from contextlib import closing
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
 
 import matplotlib
 
@@ -15,9 +25,14 @@ matplotlib.use("Agg")
 
 import matplotlib.pyplot as plt
 
+from benchmark_profiles import profile_root
+from history_store import TREND_METRICS, TrendPoint, open_store, trend
+from score_statistics import EngineComparison, compare_engines, load_engine_scores
+
 
 DEFAULT_PREDICTION_ROOT = Path("prediction")
 DEFAULT_OUTPUT_PATH = Path("charts/benchmark.png")
+DEFAULT_TRENDS_OUTPUT_PATH = Path("charts/trends.png")
 MIN_BAR_HEIGHT = 0.01
 
 # Colors for accuracy charts
@@ -26,6 +41,11 @@ OTHER_COLOR = "#94A3B8"       # medium slate for others
 # Colors for time chart
 TIME_WINNER_COLOR = "#F28E2C" # orange for 1st place
 TIME_OTHER_COLOR = "#FDBA74"  # medium orange for others
+# Engines statistically tied with the leader
+TIED_HATCH = "//"
+
+# Accuracy metrics tested for ties, as ``evaluation.json`` names them
+COMPARED_METRICS = ("overall", "nid", "teds", "mhs")
 
 
 @dataclass
@@ -127,8 +147,13 @@ def _plot_single_metric(
     engines: List[EngineMetrics],
     values: List[Optional[float]],
     title: str,
+    tied_with: Optional[Callable[[str], Set[str]]] = None,
 ) -> None:
-    """Plot a single bar chart for one metric."""
+    """Plot a single bar chart for one metric.
+
+    ``tied_with(label)`` returns the engines not significantly different from
+    ``label``; those tied with the leader are drawn in its colour, hatched.
+    """
 
     sortable = list(zip(engines, values))
     sortable.sort(key=lambda item: (item[1] is None, -(item[1] or 0.0)))
@@ -138,10 +163,20 @@ def _plot_single_metric(
     labels = [engine.label for engine in sorted_engines]
     index = range(len(labels))
     clean_values = [value or 0.0 for value in sorted_values]
-    colors = [WINNER_COLOR if i == 0 else OTHER_COLOR for i in range(len(labels))]
+    tied = tied_with(labels[0]) if tied_with is not None and labels else set()
+    colors = [
+        WINNER_COLOR if i == 0 or label in tied else OTHER_COLOR
+        for i, label in enumerate(labels)
+    ]
     bars = ax.bar(labels, clean_values, color=colors)
+    for bar, label in zip(bars[1:], labels[1:]):
+        if label in tied:
+            bar.set_hatch(TIED_HATCH)
+            bar.set_edgecolor("white")
     _ensure_min_bar_height(bars, sorted_values)
     _add_value_labels(ax, bars, sorted_values)
+    if tied:
+        ax.set_xlabel("Hatched: not significantly different from the leader", fontsize=9)
     ax.set_ylim(0, 1)
     ax.set_title(title, fontsize=14)
     ax.set_xticks(list(index))
@@ -247,8 +282,37 @@ def _save_individual_chart(
     logging.info("Saved individual chart to %s", output_path)
 
 
-def generate_charts(prediction_root: Path, output_path: Path) -> Path:
-    """Create the benchmark chart and save it to disk."""
+def _load_comparison(prediction_root: Path) -> Optional[EngineComparison]:
+    """Run the pairwise significance tests on the per-document scores."""
+
+    try:
+        comparison = compare_engines(
+            load_engine_scores(prediction_root), metrics=COMPARED_METRICS
+        )
+    except (KeyError, ValueError) as exc:
+        logging.warning("Skipping significance tests: %s", exc)
+        return None
+    return comparison if comparison.metrics else None
+
+
+def _ties(
+    comparison: Optional[EngineComparison], metric: str
+) -> Optional[Callable[[str], Set[str]]]:
+    if comparison is None:
+        return None
+    return lambda label: comparison.tied_with(metric, label)
+
+
+def generate_charts(
+    prediction_root: Path,
+    output_path: Path,
+    profile_name: Optional[str] = None,
+) -> Path:
+    """Create the benchmark chart and save it to disk.
+
+    When ``profile_name`` is given the title notes the resource profile the
+    engines under ``prediction_root`` were measured with.
+    """
 
     engines = _load_evaluation_metrics(prediction_root)
     if not engines:
@@ -261,6 +325,8 @@ def generate_charts(prediction_root: Path, output_path: Path) -> Path:
         reverse=True,
     )
 
+    comparison = _load_comparison(prediction_root)
+
     plt.style.use("ggplot")
     fig, axes = plt.subplots(3, 2, figsize=(12, 10), constrained_layout=True)
 
@@ -275,6 +341,7 @@ def generate_charts(prediction_root: Path, output_path: Path) -> Path:
         engines,
         overall_values,
         "Extraction Accuracy",
+        _ties(comparison, "overall"),
     )
 
     _plot_time_metric(
@@ -288,6 +355,7 @@ def generate_charts(prediction_root: Path, output_path: Path) -> Path:
         engines,
         nid_values,
         "Reading Order (NID)",
+        _ties(comparison, "nid"),
     )
 
     _plot_single_metric(
@@ -295,6 +363,7 @@ def generate_charts(prediction_root: Path, output_path: Path) -> Path:
         engines,
         teds_values,
         "Table Structure (TEDS)",
+        _ties(comparison, "teds"),
     )
 
     _plot_single_metric(
@@ -302,39 +371,68 @@ def generate_charts(prediction_root: Path, output_path: Path) -> Path:
         engines,
         mhs_values,
         "Heading Level (MHS)",
+        _ties(comparison, "mhs"),
     )
 
     axes[2, 1].axis("off")
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    fig.suptitle("PDF-to-Markdown Benchmark", fontsize=18)
+    title = "PDF-to-Markdown Benchmark"
+    if profile_name:
+        title = f"{title} ({profile_name})"
+    fig.suptitle(title, fontsize=18)
     fig.savefig(output_path, dpi=200)
     plt.close(fig)
 
     logging.info("Saved benchmark chart to %s", output_path)
 
+    if comparison is not None:
+        comparison_path = output_path.with_name(f"{output_path.stem}_comparison.json")
+        comparison_path.write_text(json.dumps(comparison.to_json(), indent=2))
+        logging.info("Saved engine comparison to %s", comparison_path)
+
     suffix = "".join(output_path.suffixes) or ".png"
     stem = output_path.stem
     chart_specs: List[Tuple[str, Callable[..., None], Tuple[object, ...]]] = [
         (
             "overall",
             _plot_single_metric,
-            (engines, overall_values, "Extraction Accuracy"),
+            (
+                engines,
+                overall_values,
+                "Extraction Accuracy",
+                _ties(comparison, "overall"),
+            ),
         ),
         (
             "reading-order",
             _plot_single_metric,
-            (engines, nid_values, "Reading Order (NID)"),
+            (
+                engines,
+                nid_values,
+                "Reading Order (NID)",
+                _ties(comparison, "nid"),
+            ),
         ),
         (
             "table-structure",
             _plot_single_metric,
-            (engines, teds_values, "Table Structure (TEDS)"),
+            (
+                engines,
+                teds_values,
+                "Table Structure (TEDS)",
+                _ties(comparison, "teds"),
+            ),
         ),
         (
             "heading-level",
             _plot_single_metric,
-            (engines, mhs_values, "Heading Level (MHS)"),
+            (
+                engines,
+                mhs_values,
+                "Heading Level (MHS)",
+                _ties(comparison, "mhs"),
+            ),
         ),
         (
             "extraction-time",
@@ -350,6 +448,85 @@ def generate_charts(prediction_root: Path, output_path: Path) -> Path:
     return output_path
 
 
+_TREND_TITLES = {
+    "overall": "Extraction Accuracy",
+    "nid": "Reading Order (NID)",
+    "teds": "Table Structure (TEDS)",
+    "mhs": "Heading Level (MHS)",
+}
+
+
+def _plot_trend(
+    ax,
+    points: Sequence[TrendPoint],
+    value: Callable[[TrendPoint], Optional[float]],
+    title: str,
+    ylabel: str = "Score",
+) -> None:
+    engines: Dict[str, List[TrendPoint]] = {}
+    for point in points:
+        engines.setdefault(point.engine, []).append(point)
+    for engine, runs in engines.items():
+        series = [(run.date, value(run)) for run in runs if value(run) is not None]
+        if not series:
+            continue
+        dates, values = zip(*series)
+        ax.plot(dates, values, marker="o", label=engine)
+    ax.set_title(title)
+    ax.set_ylabel(ylabel, fontsize=12)
+    ax.tick_params(axis="x", labelrotation=45)
+    if ax.get_lines():
+        ax.legend(fontsize=8)
+
+
+def generate_trend_charts(
+    store_path: Path,
+    output_path: Path,
+    engine: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Path:
+    """Plot speed and accuracy across the runs recorded in ``store_path``.
+
+    ``limit`` keeps each engine's most recent runs.
+    """
+
+    if not store_path.is_file():
+        raise FileNotFoundError(f"History store not found: {store_path.resolve()}")
+    with closing(open_store(store_path)) as connection:
+        points = trend(connection, engine, TREND_METRICS, limit)
+    if not points:
+        raise FileNotFoundError(f"No runs recorded in {store_path.resolve()}")
+
+    plt.style.use("ggplot")
+    fig, axes = plt.subplots(3, 2, figsize=(12, 10), constrained_layout=True)
+    _plot_trend(
+        axes[0, 1],
+        points,
+        lambda point: (
+            point.seconds_per_page
+            if point.seconds_per_page is not None
+            else point.seconds_per_document
+        ),
+        "Elapsed Time per Page",
+        ylabel="Seconds",
+    )
+    for ax, metric in zip((axes[0, 0], axes[1, 0], axes[1, 1], axes[2, 0]), TREND_METRICS):
+        _plot_trend(
+            ax,
+            points,
+            lambda point, metric=metric: point.means[metric],
+            _TREND_TITLES[metric],
+        )
+    axes[2, 1].axis("off")
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fig.suptitle("PDF-to-Markdown Benchmark Trends", fontsize=18)
+    fig.savefig(output_path, dpi=200)
+    plt.close(fig)
+    logging.info("Saved trend chart to %s", output_path)
+    return output_path
+
+
 def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Generate bar charts from evaluation.json files"
@@ -363,9 +540,38 @@ def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser.add_argument(
         "--output",
         type=Path,
-        default=DEFAULT_OUTPUT_PATH,
+        default=None,
         help="Destination file for the generated chart image",
     )
+    parser.add_argument(
+        "--profile",
+        default=None,
+        help=(
+            "Compare engines measured under a resource profile (e.g. 2c-4g) "
+            "using prediction-root/profiles/<profile>"
+        ),
+    )
+    parser.add_argument(
+        "--trends",
+        type=Path,
+        default=None,
+        metavar="STORE",
+        help=(
+            "Plot trends from a history store (e.g. history/history.sqlite) "
+            f"to --output, defaulting to {DEFAULT_TRENDS_OUTPUT_PATH}"
+        ),
+    )
+    parser.add_argument(
+        "--trend-engine",
+        default=None,
+        help="Only plot this engine's trend",
+    )
+    parser.add_argument(
+        "--trend-limit",
+        type=int,
+        default=None,
+        help="Most recent runs per engine in the trend chart",
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
@@ -377,7 +583,23 @@ def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
 def main(argv: Optional[List[str]] = None) -> None:
     args = _parse_args(argv)
     logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
-    output = generate_charts(args.prediction_root, args.output)
+    if args.trends is not None:
+        output = generate_trend_charts(
+            args.trends,
+            args.output or DEFAULT_TRENDS_OUTPUT_PATH,
+            engine=args.trend_engine,
+            limit=args.trend_limit,
+        )
+        print(output)
+        return
+    prediction_root = args.prediction_root
+    output_path = args.output or DEFAULT_OUTPUT_PATH
+    if args.profile:
+        prediction_root = profile_root(prediction_root, args.profile)
+        output_path = output_path.with_name(
+            f"{output_path.stem}_{args.profile}{output_path.suffix}"
+        )
+    output = generate_charts(prediction_root, output_path, profile_name=args.profile)
     print(output)
 
 
@@ -1,8 +1,33 @@
-import json
+"""Generate ``ground-truth/markdown/*.md`` from ``reference.json``.
+
+``reference.json`` is read one document at a time (see ``reference_reader``)
+and documents are rendered on a pool of worker processes with a bounded
+number in flight, so memory does not grow with the corpus. A Markdown file
+is only written when its content changed, which keeps the modification
+times, and so the corpus manifest and other caches, of unchanged documents
+stable::
+
+    uv run src/generate_groundtruth_markdown.py --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
 import os
-from typing import Callable, Dict
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Mapping, Optional, Tuple
+
 from bs4 import BeautifulSoup
 
+from reference_reader import iter_reference
+
+# Documents queued per worker before the reader waits for results.
+_IN_FLIGHT_PER_WORKER = 4
+
 
 def _format_heading1(text: str) -> str:
     stripped = text.strip()
@@ -25,58 +50,156 @@ def _format_content_by_category(category: str, text: str) -> str:
     return formatter(text) if formatter else text
 
 
-def extract_markdown_from_reference(json_path, output_dir):
-    """
-    Extracts content from a reference.json file and saves it to .md files.
+def render_markdown(elements: Iterable[Mapping[str, Any]]) -> str:
+    """Render one document's reference elements as ground-truth Markdown.
+
     - For elements with category 'table', it uses the prettified html content wrapped in <table> tags.
     - For other elements, it prefers text content, adds a level-1 heading for 'Heading1',
       formats lists with leading hyphens, and leaves other categories as-is.
+    """
+    all_content = []
+    for element in elements:
+        if "content" in element:
+            category = element.get("category", "").lower()
+            content_data = element["content"]
+            content_to_add = None
+
+            if category == "table":
+                html_content = content_data.get("html")
+                if html_content:
+                    full_table_html = f"<table>{html_content}</table>"
+                    soup = BeautifulSoup(full_table_html, "html.parser")
+                    content_to_add = soup.prettify()
+            else:
+                text_content = content_data.get("text")
+                if text_content:
+                    content_to_add = _format_content_by_category(
+                        category, text_content
+                    )
+
+            if content_to_add:
+                all_content.append(content_to_add)
+    return "\n\n".join(all_content)
+
+
+@dataclass
+class GenerationReport:
+    """Number of Markdown files written, left unchanged and skipped as empty."""
+
+    written: int = 0
+    unchanged: int = 0
+    empty: int = 0
+
+
+def _write_document(
+    pdf_filename: str, elements: List[Mapping[str, Any]], output_dir: str
+) -> Optional[bool]:
+    """Render and store one document; ``None`` when it has no content.
+
+    Returns whether the file was written. An existing file with the same
+    content is left untouched.
+    """
+    markdown = render_markdown(elements)
+    if not markdown:
+        return None
+    output_path = Path(output_dir) / (os.path.splitext(pdf_filename)[0] + ".md")
+    data = markdown.encode("utf-8")
+    try:
+        if output_path.stat().st_size == len(data) and output_path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    temporary = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    temporary.write_bytes(data)
+    os.replace(temporary, output_path)
+    return True
+
+
+def extract_markdown_from_reference(
+    json_path, output_dir, workers: Optional[int] = None
+) -> GenerationReport:
+    """
+    Extracts content from a reference.json file and saves it to .md files.
+    Each document is rendered by :func:`render_markdown`; files whose
+    content is unchanged are not rewritten.
 
     Args:
         json_path (str): The path to the reference.json file.
         output_dir (str): The directory to save the output .md files.
+        workers (int): Worker processes; defaults to the CPU count, and ``0``
+            or ``1`` renders in the calling process.
     """
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    report = GenerationReport()
+
+    def record(pdf_filename: str, written: Optional[bool]) -> None:
+        if written is None:
+            report.empty += 1
+        elif written:
+            report.written += 1
+            logging.info("Wrote %s", os.path.splitext(pdf_filename)[0] + ".md")
+        else:
+            report.unchanged += 1
+
+    documents = (
+        (pdf_filename, content.get("elements", []))
+        for pdf_filename, content in iter_reference(json_path)
+    )
+    if workers <= 1:
+        for pdf_filename, elements in documents:
+            record(pdf_filename, _write_document(pdf_filename, elements, output_dir))
+    else:
+        max_in_flight = workers * _IN_FLIGHT_PER_WORKER
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending: Deque[Tuple[str, Future]] = deque()
+            for pdf_filename, elements in documents:
+                future = executor.submit(
+                    _write_document, pdf_filename, elements, output_dir
+                )
+                pending.append((pdf_filename, future))
+                if len(pending) >= max_in_flight:
+                    name, done = pending.popleft()
+                    record(name, done.result())
+            while pending:
+                name, done = pending.popleft()
+                record(name, done.result())
+
+    logging.info(
+        "Ground truth: %d written, %d unchanged, %d without content",
+        report.written,
+        report.unchanged,
+        report.empty,
+    )
+    return report
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Generate ground-truth Markdown from reference.json."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Render processes (defaults to the CPU count; 1 renders in-process)",
+    )
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=list(logging.getLevelNamesMapping().keys()),
+        default="INFO",
+        help="Python logging level (e.g. INFO, DEBUG)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
 
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    for pdf_filename, content in data.items():
-        all_content = []
-        if "elements" in content:
-            for element in content["elements"]:
-                if "content" in element:
-                    category = element.get("category", "").lower()
-                    content_data = element["content"]
-                    content_to_add = None
-
-                    if category == "table":
-                        html_content = content_data.get("html")
-                        if html_content:
-                            full_table_html = f"<table>{html_content}</table>"
-                            soup = BeautifulSoup(full_table_html, "html.parser")
-                            content_to_add = soup.prettify()
-                    else:
-                        text_content = content_data.get("text")
-                        if text_content:
-                            content_to_add = _format_content_by_category(
-                                category, text_content
-                            )
-
-                    if content_to_add:
-                        all_content.append(content_to_add)
-
-        if all_content:
-            output_filename = os.path.splitext(pdf_filename)[0] + ".md"
-            output_path = os.path.join(output_dir, output_filename)
-
-            with open(output_path, "w", encoding="utf-8") as md_file:
-                md_file.write("\n\n".join(all_content))
-            print(f"Successfully created {output_path}")
-
-
-if __name__ == "__main__":
     # Get the absolute path to the project root
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
@@ -84,4 +207,8 @@ if __name__ == "__main__":
     json_file_path = os.path.join(project_root, "ground-truth", "reference.json")
     output_directory = os.path.join(project_root, "ground-truth", "markdown")
 
-    extract_markdown_from_reference(json_file_path, output_directory)
+    extract_markdown_from_reference(json_file_path, output_directory, args.workers)
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry point
+    main()
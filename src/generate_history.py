@@ -7,6 +7,7 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
+from history_store import STORE_FILENAME, store_evaluation
 
 YYMMDD_PATTERN = re.compile(r"^\d{6}$")
 EVALUATION_FILES = ("evaluation.json", "evaluation.csv")
@@ -44,6 +45,13 @@ def _parse_args() -> argparse.Namespace:
         action="store_false",
         help="Prevent overwriting existing history evaluation files. Overwrites are enabled by default.",
     )
+    parser.add_argument(
+        "--no-store",
+        dest="store",
+        default=True,
+        action="store_false",
+        help=f"Do not append archived runs to <history-root>/{STORE_FILENAME}.",
+    )
     return parser.parse_args()
 
 
@@ -61,6 +69,7 @@ def archive_evaluation(
     history_root: Path,
     date_folder: str,
     overwrite: bool = False,
+    store: bool = True,
 ) -> Path:
     engine_prediction_dir = prediction_root / engine
     sources = {name: engine_prediction_dir / name for name in EVALUATION_FILES}
@@ -81,6 +90,10 @@ def archive_evaluation(
 
     for name in EVALUATION_FILES:
         shutil.copy2(sources[name], destinations[name])
+    if store:
+        store_evaluation(
+            history_root / STORE_FILENAME, date_folder, destinations["evaluation.json"]
+        )
     return destination_dir
 
 
@@ -118,6 +131,7 @@ def main() -> int:
                     history_root=history_root,
                     date_folder=date_folder,
                     overwrite=args.overwrite,
+                    store=args.store,
                 )
             except Exception as exc:
                 errors.append((engine, exc))
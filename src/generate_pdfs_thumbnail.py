@@ -1,48 +1,322 @@
+"""Render the first page of every benchmark PDF as a WebP thumbnail.
+
+Thumbnails are only rendered when they are missing, older than their PDF
+(and the PDF's SHA-256 changed since the last render) or rendered with other
+settings; ``pdfs_thumbnail/.thumbnails.json`` records the hash, settings and
+render time of each one. Pages render on a pool of worker processes, at
+``--dpi`` but never larger than ``--max-size`` pixels on the long side, so
+posters and other huge pages are not rasterised at full resolution. The
+first page's size comes from the corpus manifest when it is current, so only
+documents it does not cover need an extra ``pdfinfo`` call::
+
+    uv run src/generate_pdfs_thumbnail.py --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
 import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
 from pdf2image import convert_from_path
 
+from corpus_manifest import (
+    DEFAULT_MANIFEST_PATH,
+    load_manifest,
+    pdf_page_info,
+    pdf_paths,
+    sha256_file,
+)
+
+THUMBNAIL_DIRNAME = "pdfs_thumbnail"
+INDEX_FILENAME = ".thumbnails.json"
+# pdf2image's default resolution; an A4 page renders at 1654x2339 pixels.
+DEFAULT_DPI = 200
+DEFAULT_MAX_SIZE = 2400
+
+
+@dataclass
+class ThumbnailReport:
+    """Outcome of a thumbnail run."""
+
+    rendered: int = 0
+    skipped: int = 0
+    failed: int = 0
+    render_seconds: float = 0.0
+    elapsed: float = 0.0
+
 
-def export_first_page(pdf_path: Path, output_path: Path) -> None:
-    """Render the first page of the PDF at a higher resolution and save as WebP."""
+def render_dpi(page_size: Optional[Sequence[float]], dpi: int, max_size: int) -> float:
+    """Return ``dpi``, lowered so a page of ``page_size`` points fits ``max_size`` pixels.
+
+    An unknown page size renders at ``dpi``.
+    """
+
+    if not page_size:
+        return dpi
+    long_side = max(page_size)
+    if long_side <= 0:
+        return dpi
+    return min(dpi, max_size * 72 / long_side)
+
+
+def export_first_page(
+    pdf_path: Path,
+    output_path: Path,
+    dpi: int = DEFAULT_DPI,
+    max_size: int = DEFAULT_MAX_SIZE,
+    page_size: Optional[Sequence[float]] = None,
+) -> float:
+    """Render the first page of the PDF and save it as lossless WebP.
+
+    ``page_size`` is the first page's ``[width, height]`` in points; when it
+    is not given, ``pdfinfo`` is asked for it. Returns the seconds spent.
+    The image is written to a temporary file and moved into place, so an
+    interrupted run never leaves a truncated thumbnail that looks newer than
+    its PDF.
+    """
+    start = time.perf_counter()
     try:
-        images = convert_from_path(pdf_path, first_page=1, last_page=1)
+        if page_size is None:
+            _, page_size = pdf_page_info(pdf_path)
+        images = convert_from_path(
+            pdf_path,
+            dpi=render_dpi(page_size, dpi, max_size),
+            first_page=1,
+            last_page=1,
+        )
         if images:
-            images[0].save(output_path, "WEBP", lossless=True)
+            temporary = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+            images[0].save(temporary, "WEBP", lossless=True)
+            os.replace(temporary, output_path)
         else:
             logging.warning("No pages found in PDF: %s", pdf_path)
 
     except Exception as e:
         logging.error("Error processing %s: %s", pdf_path, e)
         raise
+    return time.perf_counter() - start
+
+
+def _load_index(path: Path) -> Dict[str, Dict[str, Any]]:
+    if not path.is_file():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError) as exc:
+        logging.warning("Ignoring thumbnail index %s: %s", path, exc)
+        return {}
+
+
+def _write_index(index: Dict[str, Dict[str, Any]], path: Path) -> None:
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temporary.write_text(json.dumps(index, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(temporary, path)
 
 
-def run(project_root: Path | str) -> None:
+def _settings_match(record: Optional[Dict[str, Any]], settings: Dict[str, int]) -> bool:
+    # Thumbnails rendered before the index existed are assumed to match.
+    return record is None or all(record.get(k) == v for k, v in settings.items())
+
+
+def _render(
+    pdf_path: Path,
+    output_path: Path,
+    dpi: int,
+    max_size: int,
+    pdf_sha256: Optional[str] = None,
+    page_size: Optional[Sequence[float]] = None,
+) -> Tuple[str, float]:
+    """Render one thumbnail in a worker and return the PDF's hash and the seconds spent."""
+
+    seconds = export_first_page(pdf_path, output_path, dpi, max_size, page_size)
+    return pdf_sha256 or sha256_file(pdf_path), seconds
+
+
+_Pending = Tuple[Path, Path, Optional[str], Optional[List[float]]]
+
+
+def _render_all(
+    pending: List[_Pending],
+    workers: int,
+    dpi: int,
+    max_size: int,
+) -> Iterator[Tuple[Path, Optional[Tuple[str, float]]]]:
+    """Yield ``(pdf_path, (sha256, seconds))`` as renders finish, ``None`` on failure."""
+
+    if workers <= 1 or len(pending) <= 1:
+        for pdf_file, output_file, pdf_sha256, page_size in pending:
+            try:
+                result = _render(
+                    pdf_file, output_file, dpi, max_size, pdf_sha256, page_size
+                )
+            except Exception as exc:  # noqa: BLE001
+                logging.error("Failed to generate thumbnail for %s: %s", pdf_file.name, exc)
+                result = None
+            yield pdf_file, result
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+        futures = {
+            executor.submit(
+                _render, pdf_file, output_file, dpi, max_size, pdf_sha256, page_size
+            ): pdf_file
+            for pdf_file, output_file, pdf_sha256, page_size in pending
+        }
+        for future in as_completed(futures):
+            pdf_file = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:  # noqa: BLE001
+                logging.error("Failed to generate thumbnail for %s: %s", pdf_file.name, exc)
+                result = None
+            yield pdf_file, result
+
+
+def run(
+    project_root: Path | str,
+    workers: Optional[int] = None,
+    dpi: int = DEFAULT_DPI,
+    max_size: int = DEFAULT_MAX_SIZE,
+    force: bool = False,
+) -> ThumbnailReport:
+    """Render missing or outdated thumbnails; ``force`` renders all of them.
+
+    ``workers`` defaults to the CPU count; ``0`` or ``1`` renders in the
+    calling process.
+    """
     root_path = Path(project_root)
     pdf_dir = root_path / "pdfs"
-    output_dir = root_path / "pdfs_thumbnail"
+    output_dir = root_path / THUMBNAIL_DIRNAME
     output_dir.mkdir(parents=True, exist_ok=True)
+    report = ThumbnailReport()
 
     if not pdf_dir.exists():
         raise FileNotFoundError(f"PDF directory not found: {pdf_dir}")
 
-    pdf_files = sorted(pdf_dir.glob("*.pdf"))
+    manifest_path = root_path / DEFAULT_MANIFEST_PATH
+    pdf_files = pdf_paths(pdf_dir, manifest_path)
     if not pdf_files:
         logging.info("No PDF files found in %s", pdf_dir)
-        return
+        return report
 
+    start = time.perf_counter()
+    manifest = load_manifest(manifest_path)
+    index_path = output_dir / INDEX_FILENAME
+    index = _load_index(index_path)
+    settings = {"dpi": dpi, "max_size": max_size}
+    pending: List[_Pending] = []
     for pdf_file in pdf_files:
         output_file = output_dir / f"{pdf_file.stem}.webp"
-        try:
-            export_first_page(pdf_file, output_file)
-            logging.info("Generated thumbnail for %s", pdf_file.name)
-        except Exception as exc:  # noqa: BLE001
-            logging.error("Failed to generate thumbnail for %s: %s", pdf_file.name, exc)
+        record = index.get(pdf_file.stem)
+        stat = pdf_file.stat()
+        # Hashes and page sizes are taken from the corpus manifest when it is current.
+        entry = manifest.documents.get(pdf_file.stem) if manifest else None
+        if entry and (entry.pdf_size, entry.pdf_mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+            entry = None
+        page_size = entry.page_size if entry else None
+        if force or not output_file.is_file() or not _settings_match(record, settings):
+            pending.append((pdf_file, output_file, None, page_size))
+            continue
+        if output_file.stat().st_mtime_ns >= stat.st_mtime_ns:
+            report.skipped += 1
+            continue
+        # Older than its PDF (a checkout or copy touches every file): compare hashes.
+        pdf_sha256 = (
+            entry.pdf_sha256 if entry and entry.pdf_sha256 else sha256_file(pdf_file)
+        )
+        if record is not None and record.get("pdf_sha256") == pdf_sha256:
+            os.utime(output_file)
+            report.skipped += 1
+            continue
+        pending.append((pdf_file, output_file, pdf_sha256, page_size))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    try:
+        for pdf_file, result in _render_all(pending, workers, dpi, max_size):
+            if result is None:
+                report.failed += 1
+                continue
+            pdf_sha256, seconds = result
+            logging.info(
+                "Generated thumbnail for %s in %.2f seconds", pdf_file.name, seconds
+            )
+            index[pdf_file.stem] = {
+                "pdf_sha256": pdf_sha256,
+                **settings,
+                "render_seconds": round(seconds, 4),
+            }
+            report.rendered += 1
+            report.render_seconds += seconds
+    finally:
+        if report.rendered:
+            _write_index(index, index_path)
+
+    report.elapsed = time.perf_counter() - start
+    logging.info(
+        "Rendered %d thumbnails (%.2f seconds of rendering) in %.2f seconds; "
+        "%d up to date, %d failed",
+        report.rendered,
+        report.render_seconds,
+        report.elapsed,
+        report.skipped,
+        report.failed,
+    )
+    return report
+
 
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Render first-page PDF thumbnails.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Render processes (defaults to the CPU count; 1 renders in-process)",
+    )
+    parser.add_argument(
+        "--dpi",
+        type=int,
+        default=DEFAULT_DPI,
+        help="Render resolution for ordinary pages",
+    )
+    parser.add_argument(
+        "--max-size",
+        type=int,
+        default=DEFAULT_MAX_SIZE,
+        help="Upper bound in pixels on a thumbnail's long side; larger pages use a lower DPI",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Render every thumbnail, even those that are up to date",
+    )
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=list(logging.getLevelNamesMapping().keys()),
+        default="INFO",
+        help="Python logging level (e.g. INFO, DEBUG)",
+    )
+    return parser.parse_args(argv)
 
-if __name__ == "__main__":
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper(), logging.INFO),
+        format="%(levelname)s: %(message)s",
+    )
     # Get the absolute path to the project root
     project_root = Path(__file__).resolve().parent.parent
+    run(project_root, args.workers, args.dpi, args.max_size, args.force)
+
 
-    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
-    run(project_root)
+if __name__ == "__main__":  # pragma: no cover - CLI entry point
+    main()
@@ -0,0 +1,459 @@
+"""Compare the current run with the history archive and gate on regressions.
+
+``generate_history.py`` copies each engine's ``evaluation.json`` into
+``history/<yymmdd>/<engine>/``. This command reads a snapshot back (the
+latest one that differs from the current run, or ``--date``) and compares
+it with ``prediction/<engine>/evaluation.json``::
+
+    uv run src/history_compare.py --engine docling
+
+* **Speed**: seconds per document and per page (page counts from
+  ``ground-truth/reference.json``). A slowdown counts when it exceeds
+  ``--speed-tolerance``, or ``--noise-multiplier`` times the run-to-run
+  variation of the archived runs of the baseline's engine version on the
+  same processor if that is larger, so earlier versions' real slowdowns do
+  not widen the threshold. Runs on different processors are reported but
+  never fail.
+* **Scores**: paired per-document differences on the documents both runs
+  scored, tested with ``score_statistics``. A drop counts when it is larger
+  than ``--score-tolerance`` and significant at ``--alpha``; the documents
+  with the largest drops are listed.
+
+The exit status is 1 when any engine regressed, so CI can run it after an
+engine upgrade, and 2 when an explicit ``--date`` has no snapshot for an
+engine.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from generate_history import YYMMDD_PATTERN
+from sampling import DEFAULT_REFERENCE_PATH, load_page_counts
+from score_statistics import (
+    DEFAULT_ALPHA,
+    DEFAULT_EVALUATION_FILENAME,
+    DEFAULT_RESAMPLES,
+    EngineScores,
+    compare_engines,
+)
+
+DEFAULT_SPEED_TOLERANCE = 0.10
+DEFAULT_NOISE_MULTIPLIER = 3.0
+DEFAULT_SCORE_TOLERANCE = 0.005
+DEFAULT_TOP_DOCUMENTS = 10
+# Fewer archived runs than this give no usable estimate of timing noise.
+_MIN_NOISE_RUNS = 3
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """One ``evaluation.json``: the current run or an archived one."""
+
+    label: str
+    summary: Dict[str, Any]
+    scores: Dict[str, Dict[str, Optional[float]]]
+
+    @classmethod
+    def load(cls, path: Path, label: str) -> "Snapshot":
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        scores = {
+            entry["document_id"]: entry.get("scores", {})
+            for entry in payload.get("documents", [])
+        }
+        return cls(label, payload.get("summary", {}), scores)
+
+    def seconds_per_document(self) -> Optional[float]:
+        value = self.summary.get("elapsed_per_doc")
+        return float(value) if value else None
+
+    def seconds_per_page(self, pages: Dict[str, int]) -> Optional[float]:
+        elapsed = self.summary.get("total_elapsed")
+        total_pages = sum(pages.get(doc_id, 0) for doc_id in self.scores)
+        if not elapsed or not total_pages:
+            return None
+        return float(elapsed) / total_pages
+
+
+def history_snapshots(history_root: Path, engine: str, filename: str) -> List[Path]:
+    """Return the engine's archived evaluations, oldest first."""
+
+    if not history_root.is_dir():
+        return []
+    return [
+        folder / engine / filename
+        for folder in sorted(history_root.iterdir())
+        if YYMMDD_PATTERN.match(folder.name) and (folder / engine / filename).is_file()
+    ]
+
+
+def select_baseline(
+    current: Snapshot, candidates: List[Path], date: Optional[str] = None
+) -> Optional[Snapshot]:
+    """Pick ``date`` or else the newest snapshot that is not the current run itself."""
+
+    for path in reversed(candidates):
+        folder = path.parent.parent.name
+        if date is not None:
+            if folder == date:
+                return Snapshot.load(path, folder)
+            continue
+        snapshot = Snapshot.load(path, folder)
+        # A run archived by run.py is identical to the current one.
+        if snapshot.summary != current.summary or snapshot.scores != current.scores:
+            return snapshot
+    return None
+
+
+def _relative_noise(values: List[float]) -> Optional[float]:
+    if len(values) < _MIN_NOISE_RUNS:
+        return None
+    return statistics.stdev(values) / statistics.fmean(values)
+
+
+def compare_speed(
+    baseline: Snapshot,
+    current: Snapshot,
+    archived: List[Snapshot],
+    pages: Dict[str, int],
+    tolerance: float = DEFAULT_SPEED_TOLERANCE,
+    noise_multiplier: float = DEFAULT_NOISE_MULTIPLIER,
+) -> Dict[str, Any]:
+    """Compare seconds per document and per page between two runs.
+
+    Timing noise is estimated from the ``archived`` runs of the baseline's
+    engine version on the current processor.
+    """
+
+    processor = current.summary.get("processor")
+    comparable = baseline.summary.get("processor") == processor
+    version = baseline.summary.get("engine_version")
+    same_machine = [
+        snapshot
+        for snapshot in archived
+        if snapshot.summary.get("processor") == processor
+        and snapshot.summary.get("engine_version") == version
+    ]
+    measures: Dict[str, Dict[str, Any]] = {}
+    for name, measure in (
+        ("seconds_per_document", lambda snapshot: snapshot.seconds_per_document()),
+        ("seconds_per_page", lambda snapshot: snapshot.seconds_per_page(pages)),
+    ):
+        before, after = measure(baseline), measure(current)
+        if before is None or after is None:
+            continue
+        noise = _relative_noise(
+            [value for value in map(measure, same_machine) if value is not None]
+        )
+        threshold = max(tolerance, noise_multiplier * noise if noise else 0.0)
+        change = after / before - 1.0
+        measures[name] = {
+            "baseline": before,
+            "current": after,
+            "relative_change": change,
+            "relative_noise": noise,
+            "threshold": threshold,
+            "regressed": comparable and change > threshold,
+        }
+    return {
+        "comparable": comparable,
+        "baseline_processor": baseline.summary.get("processor"),
+        "current_processor": processor,
+        "measures": measures,
+        "regressed": any(measure["regressed"] for measure in measures.values()),
+    }
+
+
+def _paired_scores(
+    baseline: Snapshot, current: Snapshot
+) -> Tuple[List[str], Dict[str, np.ndarray]]:
+    document_ids = sorted(set(baseline.scores) & set(current.scores))
+    metrics: List[str] = []
+    for snapshot in (baseline, current):
+        for scores in snapshot.scores.values():
+            metrics.extend(name for name in scores if name not in metrics)
+    values = {}
+    for name in metrics:
+        matrix = np.full((2, len(document_ids)), np.nan)
+        for row, snapshot in enumerate((baseline, current)):
+            for column, doc_id in enumerate(document_ids):
+                value = snapshot.scores[doc_id].get(name)
+                if value is not None:
+                    matrix[row, column] = value
+        values[name] = matrix
+    return document_ids, values
+
+
+def compare_scores(
+    baseline: Snapshot,
+    current: Snapshot,
+    tolerance: float = DEFAULT_SCORE_TOLERANCE,
+    alpha: float = DEFAULT_ALPHA,
+    resamples: int = DEFAULT_RESAMPLES,
+    top_documents: int = DEFAULT_TOP_DOCUMENTS,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Test the paired per-document score differences for every metric."""
+
+    document_ids, values = _paired_scores(baseline, current)
+    comparison = compare_engines(
+        EngineScores([baseline.label, current.label], document_ids, values),
+        resamples=resamples,
+        alpha=alpha,
+        seed=seed,
+    )
+    metrics: Dict[str, Dict[str, Any]] = {}
+    for name, result in comparison.metrics.items():
+        # Row 1 is the current run, so [1][0] is current - baseline.
+        difference = result["mean_difference"][1][0]
+        significant = result["significant"][1][0]
+        deltas = values[name][1] - values[name][0]
+        shared = ~np.isnan(deltas)
+        drops = sorted(
+            (
+                (float(delta), doc_id)
+                for delta, doc_id in zip(deltas, document_ids)
+                if not np.isnan(delta) and delta < 0
+            )
+        )[:top_documents]
+        metrics[name] = {
+            "documents": result["documents"][1][0],
+            "baseline_mean": float(values[name][0, shared].mean()),
+            "current_mean": float(values[name][1, shared].mean()),
+            "mean_difference": difference,
+            "ci": [result["ci_lower"][1][0], result["ci_upper"][1][0]],
+            "p_value": result["permutation_p"][1][0],
+            "regressed": bool(significant and difference < -tolerance),
+            "largest_drops": [
+                {"document_id": doc_id, "delta": delta} for delta, doc_id in drops
+            ],
+        }
+    return {
+        "metrics": metrics,
+        "regressed": any(metric["regressed"] for metric in metrics.values()),
+    }
+
+
+def compare_engine(
+    engine: str,
+    prediction_root: Path,
+    history_root: Path,
+    pages: Dict[str, int],
+    date: Optional[str] = None,
+    evaluation_filename: str = DEFAULT_EVALUATION_FILENAME,
+    speed_tolerance: float = DEFAULT_SPEED_TOLERANCE,
+    noise_multiplier: float = DEFAULT_NOISE_MULTIPLIER,
+    score_tolerance: float = DEFAULT_SCORE_TOLERANCE,
+    alpha: float = DEFAULT_ALPHA,
+    resamples: int = DEFAULT_RESAMPLES,
+    top_documents: int = DEFAULT_TOP_DOCUMENTS,
+) -> Optional[Dict[str, Any]]:
+    """Compare one engine's current evaluation with its history.
+
+    Raises ``FileNotFoundError`` when ``date`` is given but has no snapshot
+    for the engine.
+    """
+
+    current_path = prediction_root / engine / evaluation_filename
+    if not current_path.is_file():
+        logging.warning("[%s] No current evaluation at %s", engine, current_path)
+        return None
+    current = Snapshot.load(current_path, "current")
+    candidates = history_snapshots(history_root, engine, evaluation_filename)
+    baseline = select_baseline(current, candidates, date)
+    if baseline is None and date is not None:
+        raise FileNotFoundError(
+            f"No history snapshot {date} for {engine} under {history_root}"
+        )
+    if baseline is None:
+        logging.warning("[%s] No history snapshot to compare with", engine)
+        return None
+
+    archived = [Snapshot.load(path, path.parent.parent.name) for path in candidates]
+    speed = compare_speed(
+        baseline, current, archived, pages, speed_tolerance, noise_multiplier
+    )
+    scores = compare_scores(
+        baseline, current, score_tolerance, alpha, resamples, top_documents
+    )
+    return {
+        "baseline": baseline.label,
+        "baseline_version": baseline.summary.get("engine_version"),
+        "current_version": current.summary.get("engine_version"),
+        "speed": speed,
+        "scores": scores,
+        "regressed": speed["regressed"] or scores["regressed"],
+    }
+
+
+def _print_report(engine: str, result: Dict[str, Any]) -> None:
+    status = "REGRESSED" if result["regressed"] else "ok"
+    print(
+        f"[{engine}] {status}: history/{result['baseline']} "
+        f"({result['baseline_version']}) -> current ({result['current_version']})"
+    )
+    speed = result["speed"]
+    if not speed["comparable"]:
+        print(
+            f"  speed not compared: processor changed from "
+            f"{speed['baseline_processor']!r} to {speed['current_processor']!r}"
+        )
+    for name, measure in speed["measures"].items():
+        flag = "  <-- slower" if measure["regressed"] else ""
+        print(
+            f"  {name:<22} {measure['baseline']:.4f} -> {measure['current']:.4f} "
+            f"({measure['relative_change']:+.1%}, threshold {measure['threshold']:.1%})"
+            f"{flag}"
+        )
+    for name, metric in result["scores"]["metrics"].items():
+        flag = "  <-- dropped" if metric["regressed"] else ""
+        print(
+            f"  {name:<22} {metric['baseline_mean']:.4f} -> {metric['current_mean']:.4f} "
+            f"({metric['mean_difference']:+.4f}, p={metric['p_value']:.4f}){flag}"
+        )
+        if metric["regressed"]:
+            for drop in metric["largest_drops"]:
+                print(f"      {drop['document_id']}  {drop['delta']:+.4f}")
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compare the current evaluation with the history archive"
+    )
+    parser.add_argument("--engine", type=str, help="Only compare this engine")
+    parser.add_argument(
+        "--date",
+        type=str,
+        help="History snapshot (yymmdd) to compare with; defaults to the latest one",
+    )
+    parser.add_argument(
+        "--prediction-root",
+        type=str,
+        default="prediction",
+        help="Root directory containing engine predictions",
+    )
+    parser.add_argument(
+        "--history-root",
+        type=str,
+        default="history",
+        help="Root directory of the history archive",
+    )
+    parser.add_argument(
+        "--evaluation-filename",
+        type=str,
+        default=DEFAULT_EVALUATION_FILENAME,
+        help="Evaluation report file name to compare",
+    )
+    parser.add_argument(
+        "--reference-path",
+        type=str,
+        default=DEFAULT_REFERENCE_PATH,
+        help="reference.json used for page counts",
+    )
+    parser.add_argument(
+        "--speed-tolerance",
+        type=float,
+        default=DEFAULT_SPEED_TOLERANCE,
+        help="Smallest relative slowdown treated as a regression (default 0.10)",
+    )
+    parser.add_argument(
+        "--noise-multiplier",
+        type=float,
+        default=DEFAULT_NOISE_MULTIPLIER,
+        help="Raise the speed threshold to this many times the archived run-to-run noise",
+    )
+    parser.add_argument(
+        "--score-tolerance",
+        type=float,
+        default=DEFAULT_SCORE_TOLERANCE,
+        help="Smallest mean score drop treated as a regression (default 0.005)",
+    )
+    parser.add_argument(
+        "--alpha",
+        type=float,
+        default=DEFAULT_ALPHA,
+        help="Significance level for score drops",
+    )
+    parser.add_argument(
+        "--resamples",
+        type=int,
+        default=DEFAULT_RESAMPLES,
+        help="Bootstrap and permutation resamples",
+    )
+    parser.add_argument(
+        "--top-documents",
+        type=int,
+        default=DEFAULT_TOP_DOCUMENTS,
+        help="Number of documents with the largest drops listed per metric",
+    )
+    parser.add_argument("--output", type=str, help="Write the comparison as JSON to this path")
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=list(logging.getLevelNamesMapping().keys()),
+        default="INFO",
+        help="Python logging level (e.g. INFO, DEBUG)",
+    )
+    args = parser.parse_args(argv)
+    if args.date is not None and not YYMMDD_PATTERN.match(args.date):
+        parser.error("--date must be 6 digits in yymmdd format")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
+    project_root = Path(__file__).parent.parent.resolve()
+    prediction_root = project_root / args.prediction_root
+    history_root = project_root / args.history_root
+    reference_path = project_root / args.reference_path
+    if not prediction_root.is_dir():
+        raise FileNotFoundError(f"Prediction root not found: {prediction_root}")
+    pages = load_page_counts(reference_path) if reference_path.is_file() else {}
+
+    if args.engine:
+        engines = [args.engine]
+    else:
+        engines = sorted(path.name for path in prediction_root.iterdir() if path.is_dir())
+
+    report: Dict[str, Any] = {}
+    for engine in engines:
+        try:
+            result = compare_engine(
+                engine,
+                prediction_root,
+                history_root,
+                pages,
+                date=args.date,
+                evaluation_filename=args.evaluation_filename,
+                speed_tolerance=args.speed_tolerance,
+                noise_multiplier=args.noise_multiplier,
+                score_tolerance=args.score_tolerance,
+                alpha=args.alpha,
+                resamples=args.resamples,
+                top_documents=args.top_documents,
+            )
+        except FileNotFoundError as exc:
+            logging.error("%s", exc)
+            return 2
+        if result is None:
+            continue
+        report[engine] = result
+        _print_report(engine, result)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    return 1 if any(result["regressed"] for result in report.values()) else 0
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry point
+    sys.exit(main())
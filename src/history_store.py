@@ -0,0 +1,352 @@
+"""Indexed SQLite store of every archived run, for trend queries.
+
+``history/<yymmdd>/<engine>/evaluation.json`` keeps one copy per run, so
+questions such as "how did docling's seconds per page and TEDS change over
+the last 20 releases" mean opening dozens of files. ``generate_history``
+also appends each archived run to ``history/history.sqlite``:
+
+* ``runs``: one row per (date, engine, version, processor) with document and
+  page counts and elapsed times,
+* ``run_metrics``: the mean and document count of each metric per run, and
+* ``document_scores``: every per-document score, indexed by run, metric and
+  document.
+
+Re-archiving a run replaces its rows. Import folders archived before the
+store existed with ``backfill``, and query with ``trend``::
+
+    uv run src/history_store.py backfill
+    uv run src/history_store.py trend --engine docling --metric teds --limit 20
+
+``generate_benchmark_chart.py --trends`` plots the same data.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from sampling import DEFAULT_REFERENCE_PATH, load_page_counts
+
+STORE_FILENAME = "history.sqlite"
+DEFAULT_HISTORY_ROOT = "history"
+EVALUATION_FILENAME = "evaluation.json"
+TREND_METRICS = ("overall", "nid", "teds", "mhs")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    version TEXT NOT NULL,
+    processor TEXT NOT NULL,
+    run_date TEXT,
+    document_count INTEGER,
+    page_count INTEGER,
+    total_elapsed REAL,
+    elapsed_per_doc REAL,
+    UNIQUE (date, engine, version, processor)
+);
+CREATE INDEX IF NOT EXISTS runs_engine_date ON runs (engine, date);
+CREATE TABLE IF NOT EXISTS run_metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    metric TEXT NOT NULL,
+    mean REAL,
+    count INTEGER,
+    PRIMARY KEY (run_id, metric)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS document_scores (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    metric TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    score REAL NOT NULL,
+    PRIMARY KEY (run_id, metric, document_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS document_scores_document
+    ON document_scores (document_id, metric);
+"""
+
+
+def open_store(path: Path) -> sqlite3.Connection:
+    """Open (creating if needed) the store at ``path``."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def _iso_date(date_folder: str) -> str:
+    """``251127`` -> ``2025-11-27``."""
+
+    return f"20{date_folder[:2]}-{date_folder[2:4]}-{date_folder[4:6]}"
+
+
+def record_evaluation(
+    connection: sqlite3.Connection,
+    date_folder: str,
+    payload: Mapping[str, Any],
+    pages: Optional[Mapping[str, int]] = None,
+) -> int:
+    """Store one ``evaluation.json`` payload archived under ``date_folder``.
+
+    ``pages`` maps document ids to page counts; without it the run's page
+    count is left empty. Returns the run id.
+    """
+
+    summary = payload.get("summary", {})
+    metrics = payload.get("metrics", {})
+    documents = payload.get("documents", [])
+    key = (
+        _iso_date(date_folder),
+        summary.get("engine_name") or "unknown",
+        str(summary.get("engine_version") or "unknown"),
+        summary.get("processor") or "unknown",
+    )
+    page_count = None
+    if pages:
+        page_count = sum(pages.get(entry["document_id"], 0) for entry in documents) or None
+
+    with connection:
+        connection.execute(
+            "DELETE FROM runs WHERE date = ? AND engine = ? AND version = ? "
+            "AND processor = ?",
+            key,
+        )
+        cursor = connection.execute(
+            "INSERT INTO runs (date, engine, version, processor, run_date, "
+            "document_count, page_count, total_elapsed, elapsed_per_doc) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                *key,
+                summary.get("date"),
+                summary.get("document_count", len(documents)),
+                page_count,
+                summary.get("total_elapsed"),
+                summary.get("elapsed_per_doc"),
+            ),
+        )
+        run_id = cursor.lastrowid
+        scores = metrics.get("score", {})
+        means = [
+            (name[: -len("_mean")], mean)
+            for name, mean in scores.items()
+            if name.endswith("_mean")
+        ]
+        connection.executemany(
+            "INSERT INTO run_metrics (run_id, metric, mean, count) VALUES (?, ?, ?, ?)",
+            [
+                (run_id, metric, mean, scores.get(f"{metric}_count"))
+                for metric, mean in means
+            ],
+        )
+        connection.executemany(
+            "INSERT INTO document_scores (run_id, metric, document_id, score) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (run_id, metric, entry["document_id"], score)
+                for entry in documents
+                for metric, score in entry.get("scores", {}).items()
+                if score is not None
+            ],
+        )
+    return run_id
+
+
+def _default_pages() -> Optional[Dict[str, int]]:
+    reference_path = Path(__file__).parent.parent.resolve() / DEFAULT_REFERENCE_PATH
+    return load_page_counts(reference_path) if reference_path.is_file() else None
+
+
+def store_evaluation(
+    store_path: Path, date_folder: str, evaluation_path: Path
+) -> int:
+    """Append the archived ``evaluation_path`` to the store at ``store_path``."""
+
+    payload = json.loads(evaluation_path.read_text(encoding="utf-8"))
+    with closing(open_store(store_path)) as connection:
+        return record_evaluation(connection, date_folder, payload, _default_pages())
+
+
+def backfill(
+    connection: sqlite3.Connection,
+    history_root: Path,
+    pages: Optional[Mapping[str, int]] = None,
+) -> int:
+    """Import every ``history/<yymmdd>/<engine>/evaluation.json``; return the count."""
+
+    count = 0
+    for evaluation_path in sorted(history_root.glob(f"*/*/{EVALUATION_FILENAME}")):
+        date_folder = evaluation_path.parent.parent.name
+        if not (len(date_folder) == 6 and date_folder.isdigit()):
+            continue
+        try:
+            payload = json.loads(evaluation_path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError) as exc:
+            logging.warning("Skipping %s: %s", evaluation_path, exc)
+            continue
+        record_evaluation(connection, date_folder, payload, pages)
+        count += 1
+    return count
+
+
+@dataclass(frozen=True)
+class TrendPoint:
+    """One archived run of an engine with its speed and mean scores."""
+
+    date: str
+    engine: str
+    version: str
+    processor: str
+    seconds_per_document: Optional[float]
+    seconds_per_page: Optional[float]
+    means: Dict[str, Optional[float]]
+
+
+def trend(
+    connection: sqlite3.Connection,
+    engine: Optional[str] = None,
+    metrics: Sequence[str] = TREND_METRICS,
+    limit: Optional[int] = None,
+    processor: Optional[str] = None,
+) -> List[TrendPoint]:
+    """Return the runs of ``engine`` (every engine by default), oldest first.
+
+    ``limit`` keeps each engine's most recent runs.
+    """
+
+    conditions: List[str] = []
+    parameters: List[Any] = []
+    if engine is not None:
+        conditions.append("engine = ?")
+        parameters.append(engine)
+    if processor is not None:
+        conditions.append("processor = ?")
+        parameters.append(processor)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    ranked = (
+        "SELECT *, ROW_NUMBER() OVER (PARTITION BY engine ORDER BY date DESC, id DESC) "
+        f"AS recency FROM runs {where}"
+    )
+    query = f"SELECT * FROM ({ranked})"
+    if limit is not None:
+        query += " WHERE recency <= ?"
+        parameters.append(limit)
+    query += " ORDER BY engine, date, id"
+
+    connection.row_factory = sqlite3.Row
+    runs = connection.execute(query, parameters).fetchall()
+    means: Dict[int, Dict[str, Optional[float]]] = {}
+    if runs and metrics:
+        run_ids = [row["id"] for row in runs]
+        placeholders = ",".join("?" * len(run_ids))
+        metric_placeholders = ",".join("?" * len(metrics))
+        for run_id, metric, mean in connection.execute(
+            f"SELECT run_id, metric, mean FROM run_metrics WHERE run_id IN ({placeholders}) "
+            f"AND metric IN ({metric_placeholders})",
+            [*run_ids, *metrics],
+        ):
+            means.setdefault(run_id, {})[metric] = mean
+    connection.row_factory = None
+
+    return [
+        TrendPoint(
+            date=row["date"],
+            engine=row["engine"],
+            version=row["version"],
+            processor=row["processor"],
+            seconds_per_document=row["elapsed_per_doc"],
+            seconds_per_page=(
+                row["total_elapsed"] / row["page_count"]
+                if row["total_elapsed"] is not None and row["page_count"]
+                else None
+            ),
+            means={metric: means.get(row["id"], {}).get(metric) for metric in metrics},
+        )
+        for row in runs
+    ]
+
+
+def _format(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.4f}"
+
+
+def _print_trend(points: Iterable[TrendPoint], metrics: Sequence[str]) -> None:
+    print(
+        f"{'date':<10} {'engine':<22} {'version':<12} {'s/doc':>8} {'s/page':>8} "
+        + " ".join(f"{metric:>8}" for metric in metrics)
+    )
+    for point in points:
+        print(
+            f"{point.date:<10} {point.engine:<22} {point.version:<12} "
+            f"{_format(point.seconds_per_document):>8} {_format(point.seconds_per_page):>8} "
+            + " ".join(f"{_format(point.means[metric]):>8}" for metric in metrics)
+        )
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Query or backfill the SQLite history store"
+    )
+    parser.add_argument(
+        "--history-root",
+        type=str,
+        default=DEFAULT_HISTORY_ROOT,
+        help="History archive root; the store is <history-root>/history.sqlite",
+    )
+    parser.add_argument(
+        "--store",
+        type=str,
+        default=None,
+        help="Path to the store (defaults to <history-root>/history.sqlite)",
+    )
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=list(logging.getLevelNamesMapping().keys()),
+        default="INFO",
+        help="Python logging level (e.g. INFO, DEBUG)",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("backfill", help="Import every archived history folder")
+    trend_parser = commands.add_parser("trend", help="Print speed and scores over time")
+    trend_parser.add_argument("--engine", type=str, help="Only this engine")
+    trend_parser.add_argument(
+        "--metric",
+        action="append",
+        dest="metrics",
+        help=f"Metric to show (repeatable; default {', '.join(TREND_METRICS)})",
+    )
+    trend_parser.add_argument("--processor", type=str, help="Only runs on this processor")
+    trend_parser.add_argument(
+        "--limit", type=int, default=None, help="Most recent runs per engine"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
+    project_root = Path(__file__).parent.parent.resolve()
+    history_root = project_root / args.history_root
+    store_path = project_root / args.store if args.store else history_root / STORE_FILENAME
+
+    with closing(open_store(store_path)) as connection:
+        if args.command == "backfill":
+            count = backfill(connection, history_root, _default_pages())
+            print(f"Imported {count} archived runs into {store_path}")
+            return
+        metrics = args.metrics or list(TREND_METRICS)
+        _print_trend(
+            trend(connection, args.engine, metrics, args.limit, args.processor), metrics
+        )
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry point
+    main()
@@ -0,0 +1,312 @@
+"""Cost-aware, longest-first scheduling of parse and evaluation jobs.
+
+Document costs differ by orders of magnitude: a one-page text PDF converts in
+milliseconds while a long scanned report takes minutes, and TEDS runs APTED
+over table trees, so scoring grows with the square of a table's cell count.
+Handing documents out in ``sorted()`` order leaves one worker grinding
+through the most expensive document at the end while the others sit idle.
+This module estimates each document's cost and orders jobs longest first
+(LPT), which keeps a pool's makespan within 4/3 of the optimum.
+
+Parse costs, in seconds, come from the engine's previous run:
+
+* per-document request latencies in ``requests.json`` (remote engines),
+* otherwise the seconds per page of its last ``summary.json``, or of its
+  latest run in the history store, scaled by each document's page count.
+
+Without any previous run the page count itself is the cost. Evaluation
+costs are estimated from the ground-truth features in the corpus manifest.
+``run.py --plan`` prints the resulting estimates per engine without running
+anything.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from statistics import fmean
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, TypeVar
+
+from corpus_manifest import CorpusManifest
+from history_store import open_store, trend
+
+SUMMARY_FILENAME = "summary.json"
+REQUEST_LOG_FILENAME = "requests.json"
+
+# Evaluation seconds per document, fitted on this corpus with every metric on
+# one core: a fixed overhead, a term linear in the ground-truth length and the
+# TEDS term, quadratic in the ground truth's table cells.
+EVAL_SECONDS_BASE = 2.5e-3
+EVAL_SECONDS_PER_CHAR = 3e-6
+EVAL_SECONDS_PER_CELL_SQUARED = 4e-5
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class CostEstimate:
+    """Estimated cost per document id.
+
+    ``unit`` is ``"seconds"`` when the estimate is calibrated by a previous
+    run (``source`` names it) and ``"pages"`` otherwise.
+    """
+
+    costs: Dict[str, float]
+    unit: str
+    source: str
+
+    @property
+    def total(self) -> float:
+        return sum(self.costs.values())
+
+
+@dataclass(frozen=True)
+class Schedule:
+    """Documents assigned to each of ``len(assignments)`` workers."""
+
+    assignments: List[List[str]]
+    loads: List[float]
+
+    @property
+    def makespan(self) -> float:
+        return max(self.loads, default=0.0)
+
+
+def longest_first(
+    items: Iterable[T],
+    *costs: Mapping[str, float],
+    key: Callable[[T], str] = str,
+) -> List[T]:
+    """Order ``items`` by descending cost.
+
+    Each mapping in ``costs`` breaks the ties of the previous one; documents
+    missing from a mapping count as free. Remaining ties keep their input
+    order.
+    """
+
+    return sorted(
+        items, key=lambda item: tuple(-cost.get(key(item), 0.0) for cost in costs)
+    )
+
+
+def list_schedule(
+    order: Sequence[str], costs: Mapping[str, float], workers: int
+) -> Schedule:
+    """Simulate a pool that hands ``order`` out to whichever worker is free first."""
+
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    assignments: List[List[str]] = [[] for _ in range(workers)]
+    loads = [0.0] * workers
+    free = [(0.0, worker) for worker in range(workers)]
+    for doc_id in order:
+        load, worker = heapq.heappop(free)
+        assignments[worker].append(doc_id)
+        loads[worker] = load + costs.get(doc_id, 0.0)
+        heapq.heappush(free, (loads[worker], worker))
+    return Schedule(assignments, loads)
+
+
+def lpt_schedule(costs: Mapping[str, float], workers: int) -> Schedule:
+    """Return the longest-processing-time-first schedule of ``costs``."""
+
+    return list_schedule(longest_first(sorted(costs), costs), costs, workers)
+
+
+def _read_json(path: Path) -> Optional[Dict]:
+    if not path.is_file():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError) as exc:
+        logging.warning("Ignoring %s: %s", path, exc)
+        return None
+
+
+def _request_latencies(path: Path) -> Dict[str, float]:
+    payload = _read_json(path) or {}
+    return {
+        record["document_id"]: record["latency"]
+        for record in payload.get("requests", [])
+        if record.get("error") is None and record.get("latency") is not None
+    }
+
+
+def _seconds_per_page(
+    seconds_per_page: Optional[float],
+    seconds_per_document: Optional[float],
+    mean_pages: float,
+) -> Optional[float]:
+    if seconds_per_page:
+        return seconds_per_page
+    if seconds_per_document:
+        return seconds_per_document / mean_pages
+    return None
+
+
+def _history_seconds_per_page(
+    store_path: Optional[Path], engine: str, mean_pages: float
+) -> Optional[float]:
+    if store_path is None or not store_path.is_file():
+        return None
+    with closing(open_store(store_path)) as connection:
+        points = trend(connection, engine, metrics=(), limit=1)
+    if not points:
+        return None
+    return _seconds_per_page(
+        points[-1].seconds_per_page, points[-1].seconds_per_document, mean_pages
+    )
+
+
+def parse_costs(
+    engine_dir: Path,
+    doc_ids: Sequence[str],
+    page_counts: Mapping[str, int],
+    store_path: Optional[Path] = None,
+) -> CostEstimate:
+    """Estimate the conversion cost of ``doc_ids`` for the engine at ``engine_dir``.
+
+    Must be called before the engine's run overwrites its previous outputs.
+    Documents without a page count are assumed to have the mean page count.
+    """
+
+    known = [page_counts[doc_id] for doc_id in doc_ids if page_counts.get(doc_id)]
+    mean_pages = fmean(known) if known else 1.0
+    pages = {doc_id: float(page_counts.get(doc_id) or mean_pages) for doc_id in doc_ids}
+
+    latencies = _request_latencies(engine_dir / REQUEST_LOG_FILENAME)
+    summary = _read_json(engine_dir / SUMMARY_FILENAME) or {}
+    rate = _seconds_per_page(
+        summary.get("elapsed_per_page"), summary.get("elapsed_per_doc"), mean_pages
+    )
+    source = SUMMARY_FILENAME
+    if rate is None:
+        rate = _history_seconds_per_page(store_path, engine_dir.name, mean_pages)
+        source = "history"
+    observed = [doc_id for doc_id in doc_ids if doc_id in latencies]
+    if observed:
+        source = REQUEST_LOG_FILENAME
+        if rate is None:
+            rate = sum(latencies[doc_id] for doc_id in observed) / sum(
+                pages[doc_id] for doc_id in observed
+            )
+    if rate is None:
+        return CostEstimate(pages, "pages", "page count")
+    return CostEstimate(
+        {
+            doc_id: latencies.get(doc_id, pages[doc_id] * rate)
+            for doc_id in doc_ids
+        },
+        "seconds",
+        source,
+    )
+
+
+def evaluation_costs(
+    manifest: Optional[CorpusManifest], doc_ids: Iterable[str]
+) -> Dict[str, float]:
+    """Estimate evaluation seconds for the ``doc_ids`` listed in ``manifest``."""
+
+    if manifest is None:
+        return {}
+    costs: Dict[str, float] = {}
+    for doc_id in doc_ids:
+        entry = manifest.documents.get(doc_id)
+        if entry is None or entry.gt_chars is None:
+            continue
+        costs[doc_id] = (
+            EVAL_SECONDS_BASE
+            + EVAL_SECONDS_PER_CHAR * entry.gt_chars
+            + EVAL_SECONDS_PER_CELL_SQUARED * (entry.table_cells or 0) ** 2
+        )
+    return costs
+
+
+@dataclass(frozen=True)
+class EnginePlan:
+    """Estimated runtime of one engine's parse and evaluation stages."""
+
+    engine: str
+    documents: int
+    parse: CostEstimate
+    evaluation: Optional[Schedule]
+    sorted_evaluation: Optional[Schedule]
+    streaming: bool
+
+    @property
+    def total(self) -> Optional[float]:
+        if self.parse.unit != "seconds" or self.evaluation is None:
+            return None
+        if self.streaming:
+            return max(self.parse.total, self.evaluation.makespan)
+        return self.parse.total + self.evaluation.makespan
+
+
+def plan_engines(
+    engines: Sequence[str],
+    doc_ids: Sequence[str],
+    prediction_root: Path,
+    page_counts: Mapping[str, int],
+    manifest: Optional[CorpusManifest],
+    eval_workers: int = 1,
+    streaming: bool = False,
+    store_path: Optional[Path] = None,
+) -> List[EnginePlan]:
+    """Estimate every engine's runtime over ``doc_ids``.
+
+    Engines convert one document at a time, so the parse estimate is the
+    sum of its document costs. Evaluation runs on ``eval_workers`` with
+    ``streaming`` and in one process otherwise; its schedule is only
+    estimated when the manifest covers every document.
+    """
+
+    eval_costs = evaluation_costs(manifest, doc_ids)
+    evaluation = sorted_evaluation = None
+    if doc_ids and len(eval_costs) == len(doc_ids):
+        workers = eval_workers if streaming else 1
+        evaluation = lpt_schedule(eval_costs, workers)
+        sorted_evaluation = list_schedule(sorted(doc_ids), eval_costs, workers)
+    return [
+        EnginePlan(
+            engine,
+            len(doc_ids),
+            parse_costs(prediction_root / engine, doc_ids, page_counts, store_path),
+            evaluation,
+            sorted_evaluation,
+            streaming,
+        )
+        for engine in engines
+    ]
+
+
+def _format_seconds(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1f}s"
+
+
+def format_plan(plans: Sequence[EnginePlan]) -> str:
+    """Render ``plans`` as a table, one row per engine."""
+
+    header = (
+        f"{'engine':<24}{'docs':>6}  {'parse source':<14}{'parse':>10}"
+        f"{'evaluate':>11}{'(sorted)':>11}{'total':>10}"
+    )
+    lines = [header]
+    for plan in plans:
+        if plan.parse.unit == "seconds":
+            parse = _format_seconds(plan.parse.total)
+        else:
+            parse = f"{plan.parse.total:.0f}p"
+        evaluation = plan.evaluation.makespan if plan.evaluation else None
+        sorted_evaluation = (
+            plan.sorted_evaluation.makespan if plan.sorted_evaluation else None
+        )
+        lines.append(
+            f"{plan.engine:<24}{plan.documents:>6}  {plan.parse.source:<14}{parse:>10}"
+            f"{_format_seconds(evaluation):>11}{_format_seconds(sorted_evaluation):>11}"
+            f"{_format_seconds(plan.total):>10}"
+        )
+    return "\n".join(lines)
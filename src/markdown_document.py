@@ -0,0 +1,52 @@
+"""Markdown text paired with lazily computed evaluation artefacts.
+
+Every metric converts Markdown tables to HTML and then builds its own view of
+the document (normalised text, extracted tables, heading trees). Evaluating
+one prediction per run repeats that work for the ground truth each time. A
+:class:`MarkdownDocument` computes the HTML conversion once and memoises the
+per-metric artefacts under a key, so long-lived callers such as
+``evaluation_server.py`` prepare the ground truth once and reuse it for every
+prediction scored against it.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional
+
+from converter_markdown_table import convert_to_markdown_with_html_tables
+
+
+class MarkdownDocument:
+    """A Markdown string with cached HTML-table conversion and artefacts.
+
+    ``cache_hits`` and ``cache_misses`` count artefact lookups across every
+    instance in the process (see ``telemetry``).
+    """
+
+    cache_hits = 0
+    cache_misses = 0
+
+    def __init__(self, text: Optional[str]) -> None:
+        self.text = text
+        self._with_html: Optional[str] = None
+        self._converted = False
+        self._artifacts: Dict[str, Any] = {}
+
+    @property
+    def with_html(self) -> Optional[str]:
+        """``text`` with Markdown tables rendered as HTML tables."""
+
+        if not self._converted:
+            self._with_html = convert_to_markdown_with_html_tables(self.text)
+            self._converted = True
+        return self._with_html
+
+    def artifact(self, key: str, builder: Callable[["MarkdownDocument"], Any]) -> Any:
+        """Return the artefact stored under ``key``, building it on first use."""
+
+        if key in self._artifacts:
+            MarkdownDocument.cache_hits += 1
+        else:
+            MarkdownDocument.cache_misses += 1
+            self._artifacts[key] = builder(self)
+        return self._artifacts[key]
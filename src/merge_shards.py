@@ -0,0 +1,190 @@
+"""Merge sharded parse and evaluation outputs into single-node reports.
+
+Each ``--shard i/N`` run leaves ``summary.shard-i-of-N.json`` and
+``evaluation.shard-i-of-N.{json,csv}`` next to the engine's ``markdown``
+directory (copy them into one tree when shards ran on different machines).
+This command checks that all N shards are present, sums their timings into a
+combined ``summary.json`` and rebuilds ``evaluation.json``/``.csv`` with the
+same document order and aggregates a single-node run would produce.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from evaluator import (
+    DEFAULT_OUTPUT_FILENAME,
+    DEFAULT_PREDICTION_ROOT,
+    SUMMARY_FILENAME,
+    DocumentScores,
+    _write_evaluation,
+)
+from sharding import Shard, shard_from_filename
+
+
+def _find_shard_files(prediction_dir: Path, filename: str) -> Dict[Shard, Path]:
+    """Return ``{shard: path}`` for every shard variant of ``filename``."""
+
+    stem, suffix = Path(filename).stem, Path(filename).suffix
+    found: Dict[Shard, Path] = {}
+    for path in prediction_dir.glob(f"{stem}.shard-*-of-*{suffix}"):
+        shard = shard_from_filename(path.name)
+        if shard is not None:
+            found[shard] = path
+    return found
+
+
+def _check_complete(shards: List[Shard], prediction_dir: Path) -> int:
+    counts = {shard.count for shard in shards}
+    if len(counts) != 1:
+        raise ValueError(
+            f"Mixed shard counts in {prediction_dir}: {sorted(counts)}"
+        )
+    count = counts.pop()
+    missing = sorted(set(range(1, count + 1)) - {shard.index for shard in shards})
+    if missing:
+        raise FileNotFoundError(
+            f"Missing shard(s) {', '.join(map(str, missing))} of {count} in {prediction_dir}"
+        )
+    return count
+
+
+def _merge_summaries(summaries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-shard summaries, summing document counts and timings."""
+
+    first = summaries[0]
+    document_count = sum(summary.get("document_count", 0) for summary in summaries)
+    total_elapsed = sum(summary.get("total_elapsed", 0.0) for summary in summaries)
+    processors = sorted({summary.get("processor") for summary in summaries} - {None})
+    page_counts = [summary.get("page_count") for summary in summaries]
+    pages = {}
+    if None not in page_counts and sum(page_counts):
+        pages = {
+            "page_count": sum(page_counts),
+            "elapsed_per_page": total_elapsed / sum(page_counts),
+        }
+    return {
+        "engine_name": first.get("engine_name"),
+        "engine_version": first.get("engine_version"),
+        "processor": " | ".join(processors) if processors else None,
+        "document_count": document_count,
+        "total_elapsed": total_elapsed,
+        "elapsed_per_doc": total_elapsed / document_count if document_count else 0,
+        **pages,
+        "date": max(summary.get("date", "") for summary in summaries),
+        "max_shard_elapsed": max(
+            summary.get("total_elapsed", 0.0) for summary in summaries
+        ),
+        "shards": [
+            {
+                "shard": summary.get("shard"),
+                "processor": summary.get("processor"),
+                "document_count": summary.get("document_count"),
+                "total_elapsed": summary.get("total_elapsed"),
+                "run_config": summary.get("run_config"),
+            }
+            for summary in summaries
+        ],
+    }
+
+
+def merge_shards(
+    prediction_dir: Path, output_filename: str = DEFAULT_OUTPUT_FILENAME
+) -> Path:
+    """Merge all shard outputs in ``prediction_dir`` and return the report path."""
+
+    evaluation_files = _find_shard_files(prediction_dir, output_filename)
+    if not evaluation_files:
+        raise FileNotFoundError(f"No shard evaluation files found in {prediction_dir}")
+    shard_count = _check_complete(list(evaluation_files), prediction_dir)
+
+    documents: Dict[str, DocumentScores] = {}
+    for shard in sorted(evaluation_files, key=lambda item: item.index):
+        payload = json.loads(evaluation_files[shard].read_text(encoding="utf-8"))
+        for entry in payload["documents"]:
+            scores = DocumentScores.from_json(entry)
+            if scores.document_id in documents:
+                raise ValueError(
+                    f"Document {scores.document_id} appears in more than one shard"
+                )
+            documents[scores.document_id] = scores
+
+    summary_files = _find_shard_files(prediction_dir, SUMMARY_FILENAME)
+    if summary_files:
+        _check_complete(list(summary_files), prediction_dir)
+        summaries = [
+            json.loads(summary_files[shard].read_text(encoding="utf-8"))
+            for shard in sorted(summary_files, key=lambda item: item.index)
+        ]
+        summary_path = prediction_dir / SUMMARY_FILENAME
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(_merge_summaries(summaries), f, indent=4)
+        logging.info("Merged %d shard summaries into %s", len(summaries), summary_path)
+
+    # Single-node runs order documents by sorted ground-truth file name.
+    ordered = sorted(documents.values(), key=lambda doc: f"{doc.document_id}.md")
+    logging.info(
+        "Merged %d documents from %d shards for %s",
+        len(ordered),
+        shard_count,
+        prediction_dir.name,
+    )
+    return _write_evaluation(prediction_dir, output_filename, ordered)
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Merge sharded evaluation outputs into evaluation.json/.csv"
+    )
+    parser.add_argument(
+        "--prediction-root",
+        type=str,
+        default=DEFAULT_PREDICTION_ROOT,
+        help="Directory containing engine prediction outputs",
+    )
+    parser.add_argument(
+        "--engine",
+        type=str,
+        default=None,
+        help="Engine to merge. If not specified, every engine with shard outputs is merged.",
+    )
+    parser.add_argument(
+        "--output-filename",
+        type=str,
+        default=DEFAULT_OUTPUT_FILENAME,
+        help="Evaluation filename used by the shard runs",
+    )
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=list(logging.getLevelNamesMapping().keys()),
+        default="INFO",
+        help="Python logging level (e.g. INFO, DEBUG)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
+    prediction_root = Path(args.prediction_root)
+
+    if args.engine:
+        engine_dirs = [prediction_root / args.engine]
+    else:
+        engine_dirs = [
+            path
+            for path in sorted(prediction_root.iterdir())
+            if path.is_dir() and _find_shard_files(path, args.output_filename)
+        ]
+
+    for engine_dir in engine_dirs:
+        print(merge_shards(engine_dir, args.output_filename))
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry point
+    main()
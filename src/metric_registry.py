@@ -0,0 +1,289 @@
+"""Registry of the metrics computed by the evaluator.
+
+Each :class:`MetricScorer` produces one or more related metrics (for example
+``nid`` and ``nid_s``) from a ground-truth/prediction
+:class:`~markdown_document.MarkdownDocument` pair. It is only asked for the
+metrics that were requested, so ``--metrics nid`` never extracts tables or
+runs a tree edit distance. ``overall`` is the mean of each scorer's
+``overall`` metric and pulls those metrics in when requested.
+
+Scorers may also supply a cheap approximation with bounds (see
+``evaluator_approx``) that ``evaluator.py --approx`` uses instead, and that
+stands in for a scorer that exceeds its ``--metric-timeout`` budget (see
+``metric_timeout``). New metrics
+plug in with :func:`register_scorer`; ``DocumentScores``, the JSON/CSV
+reports and the batch API pick them up from here.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from statistics import fmean
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from evaluator_approx import Estimate, approximate_heading_level, approximate_table
+from evaluator_heading_level import evaluate_heading_level_documents, heading_structure
+from evaluator_reading_order import evaluate_reading_order_documents, reading_order_texts
+from evaluator_table import evaluate_table_documents, table_html, table_tree
+from markdown_document import MarkdownDocument
+from metric_timeout import (
+    TIMEOUT_FALLBACKS,
+    MetricTimeout,
+    budget_for,
+    compute_with_timeout,
+)
+from stage_profiler import profile_stage
+from tracing import span
+
+OVERALL = "overall"
+
+ScoreFunction = Callable[
+    [MarkdownDocument, MarkdownDocument, FrozenSet[str]], Tuple[Optional[float], ...]
+]
+
+
+@dataclass(frozen=True)
+class MetricScorer:
+    """A scoring routine and the metrics it produces.
+
+    ``compute(gt, pred, requested)`` returns one value per entry of
+    ``metrics``; entries outside ``requested`` may be ``None``.
+    ``prepare(gt, requested)`` builds the ground-truth artefacts the scorer
+    reuses across predictions. ``approximate`` has the same signature as
+    ``compute`` but returns :class:`~evaluator_approx.Estimate` values; it is
+    used in approximate mode and scorers without one stay exact.
+    """
+
+    name: str
+    metrics: Tuple[str, ...]
+    compute: ScoreFunction
+    overall: Optional[str] = None
+    prepare: Optional[Callable[[MarkdownDocument, FrozenSet[str]], Any]] = None
+    approximate: Optional[
+        Callable[
+            [MarkdownDocument, MarkdownDocument, FrozenSet[str]],
+            Tuple[Optional[Estimate], ...],
+        ]
+    ] = None
+
+
+SCORERS: Dict[str, MetricScorer] = {}
+
+
+def register_scorer(scorer: MetricScorer) -> MetricScorer:
+    """Add ``scorer`` to the registry; metric names must be unique."""
+
+    taken = {OVERALL, *metric_names()}
+    clashes = sorted(taken.intersection(scorer.metrics))
+    if scorer.name in SCORERS or clashes:
+        raise ValueError(
+            f"Scorer {scorer.name!r} conflicts with registered metrics: {clashes}"
+        )
+    if scorer.overall is not None and scorer.overall not in scorer.metrics:
+        raise ValueError(f"Scorer {scorer.name!r} overall metric must be one of its metrics")
+    SCORERS[scorer.name] = scorer
+    return scorer
+
+
+def metric_names() -> Tuple[str, ...]:
+    """Return every metric name in report order, starting with ``overall``."""
+
+    names = [metric for scorer in SCORERS.values() for metric in scorer.metrics]
+    return (OVERALL, *names) if names else ()
+
+
+def resolve_metrics(metrics: Optional[Iterable[str]] = None) -> Tuple[str, ...]:
+    """Validate ``metrics`` and return them in report order (all by default)."""
+
+    available = metric_names()
+    if metrics is None:
+        return available
+    requested = set(metrics)
+    unknown = sorted(requested - set(available))
+    if unknown:
+        raise ValueError(
+            f"Unknown metric(s): {', '.join(unknown)}. Choose from {', '.join(available)}"
+        )
+    if not requested:
+        raise ValueError("At least one metric is required")
+    return tuple(name for name in available if name in requested)
+
+
+def parse_metrics(value: str) -> Tuple[str, ...]:
+    """Parse a comma-separated ``--metrics`` value such as ``nid,teds_s``."""
+
+    return resolve_metrics(part.strip() for part in value.split(",") if part.strip())
+
+
+def required_metrics(metrics: Iterable[str]) -> Dict[str, FrozenSet[str]]:
+    """Return ``{scorer name: metrics to compute}`` for the requested metrics."""
+
+    requested = set(metrics)
+    required: Dict[str, FrozenSet[str]] = {}
+    for scorer in SCORERS.values():
+        needed = requested.intersection(scorer.metrics)
+        if OVERALL in requested and scorer.overall is not None:
+            needed.add(scorer.overall)
+        if needed:
+            required[scorer.name] = frozenset(needed)
+    return required
+
+
+def prepare_ground_truth(document: MarkdownDocument, metrics: Iterable[str]) -> None:
+    """Build the ground-truth artefacts needed to score ``metrics``."""
+
+    for name, needed in required_metrics(metrics).items():
+        prepare = SCORERS[name].prepare
+        if prepare is not None:
+            prepare(document, needed)
+
+
+def compute_scores(
+    gt_document: MarkdownDocument,
+    pred_document: MarkdownDocument,
+    metrics: Iterable[str],
+    timings: Optional[Dict[str, float]] = None,
+    approximate: bool = False,
+    bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+    timeouts: Optional[Dict[str, float]] = None,
+    timeout_fallback: str = "zero",
+    timed_out: Optional[List[str]] = None,
+) -> Dict[str, Optional[float]]:
+    """Compute ``metrics`` for a document pair, in report order.
+
+    When ``timings`` is given, the seconds spent in each scorer are stored
+    under the scorer's name. With ``approximate``, scorers that provide an
+    approximation use it and, when ``bounds`` is given, the ``(lower, upper)``
+    range of every approximated metric (and of ``overall``) is stored there.
+
+    ``timeouts`` maps scorer names (``"*"`` for any) to a budget in seconds;
+    such scorers run in a supervised process. A scorer that overruns scores
+    0, or with ``timeout_fallback="bound"`` the lower bound of its
+    approximation, and its metrics are appended to ``timed_out``.
+    """
+
+    selected = resolve_metrics(metrics)
+    values: Dict[str, Optional[float]] = {}
+    ranges: Dict[str, Tuple[float, float]] = {}
+    overall_values: List[float] = []
+    overall_ranges: List[Tuple[float, float]] = []
+    for name, needed in required_metrics(selected).items():
+        scorer = SCORERS[name]
+        start = time.perf_counter()
+        with profile_stage(f"evaluate.{name}"), span(name, "metric"):
+            if approximate and scorer.approximate is not None:
+                estimates = scorer.approximate(gt_document, pred_document, needed)
+                results = tuple(None if e is None else e.value for e in estimates)
+                for metric, estimate in zip(scorer.metrics, estimates):
+                    if estimate is not None:
+                        ranges[metric] = (estimate.lower, estimate.upper)
+            elif budget_for(timeouts, name) is not None:
+                try:
+                    results = compute_with_timeout(
+                        name,
+                        gt_document.text,
+                        pred_document.text,
+                        needed,
+                        budget_for(timeouts, name),
+                    )
+                except MetricTimeout:
+                    results = _timeout_fallback(
+                        scorer, gt_document, pred_document, needed, timeout_fallback
+                    )
+                    if timed_out is not None:
+                        timed_out.extend(
+                            metric
+                            for metric, value in zip(scorer.metrics, results)
+                            if value is not None
+                        )
+            else:
+                results = scorer.compute(gt_document, pred_document, needed)
+        if timings is not None:
+            timings[name] = time.perf_counter() - start
+        values.update(zip(scorer.metrics, results))
+        if scorer.overall is not None and values[scorer.overall] is not None:
+            value = values[scorer.overall]
+            overall_values.append(value)
+            overall_ranges.append(ranges.get(scorer.overall, (value, value)))
+
+    values[OVERALL] = fmean(overall_values) if overall_values else None
+    if ranges and overall_ranges:
+        ranges[OVERALL] = (
+            fmean(lower for lower, _ in overall_ranges),
+            fmean(upper for _, upper in overall_ranges),
+        )
+    if bounds is not None:
+        bounds.update((name, ranges[name]) for name in selected if name in ranges)
+    return {name: values[name] for name in selected}
+
+
+def _timeout_fallback(
+    scorer: MetricScorer,
+    gt_document: MarkdownDocument,
+    pred_document: MarkdownDocument,
+    needed: FrozenSet[str],
+    fallback: str,
+) -> Tuple[Optional[float], ...]:
+    """Scores recorded for a scorer that ran out of time.
+
+    Metrics the scorer would not have computed stay ``None``.
+    """
+
+    if fallback == "bound" and scorer.approximate is not None:
+        estimates = scorer.approximate(gt_document, pred_document, needed)
+        return tuple(None if e is None else e.lower for e in estimates)
+    if fallback not in TIMEOUT_FALLBACKS:
+        raise ValueError(f"Unknown timeout fallback: {fallback!r}")
+    # Applicability comes from the ground truth alone, so score the scorer
+    # against an empty prediction only to learn which metrics apply.
+    empty = scorer.compute(gt_document, MarkdownDocument(""), needed)
+    return tuple(None if value is None else 0.0 for value in empty)
+
+
+def _prepare_tables(document: MarkdownDocument, needed: FrozenSet[str]) -> None:
+    if table_html(document) is None:
+        return
+    if "teds" in needed:
+        table_tree(document, structure_only=False)
+    if "teds_s" in needed:
+        table_tree(document, structure_only=True)
+
+
+register_scorer(
+    MetricScorer(
+        name="nid",
+        metrics=("nid", "nid_s"),
+        compute=lambda gt, pred, _: evaluate_reading_order_documents(gt, pred),
+        overall="nid",
+        prepare=lambda gt, _: reading_order_texts(gt),
+    )
+)
+register_scorer(
+    MetricScorer(
+        name="teds",
+        metrics=("teds", "teds_s"),
+        compute=lambda gt, pred, needed: evaluate_table_documents(
+            gt, pred, content="teds" in needed, structure="teds_s" in needed
+        ),
+        overall="teds",
+        prepare=_prepare_tables,
+        approximate=lambda gt, pred, needed: approximate_table(
+            gt, pred, content="teds" in needed, structure="teds_s" in needed
+        ),
+    )
+)
+register_scorer(
+    MetricScorer(
+        name="mhs",
+        metrics=("mhs", "mhs_s"),
+        compute=lambda gt, pred, needed: evaluate_heading_level_documents(
+            gt, pred, text="mhs" in needed, structure="mhs_s" in needed
+        ),
+        overall="mhs",
+        prepare=lambda gt, _: heading_structure(gt),
+        approximate=lambda gt, pred, needed: approximate_heading_level(
+            gt, pred, text="mhs" in needed, structure="mhs_s" in needed
+        ),
+    )
+)
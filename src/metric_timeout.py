@@ -0,0 +1,164 @@
+"""Per-metric time budgets enforced by a supervised scoring process.
+
+APTED behind TEDS and MHS has no time bound, and a single prediction with a
+huge garbage table can keep a scorer busy for a very long time. Python
+threads cannot be interrupted, so scorers with a budget run in a long-lived
+child process: the parent sends the document pair over a pipe and waits at
+most the budget for the answer. On timeout the child is killed (and started
+again for the next call) and :class:`MetricTimeout` is raised; the caller
+records a fallback score instead.
+
+Budgets come from ``--metric-timeout``: a number applies to every scorer,
+``teds=30,mhs=10`` sets them per scorer, and ``10,teds=60`` combines both.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from multiprocessing.connection import Connection
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+DEFAULT_TIMEOUT_KEY = "*"
+TIMEOUT_FALLBACKS = ("zero", "bound")
+
+
+class MetricTimeout(Exception):
+    """Raised when a scorer exceeds its time budget."""
+
+
+def parse_metric_timeouts(value: str) -> Dict[str, float]:
+    """Parse ``"30"``, ``"teds=30,mhs=10"`` or ``"10,teds=60"`` into budgets.
+
+    The returned mapping is keyed by scorer name, with ``"*"`` for the
+    budget of every other scorer.
+    """
+
+    budgets: Dict[str, float] = {}
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, seconds = part.rpartition("=")
+        budget = float(seconds)
+        if budget <= 0:
+            raise ValueError(f"Metric timeout must be positive, got {part!r}")
+        budgets[name.strip() or DEFAULT_TIMEOUT_KEY] = budget
+    if not budgets:
+        raise ValueError("Metric timeout must not be empty")
+    return budgets
+
+
+def validate_metric_timeouts(
+    budgets: Dict[str, float], scorers: Iterable[str]
+) -> None:
+    """Reject budgets for scorers that are not registered."""
+
+    unknown = sorted(set(budgets) - {DEFAULT_TIMEOUT_KEY, *scorers})
+    if unknown:
+        raise ValueError(f"Unknown scorer(s) in metric timeout: {', '.join(unknown)}")
+
+
+def budget_for(budgets: Optional[Dict[str, float]], scorer: str) -> Optional[float]:
+    """Return the budget in seconds for ``scorer``, if any."""
+
+    if not budgets:
+        return None
+    return budgets.get(scorer, budgets.get(DEFAULT_TIMEOUT_KEY))
+
+
+def _serve(connection: Connection) -> None:
+    """Child process loop: score requests until the parent hangs up."""
+
+    from markdown_document import MarkdownDocument
+    from metric_registry import SCORERS
+
+    # Scorers for one document arrive back to back; keep its ground truth.
+    cached: Tuple[Optional[str], Optional[MarkdownDocument]] = (None, None)
+    while True:
+        try:
+            scorer_name, gt_text, pred_text, needed = connection.recv()
+        except (EOFError, OSError):
+            return
+        if cached[0] != gt_text or cached[1] is None:
+            cached = (gt_text, MarkdownDocument(gt_text))
+        try:
+            result = SCORERS[scorer_name].compute(
+                cached[1], MarkdownDocument(pred_text), needed
+            )
+            connection.send(("ok", result))
+        except Exception as exc:  # noqa: BLE001 - re-raised in the parent
+            connection.send(("error", f"{type(exc).__name__}: {exc}"))
+
+
+class SupervisedScorer:
+    """A child process that runs scorers and is killed when one overruns."""
+
+    def __init__(self) -> None:
+        self._process: Optional[multiprocessing.process.BaseProcess] = None
+        self._connection: Optional[Connection] = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        # Fork keeps scorers registered at runtime; spawn re-imports them.
+        method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        context = multiprocessing.get_context(method)
+        parent, child = context.Pipe()
+        process = context.Process(target=_serve, args=(child,), daemon=True)
+        process.start()
+        child.close()
+        self._process, self._connection = process, parent
+
+    def stop(self) -> None:
+        """Kill the child process; the next call starts a fresh one."""
+
+        if self._process is not None:
+            self._process.kill()
+            self._process.join()
+        if self._connection is not None:
+            self._connection.close()
+        self._process = self._connection = None
+
+    def compute(
+        self,
+        scorer_name: str,
+        gt_text: Optional[str],
+        pred_text: Optional[str],
+        needed: FrozenSet[str],
+        timeout: float,
+    ) -> Tuple[Optional[float], ...]:
+        """Run ``scorer_name`` in the child, waiting at most ``timeout`` seconds."""
+
+        with self._lock:
+            if self._process is None or not self._process.is_alive():
+                self.stop()
+                self._start()
+            self._connection.send((scorer_name, gt_text, pred_text, needed))
+            if not self._connection.poll(timeout):
+                self.stop()
+                raise MetricTimeout(
+                    f"Scorer {scorer_name!r} exceeded its {timeout:g}s budget"
+                )
+            try:
+                status, payload = self._connection.recv()
+            except EOFError:
+                self.stop()
+                raise RuntimeError(f"Scorer {scorer_name!r} worker exited unexpectedly")
+        if status != "ok":
+            raise RuntimeError(payload)
+        return payload
+
+
+_SUPERVISOR = SupervisedScorer()
+
+
+def compute_with_timeout(
+    scorer_name: str,
+    gt_text: Optional[str],
+    pred_text: Optional[str],
+    needed: FrozenSet[str],
+    timeout: float,
+) -> Tuple[Optional[float], ...]:
+    """Run a scorer in this process's supervised worker (see :class:`SupervisedScorer`)."""
+
+    return _SUPERVISOR.compute(scorer_name, gt_text, pred_text, needed, timeout)
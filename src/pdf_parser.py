@@ -14,59 +14,211 @@ import json
 import logging
 from pathlib import Path
 import time
-from typing import List, Optional
+from typing import Callable, List, Optional, Tuple
 
 import cpuinfo
 
-from engine_registry import ENGINES, ENGINE_DISPATCH
+from benchmark_profiles import (
+    BenchmarkProfile,
+    profile_root,
+    reject_unprofiled_options,
+    resolve_profile,
+    run_profiled_parse,
+)
+from corpus_manifest import DEFAULT_MANIFEST_PATH, load_manifest, pdf_paths
+from document_pack import PACK_FORMATS, pack_predictions
+from engine_registry import ENGINES, ENGINE_DISPATCH, ENGINE_RUN_CONFIGS, load_engine
+from engine_runtime import EngineRunConfig, engine_run_context, parse_cpu_list
+from engine_server import convert_with_server
+from history_store import DEFAULT_HISTORY_ROOT, STORE_FILENAME
+from job_scheduler import evaluation_costs, longest_first, parse_costs
+from sampling import (
+    DEFAULT_REFERENCE_PATH,
+    Sample,
+    load_page_counts,
+    parse_sample_size,
+    sample_filename,
+    select_sample,
+)
+from sharding import Shard, parse_shard, select_shard, shard_filename
+from stage_profiler import (
+    DEFAULT_TOP_FUNCTIONS,
+    parse_top_count,
+    profile_stage,
+    profiling,
+)
+from telemetry import ConversionRecorder, engine_labels, telemetry_file
+from tracing import span, trace_documents, tracing
 
 DEFAULT_INPUT_DIR = "pdfs"
+DEFAULT_PREDICTION_ROOT = "prediction"
+
+
+def select_documents(
+    input_dir: Path,
+    doc_id: Optional[str] = None,
+    shard: Optional[Shard] = None,
+    sample: Optional[Sample] = None,
+) -> Tuple[List[Path], Optional[Path]]:
+    """Return the PDFs to convert and the path batch engines should read.
+
+    The second value is ``input_dir`` (or the single ``doc_id`` PDF) when the
+    whole selection can be handed to an engine as one path, and ``None`` for
+    shards and samples, which engines convert document by document.
+    """
+    project_root = Path(__file__).parent.parent.resolve()
+    if doc_id:
+        candidate_path = input_dir / f"{doc_id.strip()}.pdf"
+        if not candidate_path.exists():
+            raise FileNotFoundError(f"'{doc_id.strip()}.pdf' not found in {input_dir}.")
+        return [candidate_path], candidate_path
+
+    document_paths = pdf_paths(input_dir, project_root / DEFAULT_MANIFEST_PATH)
+    input_path: Optional[Path] = input_dir
+    if not document_paths:
+        raise FileNotFoundError(f"No PDFs found in {input_dir}.")
+    if shard is not None:
+        document_paths = select_shard(document_paths, shard)
+        # Batch engines convert ``input_path`` as a whole; without it they
+        # fall back to the selected document paths.
+        input_path = None
+        if not document_paths:
+            raise FileNotFoundError(
+                f"No PDFs in {input_dir} belong to shard {shard.index}/{shard.count}."
+            )
+    if sample is not None:
+        document_paths = select_sample(
+            document_paths, sample, project_root / DEFAULT_REFERENCE_PATH
+        )
+        input_path = None
+    return document_paths, input_path
 
 
 def process_markdown(
     engine_name: str,
     input_dir_name: str,
     doc_id: Optional[str] = None,
+    run_config: Optional[EngineRunConfig] = None,
+    prediction_root: Optional[Path] = None,
+    profile: Optional[BenchmarkProfile] = None,
+    on_document: Optional[Callable[[str], None]] = None,
+    shard: Optional[Shard] = None,
+    use_engine_server: bool = True,
+    sample: Optional[Sample] = None,
+    metrics_textfile: Optional[Path] = None,
 ):
     """Run PDF-to-Markdown conversion for a single engine.
 
     Creates an output directory, converts all PDFs from the input directory
-    to Markdown, and writes a summary file with performance metrics.
+    to Markdown, and writes a summary file with performance metrics. The
+    engine runs under ``run_config`` (defaulting to the engine's entry in
+    ``ENGINE_RUN_CONFIGS``) and the effective settings are recorded in the
+    summary, together with ``profile`` when the run is resource-constrained.
+
+    ``on_document`` is called with the path of each Markdown file as soon as
+    the engine has written it. With ``shard`` only that subset of the corpus is
+    converted and the summary is written to ``summary.shard-i-of-N.json``.
+    ``sample`` likewise converts a stratified sample (see ``sampling``) and
+    writes ``summary.sample-N-seed-S.json``. Page counts from the corpus
+    manifest or ``reference.json`` add ``page_count`` and ``elapsed_per_page``
+    to the summary. With ``metrics_textfile``,
+    conversion counts and latencies are exported there (see ``telemetry``).
+
+    Documents are converted in descending order of the evaluation cost
+    ``job_scheduler`` estimates from the corpus manifest, ties broken by the
+    parse cost estimated from the engine's previous run, so the expensive
+    evaluations of a streaming run start early. When the previous
+    run calibrates the estimate, its total is recorded as
+    ``predicted_elapsed`` next to the measured ``total_elapsed``.
+
+    When ``use_engine_server`` is set and ``engine_server.py`` is running with
+    this engine loaded, the job is sent to the warm server instead of loading
+    the engine in this process.
     """
     project_root = Path(__file__).parent.parent.resolve()
+    if shard is not None and sample is not None:
+        raise ValueError("--sample cannot be combined with --shard.")
 
     engine_version = ENGINES[engine_name]
     input_dir = Path(input_dir_name).resolve()
-    output_dir = project_root / "prediction" / engine_name / "markdown"
+    if prediction_root is None:
+        prediction_root = project_root / DEFAULT_PREDICTION_ROOT
+    output_dir = prediction_root / engine_name / "markdown"
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    if doc_id:
-        candidate_path = input_dir / f"{doc_id.strip()}.pdf"
-        if not candidate_path.exists():
-            raise FileNotFoundError(f"'{doc_id.strip()}.pdf' not found in {input_dir}.")
-        document_paths = [candidate_path]
-        input_path = candidate_path
-    else:
-        document_paths = sorted(input_dir.glob("*.pdf"))
-        input_path = input_dir
-        if not document_paths:
-            raise FileNotFoundError(f"No PDFs found in {input_dir}.")
-
+    document_paths, input_path = select_documents(input_dir, doc_id, shard, sample)
     document_count = len(document_paths)
     logging.info(
         "Processing %d PDFs with %s %s...", document_count, engine_name, engine_version
     )
 
-    start_time = time.time()
-
     to_markdown_func = ENGINE_DISPATCH.get(engine_name)
-    if to_markdown_func:
-        to_markdown_func(document_paths, input_path, output_dir)
-    else:
+    if not to_markdown_func:
         raise ValueError(f"Unknown engine: {engine_name}")
 
-    end_time = time.time()
-    total_elapsed = end_time - start_time
+    if run_config is None:
+        run_config = ENGINE_RUN_CONFIGS.get(engine_name, EngineRunConfig())
+
+    reference_path = project_root / DEFAULT_REFERENCE_PATH
+    page_counts = load_page_counts(reference_path) if reference_path.is_file() else {}
+    # Estimated from the previous run, so before this one overwrites it.
+    doc_ids = [path.stem for path in document_paths]
+    estimate = parse_costs(
+        output_dir.parent,
+        doc_ids,
+        page_counts,
+        project_root / DEFAULT_HISTORY_ROOT / STORE_FILENAME,
+    )
+    eval_costs = evaluation_costs(
+        load_manifest(project_root / DEFAULT_MANIFEST_PATH), doc_ids
+    )
+    # Parse order cannot shorten the parse itself, only decide when each
+    # evaluation can start, so evaluation cost leads and parse cost breaks ties.
+    document_paths = longest_first(
+        document_paths, eval_costs, estimate.costs, key=lambda path: path.stem
+    )
+    telemetry = telemetry_file(metrics_textfile)
+    if telemetry is not None:
+        recorder = ConversionRecorder(
+            telemetry, engine_labels(engine_name, engine_version), page_counts
+        )
+        on_document = recorder.wrap(on_document)
+    on_document = trace_documents(on_document, engine=engine_name)
+    server_result = None
+    if use_engine_server:
+        server_result = convert_with_server(
+            engine_name,
+            document_paths,
+            input_path,
+            output_dir,
+            run_config,
+            on_document=on_document,
+        )
+
+    if server_result is not None:
+        total_elapsed = server_result["elapsed"]
+        run_settings = server_result["run_config"]
+        logging.info(
+            "Converted by engine server in %.2f seconds (queued %.2f seconds)",
+            total_elapsed,
+            server_result["queue_wait"],
+        )
+    else:
+        with engine_run_context(run_config) as run_settings:
+            # Import the adapter and load its models before the clock starts,
+            # so total_elapsed stays comparable with runs in history/.
+            warm_up = getattr(load_engine(engine_name), "warm_up", None)
+            if warm_up:
+                warm_up()
+            start_time = time.time()
+            with profile_stage(f"parse.{engine_name}"), span(
+                "to_markdown", "engine", engine=engine_name, documents=document_count
+            ):
+                to_markdown_func(
+                    document_paths, input_path, output_dir, on_document=on_document
+                )
+            end_time = time.time()
+        total_elapsed = end_time - start_time
 
     elapsed_per_doc = total_elapsed / document_count if document_count > 0 else 0
     processor = cpuinfo.get_cpu_info()["brand_raw"]
@@ -78,13 +230,43 @@ def process_markdown(
         "total_elapsed": total_elapsed,
         "elapsed_per_doc": elapsed_per_doc,
         "date": time.strftime("%Y-%m-%d"),
+        "run_config": run_settings,
     }
+    pages = [page_counts.get(path.stem) for path in document_paths]
+    if pages and None not in pages:
+        summary_data["page_count"] = sum(pages)
+        summary_data["elapsed_per_page"] = total_elapsed / sum(pages)
+    if estimate.unit == "seconds":
+        summary_data["predicted_elapsed"] = estimate.total
+        logging.info(
+            "Converted in %.2f seconds; predicted %.2f seconds from %s",
+            total_elapsed,
+            estimate.total,
+            estimate.source,
+        )
+    if profile is not None:
+        summary_data["profile"] = profile.to_json()
+    if shard is not None:
+        summary_data["shard"] = shard.to_json()
+    if sample is not None:
+        summary_data["sample"] = {"size": sample.size, "seed": sample.seed}
+    if server_result is not None:
+        summary_data["engine_server"] = {
+            "queue_wait": server_result["queue_wait"],
+            "queue_depth": server_result["queue_depth"],
+        }
 
-    summary_file_path = output_dir.parent / "summary.json"
-    with open(summary_file_path, "w", encoding="utf-8") as f:
+    summary_file_path = output_dir.parent / sample_filename(
+        shard_filename("summary.json", shard), sample
+    )
+    with span(summary_file_path.name, "write", engine=engine_name), open(
+        summary_file_path, "w", encoding="utf-8"
+    ) as f:
         json.dump(summary_data, f, indent=4)
 
     logging.info("Summary saved to %s", summary_file_path)
+    if telemetry is not None:
+        telemetry.flush(force=True)
 
 
 def _parse_args(argv: Optional[List[str]] = None):
@@ -109,6 +291,87 @@ def _parse_args(argv: Optional[List[str]] = None):
         default=None,
         help="Process only the specified document",
     )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="Intra-op thread count (OMP/MKL/torch) for the engine run",
+    )
+    parser.add_argument(
+        "--cpus",
+        type=parse_cpu_list,
+        default=None,
+        help="CPU set to pin the engine process to (e.g. 0-3,6)",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        help="Convert only shard i of N (e.g. 1/4) of the corpus",
+    )
+    parser.add_argument(
+        "--sample",
+        type=parse_sample_size,
+        default=None,
+        help="Convert a stratified sample of N documents (see --seed)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Random seed for --sample",
+    )
+    parser.add_argument(
+        "--no-engine-server",
+        dest="use_engine_server",
+        action="store_false",
+        help="Convert in this process even if engine_server.py is running",
+    )
+    parser.add_argument(
+        "--pack",
+        choices=list(PACK_FORMATS),
+        default=None,
+        help=(
+            "Move each engine's Markdown output into prediction/<engine>/"
+            "markdown.<format> once it is converted"
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        type=resolve_profile,
+        default=None,
+        help=(
+            "Run under a resource profile such as 2c-4g (N cores, M GB); "
+            "outputs go to prediction/profiles/<profile>/"
+        ),
+    )
+    parser.add_argument(
+        "--cprofile",
+        type=Path,
+        default=None,
+        help=(
+            "Write a cProfile .pstats file per engine and a report.txt to this "
+            "directory (conversions in this process only)"
+        ),
+    )
+    parser.add_argument(
+        "--cprofile-top",
+        type=parse_top_count,
+        default=DEFAULT_TOP_FUNCTIONS,
+        help="Number of hottest functions listed per engine in the profile report",
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        type=Path,
+        default=None,
+        help="Export conversion telemetry to this Prometheus text file (.prom)",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        default=None,
+        help="Write a Chrome trace-event timeline of the run to this JSON file",
+    )
     parser.add_argument(
         "--log-level",
         type=str,
@@ -128,9 +391,58 @@ def main(argv: Optional[List[str]] = None) -> None:
         engines = list(ENGINES.keys())
     else:
         engines = [args.engine]
+    if args.pack and (args.shard is not None or args.sample is not None):
+        raise ValueError(
+            "--pack cannot be combined with --shard or --sample; pack the merged "
+            "output with document_pack.py instead."
+        )
+
+    project_root = Path(__file__).parent.parent.resolve()
+    prediction_root = project_root / DEFAULT_PREDICTION_ROOT
+    sample = Sample(args.sample, args.seed) if args.sample is not None else None
+    if args.profile is not None:
+        reject_unprofiled_options(
+            {
+                "--threads": args.threads,
+                "--cpus": args.cpus,
+                "--cprofile": args.cprofile,
+                "--trace": args.trace,
+            }
+        )
+        prediction_root = profile_root(prediction_root, args.profile.name)
+        for engine_name in engines:
+            run_profiled_parse(
+                args.profile,
+                engine_name,
+                args.input_dir,
+                prediction_root,
+                args.doc_id,
+                shard=args.shard,
+                sample=sample,
+                metrics_textfile=args.metrics_textfile,
+            )
+            if args.pack:
+                pack_predictions(prediction_root / engine_name, args.pack)
+        return
 
-    for engine_name in engines:
-        process_markdown(engine_name, args.input_dir, args.doc_id)
+    with tracing(args.trace), profiling(args.cprofile, args.cprofile_top):
+        for engine_name in engines:
+            run_config = ENGINE_RUN_CONFIGS[engine_name].override(
+                threads=args.threads, cpus=args.cpus
+            )
+            process_markdown(
+                engine_name,
+                args.input_dir,
+                args.doc_id,
+                run_config,
+                shard=args.shard,
+                use_engine_server=args.use_engine_server,
+                sample=sample,
+                metrics_textfile=args.metrics_textfile,
+            )
+            if args.pack:
+                with span("pack", "write", engine=engine_name):
+                    pack_predictions(prediction_root / engine_name, args.pack)
 
 
 if __name__ == "__main__":  # pragma: no cover - CLI entry point
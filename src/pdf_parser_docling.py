@@ -1,9 +1,23 @@
 import os
+from functools import lru_cache
+
+from docling.datamodel.base_models import InputFormat
 from docling.document_converter import DocumentConverter
 
 
-def to_markdown(doc_paths, _, output_dir):
-    converter = DocumentConverter()
+@lru_cache(maxsize=1)
+def _converter():
+    # Reused across calls so a long-lived process (see engine_server.py) keeps
+    # the pipeline models loaded.
+    return DocumentConverter()
+
+
+def warm_up():
+    _converter().initialize_pipeline(InputFormat.PDF)
+
+
+def to_markdown(doc_paths, _, output_dir, on_document=None):
+    converter = _converter()
     for doc_path in doc_paths:
         result = converter.convert(doc_path)
         markdown = result.document.export_to_markdown()
@@ -12,3 +26,5 @@ def to_markdown(doc_paths, _, output_dir):
         output_file = os.path.join(output_dir, f"{base_name}.md")
         with open(output_file, "w", encoding="utf-8") as f:
             f.write(markdown)
+        if on_document:
+            on_document(output_file)
@@ -1,12 +1,24 @@
 import os
+from functools import lru_cache
 
 from marker.converters.pdf import PdfConverter
 from marker.models import create_model_dict
 from marker.output import text_from_rendered
 
 
-def to_markdown(doc_paths, _, output_dir):
-    converter = PdfConverter(artifact_dict=create_model_dict())
+@lru_cache(maxsize=1)
+def _converter():
+    # Reused across calls so a long-lived process (see engine_server.py) does
+    # not reload the models through create_model_dict() for every job.
+    return PdfConverter(artifact_dict=create_model_dict())
+
+
+def warm_up():
+    _converter()
+
+
+def to_markdown(doc_paths, _, output_dir, on_document=None):
+    converter = _converter()
     for doc_path in doc_paths:
         rendered = converter(str(doc_path))
         text, _, images = text_from_rendered(rendered)
@@ -15,3 +27,5 @@ def to_markdown(doc_paths, _, output_dir):
         output_file = os.path.join(output_dir, f"{base_name}.md")
         with open(output_file, "w", encoding="utf-8") as f:
             f.write(text)
+        if on_document:
+            on_document(output_file)
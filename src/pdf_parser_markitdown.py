@@ -2,7 +2,7 @@ import os
 from markitdown import MarkItDown
 
 
-def to_markdown(doc_paths, _, output_dir):
+def to_markdown(doc_paths, _, output_dir, on_document=None):
     for doc_path in doc_paths:
         result = MarkItDown().convert(doc_path)
         markdown = result.text_content
@@ -11,3 +11,5 @@ def to_markdown(doc_paths, _, output_dir):
         output_file = os.path.join(output_dir, f"{base_name}.md")
         with open(output_file, "w", encoding="utf-8") as f:
             f.write(markdown)
+        if on_document:
+            on_document(output_file)
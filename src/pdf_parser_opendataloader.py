@@ -1,12 +1,23 @@
+import os
+
 import opendataloader_pdf
 
 
-def to_markdown(_, input_path, output_dir):
+def to_markdown(doc_paths, input_path, output_dir, on_document=None):
+    # Convert the whole input directory in one call unless only a subset of
+    # the corpus was selected.
+    inputs = [input_path] if input_path else [str(path) for path in doc_paths]
     opendataloader_pdf.convert(
-        input_path=[input_path],
+        input_path=inputs,
         output_dir=output_dir,
         format=["markdown"],
         table_method="cluster",
         image_output="off",
         quiet=True,
     )
+    if on_document:
+        # opendataloader_pdf converts the whole batch in one call, so documents
+        # are reported once it returns.
+        for doc_path in doc_paths:
+            base_name = os.path.splitext(os.path.basename(doc_path))[0]
+            on_document(os.path.join(output_dir, f"{base_name}.md"))
@@ -1,32 +1,59 @@
 import os
-import requests
+import time
+from pathlib import Path
+
 from dotenv import load_dotenv
 
+from remote_engine import (
+    RemoteEngineClient,
+    RemoteEngineConfig,
+    raise_for_failures,
+    write_request_log,
+)
+
 load_dotenv()
 
+DEFAULT_URL = "https://api.upstage.ai/v1/document-digitization"
+
+
+def _env_number(name, default, cast=float):
+    value = os.getenv(name)
+    return cast(value) if value else default
 
-def inference(input_path):
-    api_key = os.getenv("UPSTAGE_API_KEY")
-    url = "https://api.upstage.ai/v1/document-digitization"
-    headers = {"Authorization": f"Bearer {api_key}"}
-    with open(input_path, "rb") as document_file:
-        files = {"document": document_file}
-        data = {
+
+def _build_request(doc_path):
+    return {
+        "files": {"document": (doc_path.name, doc_path.read_bytes())},
+        "data": {
             "ocr": "force",
             "model": "document-parse",
             "output_formats": "['markdown']",
-        }
-        response = requests.post(url, headers=headers, files=files, data=data)
-    response.raise_for_status()
-    return response.json()
+        },
+    }
+
+
+def _parse_response(response_json):
+    return response_json.get("content", {}).get("markdown")
+
 
+def _client():
+    config = RemoteEngineConfig(
+        url=os.getenv("UPSTAGE_API_URL", DEFAULT_URL),
+        headers={"Authorization": f"Bearer {os.getenv('UPSTAGE_API_KEY')}"},
+        concurrency=_env_number("UPSTAGE_CONCURRENCY", 4, int),
+        requests_per_second=_env_number("UPSTAGE_REQUESTS_PER_SECOND", None),
+        max_retries=_env_number("UPSTAGE_MAX_RETRIES", 3, int),
+    )
+    return RemoteEngineClient(config, _build_request, _parse_response)
 
-def to_markdown(doc_paths, _, output_dir):
-    for doc_path in doc_paths:
-        response_json = inference(doc_path)
-        markdown = response_json.get("content", {}).get("markdown")
 
-        base_name = os.path.splitext(os.path.basename(doc_path))[0]
-        output_file = os.path.join(output_dir, f"{base_name}.md")
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(markdown)
+def to_markdown(doc_paths, _, output_dir, on_document=None):
+    client = _client()
+    try:
+        start_time = time.perf_counter()
+        records = client.convert(doc_paths, Path(output_dir), on_document)
+        wall_elapsed = time.perf_counter() - start_time
+    finally:
+        client.close()
+    write_request_log(records, wall_elapsed, Path(output_dir).parent / "requests.json")
+    raise_for_failures(records)
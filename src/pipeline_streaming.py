@@ -0,0 +1,198 @@
+"""Streaming evaluation that scores documents as soon as they are parsed.
+
+The staged pipeline in ``run.py`` converts every document before it scores
+any of them, leaving evaluation cores idle for the whole parse stage. A
+:class:`StreamingEvaluation` receives each Markdown file from the engine's
+``on_document`` callback and hands it to a worker pool straight away, so the
+end-to-end wall time approaches ``max(parse, eval)`` rather than their sum.
+Engines convert documents with the costliest evaluations first (see
+``job_scheduler``), so they start early instead of trailing after the parse.
+``finish`` logs the predicted evaluation makespan for the order documents
+arrived in next to the measured one, from the first submission to the last
+completed evaluation.
+The final report is assembled in ground-truth order through the same writer
+as the staged evaluator, so ``evaluation.json`` is identical in both modes.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import Executor, Future, wait
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from corpus_manifest import MANIFEST_FILENAME, load_manifest
+from evaluator import (
+    DocumentScores,
+    _draw_sample,
+    _evaluate_single_document,
+    _ground_truth_paths,
+    _logging_scores,
+    _write_evaluation,
+)
+from job_scheduler import evaluation_costs, list_schedule, longest_first
+from prediction_preflight import DEFAULT_PREFLIGHT_LIMITS, PreflightLimits
+from sampling import Sample
+from sharding import Shard
+
+_RUNNING_METRICS = ("overall", "nid", "teds", "mhs")
+
+
+class StreamingEvaluation:
+    """Collect per-document evaluations for one engine while it converts."""
+
+    def __init__(
+        self,
+        executor: Executor,
+        gt_dir: Path,
+        prediction_dir: Path,
+        target_doc_id: Optional[str] = None,
+        shard: Optional[Shard] = None,
+        metrics: Optional[Sequence[str]] = None,
+        sample: Optional[Sample] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+        timeout_fallback: str = "zero",
+        preflight: Optional[PreflightLimits] = DEFAULT_PREFLIGHT_LIMITS,
+        workers: Optional[int] = None,
+    ) -> None:
+        self.executor = executor
+        self.workers = workers
+        self.prediction_dir = prediction_dir
+        self.markdown_dir = prediction_dir / "markdown"
+        self.engine_name = prediction_dir.name
+        self.shard = shard
+        self.metrics = metrics
+        self.timeouts = timeouts
+        self.timeout_fallback = timeout_fallback
+        self.preflight = preflight
+        self.sample = _draw_sample(gt_dir, sample)
+        self.gt_paths = {
+            path.stem: path
+            for path in _ground_truth_paths(gt_dir, target_doc_id, shard, self.sample)
+        }
+        manifest = load_manifest(Path(gt_dir).parent / MANIFEST_FILENAME)
+        self.eval_costs = evaluation_costs(manifest, self.gt_paths)
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._completed = 0
+        self._totals = {name: 0.0 for name in _RUNNING_METRICS}
+        self._counts = {name: 0 for name in _RUNNING_METRICS}
+        self._first_submit: Optional[float] = None
+        self._last_done: Optional[float] = None
+        self.predicted_makespan: Optional[float] = None
+        self.measured_makespan: Optional[float] = None
+
+    def submit(self, markdown_path: str) -> None:
+        """Queue the evaluation of a freshly written prediction file."""
+
+        self._submit(Path(markdown_path).stem)
+
+    def _submit(self, doc_id: str) -> None:
+        gt_path = self.gt_paths.get(doc_id)
+        if gt_path is None or doc_id in self._futures:
+            return
+        pred_path = self.markdown_dir / f"{doc_id}.md"
+        if self._first_submit is None:
+            self._first_submit = time.perf_counter()
+        future = self.executor.submit(
+            _evaluate_single_document,
+            doc_id,
+            gt_path,
+            pred_path,
+            self.metrics,
+            timeouts=self.timeouts,
+            timeout_fallback=self.timeout_fallback,
+            preflight=self.preflight,
+        )
+        self._futures[doc_id] = future
+        future.add_done_callback(self._on_done)
+
+    def _on_done(self, future: Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        scores: DocumentScores = future.result()
+        _logging_scores(scores, self.engine_name, scores.document_id)
+        with self._lock:
+            self._last_done = time.perf_counter()
+            self._completed += 1
+            for name in _RUNNING_METRICS:
+                value = scores.scores.get(name)
+                if value is not None:
+                    self._totals[name] += value
+                    self._counts[name] += 1
+            running = " ".join(
+                f"{name}={self._totals[name] / self._counts[name]:.3f}"
+                for name in _RUNNING_METRICS
+                if self._counts[name]
+            )
+            logging.info(
+                "engine=%s evaluated=%d/%d running %s",
+                self.engine_name,
+                self._completed,
+                len(self.gt_paths),
+                running,
+            )
+
+    def finish(self, output_filename: str) -> Optional[Path]:
+        """Evaluate any documents the engine did not report and write the report."""
+
+        # Documents without a prediction are still scored, as in staged mode,
+        # most expensive first so they do not trail behind the cheap ones.
+        for doc_id in longest_first(self.gt_paths, self.eval_costs):
+            self._submit(doc_id)
+        wait(self._futures.values())
+        self._record_makespan()
+
+        documents: List[DocumentScores] = []
+        for doc_id in self.gt_paths:
+            future = self._futures[doc_id]
+            exc = future.exception()
+            if exc is not None:
+                logging.error("Failed to evaluate %s: %s", doc_id, exc)
+                continue
+            documents.append(future.result())
+
+        if not documents:
+            logging.warning("No documents evaluated for %s", self.prediction_dir)
+            return None
+        return _write_evaluation(
+            self.prediction_dir, output_filename, documents, self.shard, self.sample
+        )
+
+    def _record_makespan(self) -> None:
+        """Log the predicted evaluation makespan next to the measured one.
+
+        The prediction schedules the manifest's evaluation costs on
+        ``workers`` in submission order, so it leaves out time spent waiting
+        for the engine; it is only made when the manifest covers every
+        submitted document.
+        """
+
+        with self._lock:
+            if self._first_submit is not None and self._last_done is not None:
+                self.measured_makespan = self._last_done - self._first_submit
+        order = list(self._futures)
+        covered = all(doc_id in self.eval_costs for doc_id in order)
+        if self.workers and order and covered:
+            self.predicted_makespan = list_schedule(
+                order, self.eval_costs, self.workers
+            ).makespan
+        if self.measured_makespan is None:
+            return
+        if self.predicted_makespan is None:
+            logging.info(
+                "engine=%s evaluation makespan %.2f seconds",
+                self.engine_name,
+                self.measured_makespan,
+            )
+            return
+        logging.info(
+            "engine=%s evaluation makespan %.2f seconds; predicted %.2f seconds "
+            "on %d workers",
+            self.engine_name,
+            self.measured_makespan,
+            self.predicted_makespan,
+            self.workers,
+        )
@@ -0,0 +1,277 @@
+"""Bounded reading and clean-up of prediction files before scoring.
+
+Engines occasionally write huge outputs (repeated OCR garbage, inline base64
+images), and every evaluator makes several full-size copies of a prediction
+(``splitlines``, regex normalisation, BeautifulSoup). The preflight stage
+reads predictions in chunks and, before anything is kept in memory:
+
+* drops ``data:`` URI payloads and other long base64-like blobs,
+* stops at ``chars`` characters or ``lines`` lines of cleaned text, and
+* skips table rows/cells beyond ``cells`` Markdown or HTML table cells.
+
+so memory stays bounded whatever an engine writes. Per-document statistics
+(original size, cleaned size, table cells, what was stripped or cut) are
+recorded in ``evaluation.json``. Limits come from ``--preflight``, e.g.
+``chars=2000000,lines=20000,cells=10000`` or ``off``.
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+import re
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+# Characters requested per read; a long line arrives in several pieces.
+_CHUNK_CHARS = 64 * 1024
+# Shortest run of base64-like characters treated as a binary blob.
+_BLOB_MIN_CHARS = 512
+
+_DATA_URI = re.compile(r"data:[\w.+-]+/[\w.+-]+(?:;[\w.+-]+=[\w.+-]+)*;base64,")
+_BASE64_RUN = re.compile(r"[A-Za-z0-9+/=]*")
+_BLOB = re.compile(rf"[A-Za-z0-9+/=]{{{_BLOB_MIN_CHARS},}}")
+_HTML_CELL = re.compile(r"<t[dh][\s>/]", re.IGNORECASE)
+_HTML_TABLE_END = re.compile(r"</table\s*>", re.IGNORECASE)
+# A pipe opens a Markdown cell unless only whitespace follows it on the line.
+_MARKDOWN_CELL = re.compile(r"(?<!\\)\|(?![ \t\r]*(?:\n|$))")
+_MARKDOWN_TRAILING_PIPE = re.compile(r"(?<!\\)\|[ \t\r]*$")
+_MARKDOWN_SEPARATOR = re.compile(r"[ \t]*\|[ \t|:-]*-[ \t|:-]*\r?\n?")
+
+
+@dataclass(frozen=True)
+class PreflightLimits:
+    """Upper bounds applied to each prediction."""
+
+    chars: int = 2_000_000
+    lines: int = 20_000
+    cells: int = 10_000
+
+
+DEFAULT_PREFLIGHT_LIMITS = PreflightLimits()
+
+
+def parse_preflight_limits(value: str) -> Optional[PreflightLimits]:
+    """Parse ``--preflight`` values such as ``chars=500000,cells=2000`` or ``off``.
+
+    Unspecified limits keep their defaults.
+    """
+
+    if value.strip().lower() == "off":
+        return None
+    overrides: Dict[str, int] = {}
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, number = part.partition("=")
+        name = name.strip()
+        if name not in PreflightLimits.__dataclass_fields__:
+            raise ValueError(
+                f"Unknown preflight limit {name!r}; choose from chars, lines, cells"
+            )
+        limit = int(number)
+        if limit < 1:
+            raise ValueError(f"Preflight limit must be positive, got {part!r}")
+        overrides[name] = limit
+    return replace(DEFAULT_PREFLIGHT_LIMITS, **overrides)
+
+
+@dataclass
+class PreflightStats:
+    """What preflight saw in, and did to, one prediction.
+
+    ``source_size`` is the file size in bytes (characters for in-memory
+    text); the other counts describe the cleaned text.
+    """
+
+    source_size: int = 0
+    chars: int = 0
+    lines: int = 0
+    table_cells: int = 0
+    stripped_chars: int = 0
+    truncated: bool = False
+    reasons: List[str] = field(default_factory=list)
+
+    def note(self, reason: str) -> None:
+        if reason not in self.reasons:
+            self.reasons.append(reason)
+
+    def to_json(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class _Cleaner:
+    """Incremental blob stripping and table-cell limiting over text pieces."""
+
+    def __init__(self, limits: PreflightLimits, stats: PreflightStats) -> None:
+        self.limits = limits
+        self.stats = stats
+        self.in_data_uri = False
+        self.skipping_table = False
+        self.markdown_row = False
+        self.separator_row = False
+        self.pending_pipe = False
+        self.at_line_start = True
+
+    def _strip_blobs(self, piece: str) -> str:
+        if self.in_data_uri:
+            run = _BASE64_RUN.match(piece).end()
+            self.stats.stripped_chars += run
+            piece = piece[run:]
+            if not piece:
+                return ""
+            self.in_data_uri = False
+
+        parts: List[str] = []
+        position = 0
+        for match in _DATA_URI.finditer(piece):
+            if match.start() < position:
+                continue
+            parts.append(piece[position : match.start()])
+            end = _BASE64_RUN.match(piece, match.end()).end()
+            self.stats.stripped_chars += end - match.start()
+            self.stats.note("data_uri")
+            position = end
+            if end == len(piece):
+                self.in_data_uri = True
+        parts.append(piece[position:])
+        cleaned = "".join(parts)
+
+        def drop(match: re.Match) -> str:
+            self.stats.stripped_chars += len(match.group(0))
+            self.stats.note("blob")
+            return ""
+
+        return _BLOB.sub(drop, cleaned)
+
+    def _limit_html_cells(self, piece: str) -> str:
+        parts: List[str] = []
+        position = 0
+        while position < len(piece):
+            if self.skipping_table:
+                end = _HTML_TABLE_END.search(piece, position)
+                if end is None:
+                    return "".join(parts)
+                self.skipping_table = False
+                position = end.start()
+                continue
+            budget = self.limits.cells - self.stats.table_cells
+            over = None
+            for count, match in enumerate(_HTML_CELL.finditer(piece, position), 1):
+                if count > budget:
+                    over = match
+                    break
+            if over is None:
+                self.stats.table_cells += len(_HTML_CELL.findall(piece, position))
+                parts.append(piece[position:])
+                break
+            self.stats.table_cells = self.limits.cells
+            self.stats.truncated = True
+            self.stats.note("table_cells")
+            parts.append(piece[position : over.start()])
+            self.skipping_table = True
+            position = over.start()
+        return "".join(parts)
+
+    def _count_markdown_cells(self, piece: str) -> int:
+        """Count the cells ``piece`` opens in the current Markdown table row.
+
+        ``| a | b |`` and ``| a | b`` both have two cells. A pipe at the end of
+        a piece that does not finish the line opens a cell only if the next
+        piece has content before the line ends.
+        """
+
+        cells = len(_MARKDOWN_CELL.findall(piece))
+        if self.pending_pipe and piece.split("\n", 1)[0].strip():
+            cells += 1
+        if piece.endswith("\n"):
+            self.pending_pipe = False
+        else:
+            self.pending_pipe = bool(_MARKDOWN_TRAILING_PIPE.search(piece)) or (
+                self.pending_pipe and not piece.strip()
+            )
+        return cells
+
+    def _limit_markdown_cells(self, piece: str) -> str:
+        if self.at_line_start:
+            self.markdown_row = piece.lstrip().startswith("|")
+            # ``|---|:--:|`` rows only align the columns; a row's first piece
+            # decides, which is the whole row unless it exceeds _CHUNK_CHARS.
+            self.separator_row = bool(_MARKDOWN_SEPARATOR.fullmatch(piece))
+            self.pending_pipe = False
+        self.at_line_start = piece.endswith("\n")
+        if not self.markdown_row or self.separator_row:
+            return piece
+        cells = self._count_markdown_cells(piece)
+        if self.stats.table_cells + cells > self.limits.cells:
+            self.stats.truncated = True
+            self.stats.note("table_cells")
+            return "\n" if piece.endswith("\n") else ""
+        self.stats.table_cells += cells
+        return piece
+
+    def feed(self, piece: str) -> str:
+        piece = self._strip_blobs(piece)
+        piece = self._limit_html_cells(piece)
+        return self._limit_markdown_cells(piece) if piece else piece
+
+
+def _preflight_stream(
+    handle: TextIO, limits: PreflightLimits, stats: PreflightStats
+) -> str:
+    cleaner = _Cleaner(limits, stats)
+    parts: List[str] = []
+    while True:
+        piece = handle.readline(_CHUNK_CHARS)
+        if not piece:
+            break
+        piece = cleaner.feed(piece)
+        if not piece:
+            continue
+        limit = None
+        if stats.lines + piece.count("\n") > limits.lines or stats.lines == limits.lines:
+            piece = "".join(piece.splitlines(keepends=True)[: limits.lines - stats.lines])
+            limit = "lines"
+        if len(piece) > limits.chars - stats.chars:
+            piece = piece[: limits.chars - stats.chars]
+            limit = "chars"
+        parts.append(piece)
+        stats.chars += len(piece)
+        stats.lines += piece.count("\n")
+        if limit is not None:
+            stats.truncated = True
+            stats.note(limit)
+            break
+    return "".join(parts)
+
+
+def preflight_text(
+    text: str, limits: PreflightLimits = DEFAULT_PREFLIGHT_LIMITS
+) -> Tuple[str, PreflightStats]:
+    """Apply the preflight clean-up to an in-memory prediction."""
+
+    stats = PreflightStats(source_size=len(text))
+    return _preflight_stream(io.StringIO(text), limits, stats), stats
+
+
+def read_prediction(
+    path: Path, limits: PreflightLimits = DEFAULT_PREFLIGHT_LIMITS
+) -> Tuple[str, PreflightStats]:
+    """Read ``path`` through the preflight stage.
+
+    Like ``evaluator._read_text``, a missing or undecodable file yields an
+    empty string.
+    """
+
+    stats = PreflightStats()
+    try:
+        stats.source_size = path.stat().st_size
+        with path.open(encoding="utf-8") as handle:
+            return _preflight_stream(handle, limits, stats), stats
+    except FileNotFoundError:
+        logging.warning("Missing file: %s", path)
+    except UnicodeDecodeError:
+        logging.warning("Failed to decode file as UTF-8: %s", path)
+    return "", PreflightStats(source_size=stats.source_size)
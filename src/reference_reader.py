@@ -0,0 +1,92 @@
+"""Incremental reader for ``reference.json``.
+
+The reference file is a single JSON object that maps each PDF filename to
+its annotations. ``json.load`` holds all of it in memory at once, and large
+internal corpora reach gigabytes. :func:`iter_reference` instead yields one
+``(filename, entry)`` pair at a time, decoding each entry with the standard
+library's ``raw_decode`` as soon as it has been read, so memory use is
+bounded by the largest document rather than by the corpus.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterator, TextIO, Tuple
+
+_CHUNK_SIZE = 1 << 16
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+class _TextStream:
+    """A read buffer that drops what has been consumed whenever it refills."""
+
+    def __init__(self, handle: TextIO) -> None:
+        self.handle = handle
+        self.buffer = ""
+        self.position = 0
+        self.exhausted = False
+
+    def _fill(self, size: int) -> bool:
+        chunk = self.handle.read(size)
+        if not chunk:
+            self.exhausted = True
+            return False
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ("" at the end)."""
+
+        while True:
+            self.position = _WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._fill(_CHUNK_SIZE):
+                return ""
+
+    def expect(self, characters: str) -> str:
+        character = self.peek()
+        if not character or character not in characters:
+            found = repr(character) if character else "end of file"
+            raise ValueError(f"Expected one of {characters!r} in reference file, found {found}")
+        self.position += 1
+        return character
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                # Incomplete so far: read at least as much again and retry, so
+                # a large entry is decoded a logarithmic number of times.
+                if not self._fill(max(_CHUNK_SIZE, len(self.buffer))):
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the next chunk.
+            if end == len(self.buffer) and not self.exhausted and self._fill(_CHUNK_SIZE):
+                continue
+            self.position = end
+            return value
+
+
+def iter_reference(path: Path) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ``(pdf_filename, entry)`` for each document in ``path``, in file order."""
+
+    with open(path, encoding="utf-8") as handle:
+        stream = _TextStream(handle)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            key = stream.value()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected a filename key in {path}, found {key!r}")
+            stream.expect(":")
+            yield key, stream.value()
+            if stream.expect(",}") == "}":
+                return
@@ -0,0 +1,306 @@
+"""Concurrent client for HTTP-backed PDF parsing engines.
+
+API engines spend most of a corpus run waiting on round trips, so converting
+documents one blocking ``requests.post`` at a time leaves the client idle.
+:class:`RemoteEngineClient` keeps a pooled ``requests.Session`` and issues
+its blocking calls from a thread pool; an asyncio event loop only schedules
+them, enforcing bounded concurrency, an optional request-rate limit and
+retries with exponential backoff. It is not an async HTTP client. Every
+document yields a :class:`RequestRecord` with its status, attempt count and
+latency, which :func:`write_request_log` stores next to the engine's
+``summary.json``. A client error that retrying cannot fix (a 4xx status
+other than ``RETRY_STATUSES``, such as 401 for a bad API key) aborts the
+batch with :class:`RemoteEngineError`.
+
+Engine modules supply two callables: one that builds the ``Session.post``
+keyword arguments for a PDF and one that extracts Markdown from the JSON
+response. ``remote_engine_stub.py`` serves canned responses for offline tests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from statistics import median
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RequestBuilder = Callable[[Path], Dict[str, Any]]
+ResponseParser = Callable[[Dict[str, Any]], Optional[str]]
+
+RETRY_STATUSES = (408, 429, 500, 502, 503, 504)
+
+
+@dataclass(frozen=True)
+class RemoteEngineConfig:
+    """Connection, concurrency and retry settings for a remote engine."""
+
+    url: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    concurrency: int = 4
+    requests_per_second: Optional[float] = None
+    max_retries: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+    timeout: float = 300.0
+    retry_statuses: Tuple[int, ...] = RETRY_STATUSES
+
+
+@dataclass
+class RequestRecord:
+    """Outcome and timing of one document conversion request."""
+
+    document_id: str
+    status: Optional[int]
+    attempts: int
+    latency: float
+    error: Optional[str] = None
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "document_id": self.document_id,
+            "status": self.status,
+            "attempts": self.attempts,
+            "latency": self.latency,
+            "error": self.error,
+        }
+
+
+class RemoteEngineError(RuntimeError):
+    """Raised when remote conversion fails in a way retrying cannot fix."""
+
+
+def raise_for_failures(records: List[RequestRecord]) -> None:
+    """Raise :class:`RemoteEngineError` if any document failed to convert."""
+
+    failed = [record for record in records if record.error is not None]
+    if failed:
+        raise RemoteEngineError(
+            f"{len(failed)} of {len(records)} documents failed to convert "
+            f"(first: {failed[0].document_id}: {failed[0].error})"
+        )
+
+
+class RateLimiter:
+    """Space request starts at least ``1 / rate`` seconds apart."""
+
+    def __init__(self, rate: Optional[float]) -> None:
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class _RetryableError(Exception):
+    def __init__(self, message: str, status: Optional[int], retry_after: Optional[float]):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def _retry_after_seconds(response: requests.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+class RemoteEngineClient:
+    """Convert PDFs through an HTTP engine with pooled, concurrent requests."""
+
+    def __init__(
+        self,
+        config: RemoteEngineConfig,
+        build_request: RequestBuilder,
+        parse_response: ResponseParser,
+    ) -> None:
+        self.config = config
+        self.build_request = build_request
+        self.parse_response = parse_response
+        self.session = requests.Session()
+        self.session.headers.update(config.headers)
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=max(1, config.concurrency)
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _post(self, doc_path: Path) -> Tuple[int, Optional[str]]:
+        response = self.session.post(
+            self.config.url, timeout=self.config.timeout, **self.build_request(doc_path)
+        )
+        if response.status_code in self.config.retry_statuses:
+            raise _RetryableError(
+                f"HTTP {response.status_code}",
+                response.status_code,
+                _retry_after_seconds(response),
+            )
+        response.raise_for_status()
+        return response.status_code, self.parse_response(response.json())
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.config.backoff_max)
+        ceiling = min(self.config.backoff_max, self.config.backoff_base * 2**attempt)
+        return random.uniform(0, ceiling)
+
+    async def _convert_one(
+        self,
+        doc_path: Path,
+        output_dir: Path,
+        semaphore: asyncio.Semaphore,
+        limiter: RateLimiter,
+        executor: ThreadPoolExecutor,
+    ) -> RequestRecord:
+        doc_id = doc_path.stem
+        status: Optional[int] = None
+        error: Optional[str] = None
+        attempts = 0
+        markdown: Optional[str] = None
+
+        async with semaphore:
+            start = time.perf_counter()
+            while True:
+                attempts += 1
+                await limiter.acquire()
+                try:
+                    status, markdown = await asyncio.get_running_loop().run_in_executor(
+                        executor, self._post, doc_path
+                    )
+                    error = None
+                    break
+                except _RetryableError as exc:
+                    status, error = exc.status, str(exc)
+                    retry_after = exc.retry_after
+                except (requests.ConnectionError, requests.Timeout) as exc:
+                    status, error = None, f"{type(exc).__name__}: {exc}"
+                    retry_after = None
+                except (requests.RequestException, ValueError) as exc:
+                    status = getattr(getattr(exc, "response", None), "status_code", None)
+                    error = str(exc)
+                    if status is not None and 400 <= status < 500:
+                        raise RemoteEngineError(
+                            f"Remote conversion failed for {doc_id}: {error}"
+                        ) from exc
+                    break
+                if attempts > self.config.max_retries:
+                    break
+                delay = self._backoff(attempts - 1, retry_after)
+                logging.debug(
+                    "Retrying %s after %s (attempt %d, sleeping %.2fs)",
+                    doc_id,
+                    error,
+                    attempts,
+                    delay,
+                )
+                await asyncio.sleep(delay)
+            latency = time.perf_counter() - start
+
+        if error is None and markdown is None:
+            error = "response did not contain markdown"
+        if error is None:
+            output_file = output_dir / f"{doc_id}.md"
+            output_file.write_text(markdown, encoding="utf-8")
+
+        if error is not None:
+            logging.error("Remote conversion failed for %s: %s", doc_id, error)
+        return RequestRecord(doc_id, status, attempts, latency, error)
+
+    async def convert_async(
+        self,
+        doc_paths: Iterable[Path],
+        output_dir: Path,
+        on_document: Optional[Callable[[str], None]] = None,
+    ) -> List[RequestRecord]:
+        concurrency = max(1, self.config.concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+        limiter = RateLimiter(self.config.requests_per_second)
+        records: List[RequestRecord] = []
+        # Blocking session calls run on a pool sized to the concurrency limit;
+        # the default executor would cap them at a few threads on small hosts.
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        tasks = [
+            asyncio.create_task(
+                self._convert_one(
+                    Path(doc_path), output_dir, semaphore, limiter, executor
+                )
+            )
+            for doc_path in doc_paths
+        ]
+        try:
+            for task in asyncio.as_completed(tasks):
+                record = await task
+                if on_document and record.error is None:
+                    on_document(str(output_dir / f"{record.document_id}.md"))
+                records.append(record)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        records.sort(key=lambda record: record.document_id)
+        return records
+
+    def convert(
+        self,
+        doc_paths: Iterable[Path],
+        output_dir: Path,
+        on_document: Optional[Callable[[str], None]] = None,
+    ) -> List[RequestRecord]:
+        """Synchronously convert ``doc_paths`` and return one record per document."""
+
+        return asyncio.run(self.convert_async(doc_paths, Path(output_dir), on_document))
+
+
+def summarize_records(records: List[RequestRecord], wall_elapsed: float) -> Dict[str, Any]:
+    """Return latency percentiles, retry and error counts for a batch."""
+
+    latencies = sorted(record.latency for record in records)
+    p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] if latencies else None
+    return {
+        "request_count": len(records),
+        "error_count": sum(1 for record in records if record.error is not None),
+        "retry_count": sum(record.attempts - 1 for record in records),
+        "latency_p50": median(latencies) if latencies else None,
+        "latency_p95": p95,
+        "wall_elapsed": wall_elapsed,
+        "documents_per_second": len(records) / wall_elapsed if wall_elapsed > 0 else None,
+    }
+
+
+def write_request_log(
+    records: List[RequestRecord], wall_elapsed: float, path: Path
+) -> None:
+    """Persist per-request latency records alongside a batch summary."""
+
+    payload = {
+        "summary": summarize_records(records, wall_elapsed),
+        "requests": [record.to_json() for record in records],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=4)
+    logging.info("Request log saved to %s", path)
@@ -0,0 +1,207 @@
+"""Local stub server that replays canned remote-engine responses.
+
+The server accepts the multipart ``document`` uploads sent by HTTP engine
+adapters and answers with ``{"content": {"markdown": ...}}``. The Markdown
+comes from ``<responses-dir>/<document id>.md`` when present (for example a
+previous run's ``prediction/<engine>/markdown``), otherwise a short
+placeholder. Latency, jitter and failures are configurable so throughput,
+retry and correctness behaviour of :mod:`remote_engine` can be exercised
+offline. Start it and point ``UPSTAGE_API_URL`` at ``http://127.0.0.1:8765``::
+
+    uv run src/remote_engine_stub.py --port 8765 --latency 0.5 --error-rate 0.1
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional
+
+
+@dataclass
+class StubConfig:
+    """Response source and fault injection settings for the stub server."""
+
+    responses_dir: Optional[Path] = None
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    fail_first: int = 0
+    seed: Optional[int] = None
+
+
+def _uploaded_filename(content_type: str, body: bytes) -> Optional[str]:
+    """Return the filename of the ``document`` part of a multipart body."""
+
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body
+    )
+    if not message.is_multipart():
+        return None
+    for part in message.iter_parts():
+        if part.get_param("name", header="content-disposition") == "document":
+            return part.get_filename()
+    return None
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the stub configuration and counters."""
+
+    daemon_threads = True
+
+    def __init__(self, address, config: StubConfig) -> None:
+        super().__init__(address, _StubHandler)
+        self.config = config
+        self.lock = threading.Lock()
+        self.random = random.Random(config.seed)
+        self.request_count = 0
+        self.connection_count = 0
+        self.attempts: Counter = Counter()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def markdown_for(self, doc_id: str) -> str:
+        if self.config.responses_dir is not None:
+            canned = self.config.responses_dir / f"{doc_id}.md"
+            if canned.is_file():
+                return canned.read_text(encoding="utf-8")
+        return f"# {doc_id}\n\nStub response for {doc_id}.\n"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StubServer
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.connection_count += 1
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002
+        logging.debug("stub: " + format, *args)
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        filename = _uploaded_filename(self.headers.get("Content-Type", ""), body)
+        if not filename:
+            self._send_json(400, {"error": "missing document upload"})
+            return
+        doc_id = Path(filename).stem
+        config = self.server.config
+
+        with self.server.lock:
+            self.server.request_count += 1
+            self.server.attempts[doc_id] += 1
+            attempt = self.server.attempts[doc_id]
+            delay = config.latency + self.server.random.uniform(0, config.jitter)
+            fail = attempt <= config.fail_first or (
+                self.server.random.random() < config.error_rate
+            )
+
+        time.sleep(delay)
+        if fail:
+            self._send_json(config.error_status, {"error": "injected failure"})
+            return
+        self._send_json(200, {"content": {"markdown": self.server.markdown_for(doc_id)}})
+
+
+def start_stub_server(
+    config: StubConfig, host: str = "127.0.0.1", port: int = 0
+) -> StubServer:
+    """Start the stub in a background thread; call ``shutdown()`` to stop it."""
+
+    server = StubServer((host, port), config)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Serve canned remote-engine responses with injected latency and errors"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument(
+        "--responses-dir",
+        type=Path,
+        default=None,
+        help="Directory of <document id>.md files to replay",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds to wait before answering"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="Extra uniformly random latency"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Probability of answering with --error-status",
+    )
+    parser.add_argument(
+        "--error-status", type=int, default=503, help="HTTP status of injected errors"
+    )
+    parser.add_argument(
+        "--fail-first",
+        type=int,
+        default=0,
+        help="Fail the first N requests for every document",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        help="Logging verbosity (e.g. INFO, DEBUG)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
+    config = StubConfig(
+        responses_dir=args.responses_dir,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        fail_first=args.fail_first,
+        seed=args.seed,
+    )
+    server = StubServer((args.host, args.port), config)
+    logging.info("Stub engine listening on %s", server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:  # pragma: no cover - CLI entry point
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry point
+    main()
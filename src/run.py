@@ -4,9 +4,12 @@ from __future__ import annotations
 
 import argparse
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Sequence
+from typing import Callable, List, Optional, Sequence
 
 from evaluator import (
     DEFAULT_GT_DIR,
@@ -14,10 +17,34 @@ from evaluator import (
     DEFAULT_PREDICTION_ROOT,
     run as evaluate_run,
 )
-from engine_registry import ENGINES
+from benchmark_profiles import (
+    profile_root,
+    reject_unprofiled_options,
+    resolve_profile,
+    run_profiled_parse,
+)
+from corpus_manifest import DEFAULT_MANIFEST_PATH, load_manifest
+from document_pack import PACK_FORMATS, pack_predictions
+from engine_registry import ENGINES, ENGINE_RUN_CONFIGS
+from engine_runtime import parse_cpu_list
 from generate_benchmark_chart import DEFAULT_OUTPUT_PATH, generate_charts
 from generate_history import YYMMDD_PATTERN, archive_evaluation
-from pdf_parser import DEFAULT_INPUT_DIR, process_markdown
+from history_store import STORE_FILENAME
+from job_scheduler import format_plan, plan_engines
+from metric_registry import parse_metrics
+from metric_timeout import TIMEOUT_FALLBACKS, parse_metric_timeouts
+from pdf_parser import DEFAULT_INPUT_DIR, process_markdown, select_documents
+from pipeline_streaming import StreamingEvaluation
+from prediction_preflight import DEFAULT_PREFLIGHT_LIMITS, parse_preflight_limits
+from sampling import DEFAULT_REFERENCE_PATH, Sample, load_page_counts, parse_sample_size
+from sharding import parse_shard
+from stage_profiler import (
+    DEFAULT_TOP_FUNCTIONS,
+    parse_top_count,
+    profile_stage,
+    profiling,
+)
+from tracing import span, tracing
 
 
 def _resolve_path(value: str, project_root: Path) -> Path:
@@ -48,6 +75,158 @@ def _resolve_history_date(date_arg: Optional[str]) -> str:
     return date_arg
 
 
+def _parse_engine(
+    args: argparse.Namespace,
+    engine_name: str,
+    input_dir: Path,
+    prediction_root: Path,
+    on_document: Optional[Callable[[str], None]] = None,
+) -> None:
+    logging.info("Processing PDFs with %s", engine_name)
+    with span("parse", "pipeline", engine=engine_name):
+        if args.profile is not None:
+            run_profiled_parse(
+                args.profile,
+                engine_name,
+                str(input_dir),
+                prediction_root,
+                args.doc_id,
+                shard=args.shard,
+                sample=args.sample,
+            )
+            return
+        run_config = ENGINE_RUN_CONFIGS[engine_name].override(
+            threads=args.threads, cpus=args.cpus
+        )
+        process_markdown(
+            engine_name,
+            str(input_dir),
+            doc_id=args.doc_id,
+            run_config=run_config,
+            prediction_root=prediction_root,
+            on_document=on_document,
+            shard=args.shard,
+            use_engine_server=args.use_engine_server,
+            sample=args.sample,
+            metrics_textfile=args.metrics_textfile,
+        )
+
+
+def _pack_engine(
+    args: argparse.Namespace, engine_name: str, prediction_root: Path
+) -> None:
+    if args.pack:
+        with span("pack", "pipeline", engine=engine_name):
+            pack_predictions(prediction_root / engine_name, args.pack)
+
+
+def _run_staged(
+    args: argparse.Namespace,
+    engines: List[str],
+    input_dir: Path,
+    ground_truth_dir: Path,
+    prediction_root: Path,
+) -> List[Path]:
+    """Parse every document for every engine, then evaluate everything."""
+
+    logging.info("Starting PDF parsing for engines: %s", ", ".join(engines))
+    for engine_name in engines:
+        _parse_engine(args, engine_name, input_dir, prediction_root)
+        _pack_engine(args, engine_name, prediction_root)
+
+    logging.info("Running evaluator...")
+    evaluation_paths: List[Path] = []
+    for engine_name in engines:
+        with profile_stage("evaluate"), span(
+            "evaluate", "pipeline", engine=engine_name
+        ):
+            generated = evaluate_run(
+                str(ground_truth_dir),
+                str(prediction_root),
+                args.evaluation_filename,
+                target_engine=engine_name,
+                target_doc_id=args.doc_id,
+                shard=args.shard,
+                metrics=args.metrics,
+                sample=args.sample,
+                timeouts=args.metric_timeout,
+                timeout_fallback=args.timeout_fallback,
+                preflight=args.preflight,
+                metrics_textfile=args.metrics_textfile,
+            )
+        evaluation_paths.extend(generated)
+    return evaluation_paths
+
+
+def _run_streaming(
+    args: argparse.Namespace,
+    engines: List[str],
+    input_dir: Path,
+    ground_truth_dir: Path,
+    prediction_root: Path,
+) -> List[Path]:
+    """Evaluate each document on a worker pool as soon as it is parsed."""
+
+    evaluation_paths: List[Path] = []
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=args.eval_workers, mp_context=context
+    ) as executor:
+        for engine_name in engines:
+            streaming = StreamingEvaluation(
+                executor,
+                ground_truth_dir,
+                prediction_root / engine_name,
+                target_doc_id=args.doc_id,
+                shard=args.shard,
+                metrics=args.metrics,
+                sample=args.sample,
+                timeouts=args.metric_timeout,
+                timeout_fallback=args.timeout_fallback,
+                preflight=args.preflight,
+                workers=args.eval_workers or os.cpu_count() or 1,
+            )
+            _parse_engine(
+                args,
+                engine_name,
+                input_dir,
+                prediction_root,
+                on_document=streaming.submit,
+            )
+            with span("finish_evaluation", "pipeline", engine=engine_name):
+                result_path = streaming.finish(args.evaluation_filename)
+            _pack_engine(args, engine_name, prediction_root)
+            if result_path:
+                evaluation_paths.append(result_path)
+    return evaluation_paths
+
+
+def _print_plan(
+    args: argparse.Namespace,
+    engines: List[str],
+    input_dir: Path,
+    prediction_root: Path,
+    history_root: Path,
+) -> None:
+    """Print the estimated runtime of every engine without running anything."""
+
+    project_root = Path(__file__).parent.parent.resolve()
+    document_paths, _ = select_documents(input_dir, args.doc_id, args.shard, args.sample)
+    reference_path = project_root / DEFAULT_REFERENCE_PATH
+    page_counts = load_page_counts(reference_path) if reference_path.is_file() else {}
+    plans = plan_engines(
+        engines,
+        [path.stem for path in document_paths],
+        prediction_root,
+        page_counts,
+        load_manifest(project_root / DEFAULT_MANIFEST_PATH),
+        eval_workers=args.eval_workers or os.cpu_count() or 1,
+        streaming=args.streaming,
+        store_path=history_root / STORE_FILENAME,
+    )
+    print(format_plan(plans))
+
+
 def run_pipeline(args: argparse.Namespace) -> None:
     """Execute parsing, evaluation, history archival, and chart generation."""
 
@@ -58,47 +237,93 @@ def run_pipeline(args: argparse.Namespace) -> None:
     history_root = _resolve_path(args.history_root, project_root)
     chart_output = _resolve_path(args.chart_output, project_root)
 
+    profile = args.profile
+    if profile is not None:
+        # --metrics-textfile too: the profiled parse runs in a child process
+        # whose telemetry this process's evaluation telemetry would overwrite.
+        reject_unprofiled_options(
+            {
+                "--threads": args.threads,
+                "--cpus": args.cpus,
+                "--cprofile": args.cprofile,
+                "--trace": args.trace,
+                "--metrics-textfile": args.metrics_textfile,
+            }
+        )
+        prediction_root = profile_root(prediction_root, profile.name)
+        history_root = profile_root(history_root, profile.name)
+        chart_output = chart_output.with_name(
+            f"{chart_output.stem}_{profile.name}{chart_output.suffix}"
+        )
+        logging.info("Running under resource profile %s", profile.name)
+
     engines = _select_engine(args.engine)
     if not engines:
         raise ValueError("No engines selected for processing.")
+    if args.shard is not None and args.sample is not None:
+        raise ValueError("--sample cannot be combined with --shard.")
+    if args.pack and (args.shard is not None or args.sample is not None):
+        raise ValueError("--pack cannot be combined with --shard or --sample.")
 
-    logging.info("Starting PDF parsing for engines: %s", ", ".join(engines))
-    for engine_name in engines:
-        logging.info("Processing PDFs with %s", engine_name)
-        process_markdown(engine_name, str(input_dir), doc_id=args.doc_id)
+    if args.plan:
+        _print_plan(args, engines, input_dir, prediction_root, history_root)
+        return
 
-    logging.info("Running evaluator...")
-    evaluation_paths: List[Path] = []
-    for engine_name in engines:
-        generated = evaluate_run(
-            str(ground_truth_dir),
-            str(prediction_root),
-            args.evaluation_filename,
-            target_engine=engine_name,
-            target_doc_id=args.doc_id,
+    if args.streaming:
+        if profile is not None:
+            raise ValueError("--streaming cannot be combined with --profile.")
+        evaluation_paths = _run_streaming(
+            args, engines, input_dir, ground_truth_dir, prediction_root
+        )
+    else:
+        evaluation_paths = _run_staged(
+            args, engines, input_dir, ground_truth_dir, prediction_root
         )
-        evaluation_paths.extend(generated)
 
     if not evaluation_paths:
         raise RuntimeError("Evaluation stage did not produce any reports.")
 
+    if args.shard is not None:
+        logging.info(
+            "Shard %d/%d complete; run merge_shards.py once every shard has finished "
+            "before archiving results and generating charts.",
+            args.shard.index,
+            args.shard.count,
+        )
+        return
+
+    if args.sample is not None:
+        logging.info(
+            "Sample of %d documents (seed %d) evaluated; sampled reports are not "
+            "archived or charted.",
+            args.sample.size,
+            args.sample.seed,
+        )
+        return
+
     date_folder = _resolve_history_date(args.history_date)
     archived_paths: List[Path] = []
     logging.info("Archiving evaluation results under history/%s", date_folder)
     for evaluation_path in evaluation_paths:
         engine_name = evaluation_path.parent.name
-        archived = archive_evaluation(
-            engine=engine_name,
-            prediction_root=prediction_root,
-            history_root=history_root,
-            date_folder=date_folder,
-            overwrite=args.history_overwrite,
-        )
+        with profile_stage("archive"), span("archive", "pipeline", engine=engine_name):
+            archived = archive_evaluation(
+                engine=engine_name,
+                prediction_root=prediction_root,
+                history_root=history_root,
+                date_folder=date_folder,
+                overwrite=args.history_overwrite,
+            )
         archived_paths.append(archived)
         logging.info("[%s] Archived evaluation to %s", engine_name, archived)
 
     logging.info("Generating benchmark charts...")
-    chart_path = generate_charts(prediction_root, chart_output)
+    with profile_stage("chart"), span("chart", "pipeline"):
+        chart_path = generate_charts(
+            prediction_root,
+            chart_output,
+            profile_name=profile.name if profile is not None else None,
+        )
     logging.info("Benchmark chart written to %s", chart_path)
 
 
@@ -123,16 +348,129 @@ def _parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         default=None,
         help="Restrict parsing/evaluation to a single document identifier.",
     )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="Intra-op thread count (OMP/MKL/torch) applied to every engine run.",
+    )
+    parser.add_argument(
+        "--cpus",
+        type=parse_cpu_list,
+        default=None,
+        help="CPU set to pin engine runs to (e.g. 0-3,6).",
+    )
+    parser.add_argument(
+        "--profile",
+        type=resolve_profile,
+        default=None,
+        help=(
+            "Resource profile (e.g. 2c-4g) that caps CPUs, memory and threads for "
+            "engine runs. Results are kept under profiles/<profile>/ in the "
+            "prediction and history roots."
+        ),
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help=(
+            "Evaluate each document on a worker pool as soon as it is parsed "
+            "instead of running the parse and evaluation stages back to back."
+        ),
+    )
+    parser.add_argument(
+        "--eval-workers",
+        type=int,
+        default=None,
+        help="Evaluation worker processes for --streaming (defaults to CPU count).",
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help=(
+            "Print each engine's estimated parse and evaluation time (from previous "
+            "runs and the corpus manifest) and exit without running anything."
+        ),
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        help=(
+            "Process only shard i of N (e.g. 1/4). Archival and charts are skipped "
+            "until the shards are combined with merge_shards.py."
+        ),
+    )
+    parser.add_argument(
+        "--sample",
+        type=parse_sample_size,
+        default=None,
+        help=(
+            "Parse and evaluate a stratified sample of N documents; the reports "
+            "gain bootstrap confidence intervals. Archival and charts are skipped."
+        ),
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Random seed for --sample.",
+    )
+    parser.add_argument(
+        "--no-engine-server",
+        dest="use_engine_server",
+        action="store_false",
+        help="Convert in this process even if engine_server.py is running.",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=parse_metrics,
+        default=None,
+        help="Comma-separated metrics to compute (e.g. nid,teds_s). Defaults to all.",
+    )
+    parser.add_argument(
+        "--metric-timeout",
+        type=parse_metric_timeouts,
+        default=None,
+        help=(
+            "Time budget in seconds per scorer, for all (30), per scorer "
+            "(teds=30,mhs=10) or both (10,teds=60)."
+        ),
+    )
+    parser.add_argument(
+        "--timeout-fallback",
+        choices=TIMEOUT_FALLBACKS,
+        default="zero",
+        help="Score recorded when a scorer runs out of time: 0 or its approximate lower bound.",
+    )
+    parser.add_argument(
+        "--preflight",
+        type=parse_preflight_limits,
+        default=DEFAULT_PREFLIGHT_LIMITS,
+        help=(
+            "Prediction size limits for evaluation, e.g. chars=2000000,lines=20000,"
+            "cells=10000 (unspecified limits keep these defaults), or 'off'."
+        ),
+    )
     parser.add_argument(
         "--ground-truth-dir",
         default=DEFAULT_GT_DIR,
-        help="Directory that stores ground-truth markdown files.",
+        help="Directory (or zip/tar/SQLite pack) that stores ground-truth markdown files.",
     )
     parser.add_argument(
         "--prediction-root",
         default=DEFAULT_PREDICTION_ROOT,
         help="Root directory containing prediction outputs (defaults to ./prediction).",
     )
+    parser.add_argument(
+        "--pack",
+        choices=list(PACK_FORMATS),
+        default=None,
+        help=(
+            "Move each engine's Markdown output into prediction/<engine>/"
+            "markdown.<format> after parsing (after evaluation with --streaming)."
+        ),
+    )
     parser.add_argument(
         "--evaluation-filename",
         default=DEFAULT_OUTPUT_FILENAME,
@@ -166,19 +504,65 @@ def _parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         default=str(DEFAULT_OUTPUT_PATH),
         help="Destination path for the combined benchmark chart image.",
     )
+    parser.add_argument(
+        "--cprofile",
+        type=Path,
+        default=None,
+        help=(
+            "Write per-stage cProfile .pstats files (parse per engine, evaluate per "
+            "metric, archive, chart) and a report.txt to this directory."
+        ),
+    )
+    parser.add_argument(
+        "--cprofile-top",
+        type=parse_top_count,
+        default=DEFAULT_TOP_FUNCTIONS,
+        help="Number of hottest functions listed per stage in the profile report.",
+    )
+    parser.add_argument(
+        "--cprofile-slowest",
+        type=parse_top_count,
+        default=None,
+        help="Also keep a profile of each of the K slowest evaluated documents.",
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        type=Path,
+        default=None,
+        help=(
+            "Export conversion and evaluation telemetry to this Prometheus text file "
+            "(.prom) for node_exporter's textfile collector. Streaming evaluation "
+            "workers do not report per-metric latencies."
+        ),
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        default=None,
+        help=(
+            "Write a Chrome trace-event timeline (stages, engine runs, documents, "
+            "metrics, file writes) to this JSON file for chrome://tracing or Perfetto."
+        ),
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
         help="Logging verbosity (e.g. INFO, DEBUG).",
     )
-    return parser.parse_args(argv)
+    args = parser.parse_args(argv)
+    if args.sample is not None:
+        args.sample = Sample(args.sample, args.seed)
+    return args
 
 
 def main(argv: Optional[Sequence[str]] = None) -> None:
     args = _parse_args(argv)
     logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
     try:
-        run_pipeline(args)
+        with tracing(args.trace), profiling(
+            args.cprofile, args.cprofile_top, args.cprofile_slowest
+        ), span("run_pipeline", "pipeline"):
+            run_pipeline(args)
     except Exception as exc:  # pragma: no cover - CLI entry point
         logging.error("Pipeline failed: %s", exc)
         raise SystemExit(1) from exc
@@ -0,0 +1,244 @@
+"""Stratified, seeded corpus sampling for quick engine comparisons.
+
+``--sample N --seed S`` selects ``N`` documents so that each stratum of the
+corpus is represented in proportion to its size. Strata combine features read
+from ``ground-truth/reference.json``: whether the document has tables, whether
+it has headings and a page-count bucket. Table and heading documents are
+exactly the ones TEDS and MHS are computed on, so every metric keeps a
+proportional share of the sample. The selection depends only on the reference
+features, ``N`` and ``S``, so the parser and the evaluator agree on it.
+
+When ``ground-truth/manifest.json`` (see ``corpus_manifest``) exists, strata
+and page counts are read from it instead of the much larger reference file.
+
+Sampled runs write ``summary.sample-N-seed-S.json`` and
+``evaluation.sample-N-seed-S.{json,csv}``; the evaluation report adds
+bootstrap confidence intervals (see ``score_statistics``) and the sample
+composition.
+"""
+
+from __future__ import annotations
+
+import random
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from reference_reader import iter_reference
+
+REFERENCE_FILENAME = "reference.json"
+DEFAULT_REFERENCE_PATH = "ground-truth/reference.json"
+UNKNOWN_STRATUM = "unknown"
+# Upper edges of the page-count buckets; longer documents share the last one.
+_PAGE_BUCKETS = (1, 5, 20)
+
+
+@dataclass(frozen=True)
+class Sample:
+    """A request for ``size`` documents drawn with ``seed``."""
+
+    size: int
+    seed: int = 0
+
+    @property
+    def suffix(self) -> str:
+        return f"sample-{self.size}-seed-{self.seed}"
+
+
+def parse_sample_size(value: str) -> int:
+    """Parse a positive ``--sample`` document count."""
+
+    size = int(value)
+    if size < 1:
+        raise ValueError(f"Sample size must be at least 1, got {value!r}")
+    return size
+
+
+def sample_filename(filename: str, sample: Optional[Sample]) -> str:
+    """Insert the sample suffix before the extension: ``summary.sample-20-seed-0.json``."""
+
+    if sample is None:
+        return filename
+    path = Path(filename)
+    return f"{path.stem}.{sample.suffix}{path.suffix}"
+
+
+def _page_bucket(pages: int) -> str:
+    lower = 1
+    for upper in _PAGE_BUCKETS:
+        if pages <= upper:
+            return str(upper) if lower == upper else f"{lower}-{upper}"
+        lower = upper + 1
+    return f"{lower}+"
+
+
+def document_pages(elements: Iterable[Mapping[str, Any]]) -> int:
+    """Return the page count implied by a document's reference ``elements``."""
+
+    return max((int(element.get("page") or 1) for element in elements), default=1)
+
+
+def stratum_key(has_tables: bool, has_headings: bool, pages: int) -> str:
+    """Return the stratum key for a document's features."""
+
+    tables = "tables" if has_tables else "no-tables"
+    headings = "headings" if has_headings else "no-headings"
+    return f"{tables}/{headings}/pages-{_page_bucket(pages)}"
+
+
+def document_stratum(elements: Iterable[Mapping[str, Any]]) -> str:
+    """Return the stratum key for a document's reference ``elements``."""
+
+    elements = list(elements)
+    categories = {element.get("category") for element in elements}
+    return stratum_key(
+        "Table" in categories,
+        any(str(category).startswith("Heading") for category in categories),
+        document_pages(elements),
+    )
+
+
+def _iter_reference(
+    reference_path: Path,
+) -> Iterator[Tuple[str, List[Mapping[str, Any]]]]:
+    if not reference_path.is_file():
+        raise FileNotFoundError(f"Reference file not found: {reference_path}")
+    for name, entry in iter_reference(reference_path):
+        yield Path(name).stem, entry.get("elements", [])
+
+
+def _load_manifest(reference_path: Path):
+    # Imported here: ``corpus_manifest`` builds on this module.
+    from corpus_manifest import MANIFEST_FILENAME, load_manifest
+
+    return load_manifest(reference_path.with_name(MANIFEST_FILENAME))
+
+
+def load_strata(reference_path: Path, use_manifest: bool = True) -> Dict[str, str]:
+    """Return ``{doc_id: stratum}`` for every document in ``reference.json``.
+
+    With ``use_manifest``, a corpus manifest next to the reference file is
+    used instead when there is one.
+    """
+
+    manifest = _load_manifest(reference_path) if use_manifest else None
+    if manifest is not None:
+        return manifest.strata()
+    return {
+        doc_id: document_stratum(elements)
+        for doc_id, elements in _iter_reference(reference_path)
+    }
+
+
+def load_page_counts(reference_path: Path, use_manifest: bool = True) -> Dict[str, int]:
+    """Return ``{doc_id: pages}`` for every document in ``reference.json``.
+
+    Like :func:`load_strata`, prefers a corpus manifest next to the reference.
+    """
+
+    manifest = _load_manifest(reference_path) if use_manifest else None
+    if manifest is not None:
+        return manifest.page_counts()
+    return {
+        doc_id: document_pages(elements)
+        for doc_id, elements in _iter_reference(reference_path)
+    }
+
+
+def _allocate(populations: Mapping[str, int], size: int) -> Dict[str, int]:
+    """Split ``size`` across strata in proportion to ``populations``.
+
+    Uses largest remainders, and gives every stratum at least one document
+    when ``size`` allows it so each one contributes to the estimates.
+    """
+
+    total = sum(populations.values())
+    size = min(size, total)
+    quotas = {name: size * count / total for name, count in populations.items()}
+    allocation = {name: int(quota) for name, quota in quotas.items()}
+    if size >= len(populations):
+        for name in allocation:
+            allocation[name] = max(allocation[name], 1)
+
+    # Hand out or take back documents until the allocation sums to ``size``.
+    by_remainder = sorted(
+        populations, key=lambda name: (quotas[name] - allocation[name], name), reverse=True
+    )
+    while sum(allocation.values()) < size:
+        for name in by_remainder:
+            if allocation[name] < populations[name]:
+                allocation[name] += 1
+                break
+    while sum(allocation.values()) > size:
+        name = max(
+            (name for name in allocation if allocation[name] > 1),
+            key=lambda name: (allocation[name] - quotas[name], name),
+        )
+        allocation[name] -= 1
+    return allocation
+
+
+@dataclass(frozen=True)
+class DocumentSample:
+    """The documents selected for a :class:`Sample` and their strata."""
+
+    sample: Sample
+    strata: Dict[str, str]
+    populations: Dict[str, int]
+
+    @property
+    def document_ids(self) -> List[str]:
+        return sorted(self.strata)
+
+    def contains(self, doc_id: str) -> bool:
+        return doc_id in self.strata
+
+    def to_json(self) -> Dict[str, Any]:
+        sampled: Dict[str, int] = defaultdict(int)
+        for stratum in self.strata.values():
+            sampled[stratum] += 1
+        return {
+            "size": len(self.strata),
+            "seed": self.sample.seed,
+            "population": sum(self.populations.values()),
+            "strata": {
+                name: {"population": count, "sampled": sampled.get(name, 0)}
+                for name, count in sorted(self.populations.items())
+            },
+        }
+
+
+def draw_sample(
+    doc_ids: Iterable[str], sample: Sample, strata: Mapping[str, str]
+) -> DocumentSample:
+    """Draw a stratified sample of ``doc_ids``.
+
+    Documents missing from ``strata`` form their own ``unknown`` stratum.
+    """
+
+    groups: Dict[str, List[str]] = defaultdict(list)
+    for doc_id in sorted(set(doc_ids)):
+        groups[strata.get(doc_id, UNKNOWN_STRATUM)].append(doc_id)
+    populations = {name: len(members) for name, members in groups.items()}
+    if not populations:
+        return DocumentSample(sample, {}, {})
+
+    rng = random.Random(sample.seed)
+    selected: Dict[str, str] = {}
+    for name, count in sorted(_allocate(populations, sample.size).items()):
+        for doc_id in rng.sample(groups[name], count):
+            selected[doc_id] = name
+    return DocumentSample(sample, selected, populations)
+
+
+def select_sample(
+    paths: Iterable[Path], sample: Optional[Sample], reference_path: Path
+) -> List[Path]:
+    """Keep the paths whose stem (document id) is in the stratified ``sample``."""
+
+    paths = list(paths)
+    if sample is None:
+        return paths
+    drawn = draw_sample((path.stem for path in paths), sample, load_strata(reference_path))
+    return [path for path in paths if drawn.contains(path.stem)]
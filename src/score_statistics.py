@@ -0,0 +1,474 @@
+"""Bootstrap confidence intervals and significance tests for benchmark scores.
+
+Sampled runs (``--sample``) estimate each mean score from a subset of the
+corpus. Small strata are oversampled (each gets at least one document), so
+:func:`stratified_mean` weights each stratum's mean by its share of the
+corpus. :func:`bootstrap_mean_interval` resamples the per-document scores
+with replacement, within each stratum when strata are given, and returns the
+percentile interval of the resampled (weighted) means.
+
+:func:`compare_engines` answers whether one engine really beats another. It
+loads every engine's per-document scores into arrays aligned by document id
+and runs two paired tests on each pair of engines, over the documents where
+both have a score:
+
+* a paired bootstrap of the mean score difference (percentile interval and
+  two-sided p-value), and
+* a sign-flip permutation test of the same difference.
+
+Resamples are expressed as weight matrices and applied to all engine pairs
+with one matrix product, so 10,000 resamples per metric take milliseconds.
+Pairs whose permutation p-value is at least ``alpha`` are reported as tied;
+``generate_benchmark_chart`` marks them. Run standalone to write the
+comparison report::
+
+    uv run src/score_statistics.py --output charts/comparison.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+DEFAULT_RESAMPLES = 10_000
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_ALPHA = 0.05
+DEFAULT_EVALUATION_FILENAME = "evaluation.json"
+# Upper bound on resample-by-document matrix entries held at once.
+_BLOCK_ENTRIES = 4_000_000
+
+
+def _bootstrap_weights(
+    size: int, resamples: int, rng: np.random.Generator
+) -> Iterator[np.ndarray]:
+    """Yield blocks of bootstrap count matrices, one row per resample."""
+
+    block = max(1, _BLOCK_ENTRIES // max(size, 1))
+    for start in range(0, resamples, block):
+        rows = min(block, resamples - start)
+        # Count draws per (resample, document) cell with one flat bincount.
+        indices = rng.integers(0, size, size=(rows, size))
+        indices += np.arange(rows)[:, None] * size
+        counts = np.bincount(indices.ravel(), minlength=rows * size)
+        yield counts.reshape(rows, size).astype(np.float64)
+
+
+def _sign_flips(
+    size: int, resamples: int, rng: np.random.Generator
+) -> Iterator[np.ndarray]:
+    """Yield blocks of random ``+1``/``-1`` matrices, one row per resample."""
+
+    block = max(1, _BLOCK_ENTRIES // max(size, 1))
+    for start in range(0, resamples, block):
+        rows = min(block, resamples - start)
+        yield rng.integers(0, 2, size=(rows, size)).astype(np.float64) * 2.0 - 1.0
+
+
+def _stratum_groups(
+    values: Sequence[float], strata: Optional[Sequence[str]]
+) -> Dict[str, List[float]]:
+    groups: Dict[str, List[float]] = defaultdict(list)
+    for index, value in enumerate(values):
+        groups[strata[index] if strata is not None else ""].append(value)
+    return groups
+
+
+def _stratum_weights(
+    groups: Mapping[str, List[float]], populations: Optional[Mapping[str, int]]
+) -> Dict[str, float]:
+    """Return each stratum's share of the estimate.
+
+    With ``populations`` the shares are the strata's corpus sizes, normalised
+    over the strata that have values; otherwise they are the observed sizes.
+    """
+
+    sizes = {
+        name: (populations.get(name, len(group)) if populations else len(group))
+        for name, group in groups.items()
+    }
+    total = sum(sizes.values())
+    return {name: size / total for name, size in sizes.items()}
+
+
+def stratified_mean(
+    values: Sequence[float],
+    strata: Optional[Sequence[str]] = None,
+    populations: Optional[Mapping[str, int]] = None,
+) -> Optional[float]:
+    """Return the mean of ``values`` with each stratum weighted by its population.
+
+    Without ``populations`` this is the plain mean.
+    """
+
+    if not values:
+        return None
+    if not populations:
+        return math.fsum(values) / len(values)
+    groups = _stratum_groups(values, strata)
+    weights = _stratum_weights(groups, populations)
+    return math.fsum(
+        weights[name] * math.fsum(group) / len(group) for name, group in groups.items()
+    )
+
+
+def bootstrap_mean_interval(
+    values: Sequence[float],
+    strata: Optional[Sequence[str]] = None,
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: int = 0,
+    populations: Optional[Mapping[str, int]] = None,
+) -> Optional[Tuple[float, float]]:
+    """Return the percentile bootstrap interval for the mean of ``values``.
+
+    With ``strata`` (one label per value) each stratum is resampled on its
+    own with its observed size, matching a stratified sample design. With
+    ``populations`` as well, each resampled mean is the
+    :func:`stratified_mean` of the resample.
+    """
+
+    if not values:
+        return None
+    if not 0.0 < confidence < 1.0:
+        raise ValueError(f"confidence must be between 0 and 1, got {confidence}")
+    groups = _stratum_groups(values, strata)
+    shares = _stratum_weights(groups, populations)
+
+    rng = np.random.default_rng(seed)
+    means = np.zeros(resamples)
+    for name in sorted(groups):
+        group = np.asarray(groups[name], dtype=np.float64)
+        scale = shares[name] / len(group)
+        start = 0
+        for weights in _bootstrap_weights(len(group), resamples, rng):
+            means[start : start + len(weights)] += scale * (weights @ group)
+            start += len(weights)
+
+    tail = (1.0 - confidence) / 2.0
+    lower, upper = np.quantile(means, [tail, 1.0 - tail])
+    return float(lower), float(upper)
+
+
+def score_intervals(
+    document_scores: Sequence[Mapping[str, Optional[float]]],
+    metrics: Sequence[str],
+    strata: Optional[Sequence[str]] = None,
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: int = 0,
+    populations: Optional[Mapping[str, int]] = None,
+) -> Dict[str, Optional[List[float]]]:
+    """Return ``{"<metric>_mean": [lower, upper]}`` for each metric.
+
+    Documents where a metric is undefined are left out of its interval, as
+    they are left out of its mean. ``populations`` weights the strata as in
+    :func:`stratified_mean`.
+    """
+
+    intervals: Dict[str, Optional[List[float]]] = {}
+    for name in metrics:
+        values: List[float] = []
+        labels: List[str] = []
+        for index, scores in enumerate(document_scores):
+            value = scores.get(name)
+            if value is None:
+                continue
+            values.append(value)
+            labels.append(strata[index] if strata is not None else "")
+        interval = bootstrap_mean_interval(
+            values,
+            labels if strata is not None else None,
+            resamples,
+            confidence,
+            seed,
+            populations,
+        )
+        intervals[f"{name}_mean"] = list(interval) if interval is not None else None
+    return intervals
+
+
+@dataclass
+class EngineScores:
+    """Per-document scores of several engines aligned by document id.
+
+    ``scores[metric]`` has one row per engine and one column per document,
+    with NaN where the metric is undefined or the document is missing.
+    """
+
+    engines: List[str]
+    document_ids: List[str]
+    scores: Dict[str, np.ndarray]
+
+
+def load_engine_scores(
+    prediction_root: Path, evaluation_filename: str = DEFAULT_EVALUATION_FILENAME
+) -> EngineScores:
+    """Load every engine's ``evaluation_filename`` under ``prediction_root``.
+
+    Engines are labelled with ``summary.engine_name`` (the chart labels) and
+    fall back to the directory name.
+    """
+
+    payloads: List[Tuple[str, Dict[str, Dict[str, Optional[float]]]]] = []
+    metrics: List[str] = []
+    for engine_dir in sorted(prediction_root.iterdir()):
+        path = engine_dir / evaluation_filename
+        if not path.is_file():
+            continue
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError) as exc:
+            logging.warning("Failed to read %s: %s", path, exc)
+            continue
+        label = payload.get("summary", {}).get("engine_name") or engine_dir.name
+        documents = {
+            entry["document_id"]: entry.get("scores", {})
+            for entry in payload.get("documents", [])
+        }
+        for scores in documents.values():
+            metrics.extend(name for name in scores if name not in metrics)
+        payloads.append((label, documents))
+
+    document_ids = sorted({doc_id for _, documents in payloads for doc_id in documents})
+    column = {doc_id: index for index, doc_id in enumerate(document_ids)}
+    scores = {
+        name: np.full((len(payloads), len(document_ids)), np.nan) for name in metrics
+    }
+    for row, (_, documents) in enumerate(payloads):
+        for doc_id, values in documents.items():
+            for name, value in values.items():
+                if value is not None:
+                    scores[name][row, column[doc_id]] = value
+    return EngineScores([label for label, _ in payloads], document_ids, scores)
+
+
+def _pairwise_tests(
+    values: np.ndarray, resamples: int, confidence: float, seed: int
+) -> Dict[str, np.ndarray]:
+    """Run the paired tests for every engine pair on one metric.
+
+    ``values`` is engines x documents with NaN where a document is unscored.
+    Each pair is tested over the documents both engines scored; pairs that
+    share the same documents are resampled together. Returns square matrices
+    indexed ``[i, j]`` for the difference ``engine i - engine j``, with the
+    paired document counts under ``documents`` (each engine's own count on
+    the diagonal). Pairs without shared documents are untested and NaN.
+    """
+
+    engines = values.shape[0]
+    scored = ~np.isnan(values)
+    groups: Dict[bytes, List[Tuple[int, int]]] = defaultdict(list)
+    for i in range(engines):
+        for j in range(i + 1, engines):
+            shared = scored[i] & scored[j]
+            if shared.any():
+                groups[shared.tobytes()].append((i, j))
+
+    documents = np.diag(scored.sum(axis=1))
+    # An engine compared with itself has no difference and p = 1.
+    matrices = {}
+    for name, diagonal in (
+        ("mean_difference", 0.0),
+        ("ci_lower", 0.0),
+        ("ci_upper", 0.0),
+        ("bootstrap_p", 1.0),
+        ("permutation_p", 1.0),
+    ):
+        matrices[name] = np.full((engines, engines), np.nan)
+        np.fill_diagonal(matrices[name], diagonal)
+    tail = (1.0 - confidence) / 2.0
+    for key, pairs in groups.items():
+        shared = np.frombuffer(key, dtype=bool)
+        size = int(shared.sum())
+        differences = np.stack(
+            [values[i, shared] - values[j, shared] for i, j in pairs], axis=1
+        )
+        observed = differences.mean(axis=0)
+
+        rng = np.random.default_rng(seed)
+        boot = np.concatenate(
+            [w @ differences / size for w in _bootstrap_weights(size, resamples, rng)]
+        )
+        flips = np.concatenate(
+            [s @ differences / size for s in _sign_flips(size, resamples, rng)]
+        )
+
+        lower, upper = np.quantile(boot, [tail, 1.0 - tail], axis=0)
+        bootstrap_p = np.minimum(
+            1.0, 2.0 * np.minimum((boot <= 0).mean(axis=0), (boot >= 0).mean(axis=0))
+        )
+        # Tolerance keeps exact ties (e.g. identical engines) at p = 1.
+        extreme = np.abs(flips) >= np.abs(observed) - 1e-12
+        permutation_p = (extreme.sum(axis=0) + 1.0) / (resamples + 1.0)
+
+        for index, (i, j) in enumerate(pairs):
+            documents[i, j] = documents[j, i] = size
+            matrices["mean_difference"][i, j] = observed[index]
+            matrices["mean_difference"][j, i] = -observed[index]
+            matrices["ci_lower"][i, j], matrices["ci_upper"][i, j] = lower[index], upper[index]
+            matrices["ci_lower"][j, i], matrices["ci_upper"][j, i] = -upper[index], -lower[index]
+            for name, p_values in (("bootstrap_p", bootstrap_p), ("permutation_p", permutation_p)):
+                matrices[name][i, j] = matrices[name][j, i] = p_values[index]
+    return {"documents": documents, **matrices}
+
+
+def _json_matrix(matrix: np.ndarray) -> List[List[Optional[float]]]:
+    """Return ``matrix`` as nested lists with ``None`` for NaN entries."""
+
+    return [
+        [None if np.isnan(value) else float(value) for value in row] for row in matrix
+    ]
+
+
+@dataclass
+class EngineComparison:
+    """Pairwise significance matrices for each metric.
+
+    ``metrics[name]`` holds each engine's ``mean`` over the documents it
+    scored and square matrices indexed in ``engines`` order, among them
+    ``documents``, the number of documents each pair was tested on. Entries
+    of pairs that share no scored document are ``None``.
+    """
+
+    engines: List[str]
+    alpha: float
+    resamples: int
+    metrics: Dict[str, Dict[str, Any]]
+
+    def tied_with(self, metric: str, engine: str) -> Set[str]:
+        """Return the engines not significantly different from ``engine``.
+
+        Engines that share no scored document with ``engine`` are untested
+        and left out.
+        """
+
+        result = self.metrics.get(metric)
+        if result is None or engine not in self.engines:
+            return set()
+        row = self.engines.index(engine)
+        return {
+            other
+            for column, other in enumerate(self.engines)
+            if column != row and result["significant"][row][column] is False
+        }
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "engines": self.engines,
+            "alpha": self.alpha,
+            "resamples": self.resamples,
+            "metrics": self.metrics,
+        }
+
+
+def compare_engines(
+    engine_scores: EngineScores,
+    metrics: Optional[Sequence[str]] = None,
+    resamples: int = DEFAULT_RESAMPLES,
+    alpha: float = DEFAULT_ALPHA,
+    seed: int = 0,
+) -> EngineComparison:
+    """Test every pair of engines on each metric (all metrics by default).
+
+    Each pair of engines is compared over the documents both scored, so one
+    engine's missing predictions do not shrink the other pairs' tests. Pairs
+    with a permutation p-value below ``alpha`` are marked ``significant``.
+    """
+
+    names = list(engine_scores.scores) if metrics is None else list(metrics)
+    results: Dict[str, Dict[str, Any]] = {}
+    for name in names:
+        values = engine_scores.scores.get(name)
+        if values is None or len(engine_scores.engines) < 2:
+            continue
+        matrices = _pairwise_tests(values, resamples, 1.0 - alpha, seed)
+        paired = matrices["documents"]
+        if not (paired - np.diag(np.diag(paired))).any():
+            continue
+        results[name] = {
+            "documents": paired.tolist(),
+            "mean": [
+                float(row[~np.isnan(row)].mean()) if (~np.isnan(row)).any() else None
+                for row in values
+            ],
+            **{
+                key: _json_matrix(matrix)
+                for key, matrix in matrices.items()
+                if key != "documents"
+            },
+            "significant": [
+                [None if np.isnan(p) else bool(p < alpha) for p in row]
+                for row in matrices["permutation_p"]
+            ],
+        }
+    return EngineComparison(list(engine_scores.engines), alpha, resamples, results)
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Pairwise significance tests between engines' evaluation results"
+    )
+    parser.add_argument(
+        "--prediction-root",
+        type=Path,
+        default=Path("prediction"),
+        help="Directory containing engine prediction outputs",
+    )
+    parser.add_argument(
+        "--evaluation-filename",
+        default=DEFAULT_EVALUATION_FILENAME,
+        help="Evaluation report to compare (e.g. evaluation.sample-30-seed-0.json)",
+    )
+    parser.add_argument(
+        "--resamples",
+        type=int,
+        default=DEFAULT_RESAMPLES,
+        help="Bootstrap and permutation resamples per metric",
+    )
+    parser.add_argument(
+        "--alpha",
+        type=float,
+        default=DEFAULT_ALPHA,
+        help="Significance level for marking engines as tied",
+    )
+    parser.add_argument("--output", type=Path, help="Write the comparison report to this path")
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        help="Logging verbosity (e.g. INFO, DEBUG)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
+    comparison = compare_engines(
+        load_engine_scores(args.prediction_root, args.evaluation_filename),
+        resamples=args.resamples,
+        alpha=args.alpha,
+    )
+    for name, result in comparison.metrics.items():
+        for row, engine in enumerate(comparison.engines):
+            for column in range(row + 1, len(comparison.engines)):
+                print(
+                    f"{name:<8} {engine} vs {comparison.engines[column]}: "
+                    f"diff={result['mean_difference'][row][column]:+.4f} "
+                    f"p={result['permutation_p'][row][column]:.4f}"
+                    f"{'' if result['significant'][row][column] else ' (tied)'}"
+                )
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(comparison.to_json(), indent=2))
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry point
+    main()
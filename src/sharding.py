@@ -0,0 +1,77 @@
+"""Stable hash-based corpus sharding.
+
+``--shard i/N`` selects the documents whose SHA-256 digest of the document id
+falls into bucket ``i`` (1-based) out of ``N``. The assignment depends only
+on the id, so every machine computes the same split regardless of directory
+listing order, and adding documents never moves existing ones between
+shards. Shard runs write ``summary.shard-i-of-N.json`` and
+``evaluation.shard-i-of-N.{json,csv}``; ``merge_shards.py`` combines them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+SHARD_PATTERN = re.compile(r"^(\d+)/(\d+)$")
+SHARD_SUFFIX_PATTERN = re.compile(r"\.shard-(\d+)-of-(\d+)$")
+
+
+@dataclass(frozen=True)
+class Shard:
+    """One of ``count`` disjoint document subsets, numbered from 1."""
+
+    index: int
+    count: int
+
+    @property
+    def suffix(self) -> str:
+        return f"shard-{self.index}-of-{self.count}"
+
+    def contains(self, doc_id: str) -> bool:
+        digest = hashlib.sha256(doc_id.encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") % self.count == self.index - 1
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"index": self.index, "count": self.count}
+
+
+def parse_shard(value: str) -> Shard:
+    """Parse ``"i/N"`` into a :class:`Shard`."""
+
+    match = SHARD_PATTERN.match(value.strip())
+    if not match:
+        raise ValueError(f"Shard must look like i/N, got {value!r}")
+    index, count = int(match.group(1)), int(match.group(2))
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Shard index must be between 1 and N, got {value!r}")
+    return Shard(index, count)
+
+
+def select_shard(paths: Iterable[Path], shard: Optional[Shard]) -> List[Path]:
+    """Keep the paths whose stem (document id) belongs to ``shard``."""
+
+    if shard is None:
+        return list(paths)
+    return [path for path in paths if shard.contains(path.stem)]
+
+
+def shard_filename(filename: str, shard: Optional[Shard]) -> str:
+    """Insert the shard suffix before the extension: ``summary.shard-1-of-4.json``."""
+
+    if shard is None:
+        return filename
+    path = Path(filename)
+    return f"{path.stem}.{shard.suffix}{path.suffix}"
+
+
+def shard_from_filename(filename: str) -> Optional[Shard]:
+    """Recover the shard encoded by :func:`shard_filename`, if any."""
+
+    match = SHARD_SUFFIX_PATTERN.search(Path(filename).stem)
+    if not match:
+        return None
+    return Shard(int(match.group(1)), int(match.group(2)))
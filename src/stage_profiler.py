@@ -0,0 +1,212 @@
+"""cProfile hooks that split a run into per-stage ``.pstats`` files.
+
+``--cprofile DIR`` on ``run.py``, ``pdf_parser.py`` and ``evaluator.py``
+profiles the run without patching any code. Each stage (``parse.<engine>``,
+``evaluate.<scorer>``, ``archive``, ``chart``, ...) gets its own profile,
+written to ``DIR/<stage>.pstats`` for ``python -m pstats`` or snakeviz, and
+``DIR/report.txt`` lists the hottest functions of every stage.
+
+Stages nest: while an inner stage runs, the outer one is paused, so each
+profile (and the wall time reported for it) covers that stage's own work.
+``--cprofile-slowest K`` additionally keeps a profile of each of the K
+slowest evaluated documents under ``DIR/slowest/``. Only the calling thread
+is profiled; work done in worker processes (streaming evaluation, engine
+servers, metric time budgets) does not show up.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import heapq
+import io
+import logging
+import pstats
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import ContextManager, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_TOP_FUNCTIONS = 25
+REPORT_FILENAME = "report.txt"
+SLOWEST_DIRNAME = "slowest"
+DOCUMENT_STAGE = "evaluate.document"
+
+
+def _filename(name: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", name)
+
+
+def _merge(target: Optional[pstats.Stats], profile: cProfile.Profile) -> pstats.Stats:
+    if target is None:
+        target = pstats.Stats()
+    try:
+        target.add(profile)
+    except TypeError:
+        # A segment that recorded no calls cannot be turned into stats.
+        pass
+    return target
+
+
+@dataclass
+class _Segment:
+    name: str
+    profile: cProfile.Profile = field(default_factory=cProfile.Profile)
+    start: float = field(default_factory=time.perf_counter)
+    nested: float = 0.0
+
+
+@dataclass
+class _Document:
+    key: str
+    stats: Optional[pstats.Stats] = None
+
+
+class StageProfiler:
+    """Collects one cProfile profile per stage name.
+
+    ``top`` is the number of functions listed per stage in the report and
+    ``slowest`` the number of per-document profiles kept.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        top: int = DEFAULT_TOP_FUNCTIONS,
+        slowest: Optional[int] = None,
+    ) -> None:
+        self.output_dir = output_dir
+        self.top = top
+        self.slowest = slowest
+        self._thread = threading.get_ident()
+        self._stack: List[_Segment] = []
+        self._stages: Dict[str, pstats.Stats] = {}
+        self._elapsed: Dict[str, float] = {}
+        self._document: Optional[_Document] = None
+        # Min-heap of (elapsed, key, stats) holding the slowest documents.
+        self._slowest: List[Tuple[float, str, pstats.Stats]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Profile the enclosed block as part of stage ``name``."""
+
+        if threading.get_ident() != self._thread:
+            yield
+            return
+        if self._stack:
+            self._stack[-1].profile.disable()
+        segment = _Segment(name)
+        self._stack.append(segment)
+        segment.profile.enable()
+        try:
+            yield
+        finally:
+            segment.profile.disable()
+            self._stack.pop()
+            elapsed = time.perf_counter() - segment.start
+            own = elapsed - segment.nested
+            self._elapsed[name] = self._elapsed.get(name, 0.0) + own
+            self._stages[name] = _merge(self._stages.get(name), segment.profile)
+            if self._document is not None:
+                self._document.stats = _merge(self._document.stats, segment.profile)
+            if self._stack:
+                self._stack[-1].nested += elapsed
+                self._stack[-1].profile.enable()
+
+    @contextmanager
+    def document(self, key: str, stage: str = DOCUMENT_STAGE) -> Iterator[None]:
+        """Profile one document as ``stage``, keeping it if it is among the slowest."""
+
+        if not self.slowest or threading.get_ident() != self._thread:
+            with self.stage(stage):
+                yield
+            return
+        outer, self._document = self._document, _Document(key)
+        start = time.perf_counter()
+        try:
+            with self.stage(stage):
+                yield
+        finally:
+            document, self._document = self._document, outer
+            entry = (time.perf_counter() - start, key, document.stats or pstats.Stats())
+            if len(self._slowest) < self.slowest:
+                heapq.heappush(self._slowest, entry)
+            elif entry[0] > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def write(self) -> Path:
+        """Write every stage profile and the text report; return the report path."""
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        buffer = io.StringIO()
+        stages = sorted(self._stages, key=lambda name: self._elapsed[name], reverse=True)
+        buffer.write(f"Stage profiles in {self.output_dir}, by own wall time\n")
+        for name in stages:
+            buffer.write(f"  {name:<32} {self._elapsed[name]:10.3f}s\n")
+        for name in stages:
+            stats = self._stages[name]
+            stats.dump_stats(self.output_dir / f"{_filename(name)}.pstats")
+            buffer.write(f"\n== {name} ({self._elapsed[name]:.3f}s own wall time) ==\n")
+            stats.stream = buffer
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(self.top)
+
+        if self._slowest:
+            slowest_dir = self.output_dir / SLOWEST_DIRNAME
+            slowest_dir.mkdir(exist_ok=True)
+            buffer.write("\n== Slowest documents ==\n")
+            for elapsed, key, stats in sorted(self._slowest, reverse=True):
+                path = slowest_dir / f"{_filename(key)}.pstats"
+                stats.dump_stats(path)
+                buffer.write(f"  {key:<40} {elapsed:10.3f}s  {path.name}\n")
+
+        report_path = self.output_dir / REPORT_FILENAME
+        report_path.write_text(buffer.getvalue(), encoding="utf-8")
+        return report_path
+
+
+_ACTIVE: Optional[StageProfiler] = None
+
+
+@contextmanager
+def profiling(
+    output_dir: Optional[Path],
+    top: int = DEFAULT_TOP_FUNCTIONS,
+    slowest: Optional[int] = None,
+) -> Iterator[Optional[StageProfiler]]:
+    """Activate stage profiling into ``output_dir`` (a no-op when ``None``)."""
+
+    global _ACTIVE
+    if output_dir is None:
+        yield None
+        return
+    profiler = StageProfiler(output_dir, top, slowest)
+    _ACTIVE = profiler
+    try:
+        yield profiler
+    finally:
+        _ACTIVE = None
+        report = profiler.write()
+        logging.info("Stage profiles written to %s", report)
+
+
+def profile_stage(name: str) -> ContextManager[None]:
+    """Profile the enclosed block as stage ``name`` when profiling is active."""
+
+    return _ACTIVE.stage(name) if _ACTIVE is not None else nullcontext()
+
+
+def profile_document(key: str) -> ContextManager[None]:
+    """Profile one evaluated document when profiling is active."""
+
+    return _ACTIVE.document(key) if _ACTIVE is not None else nullcontext()
+
+
+def parse_top_count(value: str) -> int:
+    """Parse a positive ``--cprofile-top`` / ``--cprofile-slowest`` count."""
+
+    count = int(value)
+    if count < 1:
+        raise ValueError(f"Count must be at least 1, got {value!r}")
+    return count
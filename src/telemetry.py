@@ -0,0 +1,284 @@
+"""Benchmark telemetry written as a Prometheus text file.
+
+Benchmark machines are scraped with node_exporter's textfile collector, so
+``--metrics-textfile PATH`` on ``run.py``, ``pdf_parser.py`` and
+``evaluator.py`` keeps counters, gauges and histograms in a ``.prom`` file
+instead of serving them over the network:
+
+* ``opendataloader_bench_documents_converted_total``,
+  ``..._pages_converted_total``, ``..._conversion_seconds`` and
+  ``..._pages_per_second`` for parsing,
+* ``..._documents_evaluated_total``, ``..._evaluation_seconds`` (per metric),
+  ``..._metric_timeouts_total`` and ``..._artifact_cache_{hits,misses}_total``
+  for evaluation, and
+* ``..._peak_rss_bytes`` and ``..._last_update_timestamp_seconds``.
+
+Series are labelled with ``engine`` and ``version``. The file is rewritten
+atomically (temporary file and rename) at most once per
+``FLUSH_INTERVAL`` seconds while documents are processed, and once more at
+the end, so dashboards show live progress and never read a partial file.
+Point each command at its own file; the collector merges every ``*.prom``
+file in its directory.
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from markdown_document import MarkdownDocument
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+PREFIX = "opendataloader_bench"
+FLUSH_INTERVAL = 1.0
+# Upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (
+    0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_FAMILIES: Dict[str, Tuple[str, str]] = {
+    "documents_converted_total": ("counter", "Documents converted to Markdown."),
+    "pages_converted_total": ("counter", "PDF pages converted to Markdown."),
+    "conversion_seconds": ("histogram", "Seconds spent converting one document."),
+    "pages_per_second": ("gauge", "Pages converted per second in the current run."),
+    "documents_evaluated_total": ("counter", "Predictions scored by the evaluator."),
+    "evaluation_seconds": ("histogram", "Seconds per metric and document."),
+    "metric_timeouts_total": ("counter", "Scorer runs that exceeded their budget."),
+    "artifact_cache_hits_total": ("counter", "Evaluation artefacts served from cache."),
+    "artifact_cache_misses_total": ("counter", "Evaluation artefacts built on demand."),
+    "peak_rss_bytes": ("gauge", "Peak resident set size in bytes."),
+    "last_update_timestamp_seconds": ("gauge", "Unix time of the last file update."),
+}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in labels]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+@dataclass
+class _Histogram:
+    buckets: Sequence[float] = LATENCY_BUCKETS
+    counts: List[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1)
+    )
+    total: float = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+
+def _peak_rss() -> Dict[str, float]:
+    if resource is None:
+        return {}
+    # ``ru_maxrss`` is in kilobytes on Linux and bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
+
+
+class TelemetryFile:
+    """Metric values kept in memory and rendered to ``path``."""
+
+    def __init__(self, path: Path, flush_interval: float = FLUSH_INTERVAL) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], _Histogram] = {}
+        self._last_flush = 0.0
+
+    def inc(self, name: str, labels: Labels, amount: float = 1.0) -> None:
+        with self._lock:
+            key = (name, labels)
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, name: str, labels: Labels, value: float) -> None:
+        with self._lock:
+            self._values[name, labels] = value
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        with self._lock:
+            self._histograms.setdefault((name, labels), _Histogram()).observe(value)
+
+    def render(self) -> str:
+        """Return the file contents in the Prometheus text format."""
+
+        with self._lock:
+            values = dict(self._values)
+            histograms = {
+                key: (list(histogram.counts), histogram.total)
+                for key, histogram in self._histograms.items()
+            }
+        lines: List[str] = []
+        for family, (kind, help_text) in _FAMILIES.items():
+            name = f"{PREFIX}_{family}"
+            if kind == "histogram":
+                series = sorted(key for key in histograms if key[0] == family)
+            else:
+                series = sorted(key for key in values if key[0] == family)
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key in series:
+                labels = key[1]
+                if kind != "histogram":
+                    value = _format_value(values[key])
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+                    continue
+                counts, total = histograms[key]
+                cumulative = 0
+                for bound, count in zip((*LATENCY_BUCKETS, float("inf")), counts):
+                    cumulative += count
+                    bucket = _format_labels((*labels, ("le", _format_value(bound))))
+                    lines.append(f"{name}_bucket{bucket} {cumulative}")
+                total_value = _format_value(total)
+                lines.append(f"{name}_sum{_format_labels(labels)} {total_value}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def flush(self, force: bool = False) -> None:
+        """Rewrite the file atomically; unless ``force``, at most once per interval."""
+
+        now = time.time()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        for process, peak in _peak_rss().items():
+            self.set("peak_rss_bytes", (("process", process),), peak)
+        self.set("last_update_timestamp_seconds", (), now)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        temporary.write_text(self.render(), encoding="utf-8")
+        os.replace(temporary, self.path)
+
+
+_FILES: Dict[Path, TelemetryFile] = {}
+_FILES_LOCK = threading.Lock()
+
+
+def telemetry_file(path: Optional[Path]) -> Optional[TelemetryFile]:
+    """Return the shared :class:`TelemetryFile` for ``path``, or ``None`` without one.
+
+    Parsing and evaluation in one process (``run.py``) share the file.
+    """
+
+    if path is None:
+        return None
+    resolved = path.resolve()
+    with _FILES_LOCK:
+        if resolved not in _FILES:
+            _FILES[resolved] = TelemetryFile(resolved)
+        return _FILES[resolved]
+
+
+def engine_labels(engine: str, version: Optional[str]) -> Labels:
+    return (("engine", engine), ("version", version or "unknown"))
+
+
+class ConversionRecorder:
+    """Records conversion counts and latencies from ``on_document`` callbacks."""
+
+    def __init__(
+        self, telemetry: TelemetryFile, labels: Labels, pages: Mapping[str, int]
+    ) -> None:
+        self.telemetry = telemetry
+        self.labels = labels
+        self.pages = pages
+        self._start = self._last = time.perf_counter()
+        self._converted_pages = 0
+
+    def wrap(
+        self, on_document: Optional[Callable[[str], None]]
+    ) -> Callable[[str], None]:
+        """Return an ``on_document`` callback that records each document first.
+
+        A document's latency runs from the previous callback (or the start)
+        to its own, like the document spans in ``tracing``.
+        """
+
+        def recorded(path: str) -> None:
+            now = time.perf_counter()
+            self.telemetry.observe("conversion_seconds", self.labels, now - self._last)
+            self.telemetry.inc("documents_converted_total", self.labels)
+            pages = self.pages.get(Path(path).stem)
+            if pages:
+                self._converted_pages += pages
+                self.telemetry.inc("pages_converted_total", self.labels, pages)
+                self.telemetry.set(
+                    "pages_per_second",
+                    self.labels,
+                    self._converted_pages / max(now - self._start, 1e-9),
+                )
+            self.telemetry.flush()
+            if on_document:
+                on_document(path)
+            self._last = time.perf_counter()
+
+        return recorded
+
+
+class EvaluationRecorder:
+    """Records per-document evaluation timings, timeouts and cache use."""
+
+    def __init__(self, telemetry: TelemetryFile, labels: Labels) -> None:
+        self.telemetry = telemetry
+        self.labels = labels
+        self._cache = (MarkdownDocument.cache_hits, MarkdownDocument.cache_misses)
+
+    def document(
+        self, timings: Mapping[str, float], timed_out: Optional[Iterable[str]] = None
+    ) -> None:
+        self.telemetry.inc("documents_evaluated_total", self.labels)
+        for scorer, seconds in timings.items():
+            self.telemetry.observe(
+                "evaluation_seconds", (*self.labels, ("metric", scorer)), seconds
+            )
+        for metric in timed_out or ():
+            self.telemetry.inc(
+                "metric_timeouts_total", (*self.labels, ("metric", metric))
+            )
+        hits, misses = MarkdownDocument.cache_hits, MarkdownDocument.cache_misses
+        self.telemetry.inc(
+            "artifact_cache_hits_total", self.labels, hits - self._cache[0]
+        )
+        self.telemetry.inc(
+            "artifact_cache_misses_total", self.labels, misses - self._cache[1]
+        )
+        self._cache = (hits, misses)
+        self.telemetry.flush()
@@ -0,0 +1,172 @@
+"""Span tracing in Chrome trace-event format.
+
+``--trace PATH`` on ``run.py``, ``pdf_parser.py`` and ``evaluator.py``
+records a timeline of the run: pipeline stages, each engine's
+``to_markdown``, each converted document, each evaluated document and metric,
+and report writes. Open the resulting JSON in ``chrome://tracing`` or
+https://ui.perfetto.dev to see idle workers, stragglers and serial stretches
+that aggregate timings hide.
+
+Every process appends its events to its own file in a scratch directory named
+by the ``OPENDATALOADER_BENCH_TRACE_DIR`` environment variable, which worker
+processes inherit; when the run finishes the files are merged into ``PATH``.
+Timestamps are wall-clock microseconds so events from different processes
+line up. Without ``--trace`` every hook is a no-op.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+TRACE_DIR_ENV = "OPENDATALOADER_BENCH_TRACE_DIR"
+
+_lock = threading.Lock()
+# (pid, handle) of this process's event file; reopened after a fork.
+_handle: Optional[Tuple[int, IO[str]]] = None
+_named_threads: Set[Tuple[int, int]] = set()
+
+
+def _now() -> float:
+    return time.time_ns() / 1000
+
+
+def tracing_enabled() -> bool:
+    return bool(os.environ.get(TRACE_DIR_ENV))
+
+
+def _metadata(kind: str, pid: int, tid: int, name: str) -> Dict[str, Any]:
+    return {"ph": "M", "name": kind, "pid": pid, "tid": tid, "args": {"name": name}}
+
+
+def _write(event: Dict[str, Any]) -> None:
+    global _handle
+    trace_dir = os.environ.get(TRACE_DIR_ENV)
+    if not trace_dir:
+        return
+    pid, tid = os.getpid(), threading.get_ident()
+    lines: List[Dict[str, Any]] = []
+    with _lock:
+        if _handle is None or _handle[0] != pid:
+            path = Path(trace_dir) / f"{pid}.jsonl"
+            _handle = (pid, path.open("a", encoding="utf-8"))
+            _named_threads.clear()
+            process = multiprocessing.current_process().name
+            lines.append(_metadata("process_name", pid, tid, f"{process} ({pid})"))
+        if (pid, tid) not in _named_threads:
+            _named_threads.add((pid, tid))
+            lines.append(
+                _metadata("thread_name", pid, tid, threading.current_thread().name)
+            )
+        lines.append({**event, "pid": pid, "tid": tid})
+        _handle[1].write("".join(json.dumps(line) + "\n" for line in lines))
+        _handle[1].flush()
+
+
+def record_span(
+    name: str, category: str, start: float, end: float, **args: Any
+) -> None:
+    """Record a completed span from ``start`` to ``end`` (microseconds)."""
+
+    _write(
+        {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start,
+            "dur": max(end - start, 0.0),
+            "args": args,
+        }
+    )
+
+
+@contextmanager
+def span(name: str, category: str, **args: Any) -> Iterator[None]:
+    """Record the enclosed block as a span when tracing is enabled."""
+
+    if not tracing_enabled():
+        yield
+        return
+    start = _now()
+    try:
+        yield
+    finally:
+        record_span(name, category, start, _now(), **args)
+
+
+def trace_documents(
+    on_document: Optional[Callable[[str], None]], **args: Any
+) -> Optional[Callable[[str], None]]:
+    """Wrap an ``on_document`` callback so each converted document becomes a span.
+
+    Engines report documents one after another, so a document's span runs
+    from the previous report (or the start) to its own. Time spent in
+    ``on_document`` itself is not attributed to the next document.
+    """
+
+    if not tracing_enabled():
+        return on_document
+    last = _now()
+
+    def traced(path: str) -> None:
+        nonlocal last
+        end = _now()
+        record_span(Path(path).stem, "document", last, end, path=path, **args)
+        if on_document:
+            on_document(path)
+        last = _now()
+
+    return traced
+
+
+def _close() -> None:
+    global _handle
+    with _lock:
+        if _handle is not None:
+            _handle[1].close()
+            _handle = None
+
+
+def _merge(trace_dir: Path, output: Path) -> int:
+    events: List[Dict[str, Any]] = []
+    for path in sorted(trace_dir.glob("*.jsonl")):
+        with path.open(encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if line:
+                    events.append(json.loads(line))
+    events.sort(key=lambda event: (event["ph"] != "M", event.get("ts", 0)))
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8"
+    )
+    return sum(1 for event in events if event["ph"] == "X")
+
+
+@contextmanager
+def tracing(output: Optional[Path]) -> Iterator[None]:
+    """Trace the enclosed run into ``output`` (a no-op when ``None``)."""
+
+    if output is None or tracing_enabled():
+        # Nested calls keep recording into the outer trace.
+        yield
+        return
+    trace_dir = Path(tempfile.mkdtemp(prefix="bench-trace-"))
+    os.environ[TRACE_DIR_ENV] = str(trace_dir)
+    try:
+        yield
+    finally:
+        os.environ.pop(TRACE_DIR_ENV, None)
+        _close()
+        count = _merge(trace_dir, output)
+        shutil.rmtree(trace_dir, ignore_errors=True)
+        logging.info("Trace with %d spans written to %s", count, output)
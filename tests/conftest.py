@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def write_corpus(tmp_path):
+    """Return a builder for a ground-truth directory and one engine's predictions.
+
+    ``write(ground_truth, predictions, summary=None)`` writes each mapping of
+    document id to Markdown to ``tmp_path/gt`` and
+    ``tmp_path/prediction/engine/markdown``, plus the engine's
+    ``summary.json`` when ``summary`` is given, and returns
+    ``(gt_dir, engine_dir)``.
+    """
+
+    def write(ground_truth, predictions, summary=None):
+        gt_dir = tmp_path / "gt"
+        engine_dir = tmp_path / "prediction" / "engine"
+        markdown_dir = engine_dir / "markdown"
+        gt_dir.mkdir()
+        markdown_dir.mkdir(parents=True)
+        for doc_id, text in ground_truth.items():
+            (gt_dir / f"{doc_id}.md").write_text(text, encoding="utf-8")
+        for doc_id, text in predictions.items():
+            (markdown_dir / f"{doc_id}.md").write_text(text, encoding="utf-8")
+        if summary is not None:
+            (engine_dir / "summary.json").write_text(
+                json.dumps(summary), encoding="utf-8"
+            )
+        return gt_dir, engine_dir
+
+    return write
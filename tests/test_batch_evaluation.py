@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from batch_evaluation import evaluate_many, iter_evaluate_many
+from evaluator import _score_markdown_documents
+from markdown_document import MarkdownDocument
+from prediction_preflight import PreflightLimits, preflight_text
+
+GT = {
+    "doc-a": "# Title\n\nIntro text.\n\n| A | B |\n|---|---|\n| 1 | 2 |\n",
+    "doc-b": "Plain paragraph without headings or tables.\n",
+    "doc-c": "# Only heading\n\nBody.\n",
+}
+PREDICTIONS = {
+    "doc-a": "# Title\n\nIntro text!\n\n| A | B |\n|---|---|\n| 1 | 3 |\n",
+    "doc-b": None,
+    "doc-c": "Body without heading.\n",
+}
+
+
+def _expected(doc_id):
+    pred = PREDICTIONS[doc_id]
+    return _score_markdown_documents(
+        doc_id,
+        MarkdownDocument(GT[doc_id]),
+        MarkdownDocument(pred or ""),
+        pred is not None,
+    ).to_json()["scores"]
+
+
+def test_evaluate_many_matches_document_scores():
+    batch = evaluate_many(GT, PREDICTIONS, workers=1)
+
+    assert batch.document_ids == ["doc-a", "doc-b", "doc-c"]
+    assert batch.prediction_available.tolist() == [True, False, True]
+    for row, doc_id in enumerate(batch.document_ids):
+        for name, value in _expected(doc_id).items():
+            if value is None:
+                assert not batch.masks[name][row]
+                assert np.isnan(batch.scores[name][row])
+            else:
+                assert batch.masks[name][row]
+                assert batch.scores[name][row] == value
+    assert set(batch.timings) == {"nid", "teds", "mhs"}
+
+
+def test_selected_metrics_skip_other_scorers():
+    batch = evaluate_many(GT, PREDICTIONS, metrics=["teds_s"], workers=1)
+
+    assert list(batch.scores) == ["teds_s"]
+    assert list(batch.timings) == ["teds"]
+    assert batch.masks["teds_s"].tolist() == [True, False, False]
+
+
+def test_iter_evaluate_many_streams_generator_in_chunks_across_workers():
+    pairs = ((doc_id, PREDICTIONS[doc_id]) for doc_id in GT)
+
+    batches = list(iter_evaluate_many(GT, pairs, metrics=["nid"], workers=2, batch_size=2))
+
+    assert [batch.document_ids for batch in batches] == [["doc-a", "doc-b"], ["doc-c"]]
+    assert batches[0].scores["nid"][0] == _expected("doc-a")["nid"]
+
+
+def test_predictions_pass_through_preflight():
+    limits = PreflightLimits(chars=12)
+    cleaned, stats = preflight_text(PREDICTIONS["doc-a"], limits)
+
+    batch = evaluate_many(GT, PREDICTIONS, metrics=["nid"], workers=1, preflight=limits)
+    unchecked = evaluate_many(GT, PREDICTIONS, metrics=["nid"], workers=1, preflight=None)
+
+    assert batch.preflight[0] == stats.to_json()
+    assert batch.preflight[0]["truncated"] is True
+    assert batch.preflight[1] is None
+    assert batch.scores["nid"][0] == evaluate_many(
+        GT, {"doc-a": cleaned}, metrics=["nid"], workers=1, preflight=None
+    ).scores["nid"][0]
+    assert batch.scores["nid"][0] != unchecked.scores["nid"][0]
+    assert unchecked.preflight == [None, None, None]
+
+
+def test_unknown_documents_and_metrics_are_rejected():
+    with pytest.raises(KeyError):
+        evaluate_many(GT, {"missing": "text"}, workers=1)
+    with pytest.raises(TypeError, match="doc-b"):
+        evaluate_many(GT, {"doc-a": "text", "doc-b": 5}, workers=1)
+    with pytest.raises(ValueError):
+        evaluate_many(GT, PREDICTIONS, metrics=["bleu"], workers=1)
@@ -0,0 +1,51 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from benchmark_profiles import (
+    PROFILES,
+    profile_root,
+    reject_unprofiled_options,
+    resolve_profile,
+)
+
+
+def test_named_profiles_are_resolved():
+    profile = resolve_profile("2c-4g")
+    assert profile is PROFILES["2c-4g"]
+    assert profile.cpu_count == 2
+    assert profile.memory_bytes == 4 * 1024**3
+
+
+def test_ad_hoc_profile_names_are_parsed():
+    profile = resolve_profile("3c-1.5g")
+    assert profile.cpu_count == 3
+    assert profile.memory_gb == pytest.approx(1.5)
+
+
+@pytest.mark.parametrize("name", ["", "2c", "0c-4g", "two-cores"])
+def test_invalid_profile_names_raise(name):
+    with pytest.raises(ValueError):
+        resolve_profile(name)
+
+
+def test_profile_root_nests_under_profiles_directory():
+    assert profile_root(Path("prediction"), "2c-4g") == Path(
+        "prediction/profiles/2c-4g"
+    )
+
+
+def test_options_ignored_by_profiled_runs_are_rejected():
+    reject_unprofiled_options({"--threads": None, "--trace": None})
+    with pytest.raises(ValueError, match="--threads, --trace cannot be combined"):
+        reject_unprofiled_options({"--threads": 4, "--cpus": None, "--trace": Path("t")})
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "sched_getaffinity"), reason="CPU affinity not supported"
+)
+def test_run_config_pins_threads_and_cpus():
+    config = resolve_profile("1c-1g").run_config()
+    assert config.threads == 1
+    assert config.cpus == (min(os.sched_getaffinity(0)),)
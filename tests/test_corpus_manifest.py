@@ -0,0 +1,99 @@
+import json
+import os
+
+import corpus_manifest
+from corpus_manifest import (
+    build_manifest,
+    ground_truth_paths,
+    load_manifest,
+    pdf_paths,
+    write_manifest,
+)
+from sampling import load_page_counts, load_strata
+
+GROUND_TRUTH = {
+    "doc-a": "# Title\n\nText.\n",
+    "doc-b": "<table><tr><th>A</th><th>B</th></tr><tr><td>1</td><td>2</td></tr></table>\n",
+}
+
+
+def _corpus(tmp_path):
+    pdf_dir = tmp_path / "pdfs"
+    gt_dir = tmp_path / "ground-truth" / "markdown"
+    pdf_dir.mkdir()
+    gt_dir.mkdir(parents=True)
+    for doc_id, text in GROUND_TRUTH.items():
+        (pdf_dir / f"{doc_id}.pdf").write_bytes(b"%PDF-1.7 " + doc_id.encode())
+        (gt_dir / f"{doc_id}.md").write_text(text, encoding="utf-8")
+    reference = {
+        "doc-a.pdf": {"elements": [{"category": "Heading1", "page": 2}]},
+        "doc-b.pdf": {"elements": [{"category": "Table", "page": 1}]},
+    }
+    (tmp_path / "ground-truth" / "reference.json").write_text(json.dumps(reference))
+    return pdf_dir, gt_dir, tmp_path / "ground-truth" / "manifest.json"
+
+
+def test_manifest_records_hashes_pages_and_features(tmp_path):
+    pdf_dir, gt_dir, manifest_path = _corpus(tmp_path)
+
+    manifest, analysed = build_manifest(pdf_dir, gt_dir, manifest_path)
+
+    assert analysed == 4
+    assert manifest.pdf_dir == "../pdfs"
+    a, b = manifest.documents["doc-a"], manifest.documents["doc-b"]
+    assert len(a.pdf_sha256) == 64 and a.gt_chars == len(GROUND_TRUTH["doc-a"])
+    assert a.has_heading and not a.has_table
+    assert b.has_table and not b.has_heading and b.table_cells == 4
+    # Not real PDFs, so page counts fall back to reference.json.
+    assert (a.pages, b.pages) == (2, 1) and a.pages_source == "reference"
+    assert manifest.strata() == load_strata(
+        manifest_path.with_name("reference.json"), use_manifest=False
+    )
+
+
+def test_pdfinfo_supplies_page_counts_and_sizes(tmp_path, monkeypatch):
+    pdf_dir, gt_dir, manifest_path = _corpus(tmp_path)
+    monkeypatch.setattr(
+        corpus_manifest,
+        "pdfinfo_from_path",
+        lambda path: {"Pages": "3", "Page size": "612 x 792 pts (letter)"},
+    )
+
+    manifest, _ = build_manifest(pdf_dir, gt_dir, manifest_path)
+
+    entry = manifest.documents["doc-a"]
+    assert (entry.pages, entry.pages_source) == (3, "pdfinfo")
+    assert entry.page_size == [612.0, 792.0]
+
+
+def test_refresh_only_analyses_changed_files(tmp_path):
+    pdf_dir, gt_dir, manifest_path = _corpus(tmp_path)
+    manifest, _ = build_manifest(pdf_dir, gt_dir, manifest_path)
+    gt_path = gt_dir / "doc-a.md"
+    gt_path.write_text("Plain text now.\n", encoding="utf-8")
+    os.utime(gt_path, ns=(1, 1))
+
+    refreshed, analysed = build_manifest(pdf_dir, gt_dir, manifest_path, manifest)
+
+    assert analysed == 1
+    assert refreshed.documents["doc-a"].has_heading is False
+    assert refreshed.documents["doc-b"] == manifest.documents["doc-b"]
+
+
+def test_consumers_use_the_manifest_until_it_is_stale(tmp_path):
+    pdf_dir, gt_dir, manifest_path = _corpus(tmp_path)
+    manifest, _ = build_manifest(pdf_dir, gt_dir, manifest_path)
+    manifest.documents["doc-a"].pages = 7
+    write_manifest(manifest, manifest_path)
+
+    assert load_manifest(manifest_path) == manifest
+    assert load_page_counts(manifest_path.with_name("reference.json"))["doc-a"] == 7
+    assert [path.name for path in ground_truth_paths(gt_dir)] == ["doc-a.md", "doc-b.md"]
+
+    # Listing comes from the manifest: a file it does not know is not globbed...
+    (pdf_dir / "doc-c.pdf").write_bytes(b"%PDF")
+    os.utime(pdf_dir, ns=(0, manifest.pdf_dir_mtime_ns))
+    assert len(pdf_paths(pdf_dir, manifest_path)) == 2
+    # ...until the directory changes after the manifest was written.
+    os.utime(pdf_dir, ns=(0, manifest.pdf_dir_mtime_ns + 1))
+    assert len(pdf_paths(pdf_dir, manifest_path)) == 3
@@ -0,0 +1,89 @@
+import json
+import tempfile
+
+import pytest
+
+from document_pack import (
+    MarkdownPack,
+    PACK_FORMATS,
+    find_markdown,
+    open_markdown,
+    pack_directory,
+    pack_predictions,
+)
+from evaluator import _evaluate_engine_version
+
+DOCUMENTS = {
+    "doc-a": "# Alpha\n\nFirst paragraph.\n",
+    "doc-b": "# Beta\n\n| x | y |\n|---|---|\n| 1 | 2 |\n",
+    "doc-c": "Ünïcode text\n",
+}
+
+
+def _write_markdown(directory, documents=DOCUMENTS):
+    directory.mkdir(parents=True, exist_ok=True)
+    for doc_id, text in documents.items():
+        (directory / f"{doc_id}.md").write_text(text, encoding="utf-8")
+    return directory
+
+
+@pytest.mark.parametrize("pack_format", [name for name in PACK_FORMATS if name != "tar.zst"])
+def test_pack_round_trip(tmp_path, monkeypatch, pack_format):
+    spool_dir = tmp_path / "spool"
+    spool_dir.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(spool_dir))
+    directory = _write_markdown(tmp_path / "markdown")
+    path = tmp_path / f"markdown{PACK_FORMATS[pack_format]}"
+
+    assert pack_directory(directory, path) == 3
+    pack = open_markdown(path)
+
+    members = sorted(pack.glob("*.md"))
+    assert [member.stem for member in members] == sorted(DOCUMENTS)
+    member = pack / "doc-c.md"
+    assert member.read_text(encoding="utf-8") == DOCUMENTS["doc-c"]
+    assert member.stat().st_size == len(DOCUMENTS["doc-c"].encode("utf-8"))
+    assert member.parent == directory
+    assert not (pack / "missing.md").is_file()
+    with pytest.raises(FileNotFoundError):
+        (pack / "missing.md").read_text(encoding="utf-8")
+    # Compressed tar packs are read from one decompressed, indexed copy.
+    expected_spools = 1 if pack_format == "tar.gz" else 0
+    assert len(list(spool_dir.glob("*.tar"))) == expected_spools
+
+
+def test_evaluation_reads_packed_predictions_and_ground_truth(tmp_path):
+    gt_dir = _write_markdown(tmp_path / "gt")
+    loose = tmp_path / "loose" / "engine"
+    packed = tmp_path / "packed" / "engine"
+    predictions = {**DOCUMENTS, "doc-b": "# Beta\n"}
+    _write_markdown(loose / "markdown", predictions)
+    _write_markdown(packed / "markdown", predictions)
+    pack_predictions(packed, "zip")
+    gt_pack = tmp_path / "gt.sqlite"
+    pack_directory(gt_dir, gt_pack)
+
+    assert not (packed / "markdown").exists()
+    assert find_markdown(packed) == MarkdownPack(packed / "markdown.zip")
+    expected = _evaluate_engine_version(gt_dir, loose, "evaluation.json", metrics=["nid"])
+    actual = _evaluate_engine_version(
+        open_markdown(gt_pack), packed, "evaluation.json", metrics=["nid"]
+    )
+
+    assert json.loads(actual.read_text())["documents"] == json.loads(
+        expected.read_text()
+    )["documents"]
+
+
+def test_pack_predictions_keeps_documents_not_converted_again(tmp_path):
+    engine_dir = tmp_path / "engine"
+    _write_markdown(engine_dir / "markdown")
+    pack_predictions(engine_dir, "tar")
+    _write_markdown(engine_dir / "markdown", {"doc-a": "# Updated\n"})
+
+    path = pack_predictions(engine_dir, "sqlite")
+
+    assert not (engine_dir / "markdown.tar").exists()
+    pack = open_markdown(path)
+    assert sorted(member.stem for member in pack.glob("*.md")) == sorted(DOCUMENTS)
+    assert (pack / "doc-a.md").read_text(encoding="utf-8") == "# Updated\n"
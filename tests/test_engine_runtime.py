@@ -0,0 +1,83 @@
+import os
+import sys
+import types
+
+import pytest
+
+from engine_runtime import (
+    THREAD_ENV_VARS,
+    EngineRunConfig,
+    engine_run_context,
+    parse_cpu_list,
+)
+
+
+def test_parse_cpu_list_expands_ranges():
+    assert parse_cpu_list("0-3,6") == (0, 1, 2, 3, 6)
+
+
+def test_parse_cpu_list_deduplicates_and_sorts():
+    assert parse_cpu_list("5, 1,1-2") == (1, 2, 5)
+
+
+def test_parse_cpu_list_rejects_reversed_range():
+    with pytest.raises(ValueError):
+        parse_cpu_list("3-1")
+
+
+def test_override_keeps_unset_fields():
+    config = EngineRunConfig(threads=4, cpus=(0, 1))
+    assert config.override(threads=2) == EngineRunConfig(threads=2, cpus=(0, 1))
+    assert config.override() == config
+
+
+def test_thread_env_vars_are_restored(monkeypatch):
+    monkeypatch.setenv("OMP_NUM_THREADS", "7")
+    monkeypatch.delenv("MKL_NUM_THREADS", raising=False)
+
+    with engine_run_context(EngineRunConfig(threads=2)) as settings:
+        assert settings["threads"] == 2
+        for name in THREAD_ENV_VARS:
+            assert os.environ[name] == "2"
+
+    assert os.environ["OMP_NUM_THREADS"] == "7"
+    assert "MKL_NUM_THREADS" not in os.environ
+
+
+def test_only_effective_thread_controls_are_recorded(monkeypatch):
+    for module in ("numpy", "numexpr"):
+        monkeypatch.setitem(sys.modules, module, types.ModuleType(module))
+    monkeypatch.delitem(sys.modules, "torch", raising=False)
+
+    with engine_run_context(EngineRunConfig(threads=2)) as settings:
+        assert settings["threads"] is None
+        assert settings["thread_controls"] == []
+        assert os.environ["OMP_NUM_THREADS"] == "2"
+
+    monkeypatch.delitem(sys.modules, "numexpr")
+    torch = types.ModuleType("torch")
+    pool = [8]
+    torch.get_num_threads = lambda: pool[0]
+    torch.set_num_threads = lambda threads: pool.__setitem__(0, threads)
+    monkeypatch.setitem(sys.modules, "torch", torch)
+
+    with engine_run_context(EngineRunConfig(threads=2)) as settings:
+        assert settings["threads"] == 2
+        assert settings["thread_controls"] == ["torch", "NUMEXPR_NUM_THREADS"]
+        assert pool == [2]
+
+    assert pool == [8]
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "sched_setaffinity"), reason="CPU affinity not supported"
+)
+def test_affinity_is_applied_and_restored():
+    original = os.sched_getaffinity(0)
+    target = (min(original),)
+
+    with engine_run_context(EngineRunConfig(cpus=target)) as settings:
+        assert settings["cpus"] == list(target)
+        assert os.sched_getaffinity(0) == set(target)
+
+    assert os.sched_getaffinity(0) == original
@@ -0,0 +1,110 @@
+import socket
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+from engine_runtime import EngineRunConfig
+from engine_server import EngineServer, convert_with_server, server_status
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="engine server needs Unix sockets"
+)
+
+
+def _fake_engine(calls):
+    def to_markdown(doc_paths, input_path, output_dir, on_document=None):
+        calls.append([path.name for path in doc_paths])
+        for doc_path in doc_paths:
+            output_file = output_dir / f"{doc_path.stem}.md"
+            output_file.write_text(f"# {doc_path.stem}\n", encoding="utf-8")
+            if on_document:
+                on_document(str(output_file))
+
+    return to_markdown
+
+
+@pytest.fixture
+def socket_dir():
+    # AF_UNIX paths are limited to ~100 bytes, so avoid pytest's long tmp_path.
+    with tempfile.TemporaryDirectory(prefix="odl-") as directory:
+        yield Path(directory)
+
+
+def _start(socket_path, calls, idle_timeout=None):
+    server = EngineServer(
+        socket_path, ["fake"], idle_timeout, handlers={"fake": _fake_engine(calls)}
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+
+def test_convert_with_server_streams_documents(socket_dir, tmp_path):
+    calls = []
+    socket_path = socket_dir / "engines.sock"
+    server, thread = _start(socket_path, calls)
+    try:
+        doc_paths = [tmp_path / "a.pdf", tmp_path / "b.pdf"]
+        output_dir = tmp_path / "markdown"
+        output_dir.mkdir()
+        seen = []
+
+        result = convert_with_server(
+            "fake",
+            doc_paths,
+            None,
+            output_dir,
+            EngineRunConfig(),
+            on_document=seen.append,
+            socket_path=socket_path,
+        )
+
+        assert calls == [["a.pdf", "b.pdf"]]
+        assert [Path(path).name for path in seen] == ["a.md", "b.md"]
+        assert (output_dir / "a.md").read_text(encoding="utf-8") == "# a\n"
+        assert result["queue_depth"] == 0
+        assert result["elapsed"] >= 0 and result["queue_wait"] >= 0
+        assert server_status(socket_path)["jobs_completed"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join(timeout=5)
+    assert not socket_path.exists()
+
+
+def test_convert_with_server_falls_back_without_engine(socket_dir, tmp_path):
+    calls = []
+    socket_path = socket_dir / "engines.sock"
+    assert server_status(socket_path) is None
+    assert (
+        convert_with_server("fake", [], None, tmp_path, EngineRunConfig(), socket_path=socket_path)
+        is None
+    )
+
+    server, thread = _start(socket_path, calls)
+    try:
+        result = convert_with_server(
+            "other", [], None, tmp_path, EngineRunConfig(), socket_path=socket_path
+        )
+        assert result is None
+        assert calls == []
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join(timeout=5)
+
+
+def test_server_replaces_stale_socket_and_stops_when_idle(socket_dir):
+    socket_path = socket_dir / "engines.sock"
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(socket_path))
+    stale.close()
+
+    server, thread = _start(socket_path, [], idle_timeout=0.2)
+    thread.join(timeout=5)
+    server.server_close()
+
+    assert not thread.is_alive()
+    assert not socket_path.exists()
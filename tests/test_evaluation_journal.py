@@ -0,0 +1,88 @@
+import json
+
+import evaluator
+from evaluation_journal import EvaluationJournal, journal_filename
+from evaluator import DocumentScores, _evaluate_engine_version, _write_evaluation
+
+DOC_IDS = [f"doc-{index:02d}" for index in range(6)]
+SETTINGS = {"metrics": ["nid"], "approximate": False}
+GROUND_TRUTH = {doc_id: f"# Title {i}\n\nBody {i}" for i, doc_id in enumerate(DOC_IDS)}
+PREDICTIONS = {doc_id: f"# Title {i}\n\nText {i}" for i, doc_id in enumerate(DOC_IDS)}
+
+
+def test_journal_truncates_a_partial_line_and_checks_settings(tmp_path):
+    path = tmp_path / journal_filename("evaluation.json")
+    assert path.name == "evaluation.journal.jsonl"
+    journal = EvaluationJournal(path, SETTINGS)
+    journal.append({"document_id": "doc-a", "scores": {"nid": 0.5}})
+    journal.append({"document_id": "doc-b", "scores": {"nid": 1.0}})
+    journal.close()
+    with path.open("ab") as handle:
+        handle.write(b'{"document_id": "doc-c", "sco')
+
+    journal = EvaluationJournal(path, SETTINGS, resume=True)
+    assert "doc-b" in journal and "doc-c" not in journal
+    journal.append({"document_id": "doc-c", "scores": {"nid": 0.0}})
+    entries = journal.entries(["doc-c", "doc-a", "doc-x"])
+    assert [entry["document_id"] for entry in entries] == ["doc-c", "doc-a"]
+    journal.close()
+
+    journal = EvaluationJournal(path, {**SETTINGS, "approximate": True}, resume=True)
+    assert not journal.completed
+    journal.close(remove=True)
+    assert not path.exists()
+
+
+def test_resume_skips_journaled_documents(write_corpus, monkeypatch):
+    gt_dir, engine_dir = write_corpus(GROUND_TRUTH, PREDICTIONS)
+    expected = _evaluate_engine_version(gt_dir, engine_dir, "full.json", metrics=["nid"])
+    assert not (engine_dir / "full.journal.jsonl").exists()
+
+    # An interrupted run leaves the first documents in its journal.
+    real_evaluate = evaluator._evaluate_single_document
+
+    def interrupted(doc_id, *args):
+        if doc_id == DOC_IDS[3]:
+            raise KeyboardInterrupt
+        return real_evaluate(doc_id, *args)
+
+    monkeypatch.setattr(evaluator, "_evaluate_single_document", interrupted)
+    try:
+        _evaluate_engine_version(gt_dir, engine_dir, "evaluation.json", metrics=["nid"])
+    except KeyboardInterrupt:
+        pass
+    journal_path = engine_dir / "evaluation.journal.jsonl"
+    assert len(journal_path.read_text().splitlines()) == 4
+
+    evaluated = []
+
+    def counting(doc_id, *args):
+        evaluated.append(doc_id)
+        return real_evaluate(doc_id, *args)
+
+    monkeypatch.setattr(evaluator, "_evaluate_single_document", counting)
+    output_path = _evaluate_engine_version(
+        gt_dir, engine_dir, "evaluation.json", metrics=["nid"], resume=True
+    )
+
+    assert evaluated == DOC_IDS[3:]
+    assert output_path.read_bytes() == expected.read_bytes()
+    assert (engine_dir / "evaluation.csv").read_bytes() == (
+        engine_dir / "full.csv"
+    ).read_bytes()
+    assert not journal_path.exists()
+
+
+def test_streamed_report_matches_a_single_dump(tmp_path):
+    (tmp_path / "summary.json").write_text(json.dumps({"engine_name": "engine"}))
+    documents = [
+        DocumentScores("doc-ü", {"overall": 0.25, "nid": None}, True, {"nid": [0, 1]}),
+        DocumentScores("doc-b", {"overall": 1.0, "nid": 0.5}, False, timed_out=[]),
+    ]
+
+    output_path = _write_evaluation(tmp_path, "evaluation.json", documents)
+
+    payload = json.loads(output_path.read_text())
+    assert payload["metrics"]["score"]["overall_mean"] == 0.625
+    assert payload["metrics"]["score_bounds"]["nid_mean"] == [0.5, 0.5]
+    assert output_path.read_text() == json.dumps(payload, indent=2, ensure_ascii=False)
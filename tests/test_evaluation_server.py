@@ -0,0 +1,113 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from evaluation_server import start_evaluation_server
+from evaluator import _evaluate_single_document
+from markdown_document import MarkdownDocument
+
+GT_MARKDOWN = {
+    "doc-a": "# Title\n\nIntro text.\n\n| A | B |\n|---|---|\n| 1 | 2 |\n",
+    "doc-b": "Plain paragraph without headings or tables.\n",
+}
+PREDICTION = "# Title\n\nIntro text!\n\n| A | B |\n|---|---|\n| 1 | 3 |\n"
+
+
+def _post(url, payload):
+    request = urllib.request.Request(
+        url + "/evaluate",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+@pytest.fixture
+def gt_dir(tmp_path):
+    directory = tmp_path / "gt"
+    directory.mkdir()
+    for doc_id, markdown in GT_MARKDOWN.items():
+        (directory / f"{doc_id}.md").write_text(markdown, encoding="utf-8")
+    return directory
+
+
+@pytest.fixture
+def server(gt_dir):
+    server = start_evaluation_server(gt_dir, workers=0, batch_size=1)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_markdown_document_memoises_artifacts():
+    document = MarkdownDocument("| A |\n|---|\n| 1 |\n")
+    calls = []
+
+    def build(doc):
+        calls.append(doc.with_html)
+        return len(calls)
+
+    assert document.artifact("key", build) == 1
+    assert document.artifact("key", build) == 1
+    assert calls == ["<table><tr><th>A</th></tr><tr><td>1</td></tr></table>\n"]
+
+
+def test_server_matches_file_based_evaluation(server, gt_dir, tmp_path):
+    pred_path = tmp_path / "doc-a.md"
+    pred_path.write_text(PREDICTION, encoding="utf-8")
+    expected = _evaluate_single_document("doc-a", gt_dir / "doc-a.md", pred_path)
+
+    result = _post(server.url, {"doc_id": "doc-a", "markdown": PREDICTION})
+
+    assert result["document_id"] == "doc-a"
+    assert result["scores"] == expected.to_json()["scores"]
+    assert result["preflight"] == expected.to_json()["preflight"]
+    assert result["prediction_available"] is True
+    assert set(result["timings"]) == {"nid", "teds", "mhs", "total"}
+
+
+def test_server_batches_and_reports_unknown_documents(server):
+    payload = {
+        "requests": [
+            {"doc_id": "doc-a", "markdown": PREDICTION},
+            {"doc_id": "doc-b", "markdown": None},
+            {"doc_id": "missing", "markdown": "text"},
+        ]
+    }
+
+    results = _post(server.url, payload)["results"]
+
+    assert [result["document_id"] for result in results] == ["doc-a", "doc-b", "missing"]
+    assert results[1]["prediction_available"] is False
+    assert "preflight" not in results[1]
+    assert results[1]["scores"]["nid"] == 0.0
+    assert results[2]["error"] == "unknown document"
+
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        _post(server.url, {"doc_id": "missing", "markdown": "text"})
+    assert excinfo.value.code == 404
+
+    with urllib.request.urlopen(server.url + "/health") as response:
+        assert json.loads(response.read())["documents"] == 2
+
+
+@pytest.mark.parametrize("markdown", [5, ["# Title"]])
+def test_non_string_markdown_is_rejected(server, markdown):
+    payload = {
+        "requests": [
+            {"doc_id": "doc-b", "markdown": "text"},
+            {"doc_id": "doc-a", "markdown": markdown},
+        ]
+    }
+
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        _post(server.url, payload)
+    assert excinfo.value.code == 400
+    assert "doc-a" in json.loads(excinfo.value.read())["error"]
+
+    # The server keeps answering afterwards.
+    result = _post(server.url, {"doc_id": "doc-b", "markdown": "text"})
+    assert result["document_id"] == "doc-b"
@@ -0,0 +1,73 @@
+import json
+
+from evaluator import main as evaluator_main
+from evaluator_approx import approximate_heading_level, approximate_table
+from markdown_document import MarkdownDocument
+from metric_registry import compute_scores
+
+GT = (
+    "# Report\n\n## Results\n\nBody text.\n\n### Details\n\n"
+    "| A | B | C |\n|---|---|---|\n| 1 | 2 | 3 |\n| 4 | 5 | 6 |\n"
+)
+PRED = (
+    "# Report\n\n### Results\n\nBody text.\n\n## Detail\n\n"
+    "| A | B |\n|---|---|\n| 1 | 2 |\n| 4 | 6 |\n| 7 | 8 |\n"
+)
+
+
+def test_bounds_contain_exact_scores():
+    exact = compute_scores(MarkdownDocument(GT), MarkdownDocument(PRED), None)
+    bounds = {}
+    approx = compute_scores(
+        MarkdownDocument(GT), MarkdownDocument(PRED), None, approximate=True, bounds=bounds
+    )
+
+    assert approx["nid"] == exact["nid"]
+    assert set(bounds) == {"overall", "teds", "teds_s", "mhs", "mhs_s"}
+    for name, (lower, upper) in bounds.items():
+        assert lower - 1e-9 <= exact[name] <= upper + 1e-9
+        assert lower <= approx[name] <= upper
+
+
+def test_identical_documents_are_exact():
+    teds, teds_s = approximate_table(MarkdownDocument(GT), MarkdownDocument(GT))
+    mhs, mhs_s = approximate_heading_level(MarkdownDocument(GT), MarkdownDocument(GT))
+
+    for estimate in (teds, teds_s, mhs, mhs_s):
+        assert (estimate.value, estimate.lower, estimate.upper) == (1.0, 1.0, 1.0)
+
+
+def test_missing_table_scores_zero():
+    teds, teds_s = approximate_table(MarkdownDocument(GT), MarkdownDocument("text"))
+
+    assert teds.value == teds.upper == 0.0
+    assert teds_s.value == 0.0
+
+
+def test_approx_cli_writes_bounds_to_separate_report(tmp_path):
+    gt_dir = tmp_path / "gt"
+    gt_dir.mkdir()
+    (gt_dir / "doc.md").write_text(GT, encoding="utf-8")
+    engine_dir = tmp_path / "prediction" / "engine"
+    (engine_dir / "markdown").mkdir(parents=True)
+    (engine_dir / "markdown" / "doc.md").write_text(PRED, encoding="utf-8")
+
+    evaluator_main(
+        [
+            "--ground-truth-dir",
+            str(gt_dir),
+            "--prediction-root",
+            str(tmp_path / "prediction"),
+            "--approx",
+        ]
+    )
+
+    assert not (engine_dir / "evaluation.json").exists()
+    payload = json.loads((engine_dir / "evaluation_approx.json").read_text())
+    document = payload["documents"][0]
+    assert set(document["bounds"]) == {"overall", "teds", "teds_s", "mhs", "mhs_s"}
+    lower, upper = payload["metrics"]["score_bounds"]["teds_mean"]
+    assert lower <= payload["metrics"]["score"]["teds_mean"] <= upper
+    assert payload["metrics"]["score_bounds"]["nid_mean"] == [
+        payload["metrics"]["score"]["nid_mean"]
+    ] * 2
@@ -0,0 +1,40 @@
+import copy
+import json
+import os
+
+from generate_groundtruth_markdown import extract_markdown_from_reference
+
+REFERENCE = {
+    "doc-a.pdf": {
+        "elements": [
+            {"category": "Heading1", "content": {"text": " Title "}},
+            {"category": "List", "content": {"text": "item"}},
+            {"category": "Table", "content": {"html": "<tr><td>1</td></tr>"}},
+        ]
+    },
+    "doc-b.pdf": {"elements": [{"category": "Paragraph", "content": {"text": "Body"}}]},
+    "doc-c.pdf": {"elements": [{"category": "Figure"}]},
+}
+
+
+def test_only_changed_documents_are_rewritten(tmp_path):
+    reference = copy.deepcopy(REFERENCE)
+    reference_path = tmp_path / "reference.json"
+    reference_path.write_text(json.dumps(reference), encoding="utf-8")
+    output_dir = tmp_path / "markdown"
+
+    report = extract_markdown_from_reference(reference_path, output_dir, workers=1)
+
+    assert (report.written, report.unchanged, report.empty) == (2, 0, 1)
+    text = (output_dir / "doc-a.md").read_text(encoding="utf-8")
+    assert text.startswith("# Title\n\n- item\n\n<table>\n <tr>\n  <td>\n   1")
+    assert sorted(path.name for path in output_dir.iterdir()) == ["doc-a.md", "doc-b.md"]
+
+    os.utime(output_dir / "doc-a.md", ns=(0, 0))
+    reference["doc-b.pdf"]["elements"][0]["content"]["text"] = "Edited"
+    reference_path.write_text(json.dumps(reference), encoding="utf-8")
+    report = extract_markdown_from_reference(reference_path, output_dir, workers=2)
+
+    assert (report.written, report.unchanged) == (1, 1)
+    assert (output_dir / "doc-a.md").stat().st_mtime_ns == 0
+    assert (output_dir / "doc-b.md").read_text(encoding="utf-8") == "Edited"
@@ -0,0 +1,76 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("pdf2image")
+from PIL import Image  # noqa: E402
+
+import generate_pdfs_thumbnail  # noqa: E402
+from corpus_manifest import build_manifest, write_manifest  # noqa: E402
+from generate_pdfs_thumbnail import INDEX_FILENAME, render_dpi, run  # noqa: E402
+
+
+@pytest.fixture
+def renderer(monkeypatch):
+    calls = []
+
+    def convert_from_path(pdf_path, dpi, first_page, last_page):
+        calls.append((pdf_path.stem, dpi))
+        return [Image.new("RGB", (4, 4))]
+
+    monkeypatch.setattr(generate_pdfs_thumbnail, "convert_from_path", convert_from_path)
+
+    def pdf_page_info(pdf_path):
+        calls.append((pdf_path.stem, "pdfinfo"))
+        return 1, [612.0, 792.0]
+
+    monkeypatch.setattr(generate_pdfs_thumbnail, "pdf_page_info", pdf_page_info)
+    return calls
+
+
+def test_render_dpi_is_bounded_by_the_page_size():
+    assert render_dpi([612.0, 792.0], 200, 2400) == 200
+    assert render_dpi([612.0, 792.0], 200, 792) == 72
+    assert render_dpi(None, 200, 792) == 200
+
+
+def test_only_missing_or_changed_thumbnails_are_rendered(tmp_path, renderer):
+    pdf_dir = tmp_path / "pdfs"
+    pdf_dir.mkdir()
+    for doc_id in ("doc-a", "doc-b"):
+        (pdf_dir / f"{doc_id}.pdf").write_bytes(b"%PDF " + doc_id.encode())
+
+    report = run(tmp_path, workers=1)
+    assert (report.rendered, report.skipped) == (2, 0)
+    index = json.loads((tmp_path / "pdfs_thumbnail" / INDEX_FILENAME).read_text())
+    assert index["doc-a"]["dpi"] == 200 and len(index["doc-a"]["pdf_sha256"]) == 64
+
+    # Touched but unchanged PDFs are matched by hash; edited ones re-render.
+    thumbnail = tmp_path / "pdfs_thumbnail" / "doc-a.webp"
+    os.utime(thumbnail, ns=(0, 0))
+    (pdf_dir / "doc-b.pdf").write_bytes(b"%PDF changed")
+    os.utime(pdf_dir / "doc-b.pdf", ns=(0, 2 * 10**18))
+    renderer.clear()
+    report = run(tmp_path, workers=1)
+    assert (report.rendered, report.skipped) == (1, 1)
+    assert renderer == [("doc-b", "pdfinfo"), ("doc-b", 200)]
+
+    renderer.clear()
+    assert run(tmp_path, workers=1, dpi=100).rendered == 2
+    assert run(tmp_path, workers=1, dpi=100).skipped == 2
+
+
+def test_manifest_page_sizes_skip_pdfinfo(tmp_path, renderer):
+    pdf_dir = tmp_path / "pdfs"
+    gt_dir = tmp_path / "ground-truth" / "markdown"
+    pdf_dir.mkdir()
+    gt_dir.mkdir(parents=True)
+    (pdf_dir / "poster.pdf").write_bytes(b"%PDF poster")
+    manifest_path = tmp_path / "ground-truth" / "manifest.json"
+    manifest, _ = build_manifest(pdf_dir, gt_dir, manifest_path)
+    manifest.documents["poster"].page_size = [2400.0, 3600.0]
+    write_manifest(manifest, manifest_path)
+
+    assert run(tmp_path, workers=1).rendered == 1
+    assert renderer == [("poster", 48)]
@@ -0,0 +1,129 @@
+import json
+
+import history_compare
+from history_compare import (
+    Snapshot,
+    compare_engine,
+    compare_scores,
+    compare_speed,
+    select_baseline,
+)
+
+
+def _write_evaluation(path, elapsed_per_doc, scores, processor="cpu", version="1.0"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    documents = [
+        {"document_id": doc_id, "scores": {"overall": value}}
+        for doc_id, value in scores.items()
+    ]
+    summary = {
+        "engine_name": "engine",
+        "engine_version": version,
+        "processor": processor,
+        "document_count": len(scores),
+        "elapsed_per_doc": elapsed_per_doc,
+        "total_elapsed": elapsed_per_doc * len(scores),
+    }
+    path.write_text(json.dumps({"summary": summary, "documents": documents}))
+
+
+def _scores(value, count=40):
+    return {f"doc-{i:02d}": value for i in range(count)}
+
+
+def test_select_baseline_skips_the_archived_current_run(tmp_path):
+    older = tmp_path / "history" / "250101" / "engine" / "evaluation.json"
+    same = tmp_path / "history" / "250201" / "engine" / "evaluation.json"
+    current_path = tmp_path / "prediction" / "engine" / "evaluation.json"
+    _write_evaluation(older, 1.0, _scores(0.9))
+    _write_evaluation(same, 1.2, _scores(0.8))
+    _write_evaluation(current_path, 1.2, _scores(0.8))
+
+    current = Snapshot.load(current_path, "current")
+    assert select_baseline(current, [older, same]).label == "250101"
+    assert select_baseline(current, [older, same], date="250201").label == "250201"
+
+
+def test_score_drop_is_flagged_with_driving_documents():
+    baseline = Snapshot("base", {}, {doc: {"overall": 0.9} for doc in _scores(0)})
+    current_scores = {doc: {"overall": 0.9} for doc in _scores(0)}
+    for doc in ("doc-03", "doc-07", "doc-11", "doc-15", "doc-19", "doc-23"):
+        current_scores[doc] = {"overall": 0.5}
+    current = Snapshot("current", {}, current_scores)
+
+    result = compare_scores(baseline, current, resamples=2000, top_documents=2)
+
+    overall = result["metrics"]["overall"]
+    assert result["regressed"] and overall["regressed"]
+    assert overall["mean_difference"] < -0.05
+    assert [drop["delta"] for drop in overall["largest_drops"]] == [-0.4, -0.4]
+    assert not compare_scores(baseline, baseline, resamples=500)["regressed"]
+
+
+def test_compare_engine_gates_on_slowdown(tmp_path):
+    history_root = tmp_path / "history"
+    prediction_root = tmp_path / "prediction"
+    _write_evaluation(history_root / "250101" / "engine" / "evaluation.json", 1.0, _scores(0.9))
+    _write_evaluation(prediction_root / "engine" / "evaluation.json", 1.5, _scores(0.9))
+
+    result = compare_engine(
+        "engine", prediction_root, history_root, {}, resamples=500
+    )
+    speed = result["speed"]["measures"]["seconds_per_document"]
+    assert speed["relative_change"] == 0.5 and speed["regressed"]
+    assert "seconds_per_page" not in result["speed"]["measures"]
+    assert result["regressed"] and not result["scores"]["regressed"]
+
+    # A different processor is reported but does not fail the gate.
+    _write_evaluation(
+        prediction_root / "engine" / "evaluation.json", 1.5, _scores(0.9), processor="gpu"
+    )
+    result = compare_engine("engine", prediction_root, history_root, {}, resamples=500)
+    assert not result["speed"]["comparable"] and not result["regressed"]
+
+
+def test_main_exit_status(tmp_path, monkeypatch, capsys):
+    history_root = tmp_path / "history"
+    prediction_root = tmp_path / "prediction"
+    _write_evaluation(history_root / "250101" / "engine" / "evaluation.json", 1.0, _scores(0.9))
+    _write_evaluation(prediction_root / "engine" / "evaluation.json", 1.02, _scores(0.9))
+    arguments = [
+        "--prediction-root", str(prediction_root),
+        "--history-root", str(history_root),
+        "--reference-path", str(tmp_path / "missing.json"),
+        "--resamples", "200",
+    ]
+
+    assert history_compare.main(arguments) == 0
+    assert "[engine] ok" in capsys.readouterr().out
+
+    _write_evaluation(prediction_root / "engine" / "evaluation.json", 1.3, _scores(0.9))
+    assert history_compare.main(arguments) == 1
+    assert history_compare.main([*arguments, "--date", "991231"]) == 2
+
+
+def test_speed_noise_only_counts_the_baseline_version(tmp_path):
+    history_root = tmp_path / "history"
+    timings = {
+        "250101": ("0.9", 1.0),
+        "250201": ("0.9", 2.0),
+        "250301": ("1.0", 1.0),
+        "250401": ("1.0", 1.01),
+        "250501": ("1.0", 0.99),
+    }
+    for date, (version, elapsed) in timings.items():
+        path = history_root / date / "engine" / "evaluation.json"
+        _write_evaluation(path, elapsed, _scores(0.9), version=version)
+    archived = [
+        Snapshot.load(history_root / date / "engine" / "evaluation.json", date)
+        for date in timings
+    ]
+    current_path = tmp_path / "current.json"
+    _write_evaluation(current_path, 1.2, _scores(0.9), version="1.1")
+
+    speed = compare_speed(archived[-1], Snapshot.load(current_path, "current"), archived, {})
+
+    # The 0.9 runs' slowdown would otherwise raise the threshold above +21%.
+    measure = speed["measures"]["seconds_per_document"]
+    assert measure["relative_noise"] < 0.02
+    assert measure["regressed"]
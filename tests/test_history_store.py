@@ -0,0 +1,80 @@
+import json
+from contextlib import closing
+
+from generate_benchmark_chart import generate_trend_charts
+from generate_history import archive_evaluation
+from history_store import STORE_FILENAME, backfill, open_store, record_evaluation, trend
+
+
+def _payload(engine, version, elapsed_per_doc, overall, processor="cpu"):
+    documents = [
+        {"document_id": f"doc-{i}", "scores": {"overall": overall, "teds": None}}
+        for i in range(4)
+    ]
+    return {
+        "summary": {
+            "engine_name": engine,
+            "engine_version": version,
+            "processor": processor,
+            "document_count": len(documents),
+            "total_elapsed": elapsed_per_doc * len(documents),
+            "elapsed_per_doc": elapsed_per_doc,
+        },
+        "metrics": {"score": {"overall_mean": overall, "teds_mean": None, "teds_count": 0}},
+        "documents": documents,
+    }
+
+
+def _write(path, payload):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload))
+
+
+def test_record_evaluation_replaces_the_same_run(tmp_path):
+    pages = {f"doc-{i}": 2 for i in range(4)}
+    with closing(open_store(tmp_path / STORE_FILENAME)) as connection:
+        record_evaluation(connection, "250101", _payload("a", "1", 1.0, 0.5), pages)
+        record_evaluation(connection, "250101", _payload("a", "1", 2.0, 0.6), pages)
+
+        (point,) = trend(connection, "a")
+        assert point.date == "2025-01-01"
+        assert point.seconds_per_document == 2.0
+        assert point.seconds_per_page == 1.0
+        assert point.means == {"overall": 0.6, "nid": None, "teds": None, "mhs": None}
+        stored = connection.execute("SELECT COUNT(*) FROM document_scores").fetchone()
+        assert stored == (4,)
+
+
+def test_backfill_and_trend_limit(tmp_path):
+    history_root = tmp_path / "history"
+    for day, (version, overall) in enumerate([("1", 0.5), ("2", 0.6), ("3", 0.7)], 1):
+        _write(
+            history_root / f"25010{day}" / "a" / "evaluation.json",
+            _payload("a", version, 1.0, overall),
+        )
+    _write(history_root / "250102" / "b" / "evaluation.json", _payload("b", "9", 3.0, 0.4))
+    _write(history_root / "notes" / "a" / "evaluation.json", _payload("a", "0", 1.0, 0.1))
+
+    with closing(open_store(history_root / STORE_FILENAME)) as connection:
+        assert backfill(connection, history_root) == 4
+        points = trend(connection, limit=2)
+
+    assert [(p.engine, p.version) for p in points] == [("a", "2"), ("a", "3"), ("b", "9")]
+    assert points[1].means["overall"] == 0.7
+    assert points[2].seconds_per_page is None
+
+
+def test_archive_evaluation_appends_to_store_and_charts(tmp_path):
+    prediction_root = tmp_path / "prediction"
+    history_root = tmp_path / "history"
+    _write(prediction_root / "a" / "evaluation.json", _payload("a", "1", 1.0, 0.5))
+    (prediction_root / "a" / "evaluation.csv").write_text("document_id\n")
+
+    archive_evaluation("a", prediction_root, history_root, "250101")
+    archive_evaluation("a", prediction_root, history_root, "250102", store=False)
+
+    store_path = history_root / STORE_FILENAME
+    with closing(open_store(store_path)) as connection:
+        assert [point.date for point in trend(connection)] == ["2025-01-01"]
+    chart = generate_trend_charts(store_path, tmp_path / "charts" / "trends.png")
+    assert chart.is_file()
@@ -0,0 +1,95 @@
+import json
+from contextlib import closing
+
+import pytest
+
+from corpus_manifest import CorpusManifest, ManifestEntry
+from history_store import STORE_FILENAME, open_store, record_evaluation
+from job_scheduler import (
+    format_plan,
+    list_schedule,
+    longest_first,
+    lpt_schedule,
+    parse_costs,
+    plan_engines,
+)
+
+
+def test_longest_first_beats_sorted_order():
+    costs = {"a": 1.0, "b": 1.0, "c": 1.0, "d": 1.0, "e": 4.0}
+
+    assert longest_first(sorted(costs), costs) == ["e", "a", "b", "c", "d"]
+    assert longest_first(["x", "y"], {}, {"y": 1.0}) == ["y", "x"]
+    assert list_schedule(sorted(costs), costs, 2).makespan == 6.0
+    schedule = lpt_schedule(costs, 2)
+    assert schedule.makespan == 4.0
+    assert sorted(schedule.assignments) == [["a", "b", "c", "d"], ["e"]]
+    with pytest.raises(ValueError):
+        lpt_schedule(costs, 0)
+
+
+def test_parse_costs_prefer_the_most_specific_previous_run(tmp_path):
+    engine_dir = tmp_path / "prediction" / "engine"
+    engine_dir.mkdir(parents=True)
+    pages = {"doc-a": 1, "doc-b": 3}
+    doc_ids = ["doc-a", "doc-b", "doc-c"]
+
+    estimate = parse_costs(engine_dir, doc_ids, pages)
+    assert (estimate.unit, estimate.source) == ("pages", "page count")
+    assert estimate.costs == {"doc-a": 1.0, "doc-b": 3.0, "doc-c": 2.0}
+
+    store_path = tmp_path / "history" / STORE_FILENAME
+    payload = {
+        "summary": {"engine_name": "engine", "total_elapsed": 8.0},
+        "documents": [{"document_id": "doc-a"}, {"document_id": "doc-b"}],
+    }
+    with closing(open_store(store_path)) as connection:
+        record_evaluation(connection, "250101", payload, pages)
+    estimate = parse_costs(engine_dir, doc_ids, pages, store_path)
+    assert estimate.source == "history" and estimate.costs["doc-b"] == 6.0
+
+    (engine_dir / "summary.json").write_text(json.dumps({"elapsed_per_doc": 4.0}))
+    estimate = parse_costs(engine_dir, doc_ids, pages, store_path)
+    assert estimate.source == "summary.json" and estimate.costs["doc-b"] == 6.0
+
+    requests = [
+        {"document_id": "doc-a", "latency": 9.0, "error": None},
+        {"document_id": "doc-b", "latency": 1.0, "error": "HTTP 500"},
+    ]
+    (engine_dir / "requests.json").write_text(json.dumps({"requests": requests}))
+    estimate = parse_costs(engine_dir, doc_ids, pages, store_path)
+    assert estimate.source == "requests.json" and estimate.unit == "seconds"
+    assert estimate.costs == {"doc-a": 9.0, "doc-b": 6.0, "doc-c": 4.0}
+
+
+def test_plan_engines_estimates_parse_and_evaluation(tmp_path):
+    prediction_root = tmp_path / "prediction"
+    (prediction_root / "fast").mkdir(parents=True)
+    (prediction_root / "fast" / "summary.json").write_text(
+        json.dumps({"elapsed_per_page": 0.5})
+    )
+    manifest = CorpusManifest(
+        pdf_dir="../pdfs",
+        ground_truth_dir="markdown",
+        documents={
+            "doc-a": ManifestEntry(pages=2, gt_chars=100, table_cells=0),
+            "doc-b": ManifestEntry(pages=1, gt_chars=100, table_cells=50),
+        },
+    )
+
+    fast, slow = plan_engines(
+        ["fast", "slow"],
+        ["doc-a", "doc-b"],
+        prediction_root,
+        manifest.page_counts(),
+        manifest,
+        eval_workers=2,
+        streaming=True,
+    )
+
+    assert fast.parse.total == 1.5
+    assert fast.evaluation.makespan == pytest.approx(0.1028)
+    assert fast.total == 1.5
+    assert slow.parse.unit == "pages" and slow.total is None
+    table = format_plan([fast, slow])
+    assert "summary.json" in table and "3p" in table
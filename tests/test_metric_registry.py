@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+import metric_registry
+from evaluator import _evaluate_single_document, _write_evaluation
+from markdown_document import MarkdownDocument
+from metric_registry import (
+    MetricScorer,
+    compute_scores,
+    parse_metrics,
+    register_scorer,
+    required_metrics,
+)
+
+GT = "# Title\n\nIntro text.\n\n| A | B |\n|---|---|\n| 1 | 2 |\n"
+PRED = "# Title\n\nIntro text!\n\n| A | B |\n|---|---|\n| 1 | 3 |\n"
+
+
+def test_parse_metrics_orders_and_validates():
+    assert parse_metrics("teds_s, nid") == ("nid", "teds_s")
+    with pytest.raises(ValueError):
+        parse_metrics("nid,bleu")
+
+
+def test_required_metrics_skips_unrequested_scorers():
+    assert required_metrics(["nid"]) == {"nid": frozenset({"nid"})}
+    assert required_metrics(["overall", "teds_s"]) == {
+        "nid": frozenset({"nid"}),
+        "teds": frozenset({"teds", "teds_s"}),
+        "mhs": frozenset({"mhs"}),
+    }
+
+
+def test_subset_matches_full_scores_and_skips_table_work():
+    full = compute_scores(MarkdownDocument(GT), MarkdownDocument(PRED), None)
+    gt_document = MarkdownDocument(GT)
+    timings = {}
+
+    subset = compute_scores(gt_document, MarkdownDocument(PRED), ["mhs_s", "nid"], timings)
+
+    assert subset == {"nid": full["nid"], "mhs_s": full["mhs_s"]}
+    assert set(timings) == {"nid", "mhs"}
+    assert "table_html" not in gt_document._artifacts
+
+
+def test_registered_scorer_flows_into_reports(tmp_path, monkeypatch):
+    monkeypatch.setattr(metric_registry, "SCORERS", dict(metric_registry.SCORERS))
+    register_scorer(
+        MetricScorer(
+            name="length",
+            metrics=("length_ratio",),
+            compute=lambda gt, pred, _: (len(pred.text) / len(gt.text),),
+        )
+    )
+    gt_path = tmp_path / "doc.md"
+    gt_path.write_text(GT, encoding="utf-8")
+    pred_path = tmp_path / "markdown" / "doc.md"
+    pred_path.parent.mkdir()
+    pred_path.write_text(PRED, encoding="utf-8")
+
+    scores = _evaluate_single_document("doc", gt_path, pred_path, ["nid", "length_ratio"])
+    output_path = _write_evaluation(tmp_path, "evaluation.json", [scores])
+
+    payload = json.loads(output_path.read_text(encoding="utf-8"))
+    assert payload["metrics"]["computed_metrics"] == ["nid", "length_ratio"]
+    assert payload["documents"][0]["scores"]["length_ratio"] == len(PRED) / len(GT)
+    assert "teds" not in payload["documents"][0]["scores"]
+    header = (tmp_path / "evaluation.csv").read_text(encoding="utf-8").splitlines()[0]
+    assert header == "index,document_id,nid,length_ratio"
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+import metric_registry
+from evaluator import DocumentScores, _aggregate_document_scores
+from markdown_document import MarkdownDocument
+from metric_registry import MetricScorer, compute_scores, register_scorer
+from metric_timeout import parse_metric_timeouts, validate_metric_timeouts
+
+GT = "# Title\n\n| A | B |\n|---|---|\n| 1 | 2 |\n"
+
+
+def test_parse_metric_timeouts():
+    assert parse_metric_timeouts("30") == {"*": 30.0}
+    assert parse_metric_timeouts("10, teds=60") == {"*": 10.0, "teds": 60.0}
+    with pytest.raises(ValueError):
+        parse_metric_timeouts("teds=0")
+    with pytest.raises(ValueError):
+        validate_metric_timeouts({"bleu": 1.0}, ["nid", "teds"])
+
+
+def _register_slow_scorer(monkeypatch):
+    monkeypatch.setattr(metric_registry, "SCORERS", dict(metric_registry.SCORERS))
+
+    def slow(gt, pred, needed):
+        if "slow" in (pred.text or ""):
+            time.sleep(30)
+        return (0.5,)
+
+    register_scorer(MetricScorer(name="sleepy", metrics=("sleepy",), compute=slow))
+
+
+def test_overrunning_scorer_falls_back_and_is_recorded(monkeypatch):
+    _register_slow_scorer(monkeypatch)
+    timed_out = []
+
+    start = time.perf_counter()
+    scores = compute_scores(
+        MarkdownDocument(GT),
+        MarkdownDocument("slow"),
+        ["nid", "sleepy"],
+        timeouts={"sleepy": 0.5},
+        timed_out=timed_out,
+    )
+
+    assert time.perf_counter() - start < 10
+    assert scores["sleepy"] == 0.0
+    assert timed_out == ["sleepy"]
+
+    # The killed worker is replaced for the next document.
+    timed_out.clear()
+    scores = compute_scores(
+        MarkdownDocument(GT),
+        MarkdownDocument("fast"),
+        ["sleepy"],
+        timeouts={"sleepy": 5.0},
+        timed_out=timed_out,
+    )
+    assert scores["sleepy"] == 0.5
+    assert timed_out == []
+
+
+def test_bound_fallback_uses_approximate_lower_bound(monkeypatch):
+    def never_finishes(*args):
+        raise metric_registry.MetricTimeout("budget")
+
+    monkeypatch.setattr(metric_registry, "compute_with_timeout", never_finishes)
+    pred = MarkdownDocument("# Title\n\n| A | B |\n|---|---|\n| 1 | 3 |\n")
+    timed_out = []
+
+    scores = compute_scores(
+        MarkdownDocument(GT),
+        pred,
+        ["teds", "teds_s", "mhs"],
+        timeouts={"teds": 1.0},
+        timeout_fallback="bound",
+        timed_out=timed_out,
+    )
+
+    assert timed_out == ["teds", "teds_s"]
+    assert 0.0 < scores["teds"] < 1.0
+    assert 0.9 < scores["teds_s"] <= 1.0
+    exact = compute_scores(MarkdownDocument(GT), pred, ["mhs"])
+    assert scores["mhs"] == exact["mhs"]
+
+
+def test_aggregate_counts_timed_out_documents():
+    documents = [
+        DocumentScores("a", {"overall": 0.5, "teds": 0.0}, True, timed_out=["teds"]),
+        DocumentScores("b", {"overall": 1.0, "teds": 1.0}, True, timed_out=[]),
+    ]
+
+    aggregated = _aggregate_document_scores(documents)
+
+    assert aggregated["timed_out_documents"] == 1
+    assert aggregated["timed_out_counts"] == {"teds": 1}
+    assert documents[1].to_json()["timed_out"] == []
@@ -0,0 +1,66 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from evaluator import _evaluate_engine_version
+from pipeline_streaming import StreamingEvaluation
+
+GROUND_TRUTH = {
+    "doc-a": "# Title\n\nIntro text\n\n<table><tr><td>1</td></tr></table>",
+    "doc-b": "# Heading\n\nBody paragraph",
+    "doc-c": "Plain text only",
+}
+
+PREDICTIONS = {
+    "doc-a": "# Title\n\nIntro txt\n\n| 1 |\n| - |",
+    "doc-c": "Plain text",
+}
+
+SUMMARY = {"engine_name": "engine"}
+
+
+def test_streaming_report_matches_staged_report(write_corpus):
+    gt_dir, prediction_dir = write_corpus(GROUND_TRUTH, PREDICTIONS, SUMMARY)
+
+    staged_path = _evaluate_engine_version(gt_dir, prediction_dir, "staged.json")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        streaming = StreamingEvaluation(executor, gt_dir, prediction_dir)
+        # Submit out of order and twice to mimic engines reporting arbitrarily.
+        for doc_id in ("doc-c", "doc-a", "doc-c"):
+            streaming.submit(str(prediction_dir / "markdown" / f"{doc_id}.md"))
+        streaming_path = streaming.finish("streaming.json")
+
+    assert streaming_path.read_text() == staged_path.read_text()
+    assert (prediction_dir / "streaming.csv").read_text() == (
+        prediction_dir / "staged.csv"
+    ).read_text()
+
+
+def test_streaming_scores_missing_predictions(write_corpus):
+    gt_dir, prediction_dir = write_corpus(GROUND_TRUTH, PREDICTIONS, SUMMARY)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        streaming = StreamingEvaluation(executor, gt_dir, prediction_dir)
+        output_path = streaming.finish("evaluation.json")
+
+    payload = json.loads(output_path.read_text())
+    assert [doc["document_id"] for doc in payload["documents"]] == [
+        "doc-a",
+        "doc-b",
+        "doc-c",
+    ]
+    assert payload["metrics"]["missing_predictions"] == 1
+
+
+def test_streaming_records_predicted_and_measured_makespan(write_corpus):
+    gt_dir, prediction_dir = write_corpus(GROUND_TRUTH, PREDICTIONS, SUMMARY)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        streaming = StreamingEvaluation(executor, gt_dir, prediction_dir, workers=2)
+        streaming.eval_costs = {"doc-a": 3.0, "doc-b": 1.0, "doc-c": 1.0}
+        streaming.submit(str(prediction_dir / "markdown" / "doc-c.md"))
+        streaming.finish("evaluation.json")
+
+    # doc-c arrived first; doc-b follows it on the same worker while doc-a runs.
+    assert streaming.predicted_makespan == 3.0
+    assert streaming.measured_makespan > 0
@@ -0,0 +1,89 @@
+import pytest
+
+from evaluator import _aggregate_document_scores, _evaluate_single_document
+from prediction_preflight import (
+    PreflightLimits,
+    parse_preflight_limits,
+    preflight_text,
+    read_prediction,
+)
+
+GT = "# Title\n\n| A | B |\n|---|---|\n| 1 | 2 |\n"
+
+
+def test_parse_preflight_limits():
+    assert parse_preflight_limits("off") is None
+    assert parse_preflight_limits("cells=20") == PreflightLimits(cells=20)
+    with pytest.raises(ValueError):
+        parse_preflight_limits("bytes=10")
+    with pytest.raises(ValueError):
+        parse_preflight_limits("lines=0")
+
+
+def test_data_uris_and_blobs_are_stripped():
+    payload = "A" * 5000
+    text = f"Intro ![img](data:image/png;base64,{payload}) end\n{'Zm9v' * 200}\nTail\n"
+
+    cleaned, stats = preflight_text(text, PreflightLimits())
+
+    assert cleaned == "Intro ![img]() end\n\nTail\n"
+    assert stats.stripped_chars == len(text) - len(cleaned)
+    assert stats.reasons == ["data_uri", "blob"]
+    assert not stats.truncated
+
+
+def test_data_uri_spanning_chunks_is_stripped(tmp_path):
+    path = tmp_path / "doc.md"
+    path.write_text("x data:image/png;base64," + "A" * 200_000 + " y\n", encoding="utf-8")
+
+    cleaned, stats = read_prediction(path, PreflightLimits())
+
+    assert cleaned == "x  y\n"
+    assert stats.source_size == path.stat().st_size
+
+
+def test_line_and_char_limits_truncate():
+    cleaned, stats = preflight_text("line\n" * 50, PreflightLimits(lines=10))
+    assert cleaned == "line\n" * 10
+    assert stats.truncated and stats.reasons == ["lines"]
+
+    cleaned, stats = preflight_text("abcdef" * 10, PreflightLimits(chars=8))
+    assert cleaned == "abcdefab"
+    assert stats.reasons == ["chars"]
+
+
+def test_table_cells_are_limited():
+    rows = "".join(f"| {i} | {i} |\n" for i in range(10))
+    cleaned, stats = preflight_text(rows, PreflightLimits(cells=6))
+    assert cleaned.count("|") == 9
+    assert stats.table_cells == 6 and stats.reasons == ["table_cells"]
+
+    table = "| A | B\n|---|:--:|\n| 1 | 2 |\n| 3 | 4 |\n| 5 \\| 6 | 7 |\n"
+    cleaned, stats = preflight_text(table, PreflightLimits(cells=8))
+    assert stats.table_cells == 8 and not stats.truncated
+    assert cleaned == table
+
+    html = "<table>" + "<tr><td>x</td></tr>" * 10 + "</table>after"
+    cleaned, stats = preflight_text(html, PreflightLimits(cells=3))
+    assert cleaned.count("<td>") == 3
+    assert cleaned.endswith("</table>after")
+
+
+def test_evaluator_records_preflight_stats(tmp_path):
+    gt_path = tmp_path / "gt.md"
+    gt_path.write_text(GT, encoding="utf-8")
+    pred_path = tmp_path / "pred.md"
+    pred_path.write_text(GT + "\n" + "Zm9v" * 200 + "\n", encoding="utf-8")
+
+    document = _evaluate_single_document("doc", gt_path, pred_path)
+    unchecked = _evaluate_single_document("doc", gt_path, pred_path, preflight=None)
+
+    assert document.scores == _evaluate_single_document("doc", gt_path, gt_path).scores
+    assert document.to_json()["preflight"]["stripped_chars"] == 800
+    assert "preflight" not in unchecked.to_json()
+    aggregated = _aggregate_document_scores([document])
+    assert aggregated["preflight"] == {
+        "truncated_documents": 0,
+        "stripped_documents": 1,
+        "max_source_size": pred_path.stat().st_size,
+    }
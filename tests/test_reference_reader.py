@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+import reference_reader
+from reference_reader import iter_reference
+
+REFERENCE = {
+    "doc-a.pdf": {"elements": [{"category": "Heading1", "content": {"text": "Tïtle }"}}]},
+    "doc-b.pdf": {"elements": [], "pages": 12345678901234567890},
+    "doc-c.pdf": {},
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_iter_reference_matches_json_load(tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(reference_reader, "_CHUNK_SIZE", chunk_size)
+    path = tmp_path / "reference.json"
+    path.write_text(json.dumps(REFERENCE, indent=4, ensure_ascii=False), encoding="utf-8")
+
+    assert list(iter_reference(path)) == list(REFERENCE.items())
+
+
+@pytest.mark.parametrize(
+    "text, valid",
+    [(" {\n} ", True), ('{"a": 1', False), ("[1]", False), ('{"a" 1}', False), ("{1: 2}", False)],
+)
+def test_iter_reference_rejects_malformed_files(tmp_path, text, valid):
+    path = tmp_path / "reference.json"
+    path.write_text(text, encoding="utf-8")
+
+    if valid:
+        assert list(iter_reference(path)) == []
+    else:
+        with pytest.raises(ValueError):
+            list(iter_reference(path))
@@ -0,0 +1,126 @@
+import json
+import time
+
+import pytest
+
+from remote_engine import (
+    RemoteEngineClient,
+    RemoteEngineConfig,
+    RemoteEngineError,
+    raise_for_failures,
+    summarize_records,
+    write_request_log,
+)
+from remote_engine_stub import StubConfig, start_stub_server
+
+
+def _build_request(doc_path):
+    return {"files": {"document": (doc_path.name, doc_path.read_bytes())}}
+
+
+def _parse_response(payload):
+    return payload.get("content", {}).get("markdown")
+
+
+@pytest.fixture
+def pdf_paths(tmp_path):
+    input_dir = tmp_path / "pdfs"
+    input_dir.mkdir()
+    paths = []
+    for index in range(6):
+        path = input_dir / f"doc-{index}.pdf"
+        path.write_bytes(b"%PDF-1.4 stub")
+        paths.append(path)
+    return paths
+
+
+def _run(stub_config, pdf_paths, tmp_path, **config_kwargs):
+    server = start_stub_server(stub_config)
+    try:
+        config = RemoteEngineConfig(url=server.url, backoff_base=0.01, **config_kwargs)
+        client = RemoteEngineClient(config, _build_request, _parse_response)
+        output_dir = tmp_path / "markdown"
+        output_dir.mkdir(exist_ok=True)
+        reported = []
+        try:
+            records = client.convert(pdf_paths, output_dir, reported.append)
+        finally:
+            client.close()
+        return server, records, output_dir, reported
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_documents_are_converted_through_pooled_connections(pdf_paths, tmp_path):
+    responses_dir = tmp_path / "canned"
+    responses_dir.mkdir()
+    (responses_dir / "doc-0.md").write_text("# Canned", encoding="utf-8")
+
+    server, records, output_dir, reported = _run(
+        StubConfig(responses_dir=responses_dir, latency=0.02),
+        pdf_paths,
+        tmp_path,
+        concurrency=3,
+    )
+
+    assert [record.document_id for record in records] == [p.stem for p in pdf_paths]
+    assert all(record.status == 200 and record.attempts == 1 for record in records)
+    assert (output_dir / "doc-0.md").read_text(encoding="utf-8") == "# Canned"
+    assert "Stub response for doc-1" in (output_dir / "doc-1.md").read_text()
+    assert sorted(reported) == sorted(str(output_dir / f"{p.stem}.md") for p in pdf_paths)
+    assert server.request_count == len(pdf_paths)
+    assert server.connection_count <= 3
+
+
+def test_transient_errors_are_retried(pdf_paths, tmp_path):
+    server, records, output_dir, _ = _run(
+        StubConfig(fail_first=1), pdf_paths, tmp_path, max_retries=2
+    )
+
+    assert all(record.error is None for record in records)
+    assert all(record.attempts == 2 for record in records)
+    assert server.request_count == 2 * len(pdf_paths)
+
+
+def test_exhausted_retries_are_recorded_without_output(pdf_paths, tmp_path):
+    _, records, output_dir, reported = _run(
+        StubConfig(fail_first=5, error_status=502), pdf_paths[:2], tmp_path, max_retries=1
+    )
+
+    assert all(record.status == 502 and record.attempts == 2 for record in records)
+    assert all(record.error for record in records)
+    assert not list(output_dir.glob("*.md"))
+    assert reported == []
+
+
+def test_client_errors_abort_the_batch(pdf_paths, tmp_path):
+    with pytest.raises(RemoteEngineError, match="401"):
+        _run(StubConfig(fail_first=5, error_status=401), pdf_paths, tmp_path)
+
+
+def test_failed_documents_raise_after_the_batch(pdf_paths, tmp_path):
+    _, records, _, _ = _run(
+        StubConfig(fail_first=5, error_status=502), pdf_paths[:2], tmp_path, max_retries=0
+    )
+    with pytest.raises(RemoteEngineError, match="2 of 2 documents"):
+        raise_for_failures(records)
+    raise_for_failures([])
+
+
+def test_rate_limit_spaces_requests(pdf_paths, tmp_path):
+    start = time.perf_counter()
+    _run(StubConfig(), pdf_paths, tmp_path, concurrency=6, requests_per_second=50)
+    assert time.perf_counter() - start >= (len(pdf_paths) - 1) / 50
+
+
+def test_request_log_contains_summary(pdf_paths, tmp_path):
+    _, records, _, _ = _run(StubConfig(), pdf_paths[:3], tmp_path)
+    log_path = tmp_path / "requests.json"
+
+    write_request_log(records, 0.5, log_path)
+
+    payload = json.loads(log_path.read_text())
+    assert payload["summary"] == summarize_records(records, 0.5)
+    assert payload["summary"]["request_count"] == 3
+    assert len(payload["requests"]) == 3
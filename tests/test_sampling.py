@@ -0,0 +1,87 @@
+import json
+from collections import Counter
+
+from evaluator import main as evaluator_main
+from sampling import Sample, _allocate, document_stratum, draw_sample, sample_filename
+
+
+def _strata():
+    strata = {f"t{i:03d}": "tables" for i in range(20)}
+    strata.update({f"h{i:03d}": "headings" for i in range(70)})
+    strata.update({f"p{i:03d}": "plain" for i in range(10)})
+    return strata
+
+
+def test_document_stratum_uses_tables_headings_and_pages():
+    elements = [
+        {"category": "Heading1", "page": 1},
+        {"category": "Table", "page": 7},
+    ]
+    assert document_stratum(elements) == "tables/headings/pages-6-20"
+    assert document_stratum([{"category": "Paragraph", "page": 1}]) == (
+        "no-tables/no-headings/pages-1"
+    )
+
+
+def test_allocation_is_proportional_and_covers_every_stratum():
+    assert _allocate({"a": 70, "b": 20, "c": 10}, 10) == {"a": 7, "b": 2, "c": 1}
+    assert _allocate({"a": 98, "b": 1, "c": 1}, 5) == {"a": 3, "b": 1, "c": 1}
+    assert _allocate({"a": 5, "b": 5}, 50) == {"a": 5, "b": 5}
+
+
+def test_draw_sample_is_stratified_and_reproducible():
+    strata = _strata()
+
+    first = draw_sample(strata, Sample(20, seed=3), strata)
+    again = draw_sample(strata, Sample(20, seed=3), strata)
+    other = draw_sample(strata, Sample(20, seed=4), strata)
+
+    assert first.document_ids == again.document_ids
+    assert first.document_ids != other.document_ids
+    assert Counter(first.strata.values()) == {"headings": 14, "tables": 4, "plain": 2}
+    assert first.to_json()["strata"]["tables"] == {"population": 20, "sampled": 4}
+
+
+def test_sample_filename():
+    assert sample_filename("evaluation.json", Sample(20, 7)) == (
+        "evaluation.sample-20-seed-7.json"
+    )
+    assert sample_filename("evaluation.json", None) == "evaluation.json"
+
+
+def test_sampled_evaluation_reports_intervals(tmp_path):
+    gt_dir = tmp_path / "gt" / "markdown"
+    gt_dir.mkdir(parents=True)
+    engine_dir = tmp_path / "prediction" / "engine"
+    (engine_dir / "markdown").mkdir(parents=True)
+    reference = {}
+    for index in range(12):
+        doc_id = f"doc{index:02d}"
+        (gt_dir / f"{doc_id}.md").write_text(f"# Title {index}\n\nBody text.\n")
+        (engine_dir / "markdown" / f"{doc_id}.md").write_text(f"Body text {index}.\n")
+        category = "Heading1" if index % 2 else "Paragraph"
+        reference[f"{doc_id}.pdf"] = {"elements": [{"category": category, "page": 1}]}
+    (gt_dir.parent / "reference.json").write_text(json.dumps(reference))
+
+    evaluator_main(
+        [
+            "--ground-truth-dir",
+            str(gt_dir),
+            "--prediction-root",
+            str(tmp_path / "prediction"),
+            "--metrics",
+            "nid",
+            "--sample",
+            "4",
+            "--seed",
+            "1",
+        ]
+    )
+
+    assert not (engine_dir / "evaluation.json").exists()
+    payload = json.loads((engine_dir / "evaluation.sample-4-seed-1.json").read_text())
+    metrics = payload["metrics"]
+    assert len(payload["documents"]) == 4
+    assert metrics["sample"]["population"] == 12
+    lower, upper = metrics["score_intervals"]["nid_mean"]
+    assert lower <= metrics["score"]["nid_mean"] <= upper
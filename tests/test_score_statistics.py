@@ -0,0 +1,119 @@
+import json
+
+import numpy as np
+import pytest
+
+from score_statistics import (
+    bootstrap_mean_interval,
+    compare_engines,
+    load_engine_scores,
+    score_intervals,
+    stratified_mean,
+)
+
+
+def test_interval_brackets_the_mean_and_is_reproducible():
+    values = [0.2, 0.4, 0.5, 0.7, 0.9, 1.0, 0.3, 0.8]
+
+    lower, upper = bootstrap_mean_interval(values, seed=1)
+
+    assert lower < sum(values) / len(values) < upper
+    assert bootstrap_mean_interval(values, seed=1) == (lower, upper)
+
+
+def test_stratified_interval_removes_between_stratum_variance():
+    values = [0.0, 0.0, 0.01, 1.0, 1.0, 0.99]
+    strata = ["a", "a", "a", "b", "b", "b"]
+
+    plain = bootstrap_mean_interval(values)
+    stratified = bootstrap_mean_interval(values, strata)
+
+    assert stratified[1] - stratified[0] < (plain[1] - plain[0]) / 10
+
+
+def test_strata_are_weighted_by_population():
+    # One document stands in for a stratum ten times smaller than the other.
+    values = [1.0, 0.0, 0.0, 0.0, 0.0]
+    strata = ["small", "large", "large", "large", "large"]
+    populations = {"small": 10, "large": 90}
+
+    assert stratified_mean(values, strata) == 0.2
+    assert stratified_mean(values, strata, populations) == pytest.approx(0.1)
+    lower, upper = bootstrap_mean_interval(values, strata, populations=populations)
+    assert lower == upper == pytest.approx(0.1)
+
+
+def test_constant_scores_give_a_point_interval():
+    assert bootstrap_mean_interval([1.0, 1.0, 1.0]) == (1.0, 1.0)
+    assert bootstrap_mean_interval([]) is None
+    with pytest.raises(ValueError):
+        bootstrap_mean_interval([1.0], confidence=1.0)
+
+
+def test_score_intervals_skip_undefined_metrics():
+    intervals = score_intervals(
+        [{"nid": 0.5, "teds": None}, {"nid": 0.7, "teds": None}], ["nid", "teds"]
+    )
+
+    assert intervals["teds_mean"] is None
+    assert 0.5 <= intervals["nid_mean"][0] <= intervals["nid_mean"][1] <= 0.7
+
+
+def _write_engine(root, name, scores):
+    engine_dir = root / name
+    engine_dir.mkdir()
+    documents = [
+        {"document_id": f"doc{index:03d}", "scores": {"nid": value}}
+        for index, value in enumerate(scores)
+    ]
+    payload = {"summary": {"engine_name": name}, "documents": documents}
+    (engine_dir / "evaluation.json").write_text(json.dumps(payload))
+
+
+def test_compare_engines_separates_real_gaps_from_ties(tmp_path):
+    rng = np.random.default_rng(0)
+    base = rng.uniform(0.5, 0.9, size=100)
+    _write_engine(tmp_path, "a", base)
+    _write_engine(tmp_path, "b", base + rng.normal(0, 0.02, size=100))
+    _write_engine(tmp_path, "c", base - 0.05)
+
+    comparison = compare_engines(load_engine_scores(tmp_path), resamples=2000)
+
+    result = comparison.metrics["nid"]
+    assert comparison.engines == ["a", "b", "c"]
+    assert result["documents"][0][2] == 100
+    assert result["mean_difference"][0][2] == pytest.approx(0.05)
+    assert result["ci_lower"][0][2] == pytest.approx(0.05)
+    assert result["ci_upper"][0][2] == pytest.approx(0.05)
+    assert comparison.tied_with("nid", "a") == {"b"}
+    assert comparison.tied_with("nid", "c") == set()
+
+
+def test_compare_engines_pairs_only_shared_documents(tmp_path):
+    _write_engine(tmp_path, "a", [0.5, 0.6, None])
+    _write_engine(tmp_path, "b", [0.5, 0.6, 0.9])
+    _write_engine(tmp_path, "c", [0.4, 0.5, 0.8])
+
+    result = compare_engines(load_engine_scores(tmp_path), resamples=100).metrics["nid"]
+
+    # a's missing document only shrinks the pairs that include a.
+    assert result["documents"] == [[2, 2, 2], [2, 3, 3], [2, 3, 3]]
+    assert result["permutation_p"][0][1] == 1.0
+    assert result["mean_difference"][1][2] == pytest.approx(0.1)
+    assert result["mean"] == pytest.approx([0.55, 2.0 / 3.0, 1.7 / 3.0])
+
+
+def test_pairs_without_shared_documents_are_untested(tmp_path):
+    _write_engine(tmp_path, "a", [0.5, 0.6, None, None])
+    _write_engine(tmp_path, "b", [None, None, 0.5, 0.6])
+    _write_engine(tmp_path, "c", [0.5, 0.6, 0.5, 0.6])
+
+    comparison = compare_engines(load_engine_scores(tmp_path), resamples=100)
+    result = comparison.metrics["nid"]
+
+    assert result["documents"][0][1] == 0
+    assert result["permutation_p"][0][1] is None
+    assert result["significant"][0][1] is None
+    assert result["significant"][0][2] is False
+    assert comparison.tied_with("nid", "a") == {"c"}
+    json.dumps(comparison.to_json(), allow_nan=False)
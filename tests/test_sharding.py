@@ -0,0 +1,102 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from evaluator import _evaluate_engine_version
+from merge_shards import merge_shards
+from sharding import Shard, parse_shard, select_shard, shard_filename
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+DOC_IDS = [f"doc-{index:02d}" for index in range(12)]
+
+
+def test_parse_shard_accepts_one_based_indices():
+    assert parse_shard("2/4") == Shard(2, 4)
+
+
+@pytest.mark.parametrize("value", ["0/4", "5/4", "1/0", "1-4", "a/b"])
+def test_parse_shard_rejects_invalid_values(value):
+    with pytest.raises(ValueError):
+        parse_shard(value)
+
+
+def test_shards_partition_documents_stably():
+    paths = [Path(f"{doc_id}.md") for doc_id in DOC_IDS]
+    shards = [Shard(index, 3) for index in range(1, 4)]
+
+    selections = [select_shard(paths, shard) for shard in shards]
+
+    assert sorted(path for selection in selections for path in selection) == paths
+    assert selections == [select_shard(reversed(paths), shard)[::-1] for shard in shards]
+
+
+def test_shard_filename_inserts_suffix():
+    assert shard_filename("summary.json", Shard(1, 4)) == "summary.shard-1-of-4.json"
+    assert shard_filename("summary.json", None) == "summary.json"
+
+
+def _corpus():
+    ground_truth, predictions = {}, {}
+    for index, doc_id in enumerate(DOC_IDS):
+        ground_truth[doc_id] = (
+            f"# Heading {index}\n\nBody {index}\n\n| A | B |\n| - | - |\n| {index} | x |"
+        )
+        if index % 5:
+            predictions[doc_id] = (
+                f"# Heading {index}\n\nBody text {index}\n\n| A | B |\n| - | - |\n| y | x |"
+            )
+    return ground_truth, predictions
+
+
+def test_merged_shards_match_single_node_run(write_corpus):
+    gt_dir, engine_dir = write_corpus(*_corpus())
+    for index in range(1, 4):
+        (engine_dir / f"summary.shard-{index}-of-3.json").write_text(
+            json.dumps({"engine_name": "engine", "document_count": 4, "total_elapsed": 1.5}),
+            encoding="utf-8",
+        )
+
+    for index in range(1, 4):
+        subprocess.run(
+            [
+                sys.executable,
+                str(SRC_DIR / "evaluator.py"),
+                "--ground-truth-dir",
+                str(gt_dir),
+                "--prediction-root",
+                str(engine_dir.parent),
+                "--shard",
+                f"{index}/3",
+                "--log-level",
+                "WARNING",
+            ],
+            check=True,
+            cwd=SRC_DIR,
+        )
+
+    merged = json.loads(merge_shards(engine_dir).read_text())
+    merged_csv = (engine_dir / "evaluation.csv").read_text()
+    single = json.loads(
+        _evaluate_engine_version(gt_dir, engine_dir, "single.json").read_text()
+    )
+
+    assert merged["documents"] == single["documents"]
+    assert merged["metrics"] == single["metrics"]
+    assert merged_csv == (engine_dir / "single.csv").read_text()
+    assert merged["summary"]["document_count"] == 12
+    assert merged["summary"]["total_elapsed"] == pytest.approx(4.5)
+    assert merged["summary"]["elapsed_per_doc"] == pytest.approx(0.375)
+
+
+def test_merge_requires_every_shard(tmp_path):
+    engine_dir = tmp_path / "engine"
+    engine_dir.mkdir()
+    (engine_dir / "evaluation.shard-1-of-2.json").write_text(
+        json.dumps({"documents": []}), encoding="utf-8"
+    )
+
+    with pytest.raises(FileNotFoundError):
+        merge_shards(engine_dir)
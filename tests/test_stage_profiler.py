@@ -0,0 +1,73 @@
+import pstats
+import time
+
+from evaluator import run
+from stage_profiler import (
+    REPORT_FILENAME,
+    StageProfiler,
+    profile_document,
+    profile_stage,
+    profiling,
+)
+
+GT = "# Title\n\n| A | B |\n|---|---|\n| 1 | 2 |\n"
+
+
+def _busy_outer():
+    return sum(range(20000))
+
+
+def _busy_inner():
+    return sorted(range(20000), reverse=True)
+
+
+def _functions(path):
+    return {name for _, _, name in pstats.Stats(str(path)).stats}
+
+
+def test_nested_stages_get_their_own_profiles(tmp_path):
+    profiler = StageProfiler(tmp_path, top=5)
+    with profiler.stage("outer"):
+        _busy_outer()
+        with profiler.stage("inner"):
+            _busy_inner()
+    report = profiler.write()
+
+    assert "_busy_outer" in _functions(tmp_path / "outer.pstats")
+    assert "_busy_inner" not in _functions(tmp_path / "outer.pstats")
+    assert "_busy_inner" in _functions(tmp_path / "inner.pstats")
+    assert "== inner" in report.read_text(encoding="utf-8")
+
+
+def test_slowest_documents_are_kept(tmp_path):
+    profiler = StageProfiler(tmp_path, slowest=2)
+    for key, delay in (("fast", 0.0), ("slow", 0.05), ("slower", 0.1)):
+        with profiler.document(f"engine/{key}"):
+            time.sleep(delay)
+    profiler.write()
+
+    kept = sorted(path.name for path in (tmp_path / "slowest").iterdir())
+    assert kept == ["engine_slow.pstats", "engine_slower.pstats"]
+
+
+def test_hooks_are_noops_without_profiling():
+    with profile_stage("anything"), profile_document("engine/doc"):
+        pass
+
+
+def test_evaluator_profiles_each_metric(tmp_path):
+    gt_dir = tmp_path / "gt"
+    markdown_dir = tmp_path / "prediction" / "engine" / "markdown"
+    gt_dir.mkdir()
+    markdown_dir.mkdir(parents=True)
+    (gt_dir / "doc.md").write_text(GT, encoding="utf-8")
+    (markdown_dir / "doc.md").write_text(GT, encoding="utf-8")
+
+    output_dir = tmp_path / "profile"
+    with profiling(output_dir, slowest=1):
+        run(str(gt_dir), str(tmp_path / "prediction"), "evaluation.json")
+
+    for stage in ("evaluate.document", "evaluate.nid", "evaluate.teds", "evaluate.mhs"):
+        assert (output_dir / f"{stage}.pstats").is_file()
+    assert (output_dir / "slowest" / "engine_doc.pstats").is_file()
+    assert "evaluate.teds" in (output_dir / REPORT_FILENAME).read_text(encoding="utf-8")
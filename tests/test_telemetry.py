@@ -0,0 +1,90 @@
+from evaluator import run
+from telemetry import (
+    ConversionRecorder,
+    TelemetryFile,
+    engine_labels,
+    telemetry_file,
+)
+
+GT = "# Title\n\n| A | B |\n|---|---|\n| 1 | 2 |\n"
+LABELS = engine_labels("engine", "1.0")
+
+
+def _samples(text):
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_render_counters_and_cumulative_histograms(tmp_path):
+    telemetry = TelemetryFile(tmp_path / "bench.prom")
+    telemetry.inc("documents_converted_total", LABELS)
+    telemetry.inc("documents_converted_total", LABELS)
+    for seconds in (0.02, 0.3, 700.0):
+        telemetry.observe("conversion_seconds", LABELS, seconds)
+
+    text = telemetry.render()
+    samples = _samples(text)
+
+    assert "# TYPE opendataloader_bench_conversion_seconds histogram" in text
+    prefix = 'opendataloader_bench_conversion_seconds_bucket{engine="engine",version="1.0"'
+    assert samples[prefix + ',le="0.05"}'] == 1
+    assert samples[prefix + ',le="0.5"}'] == 2
+    assert samples[prefix + ',le="+Inf"}'] == 3
+    total = samples['opendataloader_bench_conversion_seconds_sum{engine="engine",version="1.0"}']
+    assert total == 700.32
+    counter = 'opendataloader_bench_documents_converted_total{engine="engine",version="1.0"}'
+    assert samples[counter] == 2
+
+
+def test_flush_is_atomic_and_throttled(tmp_path):
+    path = tmp_path / "bench.prom"
+    telemetry = TelemetryFile(path, flush_interval=3600)
+    telemetry.inc("documents_evaluated_total", LABELS)
+    telemetry.flush()
+    telemetry.inc("documents_evaluated_total", LABELS)
+    telemetry.flush()
+
+    assert [entry.name for entry in tmp_path.iterdir()] == ["bench.prom"]
+    counter = 'opendataloader_bench_documents_evaluated_total{engine="engine",version="1.0"}'
+    assert _samples(path.read_text(encoding="utf-8"))[counter] == 1
+    telemetry.flush(force=True)
+    assert _samples(path.read_text(encoding="utf-8"))[counter] == 2
+
+
+def test_conversion_recorder_counts_documents_and_pages(tmp_path):
+    telemetry = TelemetryFile(tmp_path / "bench.prom")
+    seen = []
+    on_document = ConversionRecorder(telemetry, LABELS, {"doc-a": 3}).wrap(seen.append)
+    on_document("out/doc-a.md")
+    on_document("out/doc-b.md")
+
+    samples = _samples(telemetry.render())
+    assert seen == ["out/doc-a.md", "out/doc-b.md"]
+    labels = '{engine="engine",version="1.0"}'
+    assert samples[f"opendataloader_bench_documents_converted_total{labels}"] == 2
+    assert samples[f"opendataloader_bench_pages_converted_total{labels}"] == 3
+    assert samples[f"opendataloader_bench_pages_per_second{labels}"] > 0
+
+
+def test_evaluator_exports_metric_latencies(tmp_path):
+    gt_dir = tmp_path / "gt"
+    markdown_dir = tmp_path / "prediction" / "engine" / "markdown"
+    gt_dir.mkdir()
+    markdown_dir.mkdir(parents=True)
+    (gt_dir / "doc.md").write_text(GT, encoding="utf-8")
+    (markdown_dir / "doc.md").write_text(GT, encoding="utf-8")
+    path = tmp_path / "eval.prom"
+
+    run(str(gt_dir), str(tmp_path / "prediction"), "evaluation.json", metrics_textfile=path)
+
+    samples = _samples(path.read_text(encoding="utf-8"))
+    labels = 'engine="engine",version="unknown"'
+    assert samples[f"opendataloader_bench_documents_evaluated_total{{{labels}}}"] == 1
+    for metric in ("nid", "teds", "mhs"):
+        key = f'opendataloader_bench_evaluation_seconds_count{{{labels},metric="{metric}"}}'
+        assert samples[key] == 1
+    assert telemetry_file(path) is telemetry_file(path)
@@ -0,0 +1,71 @@
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from evaluator import _evaluate_single_document
+from tracing import TRACE_DIR_ENV, span, trace_documents, tracing
+
+GT = "# Title\n\n| A | B |\n|---|---|\n| 1 | 2 |\n"
+
+
+def _events(path):
+    return json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+
+
+def test_spans_nest_and_are_merged(tmp_path):
+    output = tmp_path / "trace.json"
+    with tracing(output):
+        with span("outer", "pipeline", engine="engine"):
+            with span("inner", "metric"):
+                pass
+    assert TRACE_DIR_ENV not in os.environ
+
+    spans = {event["name"]: event for event in _events(output) if event["ph"] == "X"}
+    outer, inner = spans["outer"], spans["inner"]
+    assert outer["args"] == {"engine": "engine"}
+    assert outer["ts"] <= inner["ts"]
+    assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert outer["pid"] == os.getpid()
+    names = {event["name"] for event in _events(output) if event["ph"] == "M"}
+    assert names == {"process_name", "thread_name"}
+
+
+def test_document_callbacks_become_spans(tmp_path):
+    output = tmp_path / "trace.json"
+    seen = []
+    with tracing(output):
+        on_document = trace_documents(seen.append, engine="engine")
+        on_document("out/doc-a.md")
+        on_document("out/doc-b.md")
+
+    assert seen == ["out/doc-a.md", "out/doc-b.md"]
+    documents = [event for event in _events(output) if event.get("cat") == "document"]
+    assert [event["name"] for event in documents] == ["doc-a", "doc-b"]
+
+
+def test_hooks_are_noops_without_tracing():
+    callback = print
+    assert trace_documents(callback) is callback
+    with span("anything", "pipeline"):
+        pass
+
+
+def test_worker_processes_are_traced(tmp_path):
+    gt_path = tmp_path / "gt.md"
+    gt_path.write_text(GT, encoding="utf-8")
+    pred_path = tmp_path / "engine" / "markdown" / "doc.md"
+    pred_path.parent.mkdir(parents=True)
+    pred_path.write_text(GT, encoding="utf-8")
+
+    output = tmp_path / "trace.json"
+    context = multiprocessing.get_context("spawn")
+    with tracing(output):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            executor.submit(_evaluate_single_document, "doc", gt_path, pred_path).result()
+
+    events = [event for event in _events(output) if event["ph"] == "X"]
+    document = next(event for event in events if event["cat"] == "evaluate")
+    assert document["name"] == "doc" and document["args"] == {"engine": "engine"}
+    assert document["pid"] != os.getpid()
+    assert {"nid", "teds", "mhs"} <= {e["name"] for e in events if e["cat"] == "metric"}